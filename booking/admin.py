@@ -1,14 +1,50 @@
-from django.contrib import admin
+from django import forms
+from django.conf import settings
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+from django.http import Http404
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
 from django.utils import timezone
-from .models import ZoomMeeting, BookingRequest
+from django.utils.html import format_html
+from .models import (
+    ZoomMeeting, BookingRequest, MeetingSeries, SearchDocument, OutboxEvent, ArchivedRecord, PooledZoomMeeting,
+    MeetingAttendance, AttendanceDaily, AutoApprovalRule, AutoApprovalDecision,
+)
+from . import outbox
+from .admin_tools import LargeTableAdminMixin
+from .exports import export_response
+from .recurrence import (
+    build_rule, cancel_occurrence, materialize_occurrence, occurrence_stamp, occurrence_start, series_until,
+    upcoming_occurrences,
+)
+from .search import IndexedSearchMixin
+from .services import approve_request, reject_request
+
+class MeetingAttendanceInline(admin.TabularInline):
+    model = MeetingAttendance
+    fields = ['participant', 'name', 'join_offset', 'leave_offset', 'attended_seconds']
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+    
+    def has_add_permission(self, request, obj=None):
+        return False
 
 @admin.register(ZoomMeeting)
-class ZoomMeetingAdmin(admin.ModelAdmin):
+class ZoomMeetingAdmin(LargeTableAdminMixin, IndexedSearchMixin, admin.ModelAdmin):
     list_display = ['title', 'department', 'created_by', 'start_time', 'duration', 'status', 'is_active']
     list_filter = ['status', 'is_active', 'department', 'created_at']
+    list_select_related = ['department', 'created_by']
+    autocomplete_fields = ['created_by']
     search_fields = ['title', 'created_by__first_name', 'created_by__last_name']
-    readonly_fields = ['id', 'created_at', 'updated_at']
+    search_object_type = SearchDocument.TYPE_MEETING
+    readonly_fields = ['id', 'attendance_synced_at', 'created_at', 'updated_at']
     date_hierarchy = 'start_time'
+    inlines = [MeetingAttendanceInline]
+    
+    actions = ['export_csv', 'export_xlsx']
     
     fieldsets = (
         ('Asosiy ma\'lumotlar', {
@@ -18,30 +54,41 @@ class ZoomMeetingAdmin(admin.ModelAdmin):
             'fields': ('start_time', 'duration', 'status', 'is_active')
         }),
         ('Zoom ma\'lumotlari', {
-            'fields': ('zoom_meeting_id', 'meeting_url', 'password')
+            'fields': ('zoom_host', 'zoom_meeting_id', 'meeting_url', 'password', 'attendance_synced_at')
         }),
         ('Vaqt belgilari', {
             'fields': ('created_at', 'updated_at'),
             'classes': ('collapse',)
         })
     )
+    
+    def export_csv(self, request, queryset):
+        return export_response(request, 'meetings', 'csv', queryset)
+    export_csv.short_description = "Tanlangan uchrashuvlarni CSV ga eksport qilish"
+    
+    def export_xlsx(self, request, queryset):
+        return export_response(request, 'meetings', 'xlsx', queryset)
+    export_xlsx.short_description = "Tanlangan uchrashuvlarni XLSX ga eksport qilish"
 
 @admin.register(BookingRequest)
-class BookingRequestAdmin(admin.ModelAdmin):
+class BookingRequestAdmin(LargeTableAdminMixin, IndexedSearchMixin, admin.ModelAdmin):
     list_display = ['title', 'department', 'requested_by', 'preferred_start_time', 'duration', 'status', 'created_at']
     list_filter = ['status', 'department', 'created_at']
+    list_select_related = ['department', 'requested_by']
+    autocomplete_fields = ['requested_by', 'processed_by']
     search_fields = ['title', 'requested_by__first_name', 'requested_by__last_name']
+    search_object_type = SearchDocument.TYPE_REQUEST
     readonly_fields = ['id', 'created_at', 'updated_at']
     date_hierarchy = 'preferred_start_time'
     
-    actions = ['approve_requests', 'reject_requests']
+    actions = ['approve_requests', 'reject_requests', 'export_csv', 'export_xlsx']
     
     fieldsets = (
         ('Asosiy ma\'lumotlar', {
             'fields': ('title', 'description', 'department', 'requested_by')
         }),
         ('So\'rov tafsilotlari', {
-            'fields': ('preferred_start_time', 'duration', 'status')
+            'fields': ('preferred_start_time', 'duration', 'recurrence', 'status')
         }),
         ('Qayta ishlash', {
             'fields': ('processed_by', 'processed_at', 'rejection_reason'),
@@ -53,18 +100,237 @@ class BookingRequestAdmin(admin.ModelAdmin):
         })
     )
     
+    def _processed_by_id(self, request):
+        processed_by = getattr(request.user, 'telegramuser', None)
+        return processed_by.id if processed_by else None
+    
     def approve_requests(self, request, queryset):
-        for req in queryset.filter(status='pending'):
-            req.status = 'approved'
-            req.processed_by = request.user.telegramuser
-            req.processed_at = timezone.now()
-            req.save()
+        processed_by_id = self._processed_by_id(request)
+        approved = sum(
+            approve_request(request_id, processed_by_id) is not None
+            for request_id in queryset.filter(status='pending').values_list('id', flat=True)
+        )
+        self.message_user(request, f"{approved} ta so'rov tasdiqlandi")
     approve_requests.short_description = "Tanlangan so'rovlarni tasdiqlash"
     
     def reject_requests(self, request, queryset):
-        for req in queryset.filter(status='pending'):
-            req.status = 'rejected'
-            req.processed_by = request.user.telegramuser
-            req.processed_at = timezone.now()
-            req.save()
+        processed_by_id = self._processed_by_id(request)
+        rejected = sum(
+            reject_request(request_id, processed_by_id)
+            for request_id in queryset.filter(status='pending').values_list('id', flat=True)
+        )
+        self.message_user(request, f"{rejected} ta so'rov rad etildi")
     reject_requests.short_description = "Tanlangan so'rovlarni rad etish"
+    
+    def export_csv(self, request, queryset):
+        return export_response(request, 'requests', 'csv', queryset)
+    export_csv.short_description = "Tanlangan so'rovlarni CSV ga eksport qilish"
+    
+    def export_xlsx(self, request, queryset):
+        return export_response(request, 'requests', 'xlsx', queryset)
+    export_xlsx.short_description = "Tanlangan so'rovlarni XLSX ga eksport qilish"
+
+class MeetingSeriesForm(forms.ModelForm):
+    class Meta:
+        model = MeetingSeries
+        fields = '__all__'
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        if cleaned_data.get('rrule') and cleaned_data.get('dtstart'):
+            try:
+                build_rule(cleaned_data['rrule'], cleaned_data['dtstart'])
+            except ValueError as exc:
+                self.add_error('rrule', str(exc))
+        return cleaned_data
+
+class OccurrenceForm(forms.Form):
+    ACTION_EDIT = 'edit'
+    ACTION_CANCEL = 'cancel'
+    
+    occurrence = forms.ChoiceField(label="Takror")
+    action = forms.ChoiceField(
+        label="Amal", choices=[(ACTION_EDIT, "Tahrirlash"), (ACTION_CANCEL, "Bekor qilish")], widget=forms.RadioSelect,
+    )
+    title = forms.CharField(label="Nomi", max_length=200, required=False)
+    start_time = forms.DateTimeField(label="Yangi vaqt", required=False, help_text="YYYY-MM-DD HH:MM")
+    duration = forms.IntegerField(label="Davomiyligi (daqiqa)", min_value=1, required=False)
+    
+    def __init__(self, series, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.series = series
+        starts = upcoming_occurrences(series, timezone.now(), settings.RECURRENCE_ADMIN_OCCURRENCES)
+        self.fields['occurrence'].choices = [
+            (occurrence_stamp(start), timezone.localtime(start).strftime('%Y-%m-%d %H:%M')) for start in starts
+        ]
+    
+    def clean_occurrence(self):
+        try:
+            return occurrence_start(self.series, self.cleaned_data['occurrence'])
+        except ValueError as exc:
+            raise forms.ValidationError(str(exc))
+    
+    def clean_duration(self):
+        duration = self.cleaned_data['duration']
+        if duration and duration > settings.MAX_MEETING_DURATION:
+            raise forms.ValidationError(f"Davomiylik {settings.MAX_MEETING_DURATION} daqiqadan oshmasligi kerak")
+        return duration
+    
+    def changes(self):
+        return {
+            field: self.cleaned_data[field]
+            for field in ('title', 'start_time', 'duration')
+            if self.cleaned_data.get(field)
+        }
+
+@admin.register(MeetingSeries)
+class MeetingSeriesAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    form = MeetingSeriesForm
+    list_display = ['title', 'department', 'created_by', 'dtstart', 'rrule', 'until', 'is_active']
+    list_filter = ['is_active', 'department']
+    list_select_related = ['department', 'created_by']
+    search_fields = ['title', 'created_by__first_name', 'created_by__last_name']
+    readonly_fields = ['id', 'booking_request', 'until', 'occurrences_link', 'created_at', 'updated_at']
+    autocomplete_fields = ['created_by']
+    date_hierarchy = 'dtstart'
+    actions = ['edit_occurrence']
+    
+    def save_model(self, request, obj, form, change):
+        obj.until = series_until(obj.rrule, obj.dtstart, obj.duration)
+        super().save_model(request, obj, form, change)
+    
+    def get_urls(self):
+        return [
+            path(
+                '<uuid:object_id>/occurrence/',
+                self.admin_site.admin_view(self.occurrence_view),
+                name='booking_meetingseries_occurrence',
+            ),
+            *super().get_urls(),
+        ]
+    
+    def occurrences_link(self, obj):
+        if obj.pk is None:
+            return '-'
+        return format_html(
+            '<a href="{}">Takrorni tahrirlash yoki bekor qilish</a>',
+            reverse('admin:booking_meetingseries_occurrence', args=[obj.pk]),
+        )
+    occurrences_link.short_description = "Takrorlar"
+    
+    def edit_occurrence(self, request, queryset):
+        if queryset.count() != 1:
+            self.message_user(request, "Bitta seriyani tanlang", level=messages.WARNING)
+            return None
+        return redirect('admin:booking_meetingseries_occurrence', queryset.get().pk)
+    edit_occurrence.short_description = "Takrorni tahrirlash yoki bekor qilish"
+    
+    def occurrence_view(self, request, object_id):
+        series = self.get_object(request, str(object_id))
+        if series is None:
+            raise Http404
+        if not self.has_change_permission(request, series):
+            raise PermissionDenied
+        
+        form = OccurrenceForm(series, request.POST or None)
+        if request.method == 'POST' and form.is_valid():
+            original_start = form.cleaned_data['occurrence']
+            label = timezone.localtime(original_start).strftime('%Y-%m-%d %H:%M')
+            if form.cleaned_data['action'] == OccurrenceForm.ACTION_CANCEL:
+                cancel_occurrence(series, original_start)
+                self.message_user(request, f"{label} takrori bekor qilindi")
+            else:
+                materialize_occurrence(series, original_start, **form.changes())
+                self.message_user(request, f"{label} takrori tahrirlandi")
+            return redirect('admin:booking_meetingseries_change', series.pk)
+        
+        context = {
+            **self.admin_site.each_context(request),
+            'title': f"Takrorlar: {series.title}",
+            'opts': self.model._meta,
+            'original': series,
+            'form': form,
+        }
+        return TemplateResponse(request, 'admin/booking/meetingseries/occurrence_form.html', context)
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ['id', 'topic', 'attempts', 'created_at', 'delivered_at', 'dead_at']
+    list_filter = ['topic', ('delivered_at', admin.EmptyFieldListFilter), ('dead_at', admin.EmptyFieldListFilter)]
+    readonly_fields = ['topic', 'payload', 'attempts', 'last_error', 'created_at', 'delivered_at', 'dead_at']
+    actions = ['requeue_events']
+    
+    def requeue_events(self, request, queryset):
+        count = outbox.requeue(queryset)
+        self.message_user(request, f"{count} ta hodisa qayta navbatga qo'yildi")
+    requeue_events.short_description = "To'xtatilgan hodisalarni qayta navbatga qo'yish"
+
+@admin.register(PooledZoomMeeting)
+class PooledZoomMeetingAdmin(admin.ModelAdmin):
+    list_display = ['zoom_meeting_id', 'host', 'created_at']
+    list_filter = ['host']
+    readonly_fields = [field.name for field in PooledZoomMeeting._meta.fields]
+    
+    def has_add_permission(self, request):
+        return False
+
+@admin.register(AutoApprovalRule)
+class AutoApprovalRuleAdmin(admin.ModelAdmin):
+    list_display = ['name', 'department', 'priority', 'max_duration', 'work_start', 'work_end', 'weekdays', 'require_no_conflict', 'is_active']
+    list_filter = ['is_active', 'department']
+    list_select_related = ['department']
+    list_editable = ['priority', 'is_active']
+    autocomplete_fields = ['trusted_requesters']
+    
+    fieldsets = (
+        (None, {
+            'fields': ('name', 'department', 'priority', 'is_active')
+        }),
+        ('Shartlar', {
+            'fields': ('max_duration', 'work_start', 'work_end', 'weekdays', 'trusted_requesters', 'require_no_conflict')
+        }),
+    )
+
+@admin.register(AutoApprovalDecision)
+class AutoApprovalDecisionAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ['object_id', 'booking_request', 'outcome', 'rule', 'source', 'reason', 'created_at']
+    list_filter = ['outcome', 'source', 'rule']
+    list_select_related = ['booking_request', 'rule']
+    search_fields = ['object_id']
+    readonly_fields = [field.name for field in AutoApprovalDecision._meta.fields]
+    
+    def has_add_permission(self, request):
+        return False
+
+@admin.register(AttendanceDaily)
+class AttendanceDailyAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ['day', 'department', 'meetings', 'held', 'participants', 'attended_seconds', 'scheduled_seconds']
+    list_filter = ['department']
+    list_select_related = ['department']
+    readonly_fields = [field.name for field in AttendanceDaily._meta.fields]
+    date_hierarchy = 'day'
+    
+    def has_add_permission(self, request):
+        return False
+
+@admin.register(ArchivedRecord)
+class ArchivedRecordAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ['title', 'kind', 'department', 'owner', 'start_time', 'status', 'archived_at']
+    list_filter = ['kind', 'status', 'department']
+    list_select_related = ['department', 'owner']
+    search_fields = ['title', 'object_id']
+    readonly_fields = [field.name for field in ArchivedRecord._meta.fields]
+    date_hierarchy = 'start_time'
+    
+    actions = ['export_csv', 'export_xlsx']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def export_csv(self, request, queryset):
+        return export_response(request, 'archive', 'csv', queryset)
+    export_csv.short_description = "Tanlangan yozuvlarni CSV ga eksport qilish"
+    
+    def export_xlsx(self, request, queryset):
+        return export_response(request, 'archive', 'xlsx', queryset)
+    export_xlsx.short_description = "Tanlangan yozuvlarni XLSX ga eksport qilish"
@@ -0,0 +1,105 @@
+"""
+Katta jadvallar uchun admin yordamchilari.
+
+LargeTableAdminMixin:
+  - sahifalash taxminiy son bilan: PostgreSQL da EXPLAIN baholashi
+    (ADMIN_EXACT_COUNT_LIMIT dan katta bo'lsa), qolgan hollarda aniq COUNT
+    ADMIN_COUNT_CACHE_TIMEOUT ga keshlanadi; filtrsiz jadval bo'yicha
+    ikkinchi COUNT(*) (show_full_result_count) o'chirilgan;
+  - date_hierarchy bo'laklari (MIN/MAX va yil/oy/kun ro'yxatlari)
+    ADMIN_DATE_HIERARCHY_CACHE_TIMEOUT ga keshlanadi
+    (templates/admin/cached_change_list.html).
+
+FK ustunlar uchun list_select_related, katta jadvallarga FK maydonlar uchun
+autocomplete_fields admin sinflarining o'zida beriladi.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+def _cache_key(prefix, queryset, *parts):
+    """So'rov SQL i bo'yicha kalit; bo'sh natijali so'rov uchun None"""
+    try:
+        sql = str(queryset.query)
+    except EmptyResultSet:
+        return None
+    digest = hashlib.md5(f'{queryset.model._meta.label}:{sql}:{parts!r}'.encode()).hexdigest()
+    return f'admin:{prefix}:{digest}'
+
+
+def _explain_rows(queryset):
+    plan = json.loads(queryset.explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def estimated_count(queryset):
+    """Katta natijalar uchun taxminiy, kichiklari uchun keshlangan aniq son"""
+    if connections[queryset.db].vendor == 'postgresql':
+        estimate = _explain_rows(queryset.order_by())
+        if estimate >= settings.ADMIN_EXACT_COUNT_LIMIT:
+            return estimate
+
+    key = _cache_key('count', queryset.order_by())
+    if key is None:
+        return 0
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, settings.ADMIN_COUNT_CACHE_TIMEOUT)
+    return count
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        return estimated_count(self.object_list)
+
+
+class CachedDateQuerySet:
+    """
+    date_hierarchy teg uchun cl.queryset o'rinbosari.
+
+    Teg faqat aggregate (MIN/MAX) va dates/datetimes ni chaqiradi; ular
+    so'rov SQL i bo'yicha keshlanadi, qolgan hamma narsa asl querysetga.
+    """
+
+    def __init__(self, queryset):
+        self.queryset = queryset
+
+    def __getattr__(self, name):
+        return getattr(self.queryset, name)
+
+    def _cached(self, method, args, kwargs):
+        key = _cache_key('date_hierarchy', self.queryset.order_by(), method, args, sorted(kwargs.items()))
+        result = cache.get(key) if key else None
+        if result is None:
+            result = getattr(self.queryset, method)(*args, **kwargs)
+            if method != 'aggregate':
+                result = list(result)
+            if key:
+                cache.set(key, result, settings.ADMIN_DATE_HIERARCHY_CACHE_TIMEOUT)
+        return result
+
+    def aggregate(self, *args, **kwargs):
+        return self._cached('aggregate', args, kwargs)
+
+    def dates(self, *args, **kwargs):
+        return self._cached('dates', args, kwargs)
+
+    def datetimes(self, *args, **kwargs):
+        return self._cached('datetimes', args, kwargs)
+
+
+class LargeTableAdminMixin:
+    """Ko'p qatorli jadvallar ModelAdmin i uchun"""
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    change_list_template = 'admin/cached_change_list.html'
@@ -0,0 +1,271 @@
+"""
+Vaqt bo'laklari (kun/hafta/oy) bo'yicha analitika.
+
+DB dan faqat kerakli ustunlar bir so'rov bilan olinadi, keyin NumPy
+yordamida mahalliy vaqt bo'laklariga ajratilib, bo'lim va bo'lak bo'yicha
+vektorli guruhlanadi. Natijalar keshlanadi.
+"""
+import hashlib
+from datetime import datetime, time, timedelta
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from telegram_bot.models import Department
+from zoomga.db_router import read_replica
+from .models import ZoomMeeting, BookingRequest
+from .recurrence import expand, series_in_window
+
+GRANULARITIES = ('day', 'week', 'month')
+
+
+def local_midnight(day):
+    """Mahalliy (TIME_ZONE) yarim tun, aware datetime sifatida"""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def period_range(granularity, day=None):
+    """Bugungi kun/hafta/oy uchun [boshlanish, tugash) oralig'i (sargable filtrlar uchun)"""
+    day = day or timezone.localdate()
+    if granularity == 'week':
+        start = day - timedelta(days=day.weekday())
+        end = start + timedelta(days=7)
+    elif granularity == 'month':
+        start = day.replace(day=1)
+        end = (start + timedelta(days=32)).replace(day=1)
+    else:
+        start = day
+        end = day + timedelta(days=1)
+    return local_midnight(start), local_midnight(end)
+
+
+def bucket_dates(start_date, end_date, granularity):
+    """
+    Bo'laklar boshlanish sanalari va oxirgi (ochiq) chegara.
+
+    [start_date, end_date] oralig'ini to'liq qoplaydi.
+    """
+    if granularity == 'week':
+        current = start_date - timedelta(days=start_date.weekday())
+    elif granularity == 'month':
+        current = start_date.replace(day=1)
+    else:
+        current = start_date
+
+    dates = []
+    while current <= end_date:
+        dates.append(current)
+        if granularity == 'week':
+            current += timedelta(days=7)
+        elif granularity == 'month':
+            current = (current + timedelta(days=32)).replace(day=1)
+        else:
+            current += timedelta(days=1)
+    dates.append(current)
+    return dates
+
+
+def _epoch_seconds(values):
+    return np.fromiter((value.timestamp() for value in values), dtype=np.float64, count=len(values))
+
+
+def _columns(queryset, *fields):
+    rows = list(queryset.values_list(*fields))
+    if not rows:
+        return [() for _ in fields]
+    return list(zip(*rows))
+
+
+def _bucket_index(timestamps, boundaries):
+    return np.searchsorted(boundaries, timestamps, side='right') - 1
+
+
+def _department_names(department_ids):
+    return dict(Department.objects.filter(id__in=department_ids).values_list('id', 'name'))
+
+
+def _round(values, digits=2):
+    return [round(float(value), digits) for value in values]
+
+
+def meeting_trends(boundaries, bucket_count, range_start, range_end, department_id=None):
+    """Bo'lim va bo'lak bo'yicha uchrashuvlar soni va band qilingan daqiqalar"""
+    meetings = ZoomMeeting.objects.filter(
+        is_active=True,
+        start_time__gte=range_start,
+        start_time__lt=range_end,
+    ).exclude(status='cancelled')
+    if department_id:
+        meetings = meetings.filter(department_id=department_id)
+
+    start_times, durations, departments = _columns(meetings, 'start_time', 'duration', 'department_id')
+    occurrences = expand(series_in_window(range_start, range_end, department_id=department_id), range_start, range_end)
+    if occurrences:
+        start_times = (*start_times, *(occurrence.start_time for occurrence in occurrences))
+        durations = (*durations, *(occurrence.duration for occurrence in occurrences))
+        departments = (*departments, *(occurrence.department_id for occurrence in occurrences))
+    if not start_times:
+        return {
+            'totals': {'meetings': [0] * bucket_count, 'minutes': [0] * bucket_count},
+            'departments': [],
+        }
+
+    buckets = _bucket_index(_epoch_seconds(start_times), boundaries)
+    department_ids, department_index = np.unique(np.asarray(departments, dtype=np.int64), return_inverse=True)
+    keys = department_index * bucket_count + buckets
+    size = len(department_ids) * bucket_count
+
+    counts = np.bincount(keys, minlength=size).reshape(len(department_ids), bucket_count)
+    minutes = np.bincount(
+        keys, weights=np.asarray(durations, dtype=np.float64), minlength=size
+    ).reshape(len(department_ids), bucket_count)
+
+    names = _department_names(department_ids.tolist())
+    return {
+        'totals': {
+            'meetings': counts.sum(axis=0).tolist(),
+            'minutes': _round(minutes.sum(axis=0), 0),
+        },
+        'departments': [
+            {
+                'id': int(dept_id),
+                'name': names.get(int(dept_id), ''),
+                'meetings': counts[row].tolist(),
+                'minutes': _round(minutes[row], 0),
+            }
+            for row, dept_id in enumerate(department_ids)
+        ],
+    }
+
+
+def _group_percentiles(groups, values, group_count, percentiles):
+    """Har bir guruh uchun persentillar (saralash + bo'lish, guruhlar bo'yicha sikl)"""
+    result = np.full((group_count, len(percentiles)), np.nan)
+    if not len(values):
+        return result
+    order = np.lexsort((values, groups))
+    sorted_groups = groups[order]
+    sorted_values = values[order]
+    splits = np.searchsorted(sorted_groups, np.arange(group_count + 1))
+    for group in range(group_count):
+        chunk = sorted_values[splits[group]:splits[group + 1]]
+        if len(chunk):
+            result[group] = np.percentile(chunk, percentiles)
+    return result
+
+
+def _nullable(values):
+    return [None if np.isnan(value) else round(float(value), 2) for value in values]
+
+
+def request_trends(boundaries, bucket_count, range_start, range_end, department_id=None):
+    """So'rovlar: holatlar bo'yicha sonlar, tasdiqlash ulushi va tasdiqlash vaqti (soat)"""
+    requests = BookingRequest.objects.filter(created_at__gte=range_start, created_at__lt=range_end)
+    if department_id:
+        requests = requests.filter(department_id=department_id)
+
+    created, statuses, processed, departments = _columns(
+        requests, 'created_at', 'status', 'processed_at', 'department_id'
+    )
+    empty = [0] * bucket_count
+    if not created:
+        return {
+            'totals': {
+                'total': empty, 'approved': empty, 'rejected': empty, 'pending': empty,
+                'approval_rate': [None] * bucket_count,
+                'hours_to_approve_median': [None] * bucket_count,
+                'hours_to_approve_p90': [None] * bucket_count,
+            },
+            'departments': [],
+        }
+
+    created_ts = _epoch_seconds(created)
+    buckets = _bucket_index(created_ts, boundaries)
+    statuses = np.asarray(statuses)
+    approved = statuses == 'approved'
+    rejected = statuses == 'rejected'
+    pending = statuses == 'pending'
+
+    total_counts = np.bincount(buckets, minlength=bucket_count)
+    approved_counts = np.bincount(buckets, weights=approved, minlength=bucket_count)
+    rejected_counts = np.bincount(buckets, weights=rejected, minlength=bucket_count)
+    pending_counts = np.bincount(buckets, weights=pending, minlength=bucket_count)
+    decided = approved_counts + rejected_counts
+    with np.errstate(invalid='ignore', divide='ignore'):
+        approval_rate = np.where(decided > 0, approved_counts / decided, np.nan)
+
+    has_processed = np.fromiter((value is not None for value in processed), dtype=bool, count=len(processed))
+    timed = approved & has_processed
+    processed_ts = _epoch_seconds([value for value, flag in zip(processed, timed) if flag])
+    hours = (processed_ts - created_ts[timed]) / 3600.0
+    bucket_hours = _group_percentiles(buckets[timed], hours, bucket_count, [50, 90])
+
+    department_ids, department_index = np.unique(np.asarray(departments, dtype=np.int64), return_inverse=True)
+    dept_total = np.bincount(department_index, minlength=len(department_ids))
+    dept_approved = np.bincount(department_index, weights=approved, minlength=len(department_ids))
+    dept_rejected = np.bincount(department_index, weights=rejected, minlength=len(department_ids))
+    dept_decided = dept_approved + dept_rejected
+    with np.errstate(invalid='ignore', divide='ignore'):
+        dept_rate = np.where(dept_decided > 0, dept_approved / dept_decided, np.nan)
+    dept_hours = _group_percentiles(department_index[timed], hours, len(department_ids), [50])
+
+    names = _department_names(department_ids.tolist())
+    return {
+        'totals': {
+            'total': total_counts.tolist(),
+            'approved': approved_counts.astype(int).tolist(),
+            'rejected': rejected_counts.astype(int).tolist(),
+            'pending': pending_counts.astype(int).tolist(),
+            'approval_rate': _nullable(approval_rate),
+            'hours_to_approve_median': _nullable(bucket_hours[:, 0]),
+            'hours_to_approve_p90': _nullable(bucket_hours[:, 1]),
+        },
+        'departments': [
+            {
+                'id': int(dept_id),
+                'name': names.get(int(dept_id), ''),
+                'total': int(dept_total[row]),
+                'approved': int(dept_approved[row]),
+                'rejected': int(dept_rejected[row]),
+                'approval_rate': _nullable([dept_rate[row]])[0],
+                'hours_to_approve_median': _nullable([dept_hours[row, 0]])[0],
+            }
+            for row, dept_id in enumerate(department_ids)
+        ],
+    }
+
+
+def get_analytics(start_date, end_date, granularity='day', department_id=None):
+    """Berilgan sana oralig'i uchun keshlangan analitika"""
+    raw_key = f'{start_date}:{end_date}:{granularity}:{department_id or ""}'
+    cache_key = 'analytics:' + hashlib.md5(raw_key.encode()).hexdigest()
+    data = cache.get(cache_key)
+    if data is not None:
+        return data
+
+    dates = bucket_dates(start_date, end_date, granularity)
+    edges = [local_midnight(day) for day in dates]
+    boundaries = np.array([edge.timestamp() for edge in edges], dtype=np.float64)
+    bucket_count = len(dates) - 1
+    range_start = local_midnight(start_date)
+    range_end = local_midnight(end_date + timedelta(days=1))
+
+    with read_replica():
+        data = {
+            'start': start_date.isoformat(),
+            'end': end_date.isoformat(),
+            'granularity': granularity,
+            'buckets': [day.isoformat() for day in dates[:-1]],
+            'meetings': meeting_trends(boundaries, bucket_count, range_start, range_end, department_id),
+            'requests': request_trends(boundaries, bucket_count, range_start, range_end, department_id),
+        }
+
+    # O'tgan oraliqlar kam o'zgaradi, shuning uchun uzoqroq saqlanadi
+    if end_date < timezone.localdate():
+        timeout = settings.ANALYTICS_HISTORY_CACHE_TIMEOUT
+    else:
+        timeout = settings.ANALYTICS_CACHE_TIMEOUT
+    cache.set(cache_key, data, timeout)
+    return data
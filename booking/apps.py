@@ -3,3 +3,8 @@ from django.apps import AppConfig
 
 class BookingConfig(AppConfig):
     name = 'booking'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from zoomga import profiling
+        profiling.install()
@@ -0,0 +1,140 @@
+"""
+Eski ma'lumotlarni arxivlash (issiq/sovuq bo'linish).
+
+ARCHIVE_AFTER_DAYS dan eski uchrashuvlar va ko'rib chiqilgan so'rovlar
+ArchivedRecord jadvaliga kichik partiyalarda ko'chiriladi: har bir partiya
+alohida qisqa tranzaksiya (SELECT ... FOR UPDATE SKIP LOCKED, arxivga
+yozish, asl qatorlarni o'chirish), shuning uchun bot va web qulflarda
+kutib qolmaydi. Arxivga yozish idempotent (kind, object_id), to'xtatilgan
+ish keyingi ishga tushirishda qolgan joyidan davom etadi.
+
+Uchrashuv qatnashuvi (MeetingAttendance, uchrashuv bilan birga o'chadi)
+arxiv yozuvining data['attendance'] ro'yxatiga ko'chiriladi.
+
+Seriya takrorlari (override) arxivlanmaydi: ular o'chirilsa seriya takrori
+qayta paydo bo'ladi.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ZoomMeeting, BookingRequest, ArchivedRecord, MeetingAttendance
+
+PROCESSED_STATUSES = ('approved', 'rejected', 'cancelled')
+ATTENDANCE_FIELDS = ('participant', 'name', 'join_offset', 'leave_offset', 'attended_seconds')
+
+
+def archive_cutoff(days=None):
+    return timezone.now() - timedelta(days=settings.ARCHIVE_AFTER_DAYS if days is None else days)
+
+
+def _meeting_record(row):
+    return ArchivedRecord(
+        kind=ArchivedRecord.KIND_MEETING,
+        object_id=row['id'],
+        title=row['title'],
+        department_id=row['department_id'],
+        owner_id=row['created_by_id'],
+        start_time=row['start_time'],
+        status=row['status'],
+        data=row,
+    )
+
+
+def _request_record(row):
+    return ArchivedRecord(
+        kind=ArchivedRecord.KIND_REQUEST,
+        object_id=row['id'],
+        title=row['title'],
+        department_id=row['department_id'],
+        owner_id=row['requested_by_id'],
+        start_time=row['preferred_start_time'],
+        status=row['status'],
+        data=row,
+    )
+
+
+def _with_attendance(rows):
+    """Uchrashuv qatorlariga qatnashuvni qo'shish (bitta so'rov bilan)"""
+    attendance = {row['id']: [] for row in rows}
+    for entry in MeetingAttendance.objects.filter(meeting_id__in=attendance).order_by('meeting_id', 'join_offset').values(
+        'meeting_id', *ATTENDANCE_FIELDS,
+    ):
+        attendance[entry.pop('meeting_id')].append(entry)
+    for row in rows:
+        row['attendance'] = attendance[row['id']]
+    return rows
+
+
+def _candidates(kind, cutoff):
+    """Arxivlanadigan qatorlar (indeksli ustun bo'yicha)"""
+    if kind == ArchivedRecord.KIND_MEETING:
+        return ZoomMeeting.objects.filter(start_time__lt=cutoff, series__isnull=True).order_by('start_time', 'id')
+    return BookingRequest.objects.filter(
+        status__in=PROCESSED_STATUSES, created_at__lt=cutoff,
+    ).order_by('created_at', 'id')
+
+
+def pending_count(kind, cutoff):
+    return _candidates(kind, cutoff).count()
+
+
+def archive_batch(kind, cutoff, batch_size=None):
+    """Bitta partiyani arxivga ko'chirish; ko'chirilganlar sonini qaytaradi"""
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    model, to_record = (
+        (ZoomMeeting, _meeting_record) if kind == ArchivedRecord.KIND_MEETING else (BookingRequest, _request_record)
+    )
+    with transaction.atomic():
+        ids = list(
+            _candidates(kind, cutoff).select_for_update(skip_locked=True).values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return 0
+        rows = list(model.objects.filter(id__in=ids).values())
+        if model is ZoomMeeting:
+            # Qatnashuv CASCADE bilan o'chadi, shuning uchun avval arxivga
+            rows = _with_attendance(rows)
+        ArchivedRecord.objects.bulk_create(
+            [to_record(row) for row in rows],
+            ignore_conflicts=True,
+        )
+        # Signallar orqali qidiruv indeksi va keshlar ham tozalanadi
+        model.objects.filter(id__in=ids).delete()
+    return len(ids)
+
+
+def run_archive(kinds=None, days=None, batch_size=None, pause=None, max_batches=None):
+    """
+    Partiyalab arxivlash; har bir partiyadan keyin (tur, soni) qaytaradi.
+
+    pause - partiyalar orasidagi tanaffus (soniya), DB yukini cheklash uchun.
+    """
+    kinds = kinds or [ArchivedRecord.KIND_MEETING, ArchivedRecord.KIND_REQUEST]
+    pause = settings.ARCHIVE_BATCH_PAUSE if pause is None else pause
+    cutoff = archive_cutoff(days)
+    batches = 0
+    for kind in kinds:
+        while max_batches is None or batches < max_batches:
+            archived = archive_batch(kind, cutoff, batch_size)
+            if not archived:
+                break
+            batches += 1
+            yield kind, archived
+            if pause:
+                time.sleep(pause)
+
+
+def search_archive(query, kinds=None, limit=None, offset=0):
+    """Arxivdan nom bo'yicha qidirish (faqat so'ralganda, issiq indeksdan tashqarida)"""
+    archived = ArchivedRecord.objects.filter(kind__in=kinds or [ArchivedRecord.KIND_MEETING, ArchivedRecord.KIND_REQUEST])
+    for token in query.split():
+        archived = archived.filter(title__icontains=token)
+    limit = limit or settings.SEARCH_RESULTS_LIMIT
+    return list(archived.order_by('-start_time').values(
+        'id', 'kind', 'object_id', 'title', 'start_time', 'department__name',
+    )[offset:offset + limit])
+
@@ -0,0 +1,186 @@
+"""
+Uchrashuv qatnashuvi (Zoom Report API).
+
+Tugagan uchrashuvlar ATTENDANCE_REPORT_DELAY_MINUTES dan keyin (Zoom
+hisobotni shu vaqt ichida tayyorlaydi) partiyalab olinadi. Har biri uchun
+qatnashchilar sahifama-sahifa o'qiladi (zoom.iter_report_participants,
+umumiy ulanishlar va ZOOM_API_RATE_LIMIT), qayta ulanishlar bitta qatorga
+birlashtiriladi va bulk_create(ignore_conflicts) bilan yoziladi.
+
+Bo'lim ko'rsatkichlari AttendanceDaily yig'indilaridan hisoblanadi: ular
+uchrashuv hisoboti olingan tranzaksiyada bir marta oshiriladi, shuning
+uchun so'rov qatnashuv qatorlarini emas, kunlik qatorlarni o'qiydi.
+
+Seriya takrorlari bitta Zoom ID ga ega, ular hozircha hisobga olinmaydi.
+"""
+import logging
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+from requests import RequestException
+
+from .models import AttendanceDaily, MeetingAttendance, ZoomMeeting
+from .zoom import RateLimiter, iter_report_participants, zoom_configured
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_time(value):
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+def _participant_key(row):
+    return (row.get('id') or row.get('user_email', '').lower() or row.get('name') or '')[:100]
+
+
+def collect(meeting, rows):
+    """Hisobot qatorlari -> qatnashchi bo'yicha bittadan MeetingAttendance"""
+    attendance = {}
+    for row in rows:
+        key = _participant_key(row)
+        if not key or not row.get('join_time'):
+            continue
+        joined = _parse_time(row['join_time'])
+        left = _parse_time(row['leave_time']) if row.get('leave_time') else joined
+        join_offset = int((joined - meeting.start_time).total_seconds())
+        leave_offset = int((left - meeting.start_time).total_seconds())
+        seconds = row.get('duration') or max(leave_offset - join_offset, 0)
+
+        entry = attendance.get(key)
+        if entry is None:
+            attendance[key] = MeetingAttendance(
+                meeting=meeting,
+                participant=key,
+                name=(row.get('name') or '')[:200],
+                join_offset=join_offset,
+                leave_offset=leave_offset,
+                attended_seconds=seconds,
+            )
+        else:
+            entry.join_offset = min(entry.join_offset, join_offset)
+            entry.leave_offset = max(entry.leave_offset, leave_offset)
+            entry.attended_seconds += seconds
+    return list(attendance.values())
+
+
+def _add_to_daily(meeting, rows):
+    day = timezone.localtime(meeting.start_time).date()
+    AttendanceDaily.objects.get_or_create(department_id=meeting.department_id, day=day)
+    AttendanceDaily.objects.filter(department_id=meeting.department_id, day=day).update(
+        meetings=F('meetings') + 1,
+        held=F('held') + (1 if rows else 0),
+        participants=F('participants') + len(rows),
+        attended_seconds=F('attended_seconds') + sum(row.attended_seconds for row in rows),
+        scheduled_seconds=F('scheduled_seconds') + len(rows) * meeting.duration * 60,
+    )
+
+
+def ingest_meeting(meeting, limiter=None):
+    """
+    Bitta uchrashuv hisobotini saqlash; qatnashchilar sonini qaytaradi.
+
+    Uchrashuv boshqa worker tomonidan allaqachon qayta ishlangan bo'lsa None.
+    Qayta chaqirish xavfsiz: qatorlar takrorlanmaydi, yig'indilar oshmaydi.
+    """
+    rows = collect(meeting, iter_report_participants(meeting.zoom_meeting_id, limiter))
+    with transaction.atomic():
+        claimed = ZoomMeeting.objects.filter(id=meeting.id, attendance_synced_at__isnull=True).update(
+            attendance_synced_at=timezone.now(),
+        )
+        if not claimed:
+            return None
+        MeetingAttendance.objects.bulk_create(rows, ignore_conflicts=True, batch_size=500)
+        _add_to_daily(meeting, rows)
+    return len(rows)
+
+
+def due_meetings(limit, now=None):
+    """Hisoboti tayyor, lekin hali olinmagan uchrashuvlar (eng eskisi birinchi)"""
+    now = now or timezone.now()
+    ready_before = now - timedelta(minutes=settings.ATTENDANCE_REPORT_DELAY_MINUTES)
+    candidates = (
+        ZoomMeeting.objects.filter(
+            attendance_synced_at__isnull=True,
+            is_active=True,
+            start_time__gte=now - timedelta(days=settings.ATTENDANCE_LOOKBACK_DAYS),
+            start_time__lt=ready_before,
+        )
+        .exclude(zoom_meeting_id='')
+        .exclude(status='cancelled')
+        .only('id', 'zoom_meeting_id', 'department_id', 'start_time', 'duration')
+        .order_by('start_time')
+    )
+    due = []
+    for meeting in candidates.iterator(chunk_size=limit):
+        # Tugash vaqti start_time + duration, uni Python da tekshiramiz
+        if meeting.end_time <= ready_before:
+            due.append(meeting)
+            if len(due) >= limit:
+                break
+    return due
+
+
+def ingest_due(limit=None):
+    """
+    Navbatdagi partiyani qayta ishlash; {'meetings': n, 'participants': m} qaytaradi.
+
+    API xatosida partiya to'xtaydi, qolganlari keyingi ishga tushirishda olinadi.
+    """
+    result = {'meetings': 0, 'participants': 0}
+    if not zoom_configured():
+        return result
+    limiter = RateLimiter(settings.ZOOM_API_RATE_LIMIT)
+    for meeting in due_meetings(limit or settings.ATTENDANCE_BATCH_SIZE):
+        try:
+            participants = ingest_meeting(meeting, limiter)
+        except RequestException:
+            logger.warning("Qatnashuv hisobotini olish to'xtatildi: %s", meeting.zoom_meeting_id, exc_info=True)
+            break
+        if participants is not None:
+            result['meetings'] += 1
+            result['participants'] += participants
+    return result
+
+
+def _ratio(numerator, denominator):
+    return round(numerator / denominator, 3) if denominator else None
+
+
+def department_attendance(start_date, end_date, department_id=None):
+    """
+    [start_date, end_date] oralig'idagi bo'lim ko'rsatkichlari.
+
+    held_rate - o'tkazilgan (kamida bitta qatnashchi) uchrashuvlar ulushi,
+    presence_rate - qatnashchilar rejalashtirilgan vaqtning qancha qismida bo'lgani.
+    """
+    daily = AttendanceDaily.objects.filter(day__gte=start_date, day__lte=end_date)
+    if department_id is not None:
+        daily = daily.filter(department_id=department_id)
+    rows = (
+        daily.values('department_id', 'department__name')
+        .annotate(
+            meetings_total=Sum('meetings'),
+            held_total=Sum('held'),
+            participants_total=Sum('participants'),
+            attended_total=Sum('attended_seconds'),
+            scheduled_total=Sum('scheduled_seconds'),
+        )
+        .order_by('department__name')
+    )
+    return [
+        {
+            'department_id': row['department_id'],
+            'department': row['department__name'],
+            'meetings': row['meetings_total'],
+            'held': row['held_total'],
+            'participants': row['participants_total'],
+            'held_rate': _ratio(row['held_total'], row['meetings_total']),
+            'avg_participants': _ratio(row['participants_total'], row['held_total']),
+            'avg_minutes': _ratio(row['attended_total'], row['participants_total'] * 60),
+            'presence_rate': _ratio(row['attended_total'], row['scheduled_total']),
+        }
+        for row in rows
+    ]
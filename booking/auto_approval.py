@@ -0,0 +1,298 @@
+"""
+So'rovlarni qoidalar asosida avtomatik tasdiqlash.
+
+AutoApprovalRule lar bir marta tekshiruvchi funksiyalar ro'yxatiga
+"kompilyatsiya" qilinadi va qoidalar versiyasi (kesh kaliti, qoida
+o'zgarganda signals yangilaydi) o'zgarmaguncha jarayon xotirasida turadi.
+
+Tekshiruv ikki joyda:
+  - so'rov yaratilganda (bot) - evaluate_new, qaror jurnalga yoziladi;
+  - kutilayotgan navbat bo'yicha (Celery beat yoki auto_approve buyrug'i) -
+    run_backlog: so'rovlar bitta so'rov bilan olinadi, bo'limdagi band
+    vaqtlar har bir bo'lim uchun bitta oraliq so'rovi bilan yuklanadi va
+    kesishish xotirada tekshiriladi. Shu partiyada tasdiqlangan so'rov ham
+    band vaqtga qo'shiladi, shuning uchun bir-biriga kesishgan ikki so'rov
+    birga tasdiqlanmaydi. dry_run - faqat hisobot.
+
+Arzon shartlar (davomiylik, ish vaqti, ishonchli foydalanuvchi) birinchi,
+kesishish esa faqat ular bajarilganda va bir marta tekshiriladi.
+Takrorlanuvchi so'rovlar avtomatik tasdiqlanmaydi.
+"""
+import bisect
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import AutoApprovalDecision, AutoApprovalRule, BookingRequest
+from .recurrence import find_conflicts, meetings_in_window
+from .services import approve_request
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'booking:auto_approval:version'
+REASON_MAX_LENGTH = 255
+
+_compiled = (None, [])
+
+
+@dataclass
+class CompiledRule:
+    id: int
+    name: str
+    department_id: int
+    require_no_conflict: bool
+    checks: list = field(default_factory=list)
+
+    def failures(self, booking_request):
+        """Bajarilmagan shartlar nomlari (bo'sh - qoida mos keladi, kesishishdan tashqari)"""
+        return [label for label, check in self.checks if not check(booking_request)]
+
+
+@dataclass
+class Decision:
+    booking_request: BookingRequest
+    rule: CompiledRule = None
+    reasons: list = field(default_factory=list)
+
+    @property
+    def approved(self):
+        return self.rule is not None
+
+    @property
+    def reason(self):
+        if self.rule is not None:
+            return self.rule.name[:REASON_MAX_LENGTH]
+        return '; '.join(self.reasons)[:REASON_MAX_LENGTH]
+
+
+def rules_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(VERSION_KEY, version, None):
+            version = cache.get(VERSION_KEY, version)
+    return version
+
+
+def invalidate_rules():
+    cache.set(VERSION_KEY, time.time_ns(), None)
+
+
+def _max_duration(limit):
+    return f"davomiylik > {limit} daq", lambda request: request.duration <= limit
+
+
+def _work_hours(start, end):
+    def check(request):
+        local_start = timezone.localtime(request.preferred_start_time)
+        local_end = local_start + timedelta(minutes=request.duration)
+        return local_start.date() == local_end.date() and start <= local_start.time() and local_end.time() <= end
+
+    return f"ish vaqtidan tashqari ({start:%H:%M}-{end:%H:%M})", check
+
+
+def _weekdays(days):
+    return "ish kuni emas", lambda request: timezone.localtime(request.preferred_start_time).weekday() in days
+
+
+def _trusted(requester_ids):
+    return "ishonchli foydalanuvchi emas", lambda request: request.requested_by_id in requester_ids
+
+
+def compile_rule(rule, trusted_ids):
+    checks = []
+    if rule.max_duration:
+        checks.append(_max_duration(rule.max_duration))
+    if rule.weekdays.strip():
+        checks.append(_weekdays(frozenset(rule.weekday_numbers())))
+    if rule.work_start is not None and rule.work_end is not None:
+        checks.append(_work_hours(rule.work_start, rule.work_end))
+    if trusted_ids:
+        checks.append(_trusted(frozenset(trusted_ids)))
+    return CompiledRule(
+        id=rule.id,
+        name=rule.name,
+        department_id=rule.department_id,
+        require_no_conflict=rule.require_no_conflict,
+        checks=checks,
+    )
+
+
+def compiled_rules():
+    """Faol qoidalar (priority tartibida); versiya o'zgarmaguncha qayta yuklanmaydi"""
+    global _compiled
+    version = rules_version()
+    if _compiled[0] != version:
+        rules = list(AutoApprovalRule.objects.filter(is_active=True).order_by('priority', 'id'))
+        trusted = defaultdict(set)
+        through = AutoApprovalRule.trusted_requesters.through
+        for rule_id, telegram_user_id in through.objects.filter(
+            autoapprovalrule__is_active=True,
+        ).values_list('autoapprovalrule_id', 'telegramuser_id'):
+            trusted[rule_id].add(telegram_user_id)
+        _compiled = (version, [compile_rule(rule, trusted[rule.id]) for rule in rules])
+    return _compiled[1]
+
+
+def _precheck(booking_request, now):
+    if booking_request.recurrence:
+        return "takrorlanuvchi so'rov"
+    if booking_request.preferred_start_time <= now:
+        return "vaqt o'tgan"
+    return None
+
+
+def decide(rules, booking_request, has_conflict, now=None):
+    """
+    Birinchi mos qoida bo'yicha qaror.
+
+    has_conflict - argumentsiz funksiya, faqat kerak bo'lganda va bir marta chaqiriladi.
+    """
+    blocked = _precheck(booking_request, now or timezone.now())
+    if blocked:
+        return Decision(booking_request, reasons=[blocked])
+
+    reasons = []
+    conflict = None
+    for rule in rules:
+        if rule.department_id is not None and rule.department_id != booking_request.department_id:
+            continue
+        failures = rule.failures(booking_request)
+        if not failures and rule.require_no_conflict:
+            if conflict is None:
+                conflict = has_conflict()
+            if conflict:
+                failures = ["vaqt band"]
+        if not failures:
+            return Decision(booking_request, rule=rule)
+        reasons.append(f"{rule.name}: {', '.join(failures)}")
+    return Decision(booking_request, reasons=reasons or ["mos qoida yo'q"])
+
+
+def _apply(decision, source):
+    """Tasdiqlash va jurnalga yozish; so'rov allaqachon ko'rib chiqilgan bo'lsa None"""
+    with transaction.atomic():
+        result = approve_request(decision.booking_request.id, None)
+        if result is None:
+            return None
+        AutoApprovalDecision.objects.create(
+            booking_request_id=decision.booking_request.id,
+            object_id=decision.booking_request.id,
+            rule_id=decision.rule.id,
+            outcome=AutoApprovalDecision.OUTCOME_APPROVED,
+            source=source,
+            reason=decision.reason,
+        )
+    logger.info("So'rov %s avtomatik tasdiqlandi (qoida: %s)", decision.booking_request.id, decision.rule.name)
+    return result
+
+
+def evaluate_new(booking_request, conflicts=None):
+    """
+    Yangi so'rovni tekshirish; tasdiqlangan bo'lsa ZoomMeeting, aks holda None.
+
+    conflicts - chaqiruvchi allaqachon topgan kesishuvlar (find_conflicts).
+    """
+    rules = compiled_rules()
+    if not rules:
+        return None
+
+    def has_conflict():
+        if conflicts is not None:
+            return bool(conflicts)
+        return bool(find_conflicts(
+            booking_request.department_id, booking_request.preferred_start_time, booking_request.duration,
+        ))
+
+    decision = decide(rules, booking_request, has_conflict)
+    if decision.approved:
+        return _apply(decision, AutoApprovalDecision.SOURCE_CREATE)
+    AutoApprovalDecision.objects.create(
+        booking_request_id=booking_request.id,
+        object_id=booking_request.id,
+        outcome=AutoApprovalDecision.OUTCOME_NO_MATCH,
+        source=AutoApprovalDecision.SOURCE_CREATE,
+        reason=decision.reason,
+    )
+    return None
+
+
+class BusyTimes:
+    """Bo'limlar bo'yicha band oraliqlar (boshlanish bo'yicha saralangan)"""
+
+    def __init__(self):
+        self.starts = defaultdict(list)
+        self.ends = defaultdict(list)
+
+    def add(self, department_id, start, end):
+        index = bisect.bisect(self.starts[department_id], start)
+        self.starts[department_id].insert(index, start)
+        self.ends[department_id].insert(index, end)
+
+    def overlaps(self, department_id, start, end):
+        starts = self.starts[department_id]
+        ends = self.ends[department_id]
+        # Uzoq uchrashuvlar ham qamralsin
+        first = bisect.bisect_left(starts, start - timedelta(minutes=settings.MAX_MEETING_DURATION))
+        last = bisect.bisect_left(starts, end)
+        return any(ends[index] > start for index in range(first, last))
+
+    @classmethod
+    def load(cls, booking_requests):
+        """Har bir bo'lim uchun so'rovlar oralig'idagi uchrashuvlar - bitta oraliq so'rovi"""
+        busy = cls()
+        windows = {}
+        for request in booking_requests:
+            start = request.preferred_start_time
+            end = start + timedelta(minutes=request.duration)
+            low, high = windows.get(request.department_id, (start, end))
+            windows[request.department_id] = (min(low, start), max(high, end))
+        for department_id, (low, high) in windows.items():
+            window_start = low - timedelta(minutes=settings.MAX_MEETING_DURATION)
+            for meeting in meetings_in_window(window_start, high, department_id=department_id):
+                if meeting.status != 'cancelled':
+                    busy.add(department_id, meeting.start_time, meeting.end_time)
+        return busy
+
+
+def pending_requests(limit=None):
+    return list(
+        BookingRequest.objects.filter(status='pending', preferred_start_time__gt=timezone.now())
+        .only('id', 'title', 'department_id', 'requested_by_id', 'preferred_start_time', 'duration', 'recurrence')
+        .order_by('created_at')[:limit or settings.AUTO_APPROVAL_BATCH_SIZE]
+    )
+
+
+def run_backlog(dry_run=False, limit=None):
+    """
+    Kutilayotgan so'rovlarni qoidalar bo'yicha tekshirish; qarorlar ro'yxatini qaytaradi.
+
+    Jurnalga faqat tasdiqlashlar yoziladi (mos kelmaganlar har safar
+    takrorlanmasin). dry_run da hech narsa o'zgartirilmaydi.
+    """
+    rules = compiled_rules()
+    if not rules:
+        return []
+
+    now = timezone.now()
+    booking_requests = pending_requests(limit)
+    busy = BusyTimes.load(booking_requests)
+    decisions = []
+    for request in booking_requests:
+        start = request.preferred_start_time
+        end = start + timedelta(minutes=request.duration)
+        decision = decide(rules, request, lambda: busy.overlaps(request.department_id, start, end), now)
+        if decision.approved:
+            if not dry_run and _apply(decision, AutoApprovalDecision.SOURCE_BACKLOG) is None:
+                # Bu orada admin ko'rib chiqqan
+                continue
+            busy.add(request.department_id, start, end)
+        decisions.append(decision)
+    return decisions
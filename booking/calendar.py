@@ -0,0 +1,200 @@
+"""
+iCalendar (.ics) feedlari: bo'lim va Telegram foydalanuvchisi uchun.
+
+Feed tanasi kesh versiyasi bilan bog'langan: uchrashuv o'zgarganda versiya
+yangilanadi, shuning uchun ETag va keshlangan tana DB ga murojaatsiz
+tekshiriladi.
+"""
+import hashlib
+import heapq
+import time
+from datetime import timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+from .models import ZoomMeeting
+from .recurrence import expand, series_in_window
+
+FEED_DEPARTMENT = 'department'
+FEED_USER = 'user'
+FEED_KINDS = (FEED_DEPARTMENT, FEED_USER)
+
+ICS_STATUS = {
+    'scheduled': 'CONFIRMED',
+    'active': 'CONFIRMED',
+    'ended': 'CONFIRMED',
+    'cancelled': 'CANCELLED',
+}
+
+
+def feed_token(kind, obj_id):
+    """Feed URL uchun imzolangan token"""
+    return salted_hmac(f'booking.calendar.{kind}', str(obj_id)).hexdigest()[:32]
+
+
+def check_feed_token(kind, obj_id, token):
+    return constant_time_compare(feed_token(kind, obj_id), token)
+
+
+def _version_key(kind, obj_id):
+    return f'calendar:version:{kind}:{obj_id}'
+
+
+def feed_version(kind, obj_id):
+    key = _version_key(kind, obj_id)
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def invalidate_meeting_feeds(department_id, created_by_id):
+    """Uchrashuv o'zgarganda tegishli feedlar versiyasini yangilash"""
+    version = time.time_ns()
+    cache.set_many({
+        _version_key(FEED_DEPARTMENT, department_id): version,
+        _version_key(FEED_USER, created_by_id): version,
+    }, None)
+
+
+def feed_window(now=None):
+    now = now or timezone.now()
+    day_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    return (
+        day_start - timedelta(days=settings.CALENDAR_FEED_PAST_DAYS),
+        day_start + timedelta(days=settings.CALENDAR_FEED_FUTURE_DAYS),
+    )
+
+
+def feed_etag(kind, obj_id, version, window_start):
+    raw = f'{kind}:{obj_id}:{version}:{window_start.date().isoformat()}'
+    return '"%s"' % hashlib.md5(raw.encode()).hexdigest()
+
+
+def body_cache_key(etag):
+    return 'calendar:body:' + etag.strip('"')
+
+
+def _escape(value):
+    return (
+        (value or '')
+        .replace('\\', '\\\\')
+        .replace(';', '\\;')
+        .replace(',', '\\,')
+        .replace('\r\n', '\\n')
+        .replace('\n', '\\n')
+    )
+
+
+def _fold(line):
+    """RFC 5545 bo'yicha 75 oktetdan uzun qatorlarni bo'lish"""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line + '\r\n'
+    parts = []
+    current = ''
+    size = 0
+    for char in line:
+        char_size = len(char.encode('utf-8'))
+        if size + char_size > 75:
+            parts.append(current)
+            current = ' '
+            size = 1
+        current += char
+        size += char_size
+    parts.append(current)
+    return '\r\n'.join(parts) + '\r\n'
+
+
+def _format_dt(value):
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def feed_queryset(kind, obj_id, window_start, window_end):
+    meetings = ZoomMeeting.objects.filter(
+        is_active=True,
+        start_time__gte=window_start,
+        start_time__lt=window_end,
+    )
+    if kind == FEED_DEPARTMENT:
+        meetings = meetings.filter(department_id=obj_id)
+    else:
+        meetings = meetings.filter(created_by_id=obj_id)
+
+    return meetings.order_by('start_time').values_list(
+        'id', 'title', 'description', 'start_time', 'duration',
+        'meeting_url', 'status', 'updated_at', 'department__name',
+    )
+
+
+def feed_rows(kind, obj_id, window_start, window_end):
+    """Yagona uchrashuvlar va oraliqdagi seriya takrorlari, start_time bo'yicha"""
+    meetings = feed_queryset(kind, obj_id, window_start, window_end).iterator(
+        chunk_size=settings.CALENDAR_FEED_CHUNK_SIZE
+    )
+    if kind == FEED_DEPARTMENT:
+        series = series_in_window(window_start, window_end, department_id=obj_id)
+    else:
+        series = series_in_window(window_start, window_end, created_by_id=obj_id)
+    occurrences = (
+        (
+            occurrence.id, occurrence.title, occurrence.description, occurrence.start_time,
+            occurrence.duration, occurrence.meeting_url, occurrence.status, occurrence.updated_at,
+            occurrence.department.name,
+        )
+        for occurrence in expand(series, window_start, window_end)
+    )
+    return heapq.merge(meetings, occurrences, key=lambda row: row[3])
+
+
+def iter_calendar(name, rows):
+    """Kalendarni qatorma-qator generatsiya qilish"""
+    yield (
+        'BEGIN:VCALENDAR\r\n'
+        'VERSION:2.0\r\n'
+        'PRODID:-//Zoomga//Booking//UZ\r\n'
+        'CALSCALE:GREGORIAN\r\n'
+        'METHOD:PUBLISH\r\n'
+    )
+    yield _fold(f'X-WR-CALNAME:{_escape(name)}')
+    yield _fold(f'X-WR-TIMEZONE:{settings.TIME_ZONE}')
+
+    stamp = _format_dt(timezone.now())
+    for (meeting_id, title, description, start_time, duration,
+         meeting_url, status, updated_at, department_name) in rows:
+        end_time = start_time + timedelta(minutes=duration)
+        lines = [
+            'BEGIN:VEVENT',
+            f'UID:{meeting_id}@zoomga',
+            f'DTSTAMP:{stamp}',
+            f'LAST-MODIFIED:{_format_dt(updated_at)}',
+            f'DTSTART:{_format_dt(start_time)}',
+            f'DTEND:{_format_dt(end_time)}',
+            f'SUMMARY:{_escape(title)}',
+            f'STATUS:{ICS_STATUS.get(status, "CONFIRMED")}',
+            f'CATEGORIES:{_escape(department_name)}',
+        ]
+        if description:
+            lines.append(f'DESCRIPTION:{_escape(description)}')
+        if meeting_url:
+            lines.append(f'URL:{meeting_url}')
+            lines.append(f'LOCATION:{_escape(meeting_url)}')
+        lines.append('END:VEVENT')
+        yield ''.join(_fold(line) for line in lines)
+
+    yield 'END:VCALENDAR\r\n'
+
+
+def stream_and_cache(chunks, cache_key):
+    """Chunklarni yuborish va oxirida kodlangan tanani keshga yozish"""
+    parts = []
+    for chunk in chunks:
+        data = chunk.encode('utf-8')
+        parts.append(data)
+        yield data
+    cache.set(cache_key, b''.join(parts), settings.CALENDAR_FEED_CACHE_TIMEOUT)
@@ -0,0 +1,156 @@
+"""
+Delta-sinxronlash: kursordan keyin o'zgargan uchrashuv va so'rovlar.
+
+Har bir oqim (uchrashuvlar, so'rovlar, o'chirilganlar) (updated_at, id)
+indeksi bo'yicha keyset bilan o'qiladi: kursor oqimdagi oxirgi qatorning
+(vaqt, id) juftligini saqlaydi, shuning uchun o'zgarish bo'lmasa har bir
+oqim bitta bo'sh indeks diapazoni. Kursor mijoz uchun shaffof emas
+(base64 JSON).
+
+Hali tugamagan tranzaksiyalar oldingi updated_at bilan keyinroq ko'rinishi
+mumkin, shuning uchun oxirgi CHANGES_SETTLE_SECONDS dagi qatorlar keyingi
+so'rovgacha qaytarilmaydi. Replika kechikishi sababli so'rovlar doim asosiy
+bazadan o'qiladi.
+
+O'chirish izlari: o'chirilgan qatorlar Tombstone dan, is_active=False
+uchrashuvlar esa uchrashuvlar oqimidan "deleted" ro'yxatiga chiqadi.
+"""
+import base64
+import json
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import BookingRequest, Tombstone, ZoomMeeting
+
+STREAM_MEETINGS = 'm'
+STREAM_REQUESTS = 'r'
+STREAM_TOMBSTONES = 't'
+STREAMS = (STREAM_MEETINGS, STREAM_REQUESTS, STREAM_TOMBSTONES)
+# Kursor qaysi paytgacha sinxronlanganini bildiradi (muddati o'tganini aniqlash uchun)
+SYNCED_UNTIL = 'at'
+
+MEETING_FIELDS = (
+    'id', 'title', 'description', 'department_id', 'created_by_id', 'start_time', 'duration', 'status',
+    'meeting_url', 'zoom_meeting_id', 'series_id', 'original_start', 'is_active', 'created_at', 'updated_at',
+)
+REQUEST_FIELDS = (
+    'id', 'title', 'description', 'department_id', 'requested_by_id', 'preferred_start_time', 'duration',
+    'status', 'recurrence', 'rejection_reason', 'processed_by_id', 'processed_at', 'created_at', 'updated_at',
+)
+
+
+class CursorExpired(Exception):
+    """Kursor o'chirish izlari saqlanadigan muddatdan eski: to'liq qayta sinxronlash kerak"""
+
+
+def encode_cursor(positions, synced_until):
+    data = {
+        stream: [moment.isoformat(), str(object_id)]
+        for stream, (moment, object_id) in positions.items()
+        if moment is not None
+    }
+    data[SYNCED_UNTIL] = synced_until.isoformat()
+    return base64.urlsafe_b64encode(json.dumps(data, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decode_cursor(value):
+    """Kursor -> ({oqim: (vaqt, id)}, sinxronlangan payt); noto'g'ri kursorda ValueError"""
+    if not value:
+        return {}, None
+    try:
+        data = json.loads(base64.urlsafe_b64decode(value + '=' * (-len(value) % 4)))
+        positions = {
+            stream: (datetime.fromisoformat(data[stream][0]), data[stream][1])
+            for stream in STREAMS
+            if stream in data
+        }
+        return positions, datetime.fromisoformat(data[SYNCED_UNTIL])
+    except (TypeError, ValueError, KeyError, IndexError, AttributeError) as exc:
+        raise ValueError("Kursor noto'g'ri") from exc
+
+
+def _page(queryset, time_field, position, upper, limit, fields):
+    rows = queryset.filter(**{f'{time_field}__lt': upper})
+    if position is not None:
+        moment, object_id = position
+        rows = rows.filter(Q(**{f'{time_field}__gt': moment}) | Q(**{time_field: moment, 'id__gt': object_id}))
+    rows = list(rows.order_by(time_field, 'id').values(*fields)[:limit + 1])
+    return rows[:limit], len(rows) > limit
+
+
+def _last(rows, time_field, position):
+    if not rows:
+        return position or (None, None)
+    return rows[-1][time_field], rows[-1]['id']
+
+
+def get_changes(cursor, limit=None, include_requests=True, now=None):
+    """
+    Kursordan keyingi o'zgarishlar.
+
+    {'meetings', 'requests', 'deleted', 'cursor', 'has_more'} qaytaradi;
+    has_more bo'lsa mijoz darhol yangi kursor bilan qayta so'rashi kerak.
+    """
+    limit = limit or settings.CHANGES_PAGE_SIZE
+    now = now or timezone.now()
+    upper = now - timedelta(seconds=settings.CHANGES_SETTLE_SECONDS)
+    positions, synced_until = decode_cursor(cursor)
+    # Shu paytdan keyingi o'chirish izlari tozalangan bo'lishi mumkin
+    if synced_until is not None and synced_until < now - timedelta(days=settings.TOMBSTONE_RETENTION_DAYS):
+        raise CursorExpired
+
+    tombstone_position = positions.get(STREAM_TOMBSTONES)
+
+    meetings, more = _page(
+        ZoomMeeting.objects.all(), 'updated_at', positions.get(STREAM_MEETINGS), upper, limit, MEETING_FIELDS,
+    )
+    new_positions = {STREAM_MEETINGS: _last(meetings, 'updated_at', positions.get(STREAM_MEETINGS))}
+
+    requests = []
+    tombstone_kinds = [Tombstone.KIND_MEETING]
+    if include_requests:
+        requests, more_requests = _page(
+            BookingRequest.objects.all(), 'updated_at', positions.get(STREAM_REQUESTS), upper, limit, REQUEST_FIELDS,
+        )
+        more = more or more_requests
+        new_positions[STREAM_REQUESTS] = _last(requests, 'updated_at', positions.get(STREAM_REQUESTS))
+        tombstone_kinds.append(Tombstone.KIND_REQUEST)
+
+    tombstones, more_tombstones = _page(
+        Tombstone.objects.filter(kind__in=tombstone_kinds), 'deleted_at', tombstone_position, upper, limit,
+        ('id', 'kind', 'object_id', 'deleted_at'),
+    )
+    more = more or more_tombstones
+    new_positions[STREAM_TOMBSTONES] = _last(tombstones, 'deleted_at', tombstone_position)
+
+    deleted = [
+        {'type': row['kind'], 'id': row['object_id'], 'deleted_at': row['deleted_at']}
+        for row in tombstones
+    ]
+    active_meetings = []
+    for row in meetings:
+        if row['is_active']:
+            active_meetings.append(row)
+        else:
+            deleted.append({'type': Tombstone.KIND_MEETING, 'id': row['id'], 'deleted_at': row['updated_at']})
+
+    return {
+        'meetings': active_meetings,
+        'requests': requests,
+        'deleted': deleted,
+        'cursor': encode_cursor(new_positions, upper),
+        'has_more': more,
+    }
+
+
+def record_deletion(kind, object_id):
+    Tombstone.objects.create(kind=kind, object_id=object_id)
+
+
+def prune_tombstones(now=None):
+    cutoff = (now or timezone.now()) - timedelta(days=settings.TOMBSTONE_RETENTION_DAYS)
+    deleted, _ = Tombstone.objects.filter(deleted_at__lt=cutoff).delete()
+    return deleted
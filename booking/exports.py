@@ -0,0 +1,294 @@
+"""
+Uchrashuvlar va so'rovlarni CSV/XLSX formatida eksport qilish.
+
+Qatorlar DB dan server tomonidagi kursor (iterator) orqali o'qiladi va
+fayl qatorma-qator yoziladi, shuning uchun xotira sarfi qatorlar soniga
+bog'liq emas.
+"""
+import csv
+import re
+import uuid
+import zipfile
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.utils import timezone
+
+from zoomga.streaming import streaming_response
+from .models import ZoomMeeting, BookingRequest, ArchivedRecord
+
+EXPORT_FORMATS = ('csv', 'xlsx')
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+MEETING_EXPORT_FIELDS = [
+    ('ID', 'id'),
+    ('Nomi', 'title'),
+    ("Bo'lim", 'department__name'),
+    ('Yaratuvchi (ism)', 'created_by__first_name'),
+    ('Yaratuvchi (familiya)', 'created_by__last_name'),
+    ('Yaratuvchi (username)', 'created_by__username'),
+    ('Boshlanish vaqti', 'start_time'),
+    ('Davomiyligi (daqiqa)', 'duration'),
+    ('Holati', 'status'),
+    ('Havola', 'meeting_url'),
+    ('Yaratilgan', 'created_at'),
+]
+
+REQUEST_EXPORT_FIELDS = [
+    ('ID', 'id'),
+    ('Nomi', 'title'),
+    ("Bo'lim", 'department__name'),
+    ("So'rovchi (ism)", 'requested_by__first_name'),
+    ("So'rovchi (familiya)", 'requested_by__last_name'),
+    ("So'rovchi (username)", 'requested_by__username'),
+    ('Vaqt', 'preferred_start_time'),
+    ('Davomiyligi (daqiqa)', 'duration'),
+    ('Holati', 'status'),
+    ("Ko'rib chiqqan", 'processed_by__username'),
+    ("Ko'rib chiqilgan vaqt", 'processed_at'),
+    ('Yaratilgan', 'created_at'),
+]
+
+ARCHIVE_EXPORT_FIELDS = [
+    ('ID', 'object_id'),
+    ('Turi', 'kind'),
+    ('Nomi', 'title'),
+    ("Bo'lim", 'department__name'),
+    ('Egasi (ism)', 'owner__first_name'),
+    ('Egasi (familiya)', 'owner__last_name'),
+    ('Egasi (username)', 'owner__username'),
+    ('Vaqt', 'start_time'),
+    ('Holati', 'status'),
+    ('Arxivlangan', 'archived_at'),
+]
+
+_XML_INVALID_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+EXPORTS = {
+    'meetings': (ZoomMeeting, MEETING_EXPORT_FIELDS),
+    'requests': (BookingRequest, REQUEST_EXPORT_FIELDS),
+    'archive': (ArchivedRecord, ARCHIVE_EXPORT_FIELDS),
+}
+
+
+def filter_meetings(meetings, params):
+    """meetings_list filtrlari (status, department, date)"""
+    status_filter = params.get('status')
+    department_filter = params.get('department')
+    date_filter = params.get('date')
+
+    if status_filter:
+        meetings = meetings.filter(status=status_filter)
+
+    if department_filter:
+        meetings = meetings.filter(department_id=department_filter)
+
+    if date_filter:
+        meetings = meetings.filter(start_time__date=date_filter)
+
+    return meetings
+
+
+def filter_requests(requests, params):
+    """requests_list filtrlari (status, department)"""
+    status_filter = params.get('status')
+    department_filter = params.get('department')
+
+    if status_filter:
+        requests = requests.filter(status=status_filter)
+
+    if department_filter:
+        requests = requests.filter(department_id=department_filter)
+
+    return requests
+
+
+def filter_archive(archived, params):
+    """Arxiv filtrlari (kind, department, q, start, end)"""
+    if params.get('kind'):
+        archived = archived.filter(kind=params['kind'])
+    if params.get('department'):
+        archived = archived.filter(department_id=params['department'])
+    for token in params.get('q', '').split():
+        archived = archived.filter(title__icontains=token)
+    if params.get('start'):
+        archived = archived.filter(start_time__date__gte=params['start'])
+    if params.get('end'):
+        archived = archived.filter(start_time__date__lte=params['end'])
+    return archived
+
+
+def export_queryset(kind, params):
+    """Eksport turi va GET parametrlari bo'yicha filtrlangan queryset"""
+    if kind == 'archive':
+        return filter_archive(ArchivedRecord.objects.order_by('-start_time'), params)
+    if kind == 'meetings':
+        return filter_meetings(ZoomMeeting.objects.filter(is_active=True).order_by('-start_time'), params)
+    return filter_requests(BookingRequest.objects.all().order_by('-created_at'), params)
+
+
+def _format_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if hasattr(value, 'tzinfo'):
+        return timezone.localtime(value).strftime('%Y-%m-%d %H:%M')
+    return value
+
+
+def iter_rows(kind, queryset):
+    """Sarlavha va ma'lumot qatorlari (JOIN bilan bitta so'rov, server kursori)"""
+    model, fields = EXPORTS[kind]
+    status_labels = dict(model.STATUS_CHOICES)
+    columns = [field for _, field in fields]
+    status_index = columns.index('status')
+
+    yield [header for header, _ in fields]
+    rows = queryset.values_list(*columns).iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+    for row in rows:
+        row = [_format_value(value) for value in row]
+        row[status_index] = status_labels.get(row[status_index], row[status_index])
+        yield row
+
+
+class _Echo:
+    """csv.writer uchun buferlarsiz 'fayl'"""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows):
+    writer = csv.writer(_Echo())
+    yield '\ufeff'.encode('utf-8')  # Excel uchun BOM
+    for row in rows:
+        yield writer.writerow(row).encode('utf-8')
+
+
+class _ChunkBuffer:
+    """Yozilgan baytlarni yig'ib, generatorga bo'lib beruvchi oqim"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+_XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+
+_XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+_XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+
+_XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+
+
+def _xlsx_cell(value):
+    if isinstance(value, bool):
+        value = str(value)
+    if isinstance(value, (int, float)):
+        return f'<c><v>{value}</v></c>'
+    text = escape(_XML_INVALID_CHARS.sub('', str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def iter_xlsx(rows, sheet_name='Export', flush_every=500):
+    """
+    XLSX faylini oqim sifatida yozish.
+
+    ZIP arxivi seek qilinmaydigan buferga yoziladi (data descriptor bilan),
+    varaq esa inline satrlar bilan qatorma-qator siqiladi.
+    """
+    buffer = _ChunkBuffer()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml', _XLSX_CONTENT_TYPES)
+        archive.writestr('_rels/.rels', _XLSX_ROOT_RELS)
+        archive.writestr('xl/workbook.xml', _XLSX_WORKBOOK.format(name=escape(sheet_name)))
+        archive.writestr('xl/_rels/workbook.xml.rels', _XLSX_WORKBOOK_RELS)
+        yield buffer.drain()
+
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                b'<sheetData>'
+            )
+            for index, row in enumerate(rows, start=1):
+                sheet.write(
+                    ('<row>' + ''.join(_xlsx_cell(value) for value in row) + '</row>').encode('utf-8')
+                )
+                if index % flush_every == 0:
+                    yield buffer.drain()
+            sheet.write(b'</sheetData></worksheet>')
+    yield buffer.drain()
+
+
+def iter_export(kind, fmt, queryset):
+    rows = iter_rows(kind, queryset)
+    if fmt == 'xlsx':
+        return iter_xlsx(rows, sheet_name=kind)
+    return iter_csv(rows)
+
+
+def export_filename(kind, fmt):
+    return f"{kind}_{timezone.localtime().strftime('%Y%m%d_%H%M')}.{fmt}"
+
+
+def export_response(request, kind, fmt, queryset):
+    response = streaming_response(request, iter_export(kind, fmt, queryset), content_type=CONTENT_TYPES[fmt])
+    response['Content-Disposition'] = f'attachment; filename="{export_filename(kind, fmt)}"'
+    return response
+
+
+def write_export(kind, fmt, queryset, path):
+    """Eksportni faylga yozish (fon vazifalari uchun)"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'wb') as output:
+        for chunk in iter_export(kind, fmt, queryset):
+            output.write(chunk)
+    return path
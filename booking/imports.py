@@ -0,0 +1,384 @@
+"""
+CSV/XLSX fayldan uchrashuv so'rovlarini ommaviy import qilish.
+
+Fayl qatorma-qator o'qiladi (XLSX ham zip ichidagi XML dan iterparse bilan),
+keyin bo'limdagi mavjud uchrashuvlar/kutilayotgan so'rovlar bitta oraliq
+so'rovi bilan yig'iladi va yangi qatorlar (bo'lim, boshlanish) bo'yicha
+ketma-ket ko'rib chiqiladi - kesishishlar ham, Department.daily_limit ham
+shu o'tishda aniqlanadi. To'g'ri qatorlar bitta bulk_create bilan
+kutilayotgan so'rov sifatida yoziladi.
+"""
+import csv
+import io
+import re
+import zipfile
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from itertools import accumulate
+from xml.etree.ElementTree import iterparse
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from telegram_bot.models import Department, DepartmentAdmin
+from telegram_bot.review_queue import invalidate_queue
+from .exports import iter_csv
+from .models import ZoomMeeting, BookingRequest
+from .recurrence import expand, series_in_window
+from .search import index_requests
+
+IMPORT_FORMATS = ('csv', 'xlsx')
+
+# Sarlavhalar (kichik harflarda); eksport qilingan so'rovlar faylini ham qabul qiladi
+HEADER_ALIASES = {
+    'department': 'department',
+    "bo'lim": 'department',
+    'title': 'title',
+    'nomi': 'title',
+    'start': 'start',
+    'start_time': 'start',
+    'vaqt': 'start',
+    'boshlanish vaqti': 'start',
+    'duration': 'duration',
+    'davomiyligi': 'duration',
+    'davomiyligi (daqiqa)': 'duration',
+    'description': 'description',
+    'tavsif': 'description',
+}
+REQUIRED_COLUMNS = ('department', 'title', 'start', 'duration')
+DATETIME_FORMATS = ('%Y-%m-%d %H:%M', '%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M', '%Y-%m-%dT%H:%M:%S', '%d.%m.%Y %H:%M')
+EXCEL_EPOCH = datetime(1899, 12, 30)
+
+_SHEET_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_CELL_REF_RE = re.compile(r'([A-Z]+)')
+
+
+class BulkImportError(ValueError):
+    """Butun faylni qayta ishlab bo'lmaydi (format, sarlavhalar, hajm)"""
+
+
+class ImportRow:
+    """Fayldagi bitta qator va uning natijasi"""
+
+    def __init__(self, line, values):
+        self.line = line
+        self.values = values
+        self.title = _cell_text(values.get('title'))
+        self.department = None
+        self.start_time = None
+        self.duration = None
+        self.description = _cell_text(values.get('description'))
+        self.error = ''
+        self.request_id = None
+
+    @property
+    def end_time(self):
+        return self.start_time + timedelta(minutes=self.duration)
+
+    @property
+    def ok(self):
+        return not self.error
+
+
+def _cell_text(value):
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+
+def iter_csv_records(fileobj):
+    text = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    try:
+        yield from csv.reader(text)
+    finally:
+        text.detach()
+
+
+def _column_index(ref):
+    letters = _CELL_REF_RE.match(ref).group(1)
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - ord('A') + 1
+    return index - 1
+
+
+def _shared_strings(archive):
+    if 'xl/sharedStrings.xml' not in archive.namelist():
+        return []
+    strings = []
+    with archive.open('xl/sharedStrings.xml') as handle:
+        for _, element in iterparse(handle):
+            if element.tag == f'{_SHEET_NS}si':
+                strings.append(''.join(text.text or '' for text in element.iter(f'{_SHEET_NS}t')))
+                element.clear()
+    return strings
+
+
+def iter_xlsx_records(fileobj):
+    """Birinchi varaq qatorlari (qiymatlar: satr yoki son)"""
+    try:
+        archive = zipfile.ZipFile(fileobj)
+    except zipfile.BadZipFile:
+        raise BulkImportError("XLSX faylni o'qib bo'lmadi")
+    with archive:
+        sheets = sorted(name for name in archive.namelist() if re.fullmatch(r'xl/worksheets/sheet\d+\.xml', name))
+        if not sheets:
+            raise BulkImportError("XLSX faylda varaq topilmadi")
+        strings = _shared_strings(archive)
+        with archive.open('xl/worksheets/sheet1.xml' if 'xl/worksheets/sheet1.xml' in sheets else sheets[0]) as handle:
+            for _, element in iterparse(handle):
+                if element.tag != f'{_SHEET_NS}row':
+                    continue
+                record = {}
+                index = -1
+                for cell in element.iter(f'{_SHEET_NS}c'):
+                    # r (masalan "C5") ixtiyoriy; bo'lmasa ketma-ket ustun
+                    index = _column_index(cell.get('r')) if cell.get('r') else index + 1
+                    cell_type = cell.get('t')
+                    if cell_type == 'inlineStr':
+                        value = ''.join(text.text or '' for text in cell.iter(f'{_SHEET_NS}t'))
+                    else:
+                        raw = cell.findtext(f'{_SHEET_NS}v')
+                        if raw is None:
+                            continue
+                        if cell_type == 's':
+                            value = strings[int(raw)]
+                        elif cell_type in ('str', 'b', 'e'):
+                            value = raw
+                        else:
+                            value = float(raw)
+                    record[index] = value
+                element.clear()
+                yield [record.get(index) for index in range(max(record, default=-1) + 1)]
+
+
+def iter_records(fileobj, fmt):
+    """Sarlavha bo'yicha lug'atlar: (qator raqami, {ustun: qiymat})"""
+    records = iter_csv_records(fileobj) if fmt == 'csv' else iter_xlsx_records(fileobj)
+    header = next(records, None)
+    if header is None:
+        raise BulkImportError("Fayl bo'sh")
+    columns = [HEADER_ALIASES.get(_cell_text(name).lower()) for name in header]
+    missing = [name for name in REQUIRED_COLUMNS if name not in columns]
+    if missing:
+        raise BulkImportError(f"Ustunlar topilmadi: {', '.join(missing)}")
+
+    for line, record in enumerate(records, 2):
+        if not any(_cell_text(value) for value in record):
+            continue
+        yield line, {
+            column: value for column, value in zip(columns, record) if column is not None
+        }
+
+
+def parse_start(value):
+    if isinstance(value, float):
+        # XLSX sana yacheykasi (Excel seriya raqami)
+        start_time = EXCEL_EPOCH + timedelta(days=value)
+        start_time = start_time.replace(second=0, microsecond=0) + timedelta(minutes=round(start_time.second / 60))
+        return timezone.make_aware(start_time)
+    text = _cell_text(value)
+    for fmt in DATETIME_FORMATS:
+        try:
+            return timezone.make_aware(datetime.strptime(text, fmt))
+        except ValueError:
+            continue
+    raise ValueError("Vaqt formati noto'g'ri (YYYY-MM-DD HH:MM)")
+
+
+def parse_row(line, values):
+    row = ImportRow(line, values)
+    try:
+        if not row.title:
+            raise ValueError("Nomi kiritilmagan")
+        if len(row.title) > 200:
+            raise ValueError("Nomi 200 belgidan oshmasligi kerak")
+        row.start_time = parse_start(values.get('start'))
+        if row.start_time <= timezone.now():
+            raise ValueError("Vaqt o'tib ketgan")
+        try:
+            row.duration = int(float(_cell_text(values.get('duration'))))
+        except ValueError:
+            raise ValueError("Davomiylik son bo'lishi kerak")
+        if not 0 < row.duration <= settings.MAX_MEETING_DURATION:
+            raise ValueError(f"Davomiylik 1 daqiqadan {settings.MAX_MEETING_DURATION} daqiqagacha bo'lishi kerak")
+    except ValueError as exc:
+        row.error = str(exc)
+    return row
+
+
+def read_rows(fileobj, fmt):
+    if fmt not in IMPORT_FORMATS:
+        raise BulkImportError("Faqat CSV yoki XLSX fayl qabul qilinadi")
+    rows = []
+    for line, values in iter_records(fileobj, fmt):
+        if len(rows) >= settings.BULK_IMPORT_MAX_ROWS:
+            raise BulkImportError(f"Faylda {settings.BULK_IMPORT_MAX_ROWS} tadan ortiq qator bor")
+        rows.append(parse_row(line, values))
+    if not rows:
+        raise BulkImportError("Faylda ma'lumot qatorlari yo'q")
+    return rows
+
+
+def resolve_departments(rows, telegram_user):
+    """Bo'lim nomi yoki ID si bo'yicha; foydalanuvchi a'zo bo'lmagan bo'limlar xato"""
+    keys = {_cell_text(row.values.get('department')) for row in rows if row.ok}
+    ids = [int(key) for key in keys if key.isdigit()]
+    departments = Department.objects.filter(is_active=True).filter(Q(name__in=keys) | Q(id__in=ids))
+    by_key = {}
+    for department in departments:
+        by_key[department.name] = department
+        by_key[str(department.id)] = department
+    member_of = set(DepartmentAdmin.objects.filter(
+        telegram_user=telegram_user, is_active=True
+    ).values_list('department_id', flat=True))
+
+    for row in rows:
+        if not row.ok:
+            continue
+        key = _cell_text(row.values.get('department'))
+        row.department = by_key.get(key)
+        if row.department is None:
+            row.error = f"Bo'lim topilmadi: {key}"
+        elif row.department.id not in member_of:
+            row.error = f"Siz {row.department.name} bo'limi a'zosi emassiz"
+
+
+def _existing_intervals(department_ids, window_start, window_end):
+    """Bo'limlardagi band vaqtlar: (bo'lim, boshlanish, tugash)"""
+    meetings = ZoomMeeting.objects.filter(
+        is_active=True,
+        department_id__in=department_ids,
+        start_time__gte=window_start,
+        start_time__lt=window_end,
+    ).exclude(status='cancelled').values_list('department_id', 'start_time', 'duration')
+    pending = BookingRequest.objects.filter(
+        status='pending',
+        department_id__in=department_ids,
+        preferred_start_time__gte=window_start,
+        preferred_start_time__lt=window_end,
+    ).values_list('department_id', 'preferred_start_time', 'duration')
+    occurrences = expand(
+        series_in_window(window_start, window_end).filter(department_id__in=department_ids),
+        window_start, window_end,
+    )
+    for department_id, start_time, duration in [*meetings, *pending]:
+        yield department_id, start_time, start_time + timedelta(minutes=duration)
+    for occurrence in occurrences:
+        yield occurrence.department_id, occurrence.start_time, occurrence.end_time
+
+
+def check_schedule(rows):
+    """
+    Kesishishlar va kunlik limitni tekshirish.
+
+    Avval har bir bo'limdagi mavjud band vaqtlar yig'iladi (boshlanish
+    bo'yicha saralangan, tugashlarning prefiks maksimumi bilan), keyin
+    yangi qatorlar vaqt tartibida ko'rib chiqiladi: mavjudlari bilan
+    kesishish bisect bilan, qabul qilingan yangi qatorlar esa o'zaro
+    kesishmagani uchun faqat oxirgi qabul qilingani bilan tekshiriladi.
+    Shu sababli qatorni rad etish hech qachon keyinroq qayta ko'rilmaydi.
+    """
+    valid = [row for row in rows if row.ok]
+    if not valid:
+        return
+    department_ids = {row.department.id for row in valid}
+    first_day = timezone.localtime(min(row.start_time for row in valid)).date()
+    last_day = timezone.localtime(max(row.start_time for row in valid)).date()
+    # Oldinroq boshlanib kesishadiganlar va to'liq kunlar (limit uchun)
+    window_start = timezone.make_aware(datetime.combine(first_day, datetime.min.time())) - timedelta(
+        minutes=settings.MAX_MEETING_DURATION
+    )
+    window_end = timezone.make_aware(datetime.combine(last_day + timedelta(days=1), datetime.min.time()))
+
+    booked = Counter()
+    existing = defaultdict(list)
+    for department_id, start_time, end_time in _existing_intervals(department_ids, window_start, window_end):
+        booked[department_id, timezone.localtime(start_time).date()] += 1
+        existing[department_id].append((start_time, end_time))
+
+    busy = {}
+    for department_id, intervals in existing.items():
+        intervals.sort()
+        busy[department_id] = (
+            [start_time for start_time, _ in intervals],
+            list(accumulate((end_time for _, end_time in intervals), max)),
+        )
+
+    last_accepted = {}
+    for row in sorted(valid, key=lambda row: (row.department.id, row.start_time)):
+        department_id = row.department.id
+        starts, max_ends = busy.get(department_id, ((), ()))
+        # row.end_time dan oldin boshlanganlar ichida row.start_time dan keyin tugaydigani bormi
+        before_end = bisect_left(starts, row.end_time)
+        previous = last_accepted.get(department_id)
+        day = (department_id, timezone.localtime(row.start_time).date())
+
+        if before_end and max_ends[before_end - 1] > row.start_time:
+            row.error = "Bo'limda shu vaqtda boshqa uchrashuv bor"
+        elif previous is not None and row.start_time < previous.end_time:
+            row.error = f"{previous.line}-qator bilan vaqti kesishadi"
+        elif booked[day] >= row.department.daily_limit:
+            row.error = f"Bo'limning kunlik limiti ({row.department.daily_limit} ta) to'lgan"
+        else:
+            booked[day] += 1
+            last_accepted[department_id] = row
+
+
+def create_requests(rows, telegram_user):
+    accepted = [row for row in rows if row.ok]
+    requests = [
+        BookingRequest(
+            title=row.title,
+            description=row.description,
+            preferred_start_time=row.start_time,
+            duration=row.duration,
+            department=row.department,
+            requested_by=telegram_user,
+            status='pending',
+        )
+        for row in accepted
+    ]
+    with transaction.atomic():
+        BookingRequest.objects.bulk_create(requests)
+        # bulk_create post_save signallarini chaqirmaydi
+        index_requests(requests)
+        transaction.on_commit(invalidate_queue)
+    for row, booking_request in zip(accepted, requests):
+        row.request_id = booking_request.id
+    return requests
+
+
+def import_bookings(fileobj, fmt, telegram_user):
+    """
+    Faylni tekshirish va to'g'ri qatorlarni so'rov sifatida yaratish.
+
+    Har bir qator natijasi bilan ImportRow ro'yxatini qaytaradi;
+    butun fayl yaroqsiz bo'lsa BulkImportError.
+    """
+    rows = read_rows(fileobj, fmt)
+    resolve_departments(rows, telegram_user)
+    check_schedule(rows)
+    if any(row.ok for row in rows):
+        create_requests(rows, telegram_user)
+    return rows
+
+
+def import_format(filename):
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    return extension if extension in IMPORT_FORMATS else None
+
+
+def report_csv(rows):
+    """Qatorlar bo'yicha hisobot (CSV, Excel uchun BOM bilan)"""
+    records = [['Qator', 'Nomi', 'Holat', 'Izoh', "So'rov ID"]]
+    records.extend(
+        [row.line, row.title, 'Yaratildi' if row.ok else 'Xato', row.error, row.request_id or '']
+        for row in rows
+    )
+    return b''.join(iter_csv(records))
@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from booking.archive import archive_cutoff, pending_count, run_archive
+from booking.models import ArchivedRecord
+
+
+class Command(BaseCommand):
+    help = (
+        'Move old meetings and processed requests into the archive table in small batches. '
+        'Safe to interrupt: a rerun resumes with the rows that are still left.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.ARCHIVE_AFTER_DAYS, help='Archive rows older than N days')
+        parser.add_argument('--kind', choices=[kind for kind, _ in ArchivedRecord.KIND_CHOICES], action='append',
+                            help='Only archive this kind (repeatable)')
+        parser.add_argument('--batch-size', type=int, default=settings.ARCHIVE_BATCH_SIZE)
+        parser.add_argument('--sleep', type=float, default=settings.ARCHIVE_BATCH_PAUSE,
+                            help='Pause between batches in seconds')
+        parser.add_argument('--max-batches', type=int, help='Stop after N batches (resume with the next run)')
+        parser.add_argument('--dry-run', action='store_true', help='Only count rows that would be archived')
+
+    def handle(self, *args, **options):
+        kinds = options['kind'] or [kind for kind, _ in ArchivedRecord.KIND_CHOICES]
+        if options['dry_run']:
+            cutoff = archive_cutoff(options['days'])
+            for kind in kinds:
+                self.stdout.write(f'{kind}: {pending_count(kind, cutoff)} rows older than {cutoff:%Y-%m-%d %H:%M}')
+            return
+
+        totals = dict.fromkeys(kinds, 0)
+        batches = run_archive(
+            kinds=kinds,
+            days=options['days'],
+            batch_size=options['batch_size'],
+            pause=options['sleep'],
+            max_batches=options['max_batches'],
+        )
+        for kind, archived in batches:
+            totals[kind] += archived
+            self.stdout.write(f'{kind}: archived {archived} (total {totals[kind]})')
+
+        summary = ', '.join(f'{totals[kind]} {kind}s' for kind in kinds)
+        self.stdout.write(self.style.SUCCESS(f'Archived {summary}'))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from booking import auto_approval
+
+
+class Command(BaseCommand):
+    help = (
+        'Evaluate pending booking requests against the active auto-approval rules and approve the matches. '
+        'With --dry-run nothing is changed and a report of what would happen (and why) is printed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report decisions')
+        parser.add_argument('--limit', type=int, default=None, help='Requests to evaluate (default AUTO_APPROVAL_BATCH_SIZE)')
+
+    def handle(self, *args, **options):
+        if not auto_approval.compiled_rules():
+            self.stdout.write(self.style.WARNING('No active auto-approval rules'))
+            return
+
+        decisions = auto_approval.run_backlog(dry_run=options['dry_run'], limit=options['limit'])
+        approved = 0
+        for decision in decisions:
+            booking_request = decision.booking_request
+            start = timezone.localtime(booking_request.preferred_start_time)
+            if decision.approved:
+                approved += 1
+                outcome = self.style.SUCCESS(f"{'APPROVE' if options['dry_run'] else 'APPROVED':<8}")
+                detail = f'rule: {decision.rule.name}'
+            else:
+                outcome = f"{'PENDING':<8}"
+                detail = decision.reason
+            self.stdout.write(f'{outcome} {booking_request.id} {start:%Y-%m-%d %H:%M} {booking_request.title[:40]} - {detail}')
+
+        verb = 'would be approved' if options['dry_run'] else 'approved'
+        self.stdout.write(f'{approved} of {len(decisions)} pending requests {verb}')
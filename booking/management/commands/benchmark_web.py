@@ -0,0 +1,141 @@
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from importlib import import_module
+
+import httpx
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+DEFAULT_VIEWS = ('booking:api_meeting_stats', 'booking:api_department_stats')
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+class Command(BaseCommand):
+    help = (
+        'Start gunicorn in WSGI and ASGI mode (gunicorn.conf.py, WEB_SERVER_MODE) and compare '
+        'requests per second and latency percentiles for the booking JSON endpoints. '
+        'The load generator runs on the same host, so compare modes against each other, not absolute numbers.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', choices=['wsgi', 'asgi'], action='append', help='Server mode (repeatable, default both)')
+        parser.add_argument('--path', action='append', help='URL path to request (repeatable, default the stats APIs)')
+        parser.add_argument('--requests', type=int, default=2000, help='Requests per mode and path')
+        parser.add_argument('--concurrency', type=int, default=50, help='Concurrent client connections')
+        parser.add_argument('--warmup', type=int, default=50, help='Unmeasured requests before each run')
+        parser.add_argument('--workers', type=int, default=2, help='WEB_CONCURRENCY for both modes')
+        parser.add_argument('--threads', type=int, default=1, help='GUNICORN_THREADS for WSGI mode')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--user', help='Username to authenticate as (default: first superuser)')
+
+    def handle(self, *args, **options):
+        paths = options['path'] or [reverse(name) for name in DEFAULT_VIEWS]
+        cookies = {settings.SESSION_COOKIE_NAME: self.session_key(options['user'])}
+
+        rows = []
+        for mode in options['mode'] or ['wsgi', 'asgi']:
+            self.stdout.write(f'Starting gunicorn ({mode}) on port {options["port"]}...')
+            server = self.start_server(mode, options)
+            try:
+                for path in paths:
+                    url = f'http://127.0.0.1:{options["port"]}{path}'
+                    result = asyncio.run(self.run_load(url, cookies, options))
+                    rows.append((mode, path, *result))
+            finally:
+                server.terminate()
+                server.wait(timeout=30)
+
+        self.stdout.write('')
+        self.stdout.write(f'{"mode":<6} {"path":<36} {"req/s":>9} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"max ms":>8} {"errors":>7}')
+        for mode, path, rps, p50, p95, p99, slowest, errors in rows:
+            self.stdout.write(
+                f'{mode:<6} {path:<36} {rps:>9.1f} {p50:>8.1f} {p95:>8.1f} {p99:>8.1f} {slowest:>8.1f} {errors:>7}'
+            )
+
+    def session_key(self, username):
+        User = get_user_model()
+        users = User.objects.filter(username=username) if username else User.objects.filter(is_superuser=True)
+        user = users.order_by('id').first()
+        if user is None:
+            raise CommandError('No user to authenticate as; pass --user or create a superuser')
+        session = import_module(settings.SESSION_ENGINE).SessionStore()
+        session[SESSION_KEY] = user._meta.pk.value_to_string(user)
+        session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.save()
+        return session.session_key
+
+    def start_server(self, mode, options):
+        env = {
+            **os.environ,
+            'WEB_SERVER_MODE': mode,
+            'GUNICORN_BIND': f'127.0.0.1:{options["port"]}',
+            'WEB_CONCURRENCY': str(options['workers']),
+            'GUNICORN_THREADS': str(options['threads']),
+            # Worker qayta ishga tushishi o'lchovga aralashmasin
+            'GUNICORN_MAX_REQUESTS': '0',
+        }
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '--log-level', 'warning'],
+            cwd=settings.BASE_DIR, env=env,
+        )
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f'gunicorn ({mode}) exited with code {server.returncode}')
+            try:
+                socket.create_connection(('127.0.0.1', options['port']), timeout=1).close()
+                return server
+            except OSError:
+                time.sleep(0.2)
+        server.terminate()
+        raise CommandError(f'gunicorn ({mode}) did not start listening within 30s')
+
+    async def run_load(self, url, cookies, options):
+        concurrency = options['concurrency']
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(cookies=cookies, limits=limits, timeout=60, follow_redirects=False) as client:
+            for _ in range(options['warmup']):
+                await client.get(url)
+
+            latencies = []
+            errors = 0
+            remaining = options['requests']
+
+            async def worker():
+                nonlocal remaining, errors
+                while remaining > 0:
+                    remaining -= 1
+                    started = time.perf_counter()
+                    try:
+                        response = await client.get(url)
+                        failed = response.status_code != 200
+                    except httpx.HTTPError:
+                        failed = True
+                    latencies.append((time.perf_counter() - started) * 1000)
+                    errors += failed
+
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        return (
+            len(latencies) / elapsed,
+            percentile(latencies, 0.50),
+            percentile(latencies, 0.95),
+            percentile(latencies, 0.99),
+            latencies[-1] if latencies else 0.0,
+            errors,
+        )
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from booking import attendance
+from booking.zoom import zoom_configured
+
+
+class Command(BaseCommand):
+    help = (
+        'Fetch Zoom participant reports for ended meetings and store per-participant attendance. '
+        'Runs batches of --batch-size meetings until none are due (the Celery beat task runs one batch).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help='Meetings per batch (default ATTENDANCE_BATCH_SIZE)')
+        parser.add_argument('--once', action='store_true', help='Process a single batch only')
+
+    def handle(self, *args, **options):
+        if not zoom_configured():
+            self.stdout.write(self.style.WARNING('Zoom API is not configured'))
+            return
+        total_meetings = total_participants = 0
+        while True:
+            result = attendance.ingest_due(options['batch_size'])
+            total_meetings += result['meetings']
+            total_participants += result['participants']
+            self.stdout.write(f"Batch: {result['meetings']} meetings, {result['participants']} participants")
+            if options['once'] or not result['meetings']:
+                break
+        self.stdout.write(self.style.SUCCESS(f'Done: {total_meetings} meetings, {total_participants} participants'))
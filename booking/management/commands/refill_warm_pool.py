@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from booking import warm_pool
+
+
+class Command(BaseCommand):
+    help = (
+        'Top up the pool of pre-created Zoom meetings (ZOOM_WARM_POOL_SIZE per host). '
+        'Outside ZOOM_WARM_POOL_OFFPEAK_HOURS only ZOOM_WARM_POOL_MIN is kept unless --force is given.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Fill up to the full pool size now')
+        parser.add_argument('--status', action='store_true', help='Only show how many meetings each host has')
+
+    def handle(self, *args, **options):
+        if not options['status']:
+            if not warm_pool.enabled():
+                self.stdout.write(self.style.WARNING('Warm pool is disabled (ZOOM_WARM_POOL_SIZE=0)'))
+                return
+            created = warm_pool.refill(force=options['force'])
+            for host, count in created.items():
+                self.stdout.write(f'{host}: created {count}')
+
+        for host in settings.ZOOM_HOST_USER_IDS:
+            self.stdout.write(f'{host}: {warm_pool.available(host)}/{settings.ZOOM_WARM_POOL_SIZE} available')
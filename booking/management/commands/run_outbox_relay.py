@@ -0,0 +1,35 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from booking.outbox import get_publisher, prune_delivered, relay
+
+
+class Command(BaseCommand):
+    help = 'Deliver transactional outbox events to Celery or Redis'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Drain the outbox once and exit')
+        parser.add_argument('--batch-size', type=int, default=settings.OUTBOX_BATCH_SIZE)
+        parser.add_argument('--interval', type=float, default=settings.OUTBOX_POLL_INTERVAL)
+
+    def handle(self, *args, **options):
+        publisher = get_publisher()
+        if options['once']:
+            delivered = relay(publisher, options['batch_size'])
+            pruned = prune_delivered()
+            self.stdout.write(self.style.SUCCESS(f'Delivered {delivered} events, pruned {pruned}'))
+            return
+
+        self.stdout.write(self.style.SUCCESS('Starting outbox relay...'))
+        next_prune = 0
+        while True:
+            delivered = relay(publisher, options['batch_size'])
+            if delivered:
+                self.stdout.write(f'Delivered {delivered} events')
+            if time.monotonic() >= next_prune:
+                prune_delivered()
+                next_prune = time.monotonic() + 3600
+            if delivered < options['batch_size']:
+                time.sleep(options['interval'])
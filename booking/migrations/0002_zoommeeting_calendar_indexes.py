@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='zoommeeting',
+            index=models.Index(fields=['department', 'start_time'], name='booking_zm_dept_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='zoommeeting',
+            index=models.Index(fields=['created_by', 'start_time'], name='booking_zm_creator_start_idx'),
+        ),
+    ]
@@ -0,0 +1,102 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE booking_searchdocument_fts USING fts5(
+        title, document,
+        content='booking_searchdocument', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER booking_searchdocument_ai AFTER INSERT ON booking_searchdocument BEGIN
+        INSERT INTO booking_searchdocument_fts(rowid, title, document)
+        VALUES (new.id, new.title, new.document);
+    END
+    """,
+    """
+    CREATE TRIGGER booking_searchdocument_ad AFTER DELETE ON booking_searchdocument BEGIN
+        INSERT INTO booking_searchdocument_fts(booking_searchdocument_fts, rowid, title, document)
+        VALUES ('delete', old.id, old.title, old.document);
+    END
+    """,
+    """
+    CREATE TRIGGER booking_searchdocument_au AFTER UPDATE ON booking_searchdocument BEGIN
+        INSERT INTO booking_searchdocument_fts(booking_searchdocument_fts, rowid, title, document)
+        VALUES ('delete', old.id, old.title, old.document);
+        INSERT INTO booking_searchdocument_fts(rowid, title, document)
+        VALUES (new.id, new.title, new.document);
+    END
+    """,
+]
+
+SQLITE_BACKWARD = [
+    'DROP TRIGGER IF EXISTS booking_searchdocument_au',
+    'DROP TRIGGER IF EXISTS booking_searchdocument_ad',
+    'DROP TRIGGER IF EXISTS booking_searchdocument_ai',
+    'DROP TABLE IF EXISTS booking_searchdocument_fts',
+]
+
+POSTGRESQL_FORWARD = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    """
+    ALTER TABLE booking_searchdocument ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(document, '')), 'B')
+    ) STORED
+    """,
+    'CREATE INDEX booking_searchdocument_vector_idx ON booking_searchdocument USING GIN (search_vector)',
+    'CREATE INDEX booking_searchdocument_trgm_idx ON booking_searchdocument USING GIN (document gin_trgm_ops)',
+]
+
+POSTGRESQL_BACKWARD = [
+    'DROP INDEX IF EXISTS booking_searchdocument_trgm_idx',
+    'DROP INDEX IF EXISTS booking_searchdocument_vector_idx',
+    'ALTER TABLE booking_searchdocument DROP COLUMN IF EXISTS search_vector',
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+create_search_index = _run({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRESQL_FORWARD})
+drop_search_index = _run({'sqlite': SQLITE_BACKWARD, 'postgresql': POSTGRESQL_BACKWARD})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('telegram_bot', '0003_alter_department_id_alter_departmentadmin_id_and_more'),
+        ('booking', '0002_zoommeeting_calendar_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_type', models.CharField(choices=[('meeting', 'Uchrashuv'), ('request', "So'rov"), ('user', 'Foydalanuvchi')], max_length=10)),
+                ('object_id', models.CharField(max_length=36)),
+                ('title', models.CharField(max_length=200)),
+                ('document', models.TextField(blank=True)),
+                ('start_time', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('department', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='telegram_bot.department')),
+                ('owner', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='telegram_bot.telegramuser')),
+            ],
+            options={
+                'unique_together': {('object_type', 'object_id')},
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0003_searchdocument'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bookingrequest',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='booking_br_status_created_idx'),
+        ),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('telegram_bot', '0003_alter_department_id_alter_departmentadmin_id_and_more'),
+        ('booking', '0005_outboxevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MeetingSeries',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField(blank=True)),
+                ('dtstart', models.DateTimeField()),
+                ('duration', models.PositiveIntegerField(help_text='Daqiqalarda')),
+                ('rrule', models.CharField(max_length=255)),
+                ('exdates', models.JSONField(blank=True, default=list)),
+                ('until', models.DateTimeField(blank=True, null=True)),
+                ('zoom_meeting_id', models.CharField(blank=True, max_length=100)),
+                ('meeting_url', models.URLField(blank=True)),
+                ('password', models.CharField(blank=True, max_length=50)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'meeting series',
+                'ordering': ['dtstart'],
+            },
+        ),
+        migrations.AddField(
+            model_name='bookingrequest',
+            name='recurrence',
+            field=models.CharField(blank=True, help_text='RRULE, masalan: FREQ=WEEKLY;COUNT=10', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='zoommeeting',
+            name='original_start',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='meetingseries',
+            name='booking_request',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='booking.bookingrequest'),
+        ),
+        migrations.AddField(
+            model_name='meetingseries',
+            name='created_by',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='telegram_bot.telegramuser'),
+        ),
+        migrations.AddField(
+            model_name='meetingseries',
+            name='department',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='telegram_bot.department'),
+        ),
+        migrations.AddField(
+            model_name='zoommeeting',
+            name='series',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='overrides', to='booking.meetingseries'),
+        ),
+        migrations.AddIndex(
+            model_name='meetingseries',
+            index=models.Index(fields=['department', 'dtstart'], name='booking_ms_dept_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='meetingseries',
+            index=models.Index(fields=['created_by', 'dtstart'], name='booking_ms_creator_start_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='zoommeeting',
+            constraint=models.UniqueConstraint(fields=('series', 'original_start'), name='booking_zm_series_occurrence_uniq'),
+        ),
+    ]
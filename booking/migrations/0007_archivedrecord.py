@@ -0,0 +1,58 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:14
+
+import django.core.serializers.json
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('telegram_bot', '0003_alter_department_id_alter_departmentadmin_id_and_more'),
+        ('booking', '0006_meetingseries'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('meeting', 'Uchrashuv'), ('request', "So'rov")], max_length=10)),
+                ('object_id', models.UUIDField()),
+                ('title', models.CharField(max_length=200)),
+                ('start_time', models.DateTimeField()),
+                ('status', models.CharField(choices=[('scheduled', 'Rejalashtirilgan'), ('active', 'Faol'), ('ended', 'Tugagan'), ('cancelled', 'Bekor qilingan'), ('pending', 'Kutilmoqda'), ('approved', 'Tasdiqlangan'), ('rejected', 'Rad etilgan')], max_length=20)),
+                ('data', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-start_time'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='zoommeeting',
+            index=models.Index(fields=['start_time'], name='booking_zm_start_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivedrecord',
+            name='department',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='telegram_bot.department'),
+        ),
+        migrations.AddField(
+            model_name='archivedrecord',
+            name='owner',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='telegram_bot.telegramuser'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedrecord',
+            index=models.Index(fields=['kind', 'start_time'], name='booking_archive_kind_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedrecord',
+            index=models.Index(fields=['department', 'start_time'], name='booking_archive_dept_start_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='archivedrecord',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id'), name='booking_archive_object_uniq'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0007_archivedrecord'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='zoommeeting',
+            name='zoom_host',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.CreateModel(
+            name='PooledZoomMeeting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('host', models.CharField(max_length=100)),
+                ('zoom_meeting_id', models.CharField(max_length=100, unique=True)),
+                ('meeting_url', models.URLField()),
+                ('password', models.CharField(blank=True, max_length=50)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['host', 'created_at'], name='booking_pool_host_created_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('telegram_bot', '0003_alter_department_id_alter_departmentadmin_id_and_more'),
+        ('booking', '0008_zoom_warm_pool'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('meetings', models.PositiveIntegerField(default=0)),
+                ('held', models.PositiveIntegerField(default=0)),
+                ('participants', models.PositiveIntegerField(default=0)),
+                ('attended_seconds', models.PositiveBigIntegerField(default=0)),
+                ('scheduled_seconds', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'attendance daily',
+                'ordering': ['-day'],
+            },
+        ),
+        migrations.CreateModel(
+            name='MeetingAttendance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('participant', models.CharField(max_length=100)),
+                ('name', models.CharField(blank=True, max_length=200)),
+                ('join_offset', models.IntegerField()),
+                ('leave_offset', models.IntegerField()),
+                ('attended_seconds', models.PositiveIntegerField()),
+            ],
+            options={
+                'ordering': ['join_offset'],
+            },
+        ),
+        migrations.AddField(
+            model_name='zoommeeting',
+            name='attendance_synced_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='zoommeeting',
+            index=models.Index(condition=models.Q(('attendance_synced_at__isnull', True)), fields=['start_time'], name='booking_zm_attendance_todo_idx'),
+        ),
+        migrations.AddField(
+            model_name='meetingattendance',
+            name='meeting',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance', to='booking.zoommeeting'),
+        ),
+        migrations.AddField(
+            model_name='attendancedaily',
+            name='department',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='telegram_bot.department'),
+        ),
+        migrations.AddConstraint(
+            model_name='meetingattendance',
+            constraint=models.UniqueConstraint(fields=('meeting', 'participant'), name='booking_attendance_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='attendancedaily',
+            constraint=models.UniqueConstraint(fields=('department', 'day'), name='booking_attendance_daily_uniq'),
+        ),
+    ]
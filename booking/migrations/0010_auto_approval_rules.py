@@ -0,0 +1,51 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('telegram_bot', '0003_alter_department_id_alter_departmentadmin_id_and_more'),
+        ('booking', '0009_meeting_attendance'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AutoApprovalRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('priority', models.PositiveIntegerField(default=100)),
+                ('max_duration', models.PositiveIntegerField(blank=True, help_text='Daqiqalarda', null=True)),
+                ('work_start', models.TimeField(blank=True, null=True)),
+                ('work_end', models.TimeField(blank=True, null=True)),
+                ('weekdays', models.CharField(blank=True, help_text='0 - dushanba ... 6 - yakshanba, masalan: 0,1,2,3,4', max_length=20)),
+                ('require_no_conflict', models.BooleanField(default=True, help_text="Bo'limda shu vaqtda boshqa uchrashuv bo'lmasligi")),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('department', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='auto_approval_rules', to='telegram_bot.department')),
+                ('trusted_requesters', models.ManyToManyField(blank=True, related_name='+', to='telegram_bot.telegramuser')),
+            ],
+            options={
+                'ordering': ['priority', 'id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='AutoApprovalDecision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('outcome', models.CharField(choices=[('approved', 'Tasdiqlangan'), ('no_match', 'Qoida mos kelmadi')], max_length=10)),
+                ('source', models.CharField(choices=[('create', "So'rov yaratilganda"), ('backlog', 'Navbatni tekshirish')], max_length=10)),
+                ('reason', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('booking_request', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='auto_decisions', to='booking.bookingrequest')),
+                ('rule', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='booking.autoapprovalrule')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:35
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0010_auto_approval_rules'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('meeting', 'Uchrashuv'), ('request', "So'rov")], max_length=10)),
+                ('object_id', models.UUIDField()),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['deleted_at', 'id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='bookingrequest',
+            index=models.Index(fields=['updated_at', 'id'], name='booking_br_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='zoommeeting',
+            index=models.Index(fields=['updated_at', 'id'], name='booking_zm_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['deleted_at', 'id'], name='booking_tombstone_sync_idx'),
+        ),
+    ]
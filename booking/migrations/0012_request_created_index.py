@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0011_delta_sync'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bookingrequest',
+            index=models.Index(fields=['created_at', 'department'], name='booking_br_created_idx'),
+        ),
+    ]
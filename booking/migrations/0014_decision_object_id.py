@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-19 12:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import F
+
+
+def copy_request_ids(apps, schema_editor):
+    AutoApprovalDecision = apps.get_model('booking', 'AutoApprovalDecision')
+    AutoApprovalDecision.objects.update(object_id=F('booking_request_id'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0013_outbox_dead_letter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='autoapprovaldecision',
+            name='object_id',
+            field=models.UUIDField(db_index=True, null=True),
+        ),
+        migrations.RunPython(copy_request_ids, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='autoapprovaldecision',
+            name='object_id',
+            field=models.UUIDField(db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='autoapprovaldecision',
+            name='booking_request',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='auto_decisions', to='booking.bookingrequest'),
+        ),
+    ]
@@ -1,3 +1,5 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
@@ -14,6 +16,8 @@ class ZoomMeeting(models.Model):
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     zoom_meeting_id = models.CharField(max_length=100, blank=True)
+    # Uchrashuv egasi bo'lgan Zoom foydalanuvchisi (bo'sh - ZOOM_USER_ID)
+    zoom_host = models.CharField(max_length=100, blank=True)
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True)
     department = models.ForeignKey(Department, on_delete=models.CASCADE)
@@ -24,11 +28,32 @@ class ZoomMeeting(models.Model):
     password = models.CharField(max_length=50, blank=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='scheduled')
     is_active = models.BooleanField(default=True)
+    # Takrorlanuvchi seriyaning tahrirlangan takrori (faqat tahrirlanganda yaratiladi)
+    series = models.ForeignKey('MeetingSeries', on_delete=models.CASCADE, null=True, blank=True, related_name='overrides')
+    original_start = models.DateTimeField(null=True, blank=True)
+    # Zoom qatnashuv hisoboti olingan vaqt (booking.attendance)
+    attendance_synced_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-start_time']
+        indexes = [
+            models.Index(fields=['department', 'start_time'], name='booking_zm_dept_start_idx'),
+            models.Index(fields=['created_by', 'start_time'], name='booking_zm_creator_start_idx'),
+            # Arxivlash uchun (bo'limsiz start_time < chegara)
+            models.Index(fields=['start_time'], name='booking_zm_start_idx'),
+            # Qatnashuv hisoboti hali olinmagan uchrashuvlar
+            models.Index(
+                fields=['start_time'], name='booking_zm_attendance_todo_idx',
+                condition=models.Q(attendance_synced_at__isnull=True),
+            ),
+            # Delta-sinxronlash (booking.changes) uchun keyset
+            models.Index(fields=['updated_at', 'id'], name='booking_zm_sync_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['series', 'original_start'], name='booking_zm_series_occurrence_uniq'),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.start_time.strftime('%Y-%m-%d %H:%M')}"
@@ -54,6 +79,7 @@ class BookingRequest(models.Model):
     duration = models.PositiveIntegerField(help_text="Daqiqalarda")
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     rejection_reason = models.TextField(blank=True)
+    recurrence = models.CharField(max_length=255, blank=True, help_text="RRULE, masalan: FREQ=WEEKLY;COUNT=10")
     processed_by = models.ForeignKey(TelegramUser, on_delete=models.SET_NULL, null=True, blank=True, related_name='processed_requests')
     processed_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -61,6 +87,334 @@ class BookingRequest(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', '-created_at', '-id'], name='booking_br_status_created_idx'),
+            models.Index(fields=['updated_at', 'id'], name='booking_br_sync_idx'),
+            # Analitika: created_at oralig'i (bo'lim filtri bilan)
+            models.Index(fields=['created_at', 'department'], name='booking_br_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.status}"
+
+class MeetingSeries(models.Model):
+    """
+    Takrorlanuvchi uchrashuvlar seriyasi: bitta qator, RRULE va istisnolar.
+
+    Takrorlar saqlanmaydi, so'ralgan vaqt oralig'i uchun booking.recurrence
+    orqali hisoblanadi. Tahrirlangan takror ZoomMeeting (series,
+    original_start) sifatida yoziladi, o'chirilgan takror exdates ga qo'shiladi.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    title = models.CharField(max_length=200)
+    description = models.TextField(blank=True)
+    department = models.ForeignKey(Department, on_delete=models.CASCADE)
+    created_by = models.ForeignKey(TelegramUser, on_delete=models.CASCADE)
+    booking_request = models.OneToOneField('BookingRequest', on_delete=models.SET_NULL, null=True, blank=True)
+    dtstart = models.DateTimeField()
+    duration = models.PositiveIntegerField(help_text="Daqiqalarda")
+    rrule = models.CharField(max_length=255)
+    exdates = models.JSONField(default=list, blank=True)
+    # Oxirgi takror tugash vaqti (cheksiz seriya uchun None), oraliq filtrlari uchun
+    until = models.DateTimeField(null=True, blank=True)
+    zoom_meeting_id = models.CharField(max_length=100, blank=True)
+    meeting_url = models.URLField(blank=True)
+    password = models.CharField(max_length=50, blank=True)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['dtstart']
+        verbose_name_plural = 'meeting series'
+        indexes = [
+            models.Index(fields=['department', 'dtstart'], name='booking_ms_dept_start_idx'),
+            models.Index(fields=['created_by', 'dtstart'], name='booking_ms_creator_start_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.title} ({self.rrule})"
+
+class SearchDocument(models.Model):
+    """
+    Qidiruv indeksi yozuvi (uchrashuv, so'rov yoki foydalanuvchi uchun bitta).
+
+    SQLite da FTS5 jadvali, PostgreSQL da tsvector/trigram indekslari shu
+    jadval asosida triggerlar va generated ustun orqali yangilanadi.
+    """
+    TYPE_MEETING = 'meeting'
+    TYPE_REQUEST = 'request'
+    TYPE_USER = 'user'
+    TYPE_CHOICES = [
+        (TYPE_MEETING, 'Uchrashuv'),
+        (TYPE_REQUEST, "So'rov"),
+        (TYPE_USER, 'Foydalanuvchi'),
+    ]
+
+    object_type = models.CharField(max_length=10, choices=TYPE_CHOICES)
+    object_id = models.CharField(max_length=36)
+    title = models.CharField(max_length=200)
+    document = models.TextField(blank=True)
+    department = models.ForeignKey(Department, on_delete=models.CASCADE, null=True, blank=True)
+    owner = models.ForeignKey(TelegramUser, on_delete=models.CASCADE, null=True, blank=True)
+    start_time = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['object_type', 'object_id']
+
+    def __str__(self):
+        return f"{self.object_type}: {self.title}"
+
+class OutboxEvent(models.Model):
+    """
+    Tranzaksion outbox: model o'zgarishi bilan bir tranzaksiyada yoziladigan hodisa.
+
+    Relay (run_outbox_relay) yetkazilmagan hodisalarni id tartibida olib,
+    Celery yoki Redis ga yuboradi (kamida bir marta yetkazish).
+    OUTBOX_MAX_ATTEMPTS marta yuborib bo'lmagan hodisa dead_at bilan
+    belgilanadi va navbatdan chiqadi (adminda qayta navbatga qo'yiladi).
+    """
+    topic = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+    dead_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(
+                fields=['id'], name='booking_outbox_pending_idx',
+                condition=models.Q(delivered_at__isnull=True, dead_at__isnull=True),
+            ),
+            models.Index(fields=['delivered_at'], name='booking_outbox_delivered_idx'),
+            models.Index(fields=['dead_at'], name='booking_outbox_dead_idx', condition=models.Q(dead_at__isnull=False)),
+        ]
+
+    def __str__(self):
+        return f"{self.topic} #{self.id}"
+
+class PooledZoomMeeting(models.Model):
+    """
+    Oldindan yaratilgan (zaxiradagi) Zoom uchrashuvi.
+
+    Tasdiqlashda booking.warm_pool.claim orqali ZoomMeeting ga o'tkaziladi
+    va qator o'chiriladi; nom va vaqt Zoom da fonda yangilanadi.
+    """
+    host = models.CharField(max_length=100)
+    zoom_meeting_id = models.CharField(max_length=100, unique=True)
+    meeting_url = models.URLField()
+    password = models.CharField(max_length=50, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['host', 'created_at'], name='booking_pool_host_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.host}: {self.zoom_meeting_id}"
+
+class MeetingAttendance(models.Model):
+    """
+    Uchrashuv qatnashchisi: bitta uchrashuv/qatnashchi uchun bitta qator.
+
+    Qayta ulanishlar birlashtiriladi: birinchi kirish, oxirgi chiqish va
+    jami qatnashgan soniyalar. Vaqtlar uchrashuv boshlanishiga nisbatan
+    soniyalarda (erta kirgan bo'lsa manfiy).
+    """
+    meeting = models.ForeignKey(ZoomMeeting, on_delete=models.CASCADE, related_name='attendance')
+    # Zoom user_id, email yoki (mehmonlar uchun) ism
+    participant = models.CharField(max_length=100)
+    name = models.CharField(max_length=200, blank=True)
+    join_offset = models.IntegerField()
+    leave_offset = models.IntegerField()
+    attended_seconds = models.PositiveIntegerField()
+
+    class Meta:
+        ordering = ['join_offset']
+        constraints = [
+            models.UniqueConstraint(fields=['meeting', 'participant'], name='booking_attendance_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.name or self.participant} ({self.meeting_id})"
+
+class AttendanceDaily(models.Model):
+    """
+    Bo'lim va kun bo'yicha qatnashuv yig'indilari.
+
+    Har bir uchrashuv hisoboti olinganda bir marta oshiriladi; bo'lim
+    ko'rsatkichlari qatnashuv qatorlarini emas, shu jadvalni o'qiydi.
+    """
+    department = models.ForeignKey(Department, on_delete=models.CASCADE)
+    day = models.DateField()
+    # Hisoboti olingan uchrashuvlar va ulardan kamida bitta qatnashchisi borlari
+    meetings = models.PositiveIntegerField(default=0)
+    held = models.PositiveIntegerField(default=0)
+    participants = models.PositiveIntegerField(default=0)
+    attended_seconds = models.PositiveBigIntegerField(default=0)
+    # Qatnashchilar soni x rejalashtirilgan davomiylik
+    scheduled_seconds = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-day']
+        verbose_name_plural = 'attendance daily'
+        constraints = [
+            models.UniqueConstraint(fields=['department', 'day'], name='booking_attendance_daily_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.department}: {self.day}"
+
+class Tombstone(models.Model):
+    """
+    O'chirilgan uchrashuv yoki so'rov izi (delta-sinxronlash, booking.changes).
+
+    post_delete signalida yoziladi (arxivlash ham shu yo'l bilan o'chiradi)
+    va TOMBSTONE_RETENTION_DAYS dan keyin tozalanadi.
+    """
+    KIND_MEETING = 'meeting'
+    KIND_REQUEST = 'request'
+    KIND_CHOICES = [
+        (KIND_MEETING, 'Uchrashuv'),
+        (KIND_REQUEST, "So'rov"),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.UUIDField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['deleted_at', 'id']
+        indexes = [
+            models.Index(fields=['deleted_at', 'id'], name='booking_tombstone_sync_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}: {self.object_id}"
+
+class AutoApprovalRule(models.Model):
+    """
+    So'rovni avtomatik tasdiqlash qoidasi (booking.auto_approval).
+
+    Qoida barcha belgilangan shartlari bajarilganda ishlaydi; bo'sh shartlar
+    tekshirilmaydi. Bo'lim bo'sh bo'lsa qoida barcha bo'limlarga tegishli.
+    Qoidalar priority bo'yicha (kichigi birinchi) tekshiriladi.
+    """
+    name = models.CharField(max_length=100)
+    department = models.ForeignKey(
+        Department, on_delete=models.CASCADE, null=True, blank=True, related_name='auto_approval_rules',
+    )
+    priority = models.PositiveIntegerField(default=100)
+    max_duration = models.PositiveIntegerField(null=True, blank=True, help_text="Daqiqalarda")
+    # Ish vaqti (mahalliy): uchrashuv shu oraliqda boshlanib, tugashi kerak
+    work_start = models.TimeField(null=True, blank=True)
+    work_end = models.TimeField(null=True, blank=True)
+    weekdays = models.CharField(max_length=20, blank=True, help_text="0 - dushanba ... 6 - yakshanba, masalan: 0,1,2,3,4")
+    # Bo'sh bo'lsa istalgan foydalanuvchi
+    trusted_requesters = models.ManyToManyField(TelegramUser, blank=True, related_name='+')
+    require_no_conflict = models.BooleanField(default=True, help_text="Bo'limda shu vaqtda boshqa uchrashuv bo'lmasligi")
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['priority', 'id']
+
+    def __str__(self):
+        return self.name
+
+    def weekday_numbers(self):
+        return {int(day) for day in self.weekdays.split(',') if day.strip()}
+
+    def clean(self):
+        try:
+            days = self.weekday_numbers()
+        except ValueError:
+            raise ValidationError({'weekdays': "Kunlar 0-6 oralig'idagi sonlar, vergul bilan"})
+        if not days <= set(range(7)):
+            raise ValidationError({'weekdays': "Kunlar 0-6 oralig'idagi sonlar, vergul bilan"})
+        if (self.work_start is None) != (self.work_end is None):
+            raise ValidationError("Ish vaqtining boshlanishi va tugashi birga kiritiladi")
+        if self.work_start is not None and self.work_start >= self.work_end:
+            raise ValidationError({'work_end': "Tugash vaqti boshlanishidan keyin bo'lishi kerak"})
+
+class AutoApprovalDecision(models.Model):
+    """
+    Avtomatik tasdiqlash qarori: qaysi qoida ishladi yoki nega hech biri ishlamadi.
+
+    So'rov arxivlansa yoki o'chirilsa jurnal saqlanadi: booking_request
+    bo'shatiladi, object_id da so'rov ID si qoladi (ArchivedRecord.object_id).
+    """
+    OUTCOME_APPROVED = 'approved'
+    OUTCOME_NO_MATCH = 'no_match'
+    OUTCOME_CHOICES = [
+        (OUTCOME_APPROVED, 'Tasdiqlangan'),
+        (OUTCOME_NO_MATCH, 'Qoida mos kelmadi'),
+    ]
+    SOURCE_CREATE = 'create'
+    SOURCE_BACKLOG = 'backlog'
+    SOURCE_CHOICES = [
+        (SOURCE_CREATE, "So'rov yaratilganda"),
+        (SOURCE_BACKLOG, 'Navbatni tekshirish'),
+    ]
+
+    booking_request = models.ForeignKey(
+        BookingRequest, on_delete=models.SET_NULL, null=True, blank=True, related_name='auto_decisions',
+    )
+    object_id = models.UUIDField(db_index=True)
+    rule = models.ForeignKey(AutoApprovalRule, on_delete=models.SET_NULL, null=True, blank=True)
+    outcome = models.CharField(max_length=10, choices=OUTCOME_CHOICES)
+    source = models.CharField(max_length=10, choices=SOURCE_CHOICES)
+    reason = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.object_id}: {self.outcome}"
+
+class ArchivedRecord(models.Model):
+    """
+    Arxivlangan uchrashuv yoki so'rov (sovuq ma'lumot).
+
+    Asosiy jadvallardan booking.archive orqali partiyalab ko'chiriladi:
+    qidiruv va filtrlar uchun kerakli ustunlar alohida, qolgan barcha
+    maydonlar data da saqlanadi.
+    """
+    KIND_MEETING = 'meeting'
+    KIND_REQUEST = 'request'
+    KIND_CHOICES = [
+        (KIND_MEETING, 'Uchrashuv'),
+        (KIND_REQUEST, "So'rov"),
+    ]
+    STATUS_CHOICES = list({**dict(ZoomMeeting.STATUS_CHOICES), **dict(BookingRequest.STATUS_CHOICES)}.items())
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.UUIDField()
+    title = models.CharField(max_length=200)
+    department = models.ForeignKey(Department, on_delete=models.SET_NULL, null=True, blank=True)
+    owner = models.ForeignKey(TelegramUser, on_delete=models.SET_NULL, null=True, blank=True)
+    start_time = models.DateTimeField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES)
+    data = models.JSONField(encoder=DjangoJSONEncoder)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-start_time']
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='booking_archive_object_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['kind', 'start_time'], name='booking_archive_kind_start_idx'),
+            models.Index(fields=['department', 'start_time'], name='booking_archive_dept_start_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()}: {self.title}"
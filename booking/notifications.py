@@ -0,0 +1,30 @@
+"""
+Telegram orqali xabar yuborish (Celery vazifalari va boshqa sinxron kod uchun).
+"""
+import asyncio
+import logging
+
+from django.conf import settings
+from telegram import Bot
+from telegram.error import TelegramError
+
+from zoomga.metrics import telegram_request
+
+logger = logging.getLogger(__name__)
+
+
+async def _send(chat_id, text, parse_mode):
+    async with Bot(settings.TELEGRAM_BOT_TOKEN, request=telegram_request(connection_pool_size=1)) as bot:
+        await bot.send_message(chat_id=chat_id, text=text, parse_mode=parse_mode)
+
+
+def send_telegram_message(chat_id, text, parse_mode=None):
+    if not settings.TELEGRAM_BOT_TOKEN:
+        logger.warning("TELEGRAM_BOT_TOKEN sozlanmagan, xabar yuborilmadi: %s", chat_id)
+        return False
+    try:
+        asyncio.run(_send(chat_id, text, parse_mode))
+    except TelegramError:
+        logger.exception("Telegram xabarini yuborib bo'lmadi: %s", chat_id)
+        return False
+    return True
@@ -0,0 +1,199 @@
+"""
+Tranzaksion outbox.
+
+Yon ta'sirlar (Zoom havolasini yaratish, Telegram xabarnomalari, keshni
+yangilash) model o'zgarishi bilan bir tranzaksiyada OutboxEvent sifatida
+yoziladi. Relay ularni id tartibida partiyalab oladi
+(SELECT ... FOR UPDATE SKIP LOCKED, shuning uchun bir nechta relay parallel
+ishlay oladi), yuboradi va yetkazilgan deb belgilaydi. Broker ishlamasa
+hodisa yo'qolmaydi: keyingi urinishda qayta yuboriladi.
+
+Aynan bitta hodisani yuborishda xato bo'lsa, uning urinishlari oshadi;
+OUTBOX_MAX_ATTEMPTS ga yetganda hodisa dead_at bilan belgilanadi va
+navbatni to'sib turmaydi. Ulanish xatolari (partiya ochilishi yoki
+yuborilishi) hodisaga yozilmaydi, shuning uchun broker uzilishi
+hodisalarni dead-letter ga o'tkazmaydi.
+"""
+import json
+import logging
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+MEETING_APPROVED = 'meeting.approved'
+MEETING_POOL_CLAIMED = 'meeting.pool_claimed'
+SERIES_APPROVED = 'series.approved'
+REQUEST_REJECTED = 'request.rejected'
+REQUEST_QUEUE_CHANGED = 'request.queue_changed'
+
+# Hodisa -> Celery vazifasi (payload kalit so'zli argumentlar sifatida uzatiladi)
+TASKS = {
+    MEETING_APPROVED: 'booking.tasks.provision_zoom_meeting',
+    MEETING_POOL_CLAIMED: 'booking.tasks.sync_pooled_meeting',
+    SERIES_APPROVED: 'booking.tasks.provision_meeting_series',
+    REQUEST_REJECTED: 'booking.tasks.notify_request_rejected',
+    REQUEST_QUEUE_CHANGED: 'booking.tasks.invalidate_request_queue',
+}
+
+
+def publish(topic, **payload):
+    """Hodisani joriy tranzaksiya ichida yozish"""
+    return OutboxEvent.objects.create(topic=topic, payload=payload)
+
+
+class CeleryPublisher:
+    """Hodisalarni Celery vazifalari sifatida yuborish (partiya uchun bitta ulanish)"""
+
+    all_or_nothing = False
+
+    def __init__(self):
+        from zoomga.celery import app
+
+        self.app = app
+        self.producer = None
+
+    @contextmanager
+    def batch(self):
+        with self.app.producer_or_acquire() as producer:
+            # Broker ishlamasa qatorlarni uzoq qulflab turmaslik uchun tez xato
+            producer.connection.ensure_connection(max_retries=1)
+            self.producer = producer
+            try:
+                yield self
+            finally:
+                self.producer = None
+
+    def publish(self, event):
+        if event.topic not in TASKS:
+            logger.error("Noma'lum outbox hodisasi, o'tkazib yuborildi: %s", event)
+            return
+        self.app.send_task(
+            TASKS[event.topic],
+            kwargs=event.payload,
+            task_id=f'outbox-{event.id}',
+            producer=self.producer,
+            retry=False,
+        )
+
+
+class RedisPublisher:
+    """Hodisalarni tashqi iste'molchilar uchun Redis stream ga yozish"""
+
+    # Pipeline bitta buyruq sifatida bajariladi
+    all_or_nothing = True
+
+    def __init__(self, url, stream):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.stream = stream
+        self.pipeline = None
+
+    @contextmanager
+    def batch(self):
+        self.pipeline = self.client.pipeline(transaction=False)
+        try:
+            yield self
+            self.pipeline.execute()
+        finally:
+            self.pipeline = None
+
+    def publish(self, event):
+        self.pipeline.xadd(
+            self.stream,
+            {'id': event.id, 'topic': event.topic, 'payload': json.dumps(event.payload)},
+            maxlen=settings.OUTBOX_REDIS_STREAM_MAXLEN,
+            approximate=True,
+        )
+
+
+def get_publisher():
+    if settings.OUTBOX_PUBLISHER == 'redis':
+        return RedisPublisher(settings.OUTBOX_REDIS_URL, settings.OUTBOX_REDIS_STREAM)
+    return CeleryPublisher()
+
+
+def relay_batch(publisher, batch_size=None):
+    """
+    Bitta partiyani yuborish.
+
+    (yetkazilganlar soni, xato bo'ldimi) qaytaradi. Xato bo'lsa tartib
+    buzilmasligi uchun partiyaning qolgan qismi keyingi urinishga qoladi.
+    """
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    with transaction.atomic():
+        events = list(
+            OutboxEvent.objects.select_for_update(skip_locked=True)
+            .filter(delivered_at__isnull=True, dead_at__isnull=True)
+            .order_by('id')[:batch_size]
+        )
+        if not events:
+            return 0, False
+
+        delivered = []
+        current = None
+        failed = False
+        try:
+            with publisher.batch():
+                for event in events:
+                    current = event
+                    publisher.publish(event)
+                    current = None
+                    delivered.append(event.id)
+        except Exception as exc:
+            if publisher.all_or_nothing:
+                delivered = []
+            failed = True
+            if current is None:
+                logger.exception("Outbox partiyasini yuborib bo'lmadi")
+            else:
+                logger.exception("Outbox hodisasini yuborib bo'lmadi: %s", current)
+                _record_failure(current, exc)
+
+        if delivered:
+            OutboxEvent.objects.filter(id__in=delivered).update(delivered_at=timezone.now())
+    return len(delivered), failed
+
+
+def _record_failure(event, exc):
+    """Urinishni hisoblash; chegaraga yetgan hodisa dead-letter ga o'tadi"""
+    event.attempts += 1
+    event.last_error = f'{type(exc).__name__}: {exc}'[:1000]
+    update = {'attempts': F('attempts') + 1, 'last_error': event.last_error}
+    if event.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        event.dead_at = update['dead_at'] = timezone.now()
+        logger.error("Outbox hodisasi %s urinishdan keyin to'xtatildi: %s", event.attempts, event)
+    OutboxEvent.objects.filter(id=event.id).update(**update)
+
+
+def requeue(queryset):
+    """Dead-letter hodisalarni qayta navbatga qo'yish; qo'yilganlar sonini qaytaradi"""
+    return queryset.filter(delivered_at__isnull=True, dead_at__isnull=False).update(dead_at=None, attempts=0)
+
+
+def relay(publisher=None, batch_size=None):
+    """Navbat bo'shaguncha (yoki xato bo'lguncha) yuborish; yetkazilganlar sonini qaytaradi"""
+    publisher = publisher or get_publisher()
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    total = 0
+    while True:
+        delivered, failed = relay_batch(publisher, batch_size)
+        total += delivered
+        if failed or delivered < batch_size:
+            return total
+
+
+def prune_delivered(older_than=None):
+    """Yetkazilgan eski hodisalarni o'chirish; o'chirilganlar sonini qaytaradi"""
+    if older_than is None:
+        older_than = timedelta(hours=settings.OUTBOX_RETENTION_HOURS)
+    deleted, _ = OutboxEvent.objects.filter(delivered_at__lt=timezone.now() - older_than).delete()
+    return deleted
@@ -0,0 +1,241 @@
+"""
+Takrorlanuvchi uchrashuvlar (MeetingSeries) takrorlarini hisoblash.
+
+Takrorlar DB da saqlanmaydi: har bir so'rov faqat o'ziga kerakli vaqt
+oralig'ini hisoblaydi. Oraliqqa tushadigan seriyalar (dtstart, until)
+bo'yicha sargable filtr bilan olinadi, tahrirlangan takrorlar (ZoomMeeting
+override) esa bitta so'rov bilan chiqarib tashlanadi.
+"""
+import heapq
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from dateutil.rrule import DAILY, MONTHLY, WEEKLY, rrulestr
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import ZoomMeeting, MeetingSeries
+
+ALLOWED_FREQUENCIES = (DAILY, WEEKLY, MONTHLY)
+RECURRENCE_PRESETS = {
+    'DAILY': 'FREQ=DAILY',
+    'WEEKDAYS': 'FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR',
+    'WEEKLY': 'FREQ=WEEKLY',
+    'MONTHLY': 'FREQ=MONTHLY',
+}
+
+
+def occurrence_stamp(start_time):
+    """Takror identifikatori: boshlanish vaqti UTC da (20260105T050000Z)"""
+    return start_time.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def build_rule(rule, dtstart):
+    """RRULE ni tekshirish va dateutil qoidasini qaytarish (ValueError)"""
+    rule = rule.strip()
+    if rule.upper().startswith('RRULE:'):
+        rule = rule[6:]
+    if not rule or '\n' in rule:
+        raise ValueError("Noto'g'ri takrorlanish qoidasi")
+    parsed = rrulestr(rule, dtstart=timezone.localtime(dtstart))
+    if parsed._freq not in ALLOWED_FREQUENCIES:
+        raise ValueError("Faqat kunlik, haftalik yoki oylik takrorlanish mumkin")
+    if parsed._count and parsed._count > settings.RECURRENCE_MAX_COUNT:
+        raise ValueError(f"Takrorlar soni {settings.RECURRENCE_MAX_COUNT} tadan oshmasligi kerak")
+    return parsed
+
+
+def series_until(rule, dtstart, duration):
+    """Cheklangan seriyaning oxirgi takrori tugash vaqti, cheksiz bo'lsa None"""
+    parsed = build_rule(rule, dtstart)
+    if not parsed._count and not parsed._until:
+        return None
+    last = None
+    for last in parsed:
+        pass
+    if last is None:
+        return dtstart
+    return last + timedelta(minutes=duration)
+
+
+class Occurrence:
+    """Seriya takrori; ZoomMeeting bilan bir xil atributlarga ega (faqat o'qish uchun)"""
+
+    status = 'scheduled'
+    is_active = True
+
+    def __init__(self, series, start_time):
+        self.series = series
+        self.series_id = series.id
+        self.start_time = start_time
+        self.original_start = start_time
+        self.id = f"{series.id}:{occurrence_stamp(start_time)}"
+        self.title = series.title
+        self.description = series.description
+        self.department = series.department
+        self.department_id = series.department_id
+        self.created_by_id = series.created_by_id
+        self.duration = series.duration
+        self.meeting_url = series.meeting_url
+        self.password = series.password
+        self.updated_at = series.updated_at
+
+    @property
+    def end_time(self):
+        return self.start_time + timedelta(minutes=self.duration)
+
+
+def series_in_window(window_start, window_end, department_id=None, created_by_id=None, department_ids=None):
+    """Oraliqda takrori bo'lishi mumkin bo'lgan faol seriyalar"""
+    series = MeetingSeries.objects.filter(is_active=True, dtstart__lt=window_end).filter(
+        Q(until__isnull=True) | Q(until__gt=window_start)
+    )
+    if department_id is not None:
+        series = series.filter(department_id=department_id)
+    if created_by_id is not None and department_ids is not None:
+        series = series.filter(Q(created_by_id=created_by_id) | Q(department_id__in=department_ids))
+    elif created_by_id is not None:
+        series = series.filter(created_by_id=created_by_id)
+    return series.select_related('department')
+
+
+def expand(series_list, window_start, window_end):
+    """[window_start, window_end) da boshlanadigan takrorlar, vaqt bo'yicha saralangan"""
+    series_list = list(series_list)
+    if not series_list:
+        return []
+
+    overridden = set(
+        ZoomMeeting.objects.filter(
+            series__in=series_list,
+            original_start__gte=window_start,
+            original_start__lt=window_end,
+        ).values_list('series_id', 'original_start')
+    )
+    occurrences = []
+    for series in series_list:
+        excluded = set(series.exdates)
+        rule = build_rule(series.rrule, series.dtstart)
+        for start_time in rule.between(window_start, window_end, inc=True):
+            if start_time >= window_end:
+                continue
+            if occurrence_stamp(start_time) in excluded:
+                continue
+            if (series.id, start_time) in overridden:
+                continue
+            occurrences.append(Occurrence(series, start_time))
+    occurrences.sort(key=lambda occurrence: occurrence.start_time)
+    return occurrences
+
+
+def meetings_in_window(window_start, window_end, department_id=None, created_by_id=None, department_ids=None):
+    """
+    Oraliqdagi yagona uchrashuvlar va seriya takrorlari (start_time bo'yicha).
+
+    ZoomMeeting obyektlari va Occurrence lar aralash qaytariladi.
+    """
+    meetings = ZoomMeeting.objects.filter(
+        is_active=True, start_time__gte=window_start, start_time__lt=window_end,
+    ).select_related('department').order_by('start_time')
+    if department_id is not None:
+        meetings = meetings.filter(department_id=department_id)
+    if created_by_id is not None and department_ids is not None:
+        meetings = meetings.filter(Q(created_by_id=created_by_id) | Q(department_id__in=department_ids))
+    elif created_by_id is not None:
+        meetings = meetings.filter(created_by_id=created_by_id)
+
+    occurrences = expand(
+        series_in_window(window_start, window_end, department_id, created_by_id, department_ids),
+        window_start, window_end,
+    )
+    return list(heapq.merge(meetings, occurrences, key=lambda meeting: meeting.start_time))
+
+
+def find_conflicts(department_id, start_time, duration, exclude_meeting_id=None):
+    """Bo'limda [start_time, start_time + duration) bilan kesishadigan uchrashuvlar"""
+    end_time = start_time + timedelta(minutes=duration)
+    # Oldinroq boshlanib, shu vaqtgacha davom etadiganlarni ham qamrash
+    window_start = start_time - timedelta(minutes=settings.MAX_MEETING_DURATION)
+    conflicts = [
+        meeting for meeting in meetings_in_window(window_start, end_time, department_id=department_id)
+        if meeting.end_time > start_time and meeting.status != 'cancelled'
+    ]
+    if exclude_meeting_id is not None:
+        conflicts = [meeting for meeting in conflicts if str(meeting.id) != str(exclude_meeting_id)]
+    return conflicts
+
+
+def count_in_window(window_start, window_end, **filters):
+    """Oraliqdagi takrorlar soni (yagona uchrashuvlarsiz)"""
+    return len(expand(series_in_window(window_start, window_end, **filters), window_start, window_end))
+
+
+def parse_occurrence_stamp(stamp):
+    """occurrence_stamp ning teskarisi (ValueError)"""
+    return datetime.strptime(stamp, '%Y%m%dT%H%M%SZ').replace(tzinfo=dt_timezone.utc)
+
+
+def occurrence_start(series, stamp):
+    """Seriya qoidasiga mos takror boshlanishi; bunday takror bo'lmasa ValueError"""
+    start_time = parse_occurrence_stamp(stamp)
+    if build_rule(series.rrule, series.dtstart).after(start_time, inc=True) != start_time:
+        raise ValueError("Seriyada bunday takror yo'q")
+    return start_time
+
+
+def upcoming_occurrences(series, after, limit):
+    """after dan keyingi takrorlar boshlanishi (bekor qilinganlarsiz, tahrirlanganlar bilan)"""
+    excluded = set(series.exdates)
+    starts = []
+    for start_time in build_rule(series.rrule, series.dtstart).xafter(after, inc=True):
+        if occurrence_stamp(start_time) not in excluded:
+            starts.append(start_time)
+            if len(starts) >= limit:
+                break
+    return starts
+
+
+def materialize_occurrence(series, original_start, **changes):
+    """
+    Takrorni tahrirlash: override ZoomMeeting yaratish (yoki mavjudini yangilash).
+
+    changes - title, start_time, duration, status va h.k. Bekor qilingan
+    takror tahrirlansa, u exdates dan chiqariladi. Kalendar va bot jadvali
+    keshlari signals orqali yangilanadi.
+    """
+    defaults = {
+        'title': series.title,
+        'description': series.description,
+        'department_id': series.department_id,
+        'created_by_id': series.created_by_id,
+        'start_time': original_start,
+        'duration': series.duration,
+        'meeting_url': series.meeting_url,
+        'password': series.password,
+        'zoom_meeting_id': series.zoom_meeting_id,
+        'status': 'scheduled',
+    }
+    defaults.update(changes)
+    stamp = occurrence_stamp(original_start)
+    with transaction.atomic():
+        if stamp in series.exdates:
+            series = MeetingSeries.objects.select_for_update().get(id=series.id)
+            series.exdates = [value for value in series.exdates if value != stamp]
+            series.save(update_fields=['exdates', 'updated_at'])
+        meeting, _ = ZoomMeeting.objects.update_or_create(
+            series=series, original_start=original_start, defaults=defaults,
+        )
+    return meeting
+
+
+def cancel_occurrence(series, original_start):
+    """Bitta takrorni o'chirish (exdates ga qo'shish, tahrirlangan bo'lsa override ham o'chadi)"""
+    stamp = occurrence_stamp(original_start)
+    with transaction.atomic():
+        series = MeetingSeries.objects.select_for_update().get(id=series.id)
+        if stamp not in series.exdates:
+            series.exdates = [*series.exdates, stamp]
+            series.save(update_fields=['exdates', 'updated_at'])
+        ZoomMeeting.objects.filter(series=series, original_start=original_start).delete()
+    return series
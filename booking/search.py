@@ -0,0 +1,322 @@
+"""
+Uchrashuvlar, so'rovlar va foydalanuvchilar bo'yicha indekslangan qidiruv.
+
+Indeks SearchDocument jadvalida saqlanadi: SQLite da unga FTS5 jadvali,
+PostgreSQL da tsvector (GIN) va trigram indekslari bog'langan.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from telegram_bot.models import TelegramUser
+from .models import ZoomMeeting, BookingRequest, SearchDocument
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+# Uchrashuv va so'rov hujjatlarida upsert da yangilanadigan ustunlar
+RELATED_FIELDS = ['title', 'document', 'department', 'owner', 'start_time', 'updated_at']
+# Bog'liq hujjatlar matniga kiradigan maydonlar: o'zgarmasa qayta indekslanmaydi
+PERSON_INDEXED_FIELDS = ('first_name', 'last_name', 'username')
+USER_INDEXED_FIELDS = PERSON_INDEXED_FIELDS + ('telegram_id',)
+DEPARTMENT_INDEXED_FIELDS = ('name',)
+
+
+def _person_text(person):
+    if person is None:
+        return ''
+    return ' '.join(filter(None, [person.first_name, person.last_name, person.username]))
+
+
+def meeting_document(meeting):
+    return SearchDocument(
+        object_type=SearchDocument.TYPE_MEETING,
+        object_id=str(meeting.id),
+        title=meeting.title,
+        document=' '.join(filter(None, [
+            meeting.description,
+            meeting.department.name,
+            _person_text(meeting.created_by),
+        ])),
+        department_id=meeting.department_id,
+        owner_id=meeting.created_by_id,
+        start_time=meeting.start_time,
+    )
+
+
+def request_document(booking_request):
+    return SearchDocument(
+        object_type=SearchDocument.TYPE_REQUEST,
+        object_id=str(booking_request.id),
+        title=booking_request.title,
+        document=' '.join(filter(None, [
+            booking_request.description,
+            booking_request.department.name,
+            _person_text(booking_request.requested_by),
+        ])),
+        department_id=booking_request.department_id,
+        owner_id=booking_request.requested_by_id,
+        start_time=booking_request.preferred_start_time,
+    )
+
+
+def user_document(telegram_user):
+    return SearchDocument(
+        object_type=SearchDocument.TYPE_USER,
+        object_id=str(telegram_user.id),
+        title=str(telegram_user)[:200],
+        document=' '.join([_person_text(telegram_user), str(telegram_user.telegram_id)]),
+        owner_id=telegram_user.id,
+    )
+
+
+def _save_document(document):
+    SearchDocument.objects.update_or_create(
+        object_type=document.object_type,
+        object_id=document.object_id,
+        defaults={
+            'title': document.title,
+            'document': document.document,
+            'department_id': document.department_id,
+            'owner_id': document.owner_id,
+            'start_time': document.start_time,
+        },
+    )
+
+
+def remove_document(object_type, object_id):
+    SearchDocument.objects.filter(object_type=object_type, object_id=str(object_id)).delete()
+
+
+def index_meeting(meeting):
+    if not meeting.is_active:
+        remove_document(SearchDocument.TYPE_MEETING, meeting.id)
+        return
+    _save_document(meeting_document(meeting))
+
+
+def index_request(booking_request):
+    _save_document(request_document(booking_request))
+
+
+def _upsert(documents, update_fields):
+    SearchDocument.objects.bulk_create(
+        documents,
+        update_conflicts=True,
+        unique_fields=['object_type', 'object_id'],
+        update_fields=update_fields,
+    )
+
+
+def index_requests(booking_requests):
+    """Yangi so'rovlarni bitta ommaviy upsert bilan indekslash"""
+    _upsert([request_document(booking_request) for booking_request in booking_requests], RELATED_FIELDS)
+
+
+def index_user(telegram_user):
+    _save_document(user_document(telegram_user))
+
+
+def index_users(telegram_users):
+    """Foydalanuvchilarni bitta ommaviy upsert bilan indekslash"""
+    _upsert(
+        [user_document(telegram_user) for telegram_user in telegram_users],
+        ['title', 'document', 'owner', 'updated_at'],
+    )
+
+
+def reindex_related(department_id=None, owner_id=None, batch_size=1000):
+    """
+    Bo'lim yoki foydalanuvchi nomi o'zgarganda bog'liq hujjatlarni yangilash.
+
+    Hujjatlar batch_size lik ommaviy upsert bilan yoziladi (qatorma-qator
+    update_or_create emas); yangilangan hujjatlar sonini qaytaradi.
+    """
+    if department_id:
+        meeting_filters = request_filters = {'department_id': department_id}
+    else:
+        meeting_filters, request_filters = {'created_by_id': owner_id}, {'requested_by_id': owner_id}
+    sources = [
+        (
+            ZoomMeeting.objects.filter(is_active=True, **meeting_filters).select_related('department', 'created_by'),
+            meeting_document,
+        ),
+        (
+            BookingRequest.objects.filter(**request_filters).select_related('department', 'requested_by'),
+            request_document,
+        ),
+    ]
+    total = 0
+    for queryset, build in sources:
+        batch = []
+        for obj in queryset.iterator(chunk_size=batch_size):
+            batch.append(build(obj))
+            if len(batch) >= batch_size:
+                _upsert(batch, RELATED_FIELDS)
+                total += len(batch)
+                batch = []
+        if batch:
+            _upsert(batch, RELATED_FIELDS)
+            total += len(batch)
+    return total
+
+
+def rebuild_index(batch_size=1000):
+    """Indeksni to'liq qayta qurish; yaratilgan hujjatlar sonini qaytaradi"""
+    sources = [
+        (ZoomMeeting.objects.filter(is_active=True).select_related('department', 'created_by'), meeting_document),
+        (BookingRequest.objects.select_related('department', 'requested_by'), request_document),
+        (TelegramUser.objects.all(), user_document),
+    ]
+    total = 0
+    with transaction.atomic():
+        SearchDocument.objects.all().delete()
+        for queryset, build in sources:
+            batch = []
+            for obj in queryset.iterator(chunk_size=batch_size):
+                batch.append(build(obj))
+                if len(batch) >= batch_size:
+                    SearchDocument.objects.bulk_create(batch)
+                    total += len(batch)
+                    batch = []
+            if batch:
+                SearchDocument.objects.bulk_create(batch)
+                total += len(batch)
+
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO booking_searchdocument_fts(booking_searchdocument_fts) VALUES ('rebuild')"
+            )
+            cursor.execute(
+                "INSERT INTO booking_searchdocument_fts(booking_searchdocument_fts) VALUES ('optimize')"
+            )
+    return total
+
+
+def _tokens(query):
+    return _TOKEN_RE.findall(query.lower())[:8]
+
+
+def _scope_sql(owner_id, department_ids, prefix=''):
+    """Natijalarni foydalanuvchi va uning bo'limlari bilan cheklash"""
+    if owner_id is None and department_ids is None:
+        return '', []
+    conditions = []
+    params = []
+    if owner_id is not None:
+        conditions.append(f'{prefix}owner_id = %s')
+        params.append(owner_id)
+    if department_ids:
+        placeholders = ', '.join(['%s'] * len(department_ids))
+        conditions.append(f'{prefix}department_id IN ({placeholders})')
+        params.extend(department_ids)
+    if not conditions:
+        return ' AND 1 = 0', []
+    return ' AND (' + ' OR '.join(conditions) + ')', params
+
+
+def _search_sqlite(tokens, object_types, limit, offset, scope_sql, scope_params):
+    match = ' '.join(f'"{token}"*' for token in tokens)
+    placeholders = ', '.join(['%s'] * len(object_types))
+    sql = f"""
+        SELECT d.id
+        FROM booking_searchdocument_fts f
+        JOIN booking_searchdocument d ON d.id = f.rowid
+        WHERE booking_searchdocument_fts MATCH %s
+          AND d.object_type IN ({placeholders}){scope_sql}
+        ORDER BY bm25(booking_searchdocument_fts, 10.0, 1.0)
+        LIMIT %s OFFSET %s
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [match, *object_types, *scope_params, limit, offset])
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _search_postgresql(tokens, query, object_types, limit, offset, scope_sql, scope_params):
+    tsquery = ' & '.join(f'{token}:*' for token in tokens)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT id FROM booking_searchdocument
+            WHERE search_vector @@ to_tsquery('simple', %s)
+              AND object_type = ANY(%s){scope_sql}
+            ORDER BY ts_rank(search_vector, to_tsquery('simple', %s)) DESC
+            LIMIT %s OFFSET %s
+            """,
+            [tsquery, list(object_types), *scope_params, tsquery, limit, offset],
+        )
+        ids = [row[0] for row in cursor.fetchall()]
+        if ids or offset:
+            return ids
+
+        # Imlo xatolari uchun trigram o'xshashligi
+        cursor.execute(
+            f"""
+            SELECT id FROM booking_searchdocument
+            WHERE document %% %s AND object_type = ANY(%s){scope_sql}
+            ORDER BY similarity(document, %s) DESC
+            LIMIT %s
+            """,
+            [query, list(object_types), *scope_params, query, limit],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def search_document_ids(query, object_types, limit=None, offset=0, owner_id=None, department_ids=None):
+    """
+    Reyting bo'yicha saralangan SearchDocument id lari.
+
+    Har bir so'z prefiks sifatida qidiriladi ("stand" -> "standup").
+    owner_id/department_ids berilsa, faqat shu foydalanuvchi yoki bo'limlarga
+    tegishli hujjatlar qaytariladi. Qo'llab-quvvatlanmaydigan DB da None.
+    """
+    tokens = _tokens(query)
+    if not tokens:
+        return []
+    limit = limit or settings.SEARCH_RESULTS_LIMIT
+    if connection.vendor == 'sqlite':
+        scope_sql, scope_params = _scope_sql(owner_id, department_ids, prefix='d.')
+        return _search_sqlite(tokens, object_types, limit, offset, scope_sql, scope_params)
+    if connection.vendor == 'postgresql':
+        scope_sql, scope_params = _scope_sql(owner_id, department_ids)
+        return _search_postgresql(tokens, query, object_types, limit, offset, scope_sql, scope_params)
+    return None
+
+
+def search(query, object_types, limit=None, offset=0, owner_id=None, department_ids=None):
+    """Qidiruv natijalari (lug'atlar ro'yxati, reyting tartibida)"""
+    ids = search_document_ids(
+        query, object_types, limit=limit, offset=offset,
+        owner_id=owner_id, department_ids=department_ids,
+    )
+    if not ids:
+        return []
+    documents = SearchDocument.objects.filter(id__in=ids).values(
+        'id', 'object_type', 'object_id', 'title', 'start_time', 'department__name',
+    )
+    by_id = {document['id']: document for document in documents}
+    return [by_id[document_id] for document_id in ids if document_id in by_id]
+
+
+def search_object_ids(query, object_type, limit=None):
+    ids = search_document_ids(query, [object_type], limit=limit)
+    if ids is None:
+        return None
+    return list(SearchDocument.objects.filter(id__in=ids).values_list('object_id', flat=True))
+
+
+class IndexedSearchMixin:
+    """
+    ModelAdmin uchun: LIKE '%x%' o'rniga qidiruv indeksidan foydalanish.
+
+    Indeks mavjud bo'lmagan DB larda standart search_fields ishlatiladi.
+    """
+    search_object_type = None
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return super().get_search_results(request, queryset, search_term)
+        object_ids = search_object_ids(search_term, self.search_object_type, limit=settings.SEARCH_ADMIN_LIMIT)
+        if object_ids is None:
+            return super().get_search_results(request, queryset, search_term)
+        return queryset.filter(pk__in=object_ids), False
@@ -0,0 +1,91 @@
+"""
+So'rovlarni ko'rib chiqish (tasdiqlash / rad etish).
+
+Holat bitta shartli UPDATE (status='pending' -> yangi holat) bilan
+o'zgartiriladi, shuning uchun bir vaqtda bosilgan tugmalardan faqat bittasi
+"yutadi" va uchrashuv faqat shu holatda yaratiladi. Zoom havolasi,
+xabarnomalar va keshni yangilash shu tranzaksiyada outbox ga yoziladi.
+"""
+from django.db import transaction
+from django.db.models import Subquery
+from django.utils import timezone
+
+from telegram_bot.models import TelegramUser
+from . import outbox, warm_pool
+from .models import ZoomMeeting, BookingRequest, MeetingSeries
+from .recurrence import series_until
+
+
+def processed_by_telegram_id(telegram_id):
+    """UPDATE ichida ishlatish uchun telegram_id -> TelegramUser.id subquery"""
+    return Subquery(TelegramUser.objects.filter(telegram_id=telegram_id).values('id')[:1])
+
+
+def _claim(request_id, status, processed_by_id, **extra):
+    now = timezone.now()
+    return BookingRequest.objects.filter(id=request_id, status='pending').update(
+        status=status,
+        processed_by_id=processed_by_id,
+        processed_at=now,
+        updated_at=now,
+        **extra
+    ) == 1
+
+
+def approve_request(request_id, processed_by_id):
+    """
+    So'rovni tasdiqlash.
+
+    Yaratilgan ZoomMeeting ni (takrorlanuvchi so'rov uchun MeetingSeries ni),
+    so'rov allaqachon ko'rib chiqilgan bo'lsa None qaytaradi.
+    """
+    with transaction.atomic():
+        if not _claim(request_id, 'approved', processed_by_id):
+            return None
+
+        booking_request = BookingRequest.objects.get(id=request_id)
+        outbox.publish(outbox.REQUEST_QUEUE_CHANGED)
+        if booking_request.recurrence:
+            # Seriya bir marta tasdiqlanadi, takrorlar saqlanmaydi
+            series = MeetingSeries.objects.create(
+                title=booking_request.title,
+                description=booking_request.description,
+                department_id=booking_request.department_id,
+                created_by_id=booking_request.requested_by_id,
+                booking_request=booking_request,
+                dtstart=booking_request.preferred_start_time,
+                duration=booking_request.duration,
+                rrule=booking_request.recurrence,
+                until=series_until(
+                    booking_request.recurrence, booking_request.preferred_start_time, booking_request.duration,
+                ),
+            )
+            outbox.publish(outbox.SERIES_APPROVED, series_id=str(series.id))
+            return series
+
+        # Zaxiradagi uchrashuv bo'lsa havola shu tranzaksiyada tayyor bo'ladi
+        pooled = warm_pool.claim(booking_request.preferred_start_time, booking_request.duration)
+        meeting = ZoomMeeting.objects.create(
+            title=booking_request.title,
+            description=booking_request.description,
+            department_id=booking_request.department_id,
+            created_by_id=booking_request.requested_by_id,
+            start_time=booking_request.preferred_start_time,
+            duration=booking_request.duration,
+            status='scheduled',
+            **(pooled or {})
+        )
+        outbox.publish(outbox.MEETING_APPROVED, meeting_id=str(meeting.id))
+        if pooled:
+            outbox.publish(outbox.MEETING_POOL_CLAIMED, meeting_id=str(meeting.id))
+    return meeting
+
+
+def reject_request(request_id, processed_by_id, rejection_reason=''):
+    """So'rovni rad etish; holat o'zgargan bo'lsa True"""
+    with transaction.atomic():
+        if not _claim(request_id, 'rejected', processed_by_id, rejection_reason=rejection_reason):
+            return False
+        outbox.publish(outbox.REQUEST_QUEUE_CHANGED)
+        outbox.publish(outbox.REQUEST_REJECTED, request_id=str(request_id))
+    return True
@@ -0,0 +1,96 @@
+from django.db.models.signals import m2m_changed, post_init, post_save, post_delete
+from django.dispatch import receiver
+
+from telegram_bot.models import TelegramUser, Department
+from telegram_bot.review_queue import invalidate_queue
+from .models import ZoomMeeting, BookingRequest, SearchDocument, MeetingSeries, AutoApprovalRule, Tombstone
+from .auto_approval import invalidate_rules
+from .changes import record_deletion
+from .calendar import invalidate_meeting_feeds
+from . import search
+
+
+@receiver([post_save, post_delete], sender=ZoomMeeting)
+@receiver([post_save, post_delete], sender=MeetingSeries)
+def meeting_changed(sender, instance, **kwargs):
+    invalidate_meeting_feeds(instance.department_id, instance.created_by_id)
+
+
+@receiver(post_save, sender=ZoomMeeting)
+def index_meeting(sender, instance, **kwargs):
+    search.index_meeting(instance)
+
+
+@receiver(post_save, sender=BookingRequest)
+def index_request(sender, instance, **kwargs):
+    search.index_request(instance)
+
+
+def _indexed_values(instance, fields):
+    # Faqat yuklangan maydonlar: kechiktirilgan (deferred) maydon so'rov yubormasin
+    return {name: instance.__dict__[name] for name in fields if name in instance.__dict__}
+
+
+def _changed_fields(instance, fields, update_fields):
+    """Oxirgi yuklash/saqlashdan beri o'zgargan indekslanadigan maydonlar"""
+    if update_fields is not None:
+        fields = [name for name in fields if name in update_fields]
+    previous = getattr(instance, '_indexed_values', {})
+    current = _indexed_values(instance, fields)
+    changed = {name for name, value in current.items() if name not in previous or previous[name] != value}
+    instance._indexed_values = {**previous, **current}
+    return changed
+
+
+@receiver(post_init, sender=TelegramUser)
+def remember_user_names(sender, instance, **kwargs):
+    instance._indexed_values = _indexed_values(instance, search.USER_INDEXED_FIELDS)
+
+
+@receiver(post_init, sender=Department)
+def remember_department_name(sender, instance, **kwargs):
+    instance._indexed_values = _indexed_values(instance, search.DEPARTMENT_INDEXED_FIELDS)
+
+
+@receiver(post_save, sender=TelegramUser)
+def index_telegram_user(sender, instance, created, update_fields=None, **kwargs):
+    changed = _changed_fields(instance, search.USER_INDEXED_FIELDS, update_fields)
+    if created or changed:
+        search.index_user(instance)
+    if not created and changed.intersection(search.PERSON_INDEXED_FIELDS):
+        search.reindex_related(owner_id=instance.id)
+
+
+@receiver(post_save, sender=Department)
+def reindex_department(sender, instance, created, update_fields=None, **kwargs):
+    changed = _changed_fields(instance, search.DEPARTMENT_INDEXED_FIELDS, update_fields)
+    if not created and changed:
+        search.reindex_related(department_id=instance.id)
+
+
+@receiver(post_delete, sender=ZoomMeeting)
+def unindex_meeting(sender, instance, **kwargs):
+    search.remove_document(SearchDocument.TYPE_MEETING, instance.id)
+    record_deletion(Tombstone.KIND_MEETING, instance.id)
+
+
+@receiver(post_delete, sender=BookingRequest)
+def unindex_request(sender, instance, **kwargs):
+    search.remove_document(SearchDocument.TYPE_REQUEST, instance.id)
+    record_deletion(Tombstone.KIND_REQUEST, instance.id)
+
+
+@receiver(post_delete, sender=TelegramUser)
+def unindex_telegram_user(sender, instance, **kwargs):
+    search.remove_document(SearchDocument.TYPE_USER, instance.id)
+
+
+@receiver([post_save, post_delete], sender=BookingRequest)
+def request_changed(sender, instance, **kwargs):
+    invalidate_queue()
+
+
+@receiver([post_save, post_delete], sender=AutoApprovalRule)
+@receiver(m2m_changed, sender=AutoApprovalRule.trusted_requesters.through)
+def auto_approval_rules_changed(sender, **kwargs):
+    invalidate_rules()
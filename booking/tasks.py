@@ -0,0 +1,156 @@
+import logging
+import uuid
+
+from celery import shared_task
+from django.conf import settings
+from django.http import QueryDict
+from django.utils import timezone
+from requests import RequestException
+
+from telegram_bot.review_queue import invalidate_queue
+from zoomga.db_router import replica_task
+from .calendar import invalidate_meeting_feeds
+from .exports import export_queryset, write_export
+from . import attendance, auto_approval, changes, warm_pool
+from .models import ZoomMeeting, BookingRequest, MeetingSeries
+from .notifications import send_telegram_message
+from .zoom import create_meeting, create_series_meeting, update_meeting, zoom_configured
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+@replica_task
+def export_to_file(kind, fmt, query_string=''):
+    """Katta eksportni fonda faylga yozish; fayl nomini qaytaradi"""
+    params = QueryDict(query_string)
+    filename = f'{kind}_{uuid.uuid4().hex}.{fmt}'
+    write_export(kind, fmt, export_queryset(kind, params), settings.EXPORT_ROOT / filename)
+    return filename
+
+
+@shared_task(bind=True, max_retries=5, default_retry_delay=30)
+def provision_zoom_meeting(self, meeting_id):
+    """Tasdiqlangan uchrashuv uchun Zoom havolasini yaratish va foydalanuvchini xabardor qilish"""
+    meeting = ZoomMeeting.objects.select_related('created_by', 'department').get(id=meeting_id)
+
+    if not meeting.zoom_meeting_id and zoom_configured():
+        try:
+            data = create_meeting(meeting)
+        except RequestException as exc:
+            raise self.retry(exc=exc)
+
+        ZoomMeeting.objects.filter(id=meeting_id, zoom_meeting_id='').update(
+            zoom_meeting_id=str(data['id']),
+            meeting_url=data.get('join_url', ''),
+            password=data.get('password', ''),
+            updated_at=timezone.now(),
+        )
+        invalidate_meeting_feeds(meeting.department_id, meeting.created_by_id)
+        meeting.refresh_from_db()
+    elif not zoom_configured():
+        logger.warning("Zoom API sozlanmagan, uchrashuv havolasiz qoldi: %s", meeting_id)
+
+    start_time = timezone.localtime(meeting.start_time)
+    send_telegram_message(
+        meeting.created_by.telegram_id,
+        f"✅ So'rovingiz tasdiqlandi!\n\n"
+        f"📝 {meeting.title}\n"
+        f"🏢 {meeting.department.name}\n"
+        f"🕐 {start_time.strftime('%Y-%m-%d %H:%M')}\n"
+        f"🔗 {meeting.meeting_url or 'Havola tez orada yuboriladi'}"
+        + (f"\n🔑 Parol: {meeting.password}" if meeting.password else '')
+    )
+
+
+@shared_task(bind=True, max_retries=5, default_retry_delay=30)
+def sync_pooled_meeting(self, meeting_id):
+    """
+    Zaxiradan olingan uchrashuvning nomi va vaqtini Zoom da yangilash.
+
+    Foydalanuvchi havolani provision_zoom_meeting dan allaqachon olgan, bu
+    vazifa xabarni kutdirmaydi.
+    """
+    meeting = ZoomMeeting.objects.filter(id=meeting_id).first()
+    if meeting is None or not meeting.zoom_meeting_id:
+        return
+    try:
+        update_meeting(meeting)
+    except RequestException as exc:
+        raise self.retry(exc=exc)
+
+    if warm_pool.needs_refill():
+        refill_zoom_warm_pool.delay()
+
+
+@shared_task
+def refill_zoom_warm_pool(force=False):
+    """Zoom zaxirasini to'ldirish (beat: har 10 daqiqada, to'liq hajmgacha faqat ish vaqtidan tashqari)"""
+    return warm_pool.refill(force=force)
+
+
+@shared_task
+def ingest_meeting_attendance():
+    """Tugagan uchrashuvlar qatnashuv hisobotlarini olish (beat: har 15 daqiqada)"""
+    return attendance.ingest_due()
+
+
+@shared_task
+def auto_approve_backlog():
+    """Kutilayotgan so'rovlarni avtomatik tasdiqlash qoidalari bo'yicha tekshirish (beat: har 5 daqiqada)"""
+    return sum(decision.approved for decision in auto_approval.run_backlog())
+
+
+@shared_task
+def prune_tombstones():
+    """TOMBSTONE_RETENTION_DAYS dan eski o'chirish izlarini tozalash (beat: kuniga bir marta)"""
+    return changes.prune_tombstones()
+
+
+@shared_task(bind=True, max_retries=5, default_retry_delay=30)
+def provision_meeting_series(self, series_id):
+    """Tasdiqlangan seriya uchun takrorlanuvchi Zoom havolasini yaratish va xabar yuborish"""
+    series = MeetingSeries.objects.select_related('created_by', 'department').get(id=series_id)
+
+    if not series.zoom_meeting_id and zoom_configured():
+        try:
+            data = create_series_meeting(series)
+        except RequestException as exc:
+            raise self.retry(exc=exc)
+
+        MeetingSeries.objects.filter(id=series_id, zoom_meeting_id='').update(
+            zoom_meeting_id=str(data['id']),
+            meeting_url=data.get('join_url', ''),
+            password=data.get('password', ''),
+            updated_at=timezone.now(),
+        )
+        invalidate_meeting_feeds(series.department_id, series.created_by_id)
+        series.refresh_from_db()
+    elif not zoom_configured():
+        logger.warning("Zoom API sozlanmagan, seriya havolasiz qoldi: %s", series_id)
+
+    start_time = timezone.localtime(series.dtstart)
+    send_telegram_message(
+        series.created_by.telegram_id,
+        f"✅ Takrorlanuvchi uchrashuv tasdiqlandi!\n\n"
+        f"📝 {series.title}\n"
+        f"🏢 {series.department.name}\n"
+        f"🕐 {start_time.strftime('%Y-%m-%d %H:%M')} dan boshlab\n"
+        f"🔁 {series.rrule}\n"
+        f"🔗 {series.meeting_url or 'Havola tez orada yuboriladi'}"
+        + (f"\n🔑 Parol: {series.password}" if series.password else '')
+    )
+
+
+@shared_task
+def notify_request_rejected(request_id):
+    booking_request = BookingRequest.objects.select_related('requested_by').get(id=request_id)
+    text = f"❌ So'rovingiz rad etildi: {booking_request.title}"
+    if booking_request.rejection_reason:
+        text += f"\n\nSabab: {booking_request.rejection_reason}"
+    send_telegram_message(booking_request.requested_by.telegram_id, text)
+
+
+@shared_task
+def invalidate_request_queue():
+    invalidate_queue()
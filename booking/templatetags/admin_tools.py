@@ -0,0 +1,17 @@
+from django import template
+from django.contrib.admin.templatetags.admin_list import date_hierarchy
+
+from booking.admin_tools import CachedDateQuerySet
+
+register = template.Library()
+
+
+@register.inclusion_tag('admin/date_hierarchy.html')
+def cached_date_hierarchy(cl):
+    """Django ning date_hierarchy tegi, lekin sana so'rovlari keshdan"""
+    queryset = cl.queryset
+    cl.queryset = CachedDateQuerySet(queryset)
+    try:
+        return date_hierarchy(cl)
+    finally:
+        cl.queryset = queryset
@@ -1,3 +1,1374 @@
-from django.test import TestCase
+import io
+import json
+import tempfile
+import threading
+import zipfile
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
 
-# Create your tests here.
+import numpy as np
+from requests import RequestException
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection, IntegrityError, OperationalError, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from telegram_bot.models import Department, DepartmentAdmin, TelegramUser
+from . import analytics, archive, attendance, auto_approval, changes, imports, outbox, recurrence, search, warm_pool, zoom
+from .models import (
+    ZoomMeeting, BookingRequest, OutboxEvent, MeetingAttendance, AttendanceDaily, AutoApprovalRule, AutoApprovalDecision,
+    SearchDocument, MeetingSeries, PooledZoomMeeting, ArchivedRecord,
+)
+from . import calendar as ics
+from .calendar import FEED_USER, feed_version
+from .services import approve_request, reject_request
+from .tasks import export_to_file
+
+
+def make_telegram_user(telegram_id, **kwargs):
+    user = User.objects.create(username=f'tg_{telegram_id}')
+    return TelegramUser.objects.create(user=user, telegram_id=telegram_id, **kwargs)
+
+
+class ConcurrentReviewTests(TransactionTestCase):
+    """Bir so'rovni bir vaqtda bir nechta admin ko'rib chiqishi"""
+
+    def setUp(self):
+        self.department = Department.objects.create(name="IT")
+        self.requester = make_telegram_user(1, first_name="Ali")
+        self.admins = [
+            make_telegram_user(100 + index, first_name=f"Admin {index}", is_admin=True)
+            for index in range(4)
+        ]
+        self.booking_request = BookingRequest.objects.create(
+            title="Standup",
+            department=self.department,
+            requested_by=self.requester,
+            preferred_start_time=timezone.now() + timedelta(days=1),
+            duration=30,
+        )
+
+    def _race(self, actions):
+        barrier = threading.Barrier(len(actions))
+        results = [None] * len(actions)
+
+        def run(index, action):
+            try:
+                barrier.wait()
+                for _ in range(20):
+                    try:
+                        results[index] = action()
+                        break
+                    except OperationalError:
+                        # SQLite: "database table is locked" - qayta urinish
+                        continue
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=run, args=(index, action)) for index, action in enumerate(actions)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_approvals_create_one_meeting(self):
+        request_id = self.booking_request.id
+        results = self._race([
+            lambda admin=admin: approve_request(request_id, admin.id) for admin in self.admins
+        ])
+
+        winners = [meeting for meeting in results if meeting is not None]
+        self.assertEqual(len(winners), 1)
+        self.assertEqual(ZoomMeeting.objects.count(), 1)
+        self.assertEqual(OutboxEvent.objects.filter(topic=outbox.MEETING_APPROVED).count(), 1)
+
+        self.booking_request.refresh_from_db()
+        self.assertEqual(self.booking_request.status, 'approved')
+        self.assertIsNotNone(self.booking_request.processed_at)
+
+    def test_approve_and_reject_race(self):
+        request_id = self.booking_request.id
+        results = self._race([
+            lambda: approve_request(request_id, self.admins[0].id) is not None,
+            lambda: reject_request(request_id, self.admins[1].id, "Band"),
+        ])
+
+        self.assertEqual(results.count(True), 1)
+        self.booking_request.refresh_from_db()
+        if results[0]:
+            self.assertEqual(self.booking_request.status, 'approved')
+            self.assertEqual(ZoomMeeting.objects.count(), 1)
+        else:
+            self.assertEqual(self.booking_request.status, 'rejected')
+            self.assertEqual(ZoomMeeting.objects.count(), 0)
+
+
+class ReviewIdempotencyTests(TestCase):
+
+    def setUp(self):
+        department = Department.objects.create(name="IT")
+        requester = make_telegram_user(1, first_name="Ali")
+        self.admin = make_telegram_user(2, first_name="Vali", is_admin=True)
+        self.booking_request = BookingRequest.objects.create(
+            title="Standup",
+            department=department,
+            requested_by=requester,
+            preferred_start_time=timezone.now() + timedelta(days=1),
+            duration=30,
+        )
+
+    def test_repeated_approve_is_noop(self):
+        self.assertIsNotNone(approve_request(self.booking_request.id, self.admin.id))
+        self.assertIsNone(approve_request(self.booking_request.id, self.admin.id))
+        self.assertFalse(reject_request(self.booking_request.id, self.admin.id))
+
+        self.assertEqual(ZoomMeeting.objects.count(), 1)
+        self.assertEqual(
+            list(OutboxEvent.objects.values_list('topic', flat=True)),
+            [outbox.REQUEST_QUEUE_CHANGED, outbox.MEETING_APPROVED],
+        )
+
+
+class OutboxRelayTests(TestCase):
+
+    class Publisher:
+        all_or_nothing = False
+
+        def __init__(self, fail_on=None):
+            self.fail_on = fail_on
+            self.published = []
+
+        @contextmanager
+        def batch(self):
+            yield self
+
+        def publish(self, event):
+            if event.topic == self.fail_on:
+                raise ConnectionError("broker is down")
+            self.published.append(event.id)
+
+    def test_relay_delivers_in_order(self):
+        events = [outbox.publish(outbox.REQUEST_REJECTED, request_id=str(index)) for index in range(5)]
+        publisher = self.Publisher()
+
+        self.assertEqual(outbox.relay(publisher, batch_size=2), 5)
+        self.assertEqual(publisher.published, [event.id for event in events])
+        self.assertFalse(OutboxEvent.objects.filter(delivered_at__isnull=True).exists())
+        self.assertEqual(outbox.relay(publisher), 0)
+
+    @override_settings(OUTBOX_MAX_ATTEMPTS=3)
+    def test_failed_event_is_retried_in_order(self):
+        first = outbox.publish(outbox.REQUEST_QUEUE_CHANGED)
+        failing = outbox.publish(outbox.MEETING_APPROVED, meeting_id='x')
+        last = outbox.publish(outbox.REQUEST_QUEUE_CHANGED)
+
+        publisher = self.Publisher(fail_on=outbox.MEETING_APPROVED)
+        self.assertEqual(outbox.relay(publisher), 1)
+        self.assertEqual(publisher.published, [first.id])
+
+        failing.refresh_from_db()
+        self.assertEqual(failing.attempts, 1)
+        self.assertEqual(failing.last_error, 'ConnectionError: broker is down')
+        self.assertIsNone(failing.delivered_at)
+        self.assertIsNone(failing.dead_at)
+
+        publisher.fail_on = None
+        self.assertEqual(outbox.relay(publisher), 2)
+        self.assertEqual(publisher.published, [first.id, failing.id, last.id])
+
+    @override_settings(OUTBOX_MAX_ATTEMPTS=3)
+    def test_poison_event_is_dead_lettered(self):
+        failing = outbox.publish(outbox.MEETING_APPROVED, meeting_id='x')
+        last = outbox.publish(outbox.REQUEST_QUEUE_CHANGED)
+
+        publisher = self.Publisher(fail_on=outbox.MEETING_APPROVED)
+        for _ in range(2):
+            self.assertEqual(outbox.relay(publisher), 0)
+        failing.refresh_from_db()
+        self.assertIsNone(failing.dead_at)
+
+        self.assertEqual(outbox.relay(publisher), 0)
+        failing.refresh_from_db()
+        self.assertEqual(failing.attempts, 3)
+        self.assertIsNotNone(failing.dead_at)
+
+        # Navbatning qolgan qismi endi to'silmaydi
+        self.assertEqual(outbox.relay(publisher), 1)
+        self.assertEqual(publisher.published, [last.id])
+
+        publisher.fail_on = None
+        self.assertEqual(outbox.requeue(OutboxEvent.objects.all()), 1)
+        self.assertEqual(outbox.relay(publisher), 1)
+        failing.refresh_from_db()
+        self.assertIsNotNone(failing.delivered_at)
+
+    @override_settings(OUTBOX_MAX_ATTEMPTS=1)
+    def test_connection_failure_is_not_counted_against_events(self):
+        event = outbox.publish(outbox.REQUEST_QUEUE_CHANGED)
+
+        class DownPublisher(self.Publisher):
+            @contextmanager
+            def batch(self):
+                raise ConnectionError("broker is down")
+                yield
+
+        self.assertEqual(outbox.relay(DownPublisher()), 0)
+        event.refresh_from_db()
+        self.assertEqual((event.attempts, event.dead_at), (0, None))
+
+    def test_prune_delivered(self):
+        outbox.publish(outbox.REQUEST_QUEUE_CHANGED)
+        outbox.relay(self.Publisher())
+        self.assertEqual(outbox.prune_delivered(older_than=timedelta(hours=1)), 0)
+        self.assertEqual(outbox.prune_delivered(older_than=timedelta(0)), 1)
+
+
+class FakeZoomAPI:
+    """
+    Mahalliy soxta Zoom API: OAuth token va sahifalangan qatnashchilar hisoboti.
+
+    participants - {zoom_meeting_id: [qatorlar]}, throttle - shuncha so'rovga 429.
+    """
+
+    def __init__(self, page_size=2):
+        self.page_size = page_size
+        self.participants = {}
+        self.throttle = 0
+        self.requests = []
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def send_json(self, status, data, headers=()):
+                body = json.dumps(data).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                self.send_json(200, {'access_token': 'test-token', 'expires_in': 3600})
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                api.requests.append(self.path)
+                if api.throttle:
+                    api.throttle -= 1
+                    return self.send_json(429, {'code': 429}, [('Retry-After', '0')])
+                parts = url.path.strip('/').split('/')
+                if parts[:3] != ['v2', 'report', 'meetings'] or parts[4:] != ['participants']:
+                    return self.send_json(404, {'code': 404})
+                if parts[3] not in api.participants:
+                    return self.send_json(404, {'code': 3001, 'message': 'Meeting does not exist'})
+                rows = api.participants[parts[3]]
+                offset = int(parse_qs(url.query).get('next_page_token', ['0'])[0])
+                end = offset + api.page_size
+                self.send_json(200, {
+                    'total_records': len(rows),
+                    'participants': rows[offset:end],
+                    'next_page_token': str(end) if end < len(rows) else '',
+                })
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def zoom_time(value):
+    return value.astimezone(dt_timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+class AttendanceIngestionTests(TestCase):
+
+    def setUp(self):
+        self.department = Department.objects.create(name="IT")
+        self.owner = make_telegram_user(1, first_name="Ali")
+        self.start = (timezone.now() - timedelta(hours=3)).replace(microsecond=0)
+        self.meeting = ZoomMeeting.objects.create(
+            title="Standup",
+            department=self.department,
+            created_by=self.owner,
+            start_time=self.start,
+            duration=30,
+            zoom_meeting_id='111',
+        )
+        self.fake = FakeZoomAPI()
+        self.enterContext(self.fake)
+        self.enterContext(override_settings(
+            ZOOM_API_KEY='key', ZOOM_API_SECRET='secret', ZOOM_ACCOUNT_ID='account',
+            ZOOM_API_BASE_URL=f'{self.fake.url}/v2', ZOOM_OAUTH_URL=f'{self.fake.url}/oauth/token',
+            ZOOM_API_RATE_LIMIT=0,
+        ))
+        zoom.reset_zoom_client()
+        self.addCleanup(zoom.reset_zoom_client)
+
+    def row(self, participant_id, name, join_minute, leave_minute):
+        return {
+            'id': participant_id,
+            'name': name,
+            'user_email': '',
+            'join_time': zoom_time(self.start + timedelta(minutes=join_minute)),
+            'leave_time': zoom_time(self.start + timedelta(minutes=leave_minute)),
+            'duration': (leave_minute - join_minute) * 60,
+        }
+
+    def test_pages_are_merged_per_participant(self):
+        self.fake.participants['111'] = [
+            self.row('a', "Ali", -2, 10),
+            self.row('b', "Vali", 0, 30),
+            self.row('a', "Ali", 15, 31),
+            self.row('', "Mehmon", 5, 20),
+            self.row('c', "Soli", 1, 16),
+        ]
+
+        self.assertEqual(attendance.ingest_due(), {'meetings': 1, 'participants': 4})
+        self.assertEqual(len(self.fake.requests), 3)
+
+        ali = MeetingAttendance.objects.get(meeting=self.meeting, participant='a')
+        self.assertEqual((ali.join_offset, ali.leave_offset, ali.attended_seconds), (-120, 1860, 28 * 60))
+        self.assertTrue(MeetingAttendance.objects.filter(participant="Mehmon").exists())
+
+        daily = AttendanceDaily.objects.get(department=self.department)
+        self.assertEqual((daily.meetings, daily.held, daily.participants), (1, 1, 4))
+        self.assertEqual(daily.scheduled_seconds, 4 * 30 * 60)
+
+        [stats] = attendance.department_attendance(daily.day, daily.day)
+        self.assertEqual(stats['held_rate'], 1.0)
+        self.assertEqual(stats['avg_participants'], 4.0)
+        self.assertEqual(stats['presence_rate'], round((28 + 30 + 15 + 15) / 120, 3))
+
+    def test_ingestion_is_idempotent(self):
+        self.fake.participants['111'] = [self.row('a', "Ali", 0, 30)]
+        attendance.ingest_due()
+
+        self.assertEqual(attendance.ingest_due(), {'meetings': 0, 'participants': 0})
+        self.assertIsNone(attendance.ingest_meeting(self.meeting))
+        self.assertEqual(MeetingAttendance.objects.count(), 1)
+        self.assertEqual(AttendanceDaily.objects.get().meetings, 1)
+
+    def test_throttled_page_is_retried(self):
+        self.fake.participants['111'] = [self.row('a', "Ali", 0, 30)]
+        self.fake.throttle = 1
+
+        self.assertEqual(attendance.ingest_due(), {'meetings': 1, 'participants': 1})
+        self.assertEqual(len(self.fake.requests), 2)
+
+    def test_meeting_without_report_counts_as_not_held(self):
+        attendance.ingest_due()
+
+        self.meeting.refresh_from_db()
+        self.assertIsNotNone(self.meeting.attendance_synced_at)
+        daily = AttendanceDaily.objects.get()
+        self.assertEqual((daily.meetings, daily.held), (1, 0))
+        [stats] = attendance.department_attendance(daily.day, daily.day)
+        self.assertEqual(stats['held_rate'], 0.0)
+        self.assertIsNone(stats['presence_rate'])
+
+    def test_meetings_not_finished_long_enough_are_skipped(self):
+        self.meeting.start_time = timezone.now() - timedelta(minutes=45)
+        self.meeting.save()
+
+        self.assertEqual(attendance.ingest_due(), {'meetings': 0, 'participants': 0})
+        self.assertEqual(self.fake.requests, [])
+
+
+class AutoApprovalTests(TestCase):
+
+    def setUp(self):
+        self.department = Department.objects.create(name="IT")
+        self.requester = make_telegram_user(1, first_name="Ali")
+        self.rule = AutoApprovalRule.objects.create(
+            name="Qisqa uchrashuvlar",
+            department=self.department,
+            max_duration=60,
+            work_start=time(9),
+            work_end=time(18),
+            weekdays='0,1,2,3,4',
+        )
+        day = timezone.localdate() + timedelta(days=1)
+        while day.weekday() > 4:
+            day += timedelta(days=1)
+        self.start = timezone.make_aware(datetime.combine(day, time(10)))
+
+    def make_request(self, start=None, duration=30, **kwargs):
+        return BookingRequest.objects.create(
+            title="Standup",
+            department=self.department,
+            requested_by=self.requester,
+            preferred_start_time=start or self.start,
+            duration=duration,
+            **kwargs
+        )
+
+    def test_matching_request_is_approved_on_create(self):
+        booking_request = self.make_request()
+
+        meeting = auto_approval.evaluate_new(booking_request)
+
+        self.assertIsNotNone(meeting)
+        booking_request.refresh_from_db()
+        self.assertEqual(booking_request.status, 'approved')
+        decision = AutoApprovalDecision.objects.get()
+        self.assertEqual((decision.rule, decision.outcome), (self.rule, AutoApprovalDecision.OUTCOME_APPROVED))
+
+    def test_failed_conditions_are_logged(self):
+        booking_request = self.make_request(start=self.start.replace(hour=17, minute=30), duration=90)
+
+        self.assertIsNone(auto_approval.evaluate_new(booking_request))
+        booking_request.refresh_from_db()
+        self.assertEqual(booking_request.status, 'pending')
+        decision = AutoApprovalDecision.objects.get()
+        self.assertEqual(decision.outcome, AutoApprovalDecision.OUTCOME_NO_MATCH)
+        self.assertIn("davomiylik > 60", decision.reason)
+        self.assertIn("ish vaqtidan tashqari", decision.reason)
+
+    def test_trusted_requesters(self):
+        self.rule.trusted_requesters.add(make_telegram_user(2, first_name="Vali"))
+        self.assertIsNone(auto_approval.evaluate_new(self.make_request()))
+
+        self.rule.trusted_requesters.add(self.requester)
+        self.assertIsNotNone(auto_approval.evaluate_new(self.make_request(start=self.start + timedelta(hours=2))))
+
+    def test_backlog_approves_only_one_of_overlapping_requests(self):
+        ZoomMeeting.objects.create(
+            title="Band", department=self.department, created_by=self.requester,
+            start_time=self.start - timedelta(minutes=30), duration=45,
+        )
+        busy = self.make_request()
+        first = self.make_request(start=self.start + timedelta(hours=1))
+        second = self.make_request(start=self.start + timedelta(hours=1, minutes=15))
+
+        report = auto_approval.run_backlog(dry_run=True)
+        self.assertEqual([decision.approved for decision in report], [False, True, False])
+        self.assertEqual(BookingRequest.objects.filter(status='pending').count(), 3)
+        self.assertFalse(AutoApprovalDecision.objects.exists())
+
+        auto_approval.run_backlog()
+        statuses = dict(BookingRequest.objects.values_list('id', 'status'))
+        self.assertEqual(
+            [statuses[request.id] for request in (busy, first, second)],
+            ['pending', 'approved', 'pending'],
+        )
+        self.assertEqual(AutoApprovalDecision.objects.get().booking_request_id, first.id)
+
+    def test_decision_log_survives_archiving(self):
+        booking_request = self.make_request()
+        auto_approval.evaluate_new(booking_request)
+        BookingRequest.objects.filter(id=booking_request.id).update(created_at=timezone.now() - timedelta(days=400))
+
+        archive.archive_batch(ArchivedRecord.KIND_REQUEST, archive.archive_cutoff(365))
+
+        self.assertFalse(BookingRequest.objects.filter(id=booking_request.id).exists())
+        decision = AutoApprovalDecision.objects.get()
+        self.assertIsNone(decision.booking_request_id)
+        self.assertEqual(decision.object_id, booking_request.id)
+        self.assertEqual(decision.outcome, AutoApprovalDecision.OUTCOME_APPROVED)
+        self.assertTrue(ArchivedRecord.objects.filter(object_id=decision.object_id).exists())
+
+    def test_rule_changes_invalidate_compiled_rules(self):
+        self.assertEqual(len(auto_approval.compiled_rules()), 1)
+        self.rule.is_active = False
+        self.rule.save()
+        self.assertEqual(auto_approval.compiled_rules(), [])
+
+
+class DeltaSyncTests(TestCase):
+
+    def setUp(self):
+        self.department = Department.objects.create(name="IT")
+        self.owner = make_telegram_user(1, first_name="Ali")
+        self.meetings = [
+            ZoomMeeting.objects.create(
+                title=f"Uchrashuv {index}", department=self.department, created_by=self.owner,
+                start_time=timezone.now() + timedelta(days=1), duration=30,
+            )
+            for index in range(3)
+        ]
+        self.booking_request = BookingRequest.objects.create(
+            title="So'rov", department=self.department, requested_by=self.owner,
+            preferred_start_time=timezone.now() + timedelta(days=1), duration=30,
+        )
+
+    def sync(self, cursor='', **kwargs):
+        # Settle oynasidan o'tgan paytdagi so'rov
+        return changes.get_changes(cursor, now=timezone.now() + timedelta(minutes=1), **kwargs)
+
+    def test_pages_then_returns_only_changes(self):
+        first = self.sync(limit=2)
+        self.assertEqual(len(first['meetings']), 2)
+        self.assertTrue(first['has_more'])
+        second = self.sync(first['cursor'], limit=2)
+        self.assertEqual(len(second['meetings']), 1)
+        self.assertFalse(second['has_more'])
+        self.assertEqual(
+            {row['id'] for row in first['meetings'] + second['meetings']},
+            {meeting.id for meeting in self.meetings},
+        )
+
+        idle = self.sync(second['cursor'])
+        self.assertEqual((idle['meetings'], idle['requests'], idle['deleted']), ([], [], []))
+
+        self.meetings[0].title = "Yangi nom"
+        self.meetings[0].save()
+        update = self.sync(idle['cursor'])
+        self.assertEqual([row['title'] for row in update['meetings']], ["Yangi nom"])
+
+    def test_deletions_and_deactivations_are_tombstones(self):
+        cursor = self.sync()['cursor']
+        expected = {
+            ('meeting', self.meetings[1].id), ('meeting', self.meetings[2].id), ('request', self.booking_request.id),
+        }
+        self.meetings[1].is_active = False
+        self.meetings[1].save()
+        self.meetings[2].delete()
+        self.booking_request.delete()
+
+        result = self.sync(cursor)
+        self.assertEqual(result['meetings'], [])
+        self.assertEqual({(row['type'], row['id']) for row in result['deleted']}, expected)
+
+        hidden = self.sync(cursor, include_requests=False)
+        self.assertNotIn('request', {row['type'] for row in hidden['deleted']})
+
+    def test_recent_rows_wait_for_settle_window(self):
+        result = changes.get_changes('')
+        self.assertEqual(result['meetings'], [])
+        self.assertEqual(len(self.sync(result['cursor'])['meetings']), 3)
+
+    def test_cursor_validation(self):
+        with self.assertRaises(ValueError):
+            changes.get_changes('not-a-cursor')
+        with self.assertRaises(changes.CursorExpired):
+            changes.get_changes(self.sync()['cursor'], now=timezone.now() + timedelta(days=31))
+
+
+class LargeTableAdminTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        department = Department.objects.create(name="IT")
+        owner = make_telegram_user(1, first_name="Ali")
+        for index in range(3):
+            ZoomMeeting.objects.create(
+                title=f"Uchrashuv {index}", department=department, created_by=owner,
+                start_time=timezone.now() + timedelta(days=60 * index), duration=30,
+            )
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'parol'))
+
+    def test_changelist_counts_and_date_hierarchy_are_cached(self):
+        url = reverse('admin:booking_zoommeeting_changelist')
+        with CaptureQueriesContext(connection) as first:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        with CaptureQueriesContext(connection) as second:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(len(first) - len(second), 3)
+
+    def test_user_fields_use_autocomplete(self):
+        response = self.client.get(reverse('admin:booking_bookingrequest_add'))
+        self.assertContains(response, 'data-ajax--url', count=2)
+
+
+class ExportStatusTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user('ali', password='parol')
+        self.other = User.objects.create_user('vali', password='parol')
+
+    def start_export(self):
+        self.client.force_login(self.owner)
+        with patch('booking.views.export_to_file.delay', return_value=SimpleNamespace(id='task-1')):
+            response = self.client.get(reverse('booking:export_meetings', args=['csv']), {'background': '1'})
+        self.assertEqual(response.status_code, 202)
+        return response.json()['status_url']
+
+    def test_only_owner_can_poll_status(self):
+        status_url = self.start_export()
+        with patch('booking.views.AsyncResult') as async_result:
+            async_result.return_value.status = 'PENDING'
+            async_result.return_value.successful.return_value = False
+            self.assertEqual(self.client.get(status_url).status_code, 200)
+            self.client.force_login(self.other)
+            self.assertEqual(self.client.get(status_url).status_code, 404)
+
+    def test_unknown_task_is_not_found(self):
+        self.client.force_login(self.owner)
+        self.assertEqual(self.client.get(reverse('booking:export_status', args=['nope'])).status_code, 404)
+
+    def test_background_archive_export_downloads(self):
+        self.enterContext(override_settings(EXPORT_ROOT=Path(self.enterContext(tempfile.TemporaryDirectory()))))
+        department = Department.objects.create(name="IT")
+        ArchivedRecord.objects.create(
+            kind=ArchivedRecord.KIND_MEETING, object_id='6f1c2a8e-0d3b-4c1e-9a57-1f0e2d3c4b5a', title="Retro",
+            department=department, start_time=timezone.now() - timedelta(days=400), status='scheduled', data={},
+        )
+        self.owner.is_staff = True
+        self.owner.save()
+        self.client.force_login(self.owner)
+
+        tasks = []
+        with patch('booking.views.export_to_file.delay') as delay:
+            delay.side_effect = lambda *args: tasks.append(args) or SimpleNamespace(id='task-1')
+            response = self.client.get(
+                reverse('booking:export_archive', args=['csv']), {'background': '1', 'kind': 'meeting'},
+            )
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(tasks, [('archive', 'csv', 'kind=meeting')])
+        filename = export_to_file(*tasks[0])
+
+        with patch('booking.views.AsyncResult') as async_result:
+            async_result.return_value.status = 'SUCCESS'
+            async_result.return_value.successful.return_value = True
+            async_result.return_value.result = filename
+            download_url = self.client.get(response.json()['status_url']).json()['download_url']
+
+        response = self.client.get(download_url)
+        self.assertEqual(response.status_code, 200)
+        content = b''.join(response.streaming_content).decode('utf-8-sig')
+        self.assertIn("Retro", content)
+        self.assertIn("IT", content)
+
+    def test_download_requires_known_owner(self):
+        self.enterContext(override_settings(EXPORT_ROOT=Path(self.enterContext(tempfile.TemporaryDirectory()))))
+        filename = export_to_file('meetings', 'csv')
+        url = reverse('booking:export_download', args=[filename])
+        self.client.force_login(self.owner)
+        # Egasi yozilmagan (yoki keshdan chiqib ketgan) fayl hech kimga berilmaydi
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+        cache.set(f'export:file_owner:{filename}', self.owner.id)
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.client.force_login(self.other)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+@override_settings(STREAMING_BATCH_BYTES=1024)
+class AsgiStreamingTests(TestCase):
+    """ASGI da eksport va .ics tanasi async partiyalar bilan"""
+
+    def setUp(self):
+        cache.clear()
+        self.department = Department.objects.create(name="IT")
+        self.owner = make_telegram_user(1, first_name="Ali")
+        ZoomMeeting.objects.bulk_create([
+            ZoomMeeting(
+                title=f"Uchrashuv {index}", department=self.department, created_by=self.owner,
+                start_time=timezone.now() + timedelta(days=1, hours=index), duration=30,
+            )
+            for index in range(50)
+        ])
+        self.async_client.force_login(User.objects.create_user('ali', password='parol'))
+
+    async def fetch(self, url):
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        parts = [part async for part in response.streaming_content]
+        self.assertGreater(len(parts), 1)
+        return b''.join(parts)
+
+    async def test_export_streams_asynchronously(self):
+        body = (await self.fetch(reverse('booking:export_meetings', args=['csv']))).decode('utf-8-sig')
+        self.assertEqual(len(body.splitlines()), 51)
+        self.assertIn("Uchrashuv 49", body)
+
+    async def test_calendar_streams_asynchronously_and_caches_body(self):
+        url = reverse('booking:department_calendar', args=[
+            self.department.id, ics.feed_token(ics.FEED_DEPARTMENT, self.department.id),
+        ])
+        body = await self.fetch(url)
+        self.assertEqual(body.count(b'BEGIN:VEVENT'), 50)
+        self.assertTrue(body.endswith(b'END:VCALENDAR\r\n'))
+
+        cached = await self.async_client.get(url)
+        self.assertFalse(cached.streaming)
+        self.assertEqual(cached.content, body)
+
+
+class CalendarFeedTests(TestCase):
+    """.ics feedlari: ETag/304, tana keshi va o'zgarishda yangilanish"""
+
+    def setUp(self):
+        cache.clear()
+        self.department = Department.objects.create(name="IT")
+        self.other_department = Department.objects.create(name="Moliya")
+        self.owner = make_telegram_user(1, first_name="Ali")
+        self.meeting = ZoomMeeting.objects.create(
+            title="Standup", department=self.department, created_by=self.owner,
+            start_time=timezone.now() + timedelta(days=1), duration=30, meeting_url='https://zoom.us/j/1',
+        )
+        self.url = self.feed_url(ics.FEED_DEPARTMENT, self.department.id)
+
+    def feed_url(self, kind, obj_id):
+        name = 'booking:department_calendar' if kind == ics.FEED_DEPARTMENT else 'booking:user_calendar'
+        return reverse(name, args=[obj_id, ics.feed_token(kind, obj_id)])
+
+    def get(self, url=None, **headers):
+        response = self.client.get(url or self.url, **headers)
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, body.decode()
+
+    def test_feed_body_and_not_modified(self):
+        response, body = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/calendar; charset=utf-8')
+        self.assertIn(f'UID:{self.meeting.id}@zoomga', body)
+        self.assertIn('SUMMARY:Standup', body)
+        self.assertTrue(body.endswith('END:VCALENDAR\r\n'))
+
+        with self.assertNumQueries(0):
+            response, body = self.get(HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(body, '')
+
+    def test_cached_body_is_served_without_queries(self):
+        first, body = self.get()
+        with self.assertNumQueries(0):
+            second, cached = self.get()
+        self.assertFalse(second.streaming)
+        self.assertEqual((second['ETag'], cached), (first['ETag'], body))
+
+    def test_meeting_change_invalidates_only_its_feeds(self):
+        response, _ = self.get()
+        other_url = self.feed_url(ics.FEED_DEPARTMENT, self.other_department.id)
+        other_etag = self.get(other_url)[0]['ETag']
+
+        self.meeting.title = "Retro"
+        self.meeting.save()
+
+        changed, body = self.get(HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], response['ETag'])
+        self.assertIn('SUMMARY:Retro', body)
+        self.assertEqual(self.get(other_url, HTTP_IF_NONE_MATCH=other_etag)[0].status_code, 304)
+
+    def test_user_feed_and_tokens(self):
+        ZoomMeeting.objects.create(
+            title="Boshqa", department=self.department, created_by=make_telegram_user(2, first_name="Vali"),
+            start_time=timezone.now() + timedelta(days=2), duration=30,
+        )
+        _, department_body = self.get()
+        _, user_body = self.get(self.feed_url(ics.FEED_USER, self.owner.id))
+        self.assertEqual((department_body.count('BEGIN:VEVENT'), user_body.count('BEGIN:VEVENT')), (2, 1))
+
+        wrong = reverse('booking:department_calendar', args=[self.department.id, '0' * 32])
+        self.assertEqual(self.client.get(wrong).status_code, 404)
+        missing = self.feed_url(ics.FEED_DEPARTMENT, 999)
+        self.assertEqual(self.client.get(missing).status_code, 404)
+
+    def test_long_lines_are_folded_and_escaped(self):
+        self.meeting.title = "Yig'ilish, reja; " + "ш" * 60
+        self.meeting.save()
+        _, body = self.get()
+        lines = body.split('\r\n')
+        self.assertTrue(all(len(line.encode()) <= 75 for line in lines))
+        summary = lines.index(next(line for line in lines if line.startswith('SUMMARY:')))
+        self.assertTrue(lines[summary].startswith("SUMMARY:Yig'ilish\\, reja\\; "))
+        self.assertTrue(lines[summary + 1].startswith(' '))
+
+
+class SearchReindexTests(TestCase):
+    """Nom o'zgarganda bog'liq qidiruv hujjatlarini yangilash"""
+
+    def setUp(self):
+        self.department = Department.objects.create(name="IT")
+        self.requester = make_telegram_user(1, first_name="Ali")
+        self.request = BookingRequest.objects.create(
+            title="Standup", department=self.department, requested_by=self.requester,
+            preferred_start_time=timezone.now() + timedelta(days=1), duration=30,
+        )
+
+    def request_document(self):
+        return SearchDocument.objects.get(object_type=SearchDocument.TYPE_REQUEST, object_id=str(self.request.id))
+
+    def test_department_rename_updates_related_documents(self):
+        self.department.name = "Moliya"
+        self.department.save()
+        self.assertIn("Moliya", self.request_document().document)
+
+    def test_user_rename_updates_related_documents(self):
+        requester = TelegramUser.objects.get(id=self.requester.id)
+        requester.first_name = "Vali"
+        requester.save()
+        self.assertIn("Vali", self.request_document().document)
+        self.assertIn("Vali", SearchDocument.objects.get(
+            object_type=SearchDocument.TYPE_USER, object_id=str(requester.id),
+        ).document)
+
+    def test_unrelated_changes_skip_reindex(self):
+        with patch.object(search, 'reindex_related') as reindex, patch.object(search, 'index_user') as index_user:
+            self.requester.is_admin = True
+            self.requester.save()
+            TelegramUser.objects.only('id', 'is_active').get(id=self.requester.id).save()
+            self.department.daily_limit = 10
+            self.department.save()
+            self.department.name = "Moliya"
+            self.department.save(update_fields=['daily_limit'])
+        reindex.assert_not_called()
+        index_user.assert_not_called()
+
+    def test_reindex_is_batched(self):
+        for index in range(4):
+            BookingRequest.objects.create(
+                title=f"So'rov {index}", department=self.department, requested_by=self.requester,
+                preferred_start_time=timezone.now() + timedelta(days=2), duration=30,
+            )
+        Department.objects.filter(id=self.department.id).update(name="Moliya")
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(search.reindex_related(department_id=self.department.id, batch_size=2), 5)
+        writes = [query for query in queries.captured_queries if 'booking_searchdocument' in query['sql']]
+        self.assertEqual(len(writes), 3)
+        self.assertEqual(
+            SearchDocument.objects.filter(object_type=SearchDocument.TYPE_REQUEST, document__contains="Moliya").count(), 5,
+        )
+
+
+class AnalyticsTests(TestCase):
+    """Vaqt bo'laklari bo'yicha analitika (NumPy guruhlash va persentillar)"""
+
+    def setUp(self):
+        cache.clear()
+        self.it = Department.objects.create(name="IT")
+        self.finance = Department.objects.create(name="Moliya")
+        self.requester = make_telegram_user(1, first_name="Ali")
+        self.day = datetime(2026, 3, 2).date()  # dushanba
+
+    def at(self, day_offset, hour):
+        return analytics.local_midnight(self.day + timedelta(days=day_offset)) + timedelta(hours=hour)
+
+    def add_request(self, department, created_at, status='pending', hours_to_process=None):
+        booking_request = BookingRequest.objects.create(
+            title="So'rov", department=department, requested_by=self.requester,
+            preferred_start_time=created_at + timedelta(days=3), duration=30, status=status,
+        )
+        processed_at = created_at + timedelta(hours=hours_to_process) if hours_to_process is not None else None
+        BookingRequest.objects.filter(id=booking_request.id).update(created_at=created_at, processed_at=processed_at)
+
+    def test_bucket_dates(self):
+        self.assertEqual(
+            analytics.bucket_dates(self.day + timedelta(days=2), self.day + timedelta(days=9), 'week'),
+            [self.day, self.day + timedelta(days=7), self.day + timedelta(days=14)],
+        )
+        months = analytics.bucket_dates(datetime(2026, 1, 31).date(), datetime(2026, 2, 1).date(), 'month')
+        self.assertEqual(months, [datetime(2026, 1, 1).date(), datetime(2026, 2, 1).date(), datetime(2026, 3, 1).date()])
+
+    def test_group_percentiles(self):
+        groups = np.array([0, 0, 0, 2, 0])
+        values = np.array([4.0, 1.0, 3.0, 7.0, 2.0])
+        result = analytics._group_percentiles(groups, values, 3, [50, 90])
+        self.assertEqual(result[0, 0], 2.5)
+        self.assertAlmostEqual(result[0, 1], 3.7)
+        self.assertTrue(np.isnan(result[1]).all())
+        self.assertEqual(result[2].tolist(), [7.0, 7.0])
+        self.assertTrue(np.isnan(analytics._group_percentiles(np.array([], dtype=int), np.array([]), 2, [50])).all())
+
+    def test_request_trends(self):
+        self.add_request(self.it, self.at(0, 9), 'approved', hours_to_process=2)
+        self.add_request(self.it, self.at(0, 23), 'approved', hours_to_process=6)
+        self.add_request(self.it, self.at(1, 0), 'rejected', hours_to_process=1)
+        self.add_request(self.finance, self.at(1, 10))
+        # Oraliqdan tashqari
+        self.add_request(self.it, self.at(3, 0), 'approved', hours_to_process=1)
+
+        data = analytics.get_analytics(self.day, self.day + timedelta(days=2))
+        totals = data['requests']['totals']
+        self.assertEqual(data['buckets'], [str(self.day + timedelta(days=index)) for index in range(3)])
+        self.assertEqual(totals['total'], [2, 2, 0])
+        self.assertEqual(totals['approved'], [2, 0, 0])
+        self.assertEqual(totals['rejected'], [0, 1, 0])
+        self.assertEqual(totals['pending'], [0, 1, 0])
+        self.assertEqual(totals['approval_rate'], [1.0, 0.0, None])
+        self.assertEqual(totals['hours_to_approve_median'], [4.0, None, None])
+        self.assertEqual(totals['hours_to_approve_p90'], [5.6, None, None])
+
+        departments = {row['name']: row for row in data['requests']['departments']}
+        self.assertEqual(departments['IT']['total'], 3)
+        self.assertEqual(departments['IT']['approval_rate'], 0.67)
+        self.assertEqual(departments['IT']['hours_to_approve_median'], 4.0)
+        self.assertEqual(departments['Moliya']['approval_rate'], None)
+
+    def test_meeting_trends(self):
+        for department, day_offset, duration, status in [
+            (self.it, 0, 30, 'scheduled'), (self.it, 0, 45, 'ended'),
+            (self.finance, 1, 60, 'scheduled'), (self.it, 1, 90, 'cancelled'),
+        ]:
+            ZoomMeeting.objects.create(
+                title="Uchrashuv", department=department, created_by=self.requester,
+                start_time=self.at(day_offset, 10), duration=duration, status=status,
+            )
+        meetings = analytics.get_analytics(self.day, self.day + timedelta(days=1))['meetings']
+        self.assertEqual(meetings['totals'], {'meetings': [2, 1], 'minutes': [75.0, 60.0]})
+        self.assertEqual(
+            [(row['name'], row['meetings']) for row in meetings['departments']],
+            [('IT', [2, 0]), ('Moliya', [0, 1])],
+        )
+
+    def test_request_range_uses_created_index(self):
+        requests = BookingRequest.objects.filter(
+            created_at__gte=self.at(0, 0), created_at__lt=self.at(1, 0),
+        ).values_list('created_at', 'status', 'processed_at', 'department_id')
+        self.assertIn('booking_br_created_idx', requests.explain())
+
+
+class RecurrenceTests(TestCase):
+    """Seriya takrorlarini hisoblash, tahrirlash va bekor qilish"""
+
+    def setUp(self):
+        cache.clear()
+        self.department = Department.objects.create(name="IT")
+        self.owner = make_telegram_user(1, first_name="Ali")
+        self.dtstart = timezone.make_aware(datetime(2026, 3, 2, 10, 0))  # dushanba
+        self.series = self.make_series('FREQ=DAILY')
+
+    def make_series(self, rule, **kwargs):
+        return MeetingSeries.objects.create(
+            title="Standup", department=self.department, created_by=self.owner, dtstart=self.dtstart,
+            duration=15, rrule=rule, until=recurrence.series_until(rule, self.dtstart, 15), **kwargs,
+        )
+
+    def day(self, offset, hour=10):
+        return self.dtstart + timedelta(days=offset, hours=hour - 10)
+
+    def starts(self, window_start, window_end, **filters):
+        return [
+            (occurrence.series_id, occurrence.start_time)
+            for occurrence in recurrence.expand(
+                recurrence.series_in_window(window_start, window_end, **filters), window_start, window_end,
+            )
+        ]
+
+    def test_expand_window_is_half_open(self):
+        starts = self.starts(self.day(1), self.day(4))
+        self.assertEqual(starts, [(self.series.id, self.day(offset)) for offset in (1, 2, 3)])
+        occurrence = recurrence.expand([self.series], self.day(1), self.day(2))[0]
+        self.assertEqual(occurrence.id, f"{self.series.id}:20260303T050000Z")
+        self.assertEqual(occurrence.end_time, self.day(1) + timedelta(minutes=15))
+
+    def test_expand_skips_exdates_and_overrides(self):
+        self.series.exdates = [recurrence.occurrence_stamp(self.day(1))]
+        self.series.save()
+        ZoomMeeting.objects.create(
+            title="Ko'chirilgan", department=self.department, created_by=self.owner, start_time=self.day(2, 15),
+            duration=15, series=self.series, original_start=self.day(2),
+        )
+        self.assertEqual(self.starts(self.day(0), self.day(4)), [(self.series.id, self.day(offset)) for offset in (0, 3)])
+
+        meetings = recurrence.meetings_in_window(self.day(0), self.day(4), department_id=self.department.id)
+        self.assertEqual([meeting.start_time for meeting in meetings], [self.day(0), self.day(2, 15), self.day(3)])
+
+    def test_until_limits_series_window(self):
+        limited = self.make_series('FREQ=DAILY;COUNT=3')
+        self.assertEqual(limited.until, self.day(2) + timedelta(minutes=15))
+        self.assertEqual(list(recurrence.series_in_window(self.day(5), self.day(6))), [self.series])
+        self.assertEqual(
+            set(recurrence.series_in_window(self.day(2), self.day(3))), {self.series, limited},
+        )
+        self.assertEqual(list(recurrence.series_in_window(self.day(-5), self.day(-1))), [])
+
+    def test_series_in_window_filters(self):
+        other = make_telegram_user(2, first_name="Vali")
+        finance = Department.objects.create(name="Moliya")
+        foreign = self.make_series('FREQ=WEEKLY')
+        foreign.created_by, foreign.department = other, finance
+        foreign.save()
+        window = (self.day(0), self.day(7))
+        self.assertEqual(list(recurrence.series_in_window(*window, department_id=finance.id)), [foreign])
+        self.assertEqual(list(recurrence.series_in_window(*window, created_by_id=self.owner.id)), [self.series])
+        self.assertEqual(
+            set(recurrence.series_in_window(*window, created_by_id=self.owner.id, department_ids=[finance.id])),
+            {self.series, foreign},
+        )
+
+    def test_count_in_window(self):
+        self.make_series('FREQ=WEEKLY;BYDAY=MO,WE')
+        self.series.exdates = [recurrence.occurrence_stamp(self.day(3))]
+        self.series.save()
+        # 7 kunlik - 1 bekor qilingan, haftalik - dushanba va chorshanba
+        self.assertEqual(recurrence.count_in_window(self.day(0), self.day(7)), 8)
+        self.assertEqual(recurrence.count_in_window(self.day(0), self.day(7), created_by_id=self.owner.id), 8)
+        self.assertEqual(recurrence.count_in_window(self.day(0), self.day(7), department_id=0), 0)
+
+    def test_one_override_per_occurrence(self):
+        fields = dict(
+            title="Standup", department=self.department, created_by=self.owner, start_time=self.day(1),
+            duration=15, series=self.series, original_start=self.day(1),
+        )
+        ZoomMeeting.objects.create(**fields)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            ZoomMeeting.objects.create(**fields)
+        # Seriyasiz uchrashuvlarga cheklov qo'llanmaydi
+        ZoomMeeting.objects.create(**{**fields, 'series': None, 'original_start': None})
+        ZoomMeeting.objects.create(**{**fields, 'series': None, 'original_start': None})
+
+    def test_materialize_and_cancel_occurrence_bump_feeds(self):
+        version = feed_version(FEED_USER, self.owner.id)
+        meeting = recurrence.materialize_occurrence(self.series, self.day(1), start_time=self.day(1, 16), duration=30)
+        self.assertNotEqual(feed_version(FEED_USER, self.owner.id), version)
+        self.assertEqual((meeting.start_time, meeting.duration, meeting.title), (self.day(1, 16), 30, "Standup"))
+        # Qayta tahrirlash o'sha qatorni yangilaydi
+        again = recurrence.materialize_occurrence(self.series, self.day(1), title="Retro")
+        self.assertEqual((again.id, again.title, again.duration), (meeting.id, "Retro", 15))
+
+        version = feed_version(FEED_USER, self.owner.id)
+        recurrence.cancel_occurrence(self.series, self.day(1))
+        self.assertNotEqual(feed_version(FEED_USER, self.owner.id), version)
+        self.assertFalse(ZoomMeeting.objects.filter(series=self.series).exists())
+        self.series.refresh_from_db()
+        self.assertEqual(self.series.exdates, ['20260303T050000Z'])
+        self.assertEqual(self.starts(self.day(1), self.day(2)), [])
+
+        # Bekor qilingan takrorni tahrirlash uni qaytaradi
+        recurrence.materialize_occurrence(self.series, self.day(1))
+        self.series.refresh_from_db()
+        self.assertEqual(self.series.exdates, [])
+
+    def test_occurrence_start_validates_stamp(self):
+        self.assertEqual(recurrence.occurrence_start(self.series, '20260303T050000Z'), self.day(1))
+        for stamp in ('20260303T050100Z', '20260301T050000Z', 'nonsense'):
+            with self.assertRaises(ValueError):
+                recurrence.occurrence_start(self.series, stamp)
+
+    def test_admin_occurrence_view(self):
+        admin_user = User.objects.create_superuser('admin', password='parol')
+        self.client.force_login(admin_user)
+        url = reverse('admin:booking_meetingseries_occurrence', args=[self.series.pk])
+        stamp = recurrence.occurrence_stamp(self.day(1))
+        with patch('booking.admin.timezone.now', return_value=self.day(0, 12)):
+            response = self.client.get(url)
+            self.assertContains(response, stamp)
+            response = self.client.post(url, {'occurrence': stamp, 'action': 'edit', 'duration': 45})
+            self.assertRedirects(response, reverse('admin:booking_meetingseries_change', args=[self.series.pk]))
+            self.assertEqual(ZoomMeeting.objects.get(series=self.series, original_start=self.day(1)).duration, 45)
+
+            response = self.client.post(url, {'occurrence': stamp, 'action': 'cancel'})
+            self.assertEqual(response.status_code, 302)
+        self.series.refresh_from_db()
+        self.assertEqual(self.series.exdates, [stamp])
+
+        response = self.client.post(
+            reverse('admin:booking_meetingseries_changelist'),
+            {'action': 'edit_occurrence', '_selected_action': [self.series.pk]},
+        )
+        self.assertRedirects(response, url)
+        self.assertContains(self.client.get(reverse('admin:booking_meetingseries_change', args=[self.series.pk])), url)
+
+
+def make_xlsx(rows, shared=()):
+    """Minimal XLSX: rows - [[(ref, turi, qiymat), ...], ...], shared - sharedStrings"""
+    namespace = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+    cells = []
+    for row in rows:
+        row_cells = []
+        for ref, cell_type, value in row:
+            ref_attr = f' r="{ref}"' if ref else ''
+            if cell_type == 'inlineStr':
+                row_cells.append(f'<c{ref_attr} t="inlineStr"><is><t>{value}</t></is></c>')
+            elif cell_type:
+                row_cells.append(f'<c{ref_attr} t="{cell_type}"><v>{value}</v></c>')
+            else:
+                row_cells.append(f'<c{ref_attr}><v>{value}</v></c>')
+        cells.append(f'<row>{"".join(row_cells)}</row>')
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.writestr(
+            'xl/worksheets/sheet1.xml',
+            f'<worksheet xmlns="{namespace}"><sheetData>{"".join(cells)}</sheetData></worksheet>',
+        )
+        if shared:
+            items = ''.join(f'<si><t>{value}</t></si>' for value in shared)
+            archive.writestr('xl/sharedStrings.xml', f'<sst xmlns="{namespace}">{items}</sst>')
+    buffer.seek(0)
+    return buffer
+
+
+class BulkImportTests(TestCase):
+    """So'rovlarni CSV/XLSX dan import qilish"""
+
+    def setUp(self):
+        self.department = Department.objects.create(name="IT", daily_limit=3)
+        self.requester = make_telegram_user(1, first_name="Ali")
+        DepartmentAdmin.objects.create(telegram_user=self.requester, department=self.department)
+        self.day = timezone.localdate() + timedelta(days=2)
+
+    def at(self, hour, minute=0):
+        return timezone.make_aware(datetime.combine(self.day, time(hour, minute)))
+
+    def csv_file(self, *rows):
+        lines = ['department,title,start,duration']
+        lines.extend(f'IT,{title},{start:%Y-%m-%d %H:%M},{duration}' for title, start, duration in rows)
+        return io.BytesIO('\n'.join(lines).encode())
+
+    def import_csv(self, *rows):
+        return imports.import_bookings(self.csv_file(*rows), 'csv', self.requester)
+
+    def test_rows_are_checked_against_all_existing_meetings_first(self):
+        ZoomMeeting.objects.create(
+            title="Mavjud", department=self.department, created_by=self.requester,
+            start_time=self.at(10, 30), duration=30,
+        )
+        rows = self.import_csv(("A", self.at(10), 45), ("B", self.at(10, 15), 15), ("C", self.at(11), 30))
+        self.assertEqual([row.error for row in rows], ["Bo'limda shu vaqtda boshqa uchrashuv bor", '', ''])
+        self.assertEqual(
+            sorted(BookingRequest.objects.values_list('title', flat=True)), ["B", "C"],
+        )
+
+    def test_existing_meeting_spanning_several_rows(self):
+        self.department.daily_limit = 5
+        self.department.save()
+        ZoomMeeting.objects.create(
+            title="Uzun", department=self.department, created_by=self.requester,
+            start_time=self.at(8), duration=240,
+        )
+        ZoomMeeting.objects.create(
+            title="Qisqa", department=self.department, created_by=self.requester,
+            start_time=self.at(9), duration=15,
+        )
+        rows = self.import_csv(("A", self.at(11, 30), 60), ("B", self.at(12), 30), ("C", self.at(12, 30), 30))
+        self.assertEqual([row.ok for row in rows], [False, True, True])
+
+    def test_new_rows_overlapping_each_other(self):
+        rows = self.import_csv(("A", self.at(10), 60), ("B", self.at(10, 30), 60), ("C", self.at(11), 30))
+        self.assertEqual([row.error for row in rows], ['', "2-qator bilan vaqti kesishadi", ''])
+
+    def test_daily_limit_counts_existing_and_new(self):
+        BookingRequest.objects.create(
+            title="Kutilmoqda", department=self.department, requested_by=self.requester,
+            preferred_start_time=self.at(8), duration=30,
+        )
+        rows = self.import_csv(*[(f"S{hour}", self.at(hour), 30) for hour in (10, 11, 12)])
+        self.assertEqual([row.ok for row in rows], [True, True, False])
+        self.assertEqual(rows[2].error, "Bo'limning kunlik limiti (3 ta) to'lgan")
+
+    def test_invalid_rows_are_reported(self):
+        rows = self.import_csv(
+            ("", self.at(10), 30), ("Eski", self.at(10) - timedelta(days=5), 30), ("Uzun", self.at(10), 9999),
+        )
+        self.assertEqual(
+            [row.error for row in rows],
+            ["Nomi kiritilmagan", "Vaqt o'tib ketgan", "Davomiylik 1 daqiqadan 480 daqiqagacha bo'lishi kerak"],
+        )
+        self.assertFalse(BookingRequest.objects.exists())
+
+    def test_xlsx_records(self):
+        serial = (datetime.combine(self.day, time(9, 30)) - imports.EXCEL_EPOCH) / timedelta(days=1)
+        workbook = make_xlsx([
+            [('A1', 's', 0), ('B1', 's', 1), ('C1', 'inlineStr', 'Vaqt'), ('E1', 'inlineStr', 'Davomiyligi')],
+            [('A2', 's', 2), ('B2', 'inlineStr', 'Standup'), ('C2', None, serial), ('E2', None, '30')],
+            [],
+            [(None, 'str', 'IT'), (None, 'str', 'Retro'), (None, 'str', f'{self.day:%d.%m.%Y} 15:00'),
+             (None, 'inlineStr', ''), (None, None, '45.0')],
+        ], shared=["Bo'lim", 'Nomi', 'IT'])
+        rows = imports.import_bookings(workbook, 'xlsx', self.requester)
+        self.assertEqual([(row.title, row.start_time, row.duration, row.error) for row in rows], [
+            ('Standup', self.at(9, 30), 30, ''),
+            ('Retro', self.at(15), 45, ''),
+        ])
+        self.assertEqual(BookingRequest.objects.count(), 2)
+
+    def test_file_level_errors(self):
+        with self.assertRaisesMessage(imports.BulkImportError, "XLSX faylni o'qib bo'lmadi"):
+            imports.read_rows(io.BytesIO(b'not a zip'), 'xlsx')
+        with self.assertRaisesMessage(imports.BulkImportError, "Ustunlar topilmadi: duration"):
+            imports.read_rows(io.BytesIO(b'department,title,start\nIT,A,2030-01-01 10:00'), 'csv')
+
+
+@override_settings(
+    ZOOM_WARM_POOL_SIZE=3, ZOOM_WARM_POOL_MIN=1, ZOOM_HOST_USER_IDS=['host-a', 'host-b'],
+    ZOOM_WARM_POOL_OFFPEAK_HOURS=(20, 7), ZOOM_WARM_POOL_MAX_AGE_DAYS=14, ZOOM_API_RATE_LIMIT=0,
+)
+class WarmPoolTests(TestCase):
+    """Oldindan yaratilgan Zoom uchrashuvlari zaxirasi"""
+
+    def setUp(self):
+        cache.clear()
+        self.department = Department.objects.create(name="IT")
+        self.requester = make_telegram_user(1, first_name="Ali")
+        self.start = timezone.now().replace(microsecond=0) + timedelta(days=1)
+        self.created = 0
+        self.enterContext(patch.object(warm_pool, 'zoom_configured', return_value=True))
+        self.create_pool_meeting = self.enterContext(
+            patch.object(warm_pool, 'create_pool_meeting', side_effect=self.fake_create),
+        )
+        self.delete_meeting = self.enterContext(patch.object(warm_pool, 'delete_meeting'))
+
+    def fake_create(self, host, start_time):
+        self.created += 1
+        return {'id': 1000 + self.created, 'join_url': f'https://zoom.us/j/{1000 + self.created}', 'password': 'x'}
+
+    def pool(self, host, count=1, age_days=0):
+        entries = []
+        for _ in range(count):
+            self.created += 1
+            entries.append(PooledZoomMeeting.objects.create(
+                host=host, zoom_meeting_id=str(self.created), meeting_url=f'https://zoom.us/j/{self.created}',
+            ))
+        if age_days:
+            PooledZoomMeeting.objects.filter(id__in=[entry.id for entry in entries]).update(
+                created_at=timezone.now() - timedelta(days=age_days),
+            )
+        return entries
+
+    def book(self, host, start_time, duration=60):
+        return ZoomMeeting.objects.create(
+            title="Band", department=self.department, created_by=self.requester,
+            start_time=start_time, duration=duration, zoom_host=host, zoom_meeting_id='busy',
+        )
+
+    def test_claim_prefers_free_host(self):
+        self.pool('host-a', 2)
+        free_entry, = self.pool('host-b')
+        self.book('host-a', self.start - timedelta(minutes=30))
+
+        claimed = warm_pool.claim(self.start, 30)
+        self.assertEqual(claimed['zoom_host'], 'host-b')
+        self.assertEqual(claimed['zoom_meeting_id'], free_entry.zoom_meeting_id)
+        self.assertFalse(PooledZoomMeeting.objects.filter(host='host-b').exists())
+
+    def test_claim_falls_back_to_busy_host(self):
+        busy_entry, = self.pool('host-a')
+        self.book('host-a', self.start)
+        self.book('host-b', self.start + timedelta(minutes=15))
+
+        self.assertEqual(warm_pool.claim(self.start, 30)['zoom_meeting_id'], busy_entry.zoom_meeting_id)
+        self.assertIsNone(warm_pool.claim(self.start, 30))
+
+    def test_claim_skips_stale_entries(self):
+        self.pool('host-a', age_days=15)
+        self.assertIsNone(warm_pool.claim(self.start, 30))
+        fresh, = self.pool('host-a', age_days=13)
+        self.assertEqual(warm_pool.claim(self.start, 30)['zoom_meeting_id'], fresh.zoom_meeting_id)
+        self.assertEqual(PooledZoomMeeting.objects.count(), 1)
+
+    def test_claim_disabled_by_default(self):
+        self.pool('host-a')
+        with self.settings(ZOOM_WARM_POOL_SIZE=0):
+            self.assertIsNone(warm_pool.claim(self.start, 30))
+
+    def test_approval_uses_pooled_meeting(self):
+        entry, _ = self.pool('host-a', 2)
+        booking_request = BookingRequest.objects.create(
+            title="Standup", department=self.department, requested_by=self.requester,
+            preferred_start_time=self.start, duration=30,
+        )
+        meeting = approve_request(booking_request.id, None)
+        self.assertEqual((meeting.zoom_host, meeting.zoom_meeting_id), ('host-a', entry.zoom_meeting_id))
+        topics = list(OutboxEvent.objects.values_list('topic', flat=True))
+        self.assertEqual(topics[-2:], [outbox.MEETING_APPROVED, outbox.MEETING_POOL_CLAIMED])
+        self.assertEqual(PooledZoomMeeting.objects.get().host, 'host-a')
+
+    def at_hour(self, hour):
+        return timezone.localtime().replace(hour=hour, minute=0, second=0, microsecond=0)
+
+    def test_refill_target_off_peak(self):
+        self.pool('host-a', 1)
+        stale, = self.pool('host-b', age_days=20)
+        with patch.object(warm_pool.timezone, 'now', return_value=self.at_hour(23)):
+            created = warm_pool.refill()
+        self.assertEqual(created, {'host-a': 2, 'host-b': 3})
+        self.delete_meeting.assert_called_once_with(stale.zoom_meeting_id)
+        self.assertEqual(warm_pool.available('host-a'), 3)
+        self.assertEqual(warm_pool.available('host-b'), 3)
+
+    def test_refill_target_at_peak(self):
+        self.pool('host-a', 2)
+        self.pool('host-b', age_days=20)
+        with patch.object(warm_pool.timezone, 'now', return_value=self.at_hour(10)):
+            self.assertTrue(warm_pool.needs_refill())
+            created = warm_pool.refill()
+        # Ish vaqtida faqat ZOOM_WARM_POOL_MIN gacha, eskilar o'chirilmaydi
+        self.assertEqual(created, {'host-a': 0, 'host-b': 1})
+        self.delete_meeting.assert_not_called()
+        with patch.object(warm_pool.timezone, 'now', return_value=self.at_hour(10)):
+            self.assertFalse(warm_pool.needs_refill())
+            self.assertEqual(warm_pool.refill(force=True), {'host-a': 1, 'host-b': 2})
+
+    def test_refill_stops_on_api_error(self):
+        calls = []
+
+        def flaky_create(host, start_time):
+            calls.append(host)
+            if len(calls) == 2:
+                raise RequestException("429 Too Many Requests")
+            return self.fake_create(host, start_time)
+
+        self.create_pool_meeting.side_effect = flaky_create
+        created = warm_pool.refill(force=True)
+        self.assertEqual(created, {'host-a': 1, 'host-b': 0})
+        self.assertEqual(calls, ['host-a', 'host-a'])
+        self.assertEqual(PooledZoomMeeting.objects.count(), 1)
+        # Qulf bo'shatilgan: keyingi ishga tushirish davom etadi
+        self.create_pool_meeting.side_effect = self.fake_create
+        self.assertEqual(warm_pool.refill(force=True), {'host-a': 2, 'host-b': 3})
+
+    def test_refill_skips_while_locked(self):
+        cache.add(warm_pool.REFILL_LOCK_KEY, True)
+        self.assertEqual(warm_pool.refill(force=True), {})
+        self.create_pool_meeting.assert_not_called()
+
+
+class ArchiveTests(TestCase):
+    """Eski uchrashuvlarni arxivga ko'chirish"""
+
+    def setUp(self):
+        self.department = Department.objects.create(name="IT")
+        self.owner = make_telegram_user(1, first_name="Ali")
+        self.meeting = ZoomMeeting.objects.create(
+            title="Retro",
+            department=self.department,
+            created_by=self.owner,
+            start_time=timezone.now() - timedelta(days=400),
+            duration=30,
+        )
+
+    def test_attendance_is_copied_into_archive(self):
+        MeetingAttendance.objects.bulk_create([
+            MeetingAttendance(
+                meeting=self.meeting, participant='u2', name="Vali", join_offset=60, leave_offset=900,
+                attended_seconds=840,
+            ),
+            MeetingAttendance(
+                meeting=self.meeting, participant='u1', name="Ali", join_offset=-30, leave_offset=1800,
+                attended_seconds=1830,
+            ),
+        ])
+
+        self.assertEqual(archive.archive_batch(ArchivedRecord.KIND_MEETING, archive.archive_cutoff(365)), 1)
+
+        self.assertFalse(ZoomMeeting.objects.filter(id=self.meeting.id).exists())
+        self.assertFalse(MeetingAttendance.objects.exists())
+        record = ArchivedRecord.objects.get(object_id=self.meeting.id)
+        self.assertEqual(record.data['attendance'], [
+            {'participant': 'u1', 'name': "Ali", 'join_offset': -30, 'leave_offset': 1800, 'attended_seconds': 1830},
+            {'participant': 'u2', 'name': "Vali", 'join_offset': 60, 'leave_offset': 900, 'attended_seconds': 840},
+        ])
+
+    def test_meeting_without_attendance(self):
+        archive.archive_batch(ArchivedRecord.KIND_MEETING, archive.archive_cutoff(365))
+
+        record = ArchivedRecord.objects.get(object_id=self.meeting.id)
+        self.assertEqual(record.data['attendance'], [])
+        self.assertEqual(record.title, "Retro")
@@ -7,11 +7,23 @@ urlpatterns = [
     path('login/', views.custom_login, name='login'),
     path('', views.dashboard, name='dashboard'),
     path('meetings/', views.meetings_list, name='meetings_list'),
+    path('meetings/export/<str:fmt>/', views.export_meetings, name='export_meetings'),
     path('meetings/<uuid:meeting_id>/', views.meeting_detail, name='meeting_detail'),
     path('requests/', views.requests_list, name='requests_list'),
+    path('requests/export/<str:fmt>/', views.export_requests, name='export_requests'),
+    path('requests/import/', views.import_requests, name='import_requests'),
     path('requests/<uuid:request_id>/', views.request_detail, name='request_detail'),
+    path('archive/export/<str:fmt>/', views.export_archive, name='export_archive'),
     path('departments/', views.departments_list, name='departments_list'),
     path('departments/<int:department_id>/', views.department_detail, name='department_detail'),
+    path('exports/<str:task_id>/status/', views.export_status, name='export_status'),
+    path('exports/<str:filename>/', views.export_download, name='export_download'),
     path('api/meeting-stats/', views.api_meeting_stats, name='api_meeting_stats'),
     path('api/department-stats/', views.api_department_stats, name='api_department_stats'),
+    path('api/search/', views.api_search, name='api_search'),
+    path('api/analytics/', views.api_analytics, name='api_analytics'),
+    path('api/attendance/', views.api_attendance, name='api_attendance'),
+    path('api/changes/', views.api_changes, name='api_changes'),
+    path('calendar/department/<int:department_id>/<str:token>.ics', views.department_calendar, name='department_calendar'),
+    path('calendar/user/<int:telegram_user_id>/<str:token>.ics', views.user_calendar, name='user_calendar'),
 ]
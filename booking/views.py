@@ -4,13 +4,48 @@ from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib import messages
 from django.utils import timezone
 from django.db.models import Count, Q
-from django.http import JsonResponse
+from django.http import JsonResponse, Http404, HttpResponse, HttpResponseNotModified, FileResponse
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.http import parse_etags
 from django.contrib.auth import login, authenticate
 from django.contrib.auth.forms import AuthenticationForm
+from django.contrib.auth.views import redirect_to_login
 from django.urls import reverse
+from zoomga.db_router import primary_reads, replica_reads
+from zoomga.metrics import sync_to_async
+from zoomga.streaming import streaming_response
 from .models import ZoomMeeting, BookingRequest
 from telegram_bot.models import Department, TelegramUser
+from . import calendar as ics
+from .exports import EXPORT_FORMATS, export_queryset, export_response, filter_meetings, filter_requests
+from .imports import BulkImportError, import_bookings, import_format
+from .tasks import export_to_file
+from .search import search
+from .services import approve_request, reject_request
+from .analytics import GRANULARITIES, get_analytics, period_range
+from .attendance import department_attendance
+from .changes import CursorExpired, get_changes
+from .recurrence import count_in_window
+from .archive import search_archive
+from datetime import date, timedelta
+from celery.result import AsyncResult
+import functools
 import json
+import re
+
+
+def async_login_required(view_func):
+    """login_required ning async view lar uchun varianti (Django 4.2 dagisi faqat sync)"""
+    @functools.wraps(view_func)
+    async def wrapper(request, *args, **kwargs):
+        # request.user dangasa: sessiya va foydalanuvchi bir marta thread da yuklanadi
+        if not await sync_to_async(lambda: request.user.is_authenticated)():
+            return redirect_to_login(request.get_full_path())
+        return await view_func(request, *args, **kwargs)
+
+    return wrapper
+
 
 def custom_login(request):
     if request.method == 'POST':
@@ -27,6 +62,7 @@ def custom_login(request):
     
     return render(request, 'booking/login.html', {'form': form})
 
+@replica_reads
 @login_required
 def dashboard(request):
     today = timezone.now().date()
@@ -70,23 +106,13 @@ def dashboard(request):
     
     return render(request, 'booking/dashboard.html', context)
 
+@replica_reads
 @login_required
 def meetings_list(request):
     meetings = ZoomMeeting.objects.filter(is_active=True).order_by('-start_time')
     
     # Filtrlar
-    status_filter = request.GET.get('status')
-    department_filter = request.GET.get('department')
-    date_filter = request.GET.get('date')
-    
-    if status_filter:
-        meetings = meetings.filter(status=status_filter)
-    
-    if department_filter:
-        meetings = meetings.filter(department_id=department_filter)
-    
-    if date_filter:
-        meetings = meetings.filter(start_time__date=date_filter)
+    meetings = filter_meetings(meetings, request.GET)
     
     departments = Department.objects.filter(is_active=True)
     
@@ -118,19 +144,13 @@ def meeting_detail(request, meeting_id):
     
     return render(request, 'booking/meeting_detail.html', {'meeting': meeting})
 
+@replica_reads
 @staff_member_required
 def requests_list(request):
     requests = BookingRequest.objects.all().order_by('-created_at')
     
     # Filtrlar
-    status_filter = request.GET.get('status')
-    department_filter = request.GET.get('department')
-    
-    if status_filter:
-        requests = requests.filter(status=status_filter)
-    
-    if department_filter:
-        requests = requests.filter(department_id=department_filter)
+    requests = filter_requests(requests, request.GET)
     
     departments = Department.objects.filter(is_active=True)
     
@@ -142,6 +162,7 @@ def requests_list(request):
     
     return render(request, 'booking/requests_list.html', context)
 
+@primary_reads
 @staff_member_required
 def request_detail(request, request_id):
     booking_request = get_object_or_404(BookingRequest, id=request_id)
@@ -150,38 +171,27 @@ def request_detail(request, request_id):
         action = request.POST.get('action')
         rejection_reason = request.POST.get('rejection_reason', '')
         
+        processed_by = getattr(request.user, 'telegramuser', None)
+        processed_by_id = processed_by.id if processed_by else None
+
         if action == 'approve':
-            booking_request.status = 'approved'
-            booking_request.processed_by = request.user.telegramuser
-            booking_request.processed_at = timezone.now()
-            booking_request.save()
-            
-            # Create Zoom meeting
-            meeting = ZoomMeeting.objects.create(
-                title=booking_request.title,
-                description=booking_request.description,
-                department=booking_request.department,
-                created_by=booking_request.requested_by,
-                start_time=booking_request.preferred_start_time,
-                duration=booking_request.duration,
-                status='scheduled'
-            )
-            
-            messages.success(request, f'So\'rov tasdiqlandi va uchrashuv yaratildi: {meeting.id}')
+            meeting = approve_request(booking_request.id, processed_by_id)
+            if meeting:
+                messages.success(request, f'So\'rov tasdiqlandi va uchrashuv yaratildi: {meeting.id}')
+            else:
+                messages.warning(request, 'So\'rov allaqachon ko\'rib chiqilgan!')
             
         elif action == 'reject':
-            booking_request.status = 'rejected'
-            booking_request.rejection_reason = rejection_reason
-            booking_request.processed_by = request.user.telegramuser
-            booking_request.processed_at = timezone.now()
-            booking_request.save()
-            
-            messages.success(request, 'So\'rov rad etildi!')
+            if reject_request(booking_request.id, processed_by_id, rejection_reason):
+                messages.success(request, 'So\'rov rad etildi!')
+            else:
+                messages.warning(request, 'So\'rov allaqachon ko\'rib chiqilgan!')
         
         return redirect('requests_list')
     
     return render(request, 'booking/request_detail.html', {'request': booking_request})
 
+@replica_reads
 @staff_member_required
 def departments_list(request):
     departments = Department.objects.all().order_by('name')
@@ -198,6 +208,7 @@ def departments_list(request):
     
     return render(request, 'booking/departments_list.html', {'departments': departments})
 
+@replica_reads
 @staff_member_required
 def department_detail(request, department_id):
     department = get_object_or_404(Department, id=department_id)
@@ -216,48 +227,309 @@ def department_detail(request, department_id):
     # Bo'lim adminlari
     admins = department.departmentadmin_set.filter(is_active=True)
     
+    calendar_url = request.build_absolute_uri(reverse(
+        'booking:department_calendar',
+        args=[department.id, ics.feed_token(ics.FEED_DEPARTMENT, department.id)]
+    ))
+    
     context = {
         'department': department,
         'meetings': meetings,
         'requests': requests,
         'admins': admins,
+        'calendar_url': calendar_url,
     }
     
     return render(request, 'booking/department_detail.html', context)
 
+EXPORT_FILENAME_RE = re.compile(r'^(meetings|requests|archive)_[0-9a-f]{32}\.(csv|xlsx)$')
+
+def _export_owner_key(task_id):
+    return f'export:owner:{task_id}'
+
+def _export_file_owner_key(filename):
+    return f'export:file_owner:{filename}'
+
+def _export(request, kind, fmt):
+    if fmt not in EXPORT_FORMATS:
+        raise Http404
+    
+    # Katta eksportlar fonda (Celery) tayyorlanadi
+    if request.GET.get('background'):
+        params = request.GET.copy()
+        params.pop('background')
+        result = export_to_file.delay(kind, fmt, params.urlencode())
+        # Holat va faylni faqat eksportni boshlagan foydalanuvchi ko'radi
+        cache.set(_export_owner_key(result.id), request.user.id, settings.EXPORT_OWNER_TIMEOUT)
+        return JsonResponse({
+            'task_id': result.id,
+            'status_url': reverse('booking:export_status', args=[result.id]),
+        }, status=202)
+    
+    return export_response(request, kind, fmt, export_queryset(kind, request.GET))
+
+@replica_reads
+@login_required
+def export_meetings(request, fmt):
+    return _export(request, 'meetings', fmt)
+
+@replica_reads
+@staff_member_required
+def export_requests(request, fmt):
+    return _export(request, 'requests', fmt)
+
+@replica_reads
+@staff_member_required
+def export_archive(request, fmt):
+    return _export(request, 'archive', fmt)
+
+@login_required
+def import_requests(request):
+    """CSV/XLSX fayldan so'rovlarni ommaviy yaratish va qatorlar bo'yicha hisobot"""
+    rows = None
+    if request.method == 'POST':
+        upload = request.FILES.get('file')
+        telegram_user = TelegramUser.objects.filter(user=request.user).first()
+        fmt = import_format(upload.name) if upload else None
+        if telegram_user is None:
+            messages.error(request, "Hisobingizga Telegram profili bog'lanmagan!")
+        elif fmt is None:
+            messages.error(request, "CSV yoki XLSX faylni tanlang!")
+        elif upload.size > settings.BULK_IMPORT_MAX_BYTES:
+            messages.error(request, "Fayl hajmi juda katta!")
+        else:
+            try:
+                rows = import_bookings(upload, fmt, telegram_user)
+            except BulkImportError as exc:
+                messages.error(request, str(exc))
+            else:
+                created = sum(row.ok for row in rows)
+                messages.success(request, f"{created} ta so'rov yaratildi, {len(rows) - created} ta qatorda xato.")
+    
+    return render(request, 'booking/import_requests.html', {
+        'rows': rows,
+        'max_rows': settings.BULK_IMPORT_MAX_ROWS,
+    })
+
+@login_required
+def export_status(request, task_id):
+    """Background export task status"""
+    if cache.get(_export_owner_key(task_id)) != request.user.id:
+        raise Http404
+    result = AsyncResult(task_id)
+    data = {'task_id': task_id, 'status': result.status}
+    if result.successful():
+        cache.set(_export_file_owner_key(result.result), request.user.id, settings.EXPORT_OWNER_TIMEOUT)
+        data['download_url'] = reverse('booking:export_download', args=[result.result])
+    return JsonResponse(data)
+
 @login_required
-def api_meeting_stats(request):
+def export_download(request, filename):
+    if not EXPORT_FILENAME_RE.match(filename):
+        raise Http404
+    if filename.startswith(('requests_', 'archive_')) and not request.user.is_staff:
+        raise Http404
+    # Egasi noma'lum (kesh tozalangan) bo'lsa ham fayl berilmaydi
+    if cache.get(_export_file_owner_key(filename)) != request.user.id:
+        raise Http404
+    path = settings.EXPORT_ROOT / filename
+    if not path.exists():
+        raise Http404
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=filename)
+
+@replica_reads
+@async_login_required
+async def api_meeting_stats(request):
     """API endpoint for meeting statistics"""
-    today = timezone.now().date()
-    
-    stats = {
-        'total': ZoomMeeting.objects.filter(is_active=True).count(),
-        'today': ZoomMeeting.objects.filter(
-            start_time__date=today,
-            is_active=True
-        ).count(),
-        'this_week': ZoomMeeting.objects.filter(
-            start_time__week=today.isocalendar()[1],
-            start_time__year=today.year,
-            is_active=True
-        ).count(),
-        'this_month': ZoomMeeting.objects.filter(
-            start_time__month=today.month,
-            start_time__year=today.year,
-            is_active=True
-        ).count(),
-    }
+    meetings = ZoomMeeting.objects.filter(is_active=True)
+    periods = {key: period_range(granularity) for key, granularity in (
+        ('today', 'day'), ('this_week', 'week'), ('this_month', 'month'),
+    )}
+    
+    # Indeksdan foydalanish uchun __date/__week/__month o'rniga oraliqlar
+    stats = {'total': await meetings.acount()}
+    for key, (start, end) in periods.items():
+        stats[key] = await meetings.filter(start_time__gte=start, start_time__lt=end).acount()
+    # Seriya takrorlari Python da yoyiladi: uchala oraliq bitta thread o'tishida
+    occurrences = await sync_to_async(lambda: {key: count_in_window(*window) for key, window in periods.items()})()
+    for key, count in occurrences.items():
+        stats[key] += count
     
     return JsonResponse(stats)
 
-@login_required
-def api_department_stats(request):
+@replica_reads
+@async_login_required
+async def api_analytics(request):
+    """API endpoint for time-bucketed meeting and request analytics"""
+    today = timezone.localdate()
+    granularity = request.GET.get('bucket', 'day')
+    department_id = request.GET.get('department') or None
+    
+    try:
+        end_date = date.fromisoformat(request.GET['end']) if request.GET.get('end') else today
+        start_date = date.fromisoformat(request.GET['start']) if request.GET.get('start') else end_date - timedelta(days=29)
+        if department_id:
+            department_id = int(department_id)
+    except ValueError:
+        return JsonResponse({'error': "Sana YYYY-MM-DD formatida, bo'lim esa son bo'lishi kerak"}, status=400)
+    
+    if granularity not in GRANULARITIES:
+        return JsonResponse({'error': f"bucket quyidagilardan biri bo'lishi kerak: {', '.join(GRANULARITIES)}"}, status=400)
+    if start_date > end_date:
+        return JsonResponse({'error': "start end dan katta bo'lmasligi kerak"}, status=400)
+    if (end_date - start_date).days > settings.ANALYTICS_MAX_DAYS:
+        return JsonResponse({'error': f"Oraliq {settings.ANALYTICS_MAX_DAYS} kundan oshmasligi kerak"}, status=400)
+    
+    return JsonResponse(await sync_to_async(get_analytics)(start_date, end_date, granularity, department_id))
+
+@replica_reads
+@async_login_required
+async def api_attendance(request):
+    """API endpoint for per-department attendance rates (precomputed daily aggregates)"""
+    today = timezone.localdate()
+    department_id = request.GET.get('department') or None
+    
+    try:
+        end_date = date.fromisoformat(request.GET['end']) if request.GET.get('end') else today
+        start_date = date.fromisoformat(request.GET['start']) if request.GET.get('start') else end_date - timedelta(days=29)
+        if department_id:
+            department_id = int(department_id)
+    except ValueError:
+        return JsonResponse({'error': "Sana YYYY-MM-DD formatida, bo'lim esa son bo'lishi kerak"}, status=400)
+    
+    if start_date > end_date:
+        return JsonResponse({'error': "start end dan katta bo'lmasligi kerak"}, status=400)
+    
+    stats = await sync_to_async(department_attendance)(start_date, end_date, department_id)
+    return JsonResponse({'start': start_date.isoformat(), 'end': end_date.isoformat(), 'stats': stats})
+
+@primary_reads
+@async_login_required
+async def api_changes(request):
+    """API endpoint for delta sync: meetings, requests (staff only) and deletions since an opaque cursor"""
+    try:
+        limit = min(int(request.GET.get('limit', settings.CHANGES_PAGE_SIZE)), settings.CHANGES_MAX_PAGE_SIZE)
+    except ValueError:
+        return JsonResponse({'error': "limit butun son bo'lishi kerak"}, status=400)
+    if limit <= 0:
+        return JsonResponse({'error': "limit musbat bo'lishi kerak"}, status=400)
+    
+    try:
+        changes = await sync_to_async(get_changes)(
+            request.GET.get('since', ''), limit=limit, include_requests=request.user.is_staff,
+        )
+    except CursorExpired:
+        return JsonResponse({'error': "Kursor eskirgan, to'liq qayta sinxronlang (since siz)", 'resync': True}, status=410)
+    except ValueError:
+        return JsonResponse({'error': "since kursori noto'g'ri"}, status=400)
+    
+    return JsonResponse(changes)
+
+@replica_reads
+@async_login_required
+async def api_search(request):
+    """API endpoint for indexed search over meetings and requests"""
+    query = request.GET.get('q', '').strip()
+    allowed_types = ['meeting', 'request'] if request.user.is_staff else ['meeting']
+    object_types = [t for t in request.GET.get('type', ','.join(allowed_types)).split(',') if t in allowed_types]
+    
+    try:
+        limit = min(int(request.GET.get('limit', settings.SEARCH_RESULTS_LIMIT)), 100)
+        offset = max(int(request.GET.get('offset', 0)), 0)
+    except ValueError:
+        return JsonResponse({'error': 'limit va offset butun son bo\'lishi kerak'}, status=400)
+    
+    if not query or not object_types:
+        return JsonResponse({'results': []})
+    
+    # Arxiv faqat so'ralganda (staff uchun) qidiriladi
+    if request.GET.get('archive') and request.user.is_staff:
+        return JsonResponse({'results': [
+            {
+                'type': record['kind'],
+                'id': str(record['object_id']),
+                'title': record['title'],
+                'start_time': record['start_time'].isoformat(),
+                'department': record['department__name'],
+                'url': reverse('admin:booking_archivedrecord_change', args=[record['id']]),
+                'archived': True,
+            }
+            for record in await sync_to_async(search_archive)(query, object_types, limit=limit, offset=offset)
+        ]})
+    
+    results = []
+    for document in await sync_to_async(search)(query, object_types, limit=limit, offset=offset):
+        if document['object_type'] == 'meeting':
+            url = reverse('booking:meeting_detail', args=[document['object_id']])
+        else:
+            url = reverse('booking:request_detail', args=[document['object_id']])
+        results.append({
+            'type': document['object_type'],
+            'id': document['object_id'],
+            'title': document['title'],
+            'start_time': document['start_time'].isoformat() if document['start_time'] else None,
+            'department': document['department__name'],
+            'url': url,
+        })
+    
+    return JsonResponse({'results': results})
+
+@replica_reads
+@async_login_required
+async def api_department_stats(request):
     """API endpoint for department statistics"""
-    stats = list(
-        ZoomMeeting.objects.filter(is_active=True)
+    stats = [
+        row async for row in ZoomMeeting.objects.filter(is_active=True)
         .values('department__name')
         .annotate(count=Count('id'))
         .order_by('-count')
-    )
+    ]
     
     return JsonResponse({'stats': stats})
+
+
+def _calendar_response(request, kind, obj_id, get_name):
+    version = ics.feed_version(kind, obj_id)
+    window_start, window_end = ics.feed_window()
+    etag = ics.feed_etag(kind, obj_id, version, window_start)
+
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    else:
+        cache_key = ics.body_cache_key(etag)
+        body = cache.get(cache_key)
+        if body is not None:
+            response = HttpResponse(body, content_type='text/calendar; charset=utf-8')
+        else:
+            name = get_name()
+            rows = ics.feed_rows(kind, obj_id, window_start, window_end)
+            response = streaming_response(
+                request,
+                ics.stream_and_cache(ics.iter_calendar(name, rows), cache_key),
+                content_type='text/calendar; charset=utf-8',
+            )
+
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, max-age=300'
+    return response
+
+@replica_reads
+def department_calendar(request, department_id, token):
+    """iCalendar feed for a department"""
+    if not ics.check_feed_token(ics.FEED_DEPARTMENT, department_id, token):
+        raise Http404
+
+    def get_name():
+        name = Department.objects.filter(id=department_id).values_list('name', flat=True).first()
+        if name is None:
+            raise Http404
+        return name
+
+    return _calendar_response(request, ics.FEED_DEPARTMENT, department_id, get_name)
+
+@replica_reads
+def user_calendar(request, telegram_user_id, token):
+    """iCalendar feed for a Telegram user's meetings"""
+    if not ics.check_feed_token(ics.FEED_USER, telegram_user_id, token):
+        raise Http404
+    return _calendar_response(request, ics.FEED_USER, telegram_user_id, lambda: 'Zoomga - Mening uchrashuvlarim')
@@ -0,0 +1,157 @@
+"""
+Oldindan yaratilgan Zoom uchrashuvlari zaxirasi (warm pool).
+
+Har bir Zoom host (ZOOM_HOST_USER_IDS) uchun ZOOM_WARM_POOL_SIZE ta
+uchrashuv oldindan yaratib qo'yiladi. Tasdiqlashda (services.approve_request)
+zaxiradan bittasi shu tranzaksiyaning o'zida olinadi
+(SELECT ... FOR UPDATE SKIP LOCKED): havola tasdiq bilan birga saqlanadi va
+Zoom API ni kutmaydi. Nom va vaqt Zoom da fonda yangilanadi
+(tasks.sync_pooled_meeting).
+
+To'ldirish (tasks.refill_zoom_warm_pool, Celery beat) to'liq hajmgacha
+faqat ZOOM_WARM_POOL_OFFPEAK_HOURS da bajariladi, ish vaqtida esa zaxira
+ZOOM_WARM_POOL_MIN gacha to'ldiriladi: ertalabki tasdiqlashlar Zoom API
+limitlari bilan raqobatlashmaydi. Chaqiruvlar ZOOM_API_RATE_LIMIT
+(so'rov/soniya) bilan cheklanadi, API xatosi yoki 429 da to'ldirish
+keyingi ishga tushirishgacha to'xtaydi.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from requests import RequestException
+
+from .models import PooledZoomMeeting, ZoomMeeting
+from .zoom import RateLimiter, create_pool_meeting, delete_meeting, zoom_configured
+
+logger = logging.getLogger(__name__)
+
+REFILL_LOCK_KEY = 'zoom:warm_pool:refill'
+REFILL_LOCK_TIMEOUT = 3600
+
+
+def enabled():
+    return settings.ZOOM_WARM_POOL_SIZE > 0
+
+
+def stale_cutoff():
+    """Bundan oldin yaratilgan zaxiralar berilmaydi (Zoom ularni tez orada o'chiradi)"""
+    return timezone.now() - timedelta(days=settings.ZOOM_WARM_POOL_MAX_AGE_DAYS)
+
+
+def available(host=None):
+    entries = PooledZoomMeeting.objects.filter(created_at__gte=stale_cutoff())
+    if host is not None:
+        entries = entries.filter(host=host)
+    return entries.count()
+
+
+def is_off_peak(now=None):
+    start_hour, end_hour = settings.ZOOM_WARM_POOL_OFFPEAK_HOURS
+    hour = timezone.localtime(now).hour
+    if start_hour <= end_hour:
+        return start_hour <= hour < end_hour
+    return hour >= start_hour or hour < end_hour
+
+
+def needs_refill():
+    """Ish vaqtidagi minimal zaxiradan kam qolgan bo'lsa True"""
+    return enabled() and any(available(host) < settings.ZOOM_WARM_POOL_MIN for host in settings.ZOOM_HOST_USER_IDS)
+
+
+def _busy_hosts(start_time, duration):
+    """Shu vaqtga kesishadigan uchrashuvi bor hostlar"""
+    end_time = start_time + timedelta(minutes=duration)
+    rows = ZoomMeeting.objects.filter(
+        zoom_host__in=settings.ZOOM_HOST_USER_IDS,
+        is_active=True,
+        start_time__gte=start_time - timedelta(minutes=settings.MAX_MEETING_DURATION),
+        start_time__lt=end_time,
+    ).exclude(status='cancelled').values_list('zoom_host', 'start_time', 'duration')
+    return {host for host, start, minutes in rows if start + timedelta(minutes=minutes) > start_time}
+
+
+def _take(hosts):
+    entry = (
+        PooledZoomMeeting.objects.select_for_update(skip_locked=True)
+        .filter(host__in=hosts, created_at__gte=stale_cutoff())
+        .order_by('created_at')
+        .first()
+    )
+    if entry is not None:
+        entry.delete()
+    return entry
+
+
+def claim(start_time, duration):
+    """
+    Zaxiradan uchrashuv olish (chaqiruvchining tranzaksiyasi ichida).
+
+    ZoomMeeting maydonlari lug'atini yoki zaxira bo'sh bo'lsa None qaytaradi.
+    Shu vaqtda band bo'lmagan hostlar afzal, ular bo'lmasa - istalgan host
+    (jonli yaratish ham ZOOM_USER_ID da kesishishni tekshirmaydi).
+    """
+    if not enabled():
+        return None
+    hosts = settings.ZOOM_HOST_USER_IDS
+    busy = _busy_hosts(start_time, duration)
+    free = [host for host in hosts if host not in busy]
+    entry = (_take(free) if free else None) or (_take(hosts) if busy else None)
+    if entry is None:
+        return None
+    return {
+        'zoom_host': entry.host,
+        'zoom_meeting_id': entry.zoom_meeting_id,
+        'meeting_url': entry.meeting_url,
+        'password': entry.password,
+    }
+
+
+def _discard_stale(limiter):
+    discarded = 0
+    for entry in PooledZoomMeeting.objects.filter(created_at__lt=stale_cutoff()):
+        limiter.wait()
+        delete_meeting(entry.zoom_meeting_id)
+        entry.delete()
+        discarded += 1
+    return discarded
+
+
+def refill(force=False):
+    """
+    Zaxirani to'ldirish; {host: yaratilganlar soni} qaytaradi.
+
+    force - ish vaqtida ham to'liq hajmgacha to'ldirish (masalan, birinchi ishga tushirish).
+    """
+    if not enabled() or not zoom_configured():
+        return {}
+    # Beat va qo'lda ishga tushirish bir-biriga xalaqit bermasin
+    if not cache.add(REFILL_LOCK_KEY, True, REFILL_LOCK_TIMEOUT):
+        return {}
+
+    off_peak = force or is_off_peak()
+    target = settings.ZOOM_WARM_POOL_SIZE if off_peak else min(settings.ZOOM_WARM_POOL_MIN, settings.ZOOM_WARM_POOL_SIZE)
+    limiter = RateLimiter(settings.ZOOM_API_RATE_LIMIT)
+    created = dict.fromkeys(settings.ZOOM_HOST_USER_IDS, 0)
+    try:
+        if off_peak:
+            _discard_stale(limiter)
+        for host in settings.ZOOM_HOST_USER_IDS:
+            for _ in range(target - available(host)):
+                limiter.wait()
+                placeholder_start = timezone.now() + timedelta(days=settings.ZOOM_WARM_POOL_MAX_AGE_DAYS)
+                data = create_pool_meeting(host, placeholder_start)
+                PooledZoomMeeting.objects.create(
+                    host=host,
+                    zoom_meeting_id=str(data['id']),
+                    meeting_url=data.get('join_url', ''),
+                    password=data.get('password', ''),
+                )
+                created[host] += 1
+    except RequestException:
+        logger.warning("Zoom zaxirasini to'ldirish to'xtatildi, keyingi ishga tushirishda davom etadi", exc_info=True)
+    finally:
+        cache.delete(REFILL_LOCK_KEY)
+    return created
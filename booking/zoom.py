@@ -0,0 +1,202 @@
+"""
+Zoom API bilan ishlash.
+
+Mijoz (va uning OAuth tokeni) har bir jarayonda bir marta yaratiladi va
+qayta ishlatiladi. Ko'p sahifali hisobotlar keep-alive ulanishlari bilan
+umumiy requests.Session orqali o'qiladi.
+"""
+import logging
+import time
+from datetime import timezone as dt_timezone
+
+import requests
+from django.conf import settings
+from zoomus import ZoomClient
+
+from zoomga.metrics import observe_external
+
+logger = logging.getLogger(__name__)
+
+_client = None
+_session = None
+
+REPORT_PAGE_SIZE = 300
+MAX_ATTEMPTS = 3
+
+
+def zoom_configured():
+    return bool(settings.ZOOM_API_KEY and settings.ZOOM_API_SECRET and settings.ZOOM_ACCOUNT_ID)
+
+
+def get_zoom_client():
+    global _client
+    if _client is None:
+        with observe_external('zoom', 'oauth.token'):
+            _client = ZoomClient(
+                settings.ZOOM_API_KEY, settings.ZOOM_API_SECRET, settings.ZOOM_ACCOUNT_ID,
+                base_uri=settings.ZOOM_API_BASE_URL, oauth_uri=settings.ZOOM_OAUTH_URL,
+            )
+    return _client
+
+
+def reset_zoom_client():
+    """Token eskirganda (401) yoki sozlamalar o'zgarganda"""
+    global _client
+    _client = None
+
+
+def _api_session():
+    global _session
+    if _session is None:
+        _session = requests.Session()
+    return _session
+
+
+class RateLimiter:
+    """Chaqiruvlar orasida kamida 1/rate soniya"""
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate > 0 else 0
+        self.next_at = 0.0
+
+    def wait(self):
+        now = time.monotonic()
+        if now < self.next_at:
+            time.sleep(self.next_at - now)
+            now = self.next_at
+        self.next_at = now + self.interval
+
+
+def _retry_after(response):
+    try:
+        return min(float(response.headers.get('Retry-After', 1)), 60)
+    except ValueError:
+        return 1
+
+
+def _get(endpoint, params, limiter, operation):
+    """Cheklangan GET: 429 da Retry-After kutiladi, 401 da token yangilanadi"""
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        client = get_zoom_client()
+        if limiter is not None:
+            limiter.wait()
+        with observe_external('zoom', operation):
+            response = _api_session().get(
+                client.url_for(endpoint),
+                params=params,
+                headers={'Authorization': f"Bearer {client.config['token']}"},
+                timeout=client.timeout,
+            )
+        if attempt == MAX_ATTEMPTS:
+            break
+        if response.status_code == 429:
+            time.sleep(_retry_after(response))
+        elif response.status_code == 401:
+            reset_zoom_client()
+        else:
+            break
+    return response
+
+
+def iter_report_participants(zoom_meeting_id, limiter=None):
+    """
+    Tugagan uchrashuv qatnashchilari (Report API), sahifama-sahifa.
+
+    Qatorlar sahifa kelishi bilan qaytariladi, butun hisobot xotirada
+    yig'ilmaydi. Qayta ulangan qatnashchi bir necha qator bo'lib keladi.
+    Uchrashuv o'tkazilmagan bo'lsa (404) hech narsa qaytmaydi.
+    """
+    endpoint = f'/report/meetings/{zoom_meeting_id}/participants'
+    params = {'page_size': REPORT_PAGE_SIZE}
+    while True:
+        response = _get(endpoint, params, limiter, 'report.participants')
+        if response.status_code == 404:
+            return
+        response.raise_for_status()
+        data = response.json()
+        yield from data.get('participants', [])
+        next_page_token = data.get('next_page_token')
+        if not next_page_token:
+            return
+        params = {'page_size': REPORT_PAGE_SIZE, 'next_page_token': next_page_token}
+
+
+def create_meeting(meeting):
+    """ZoomMeeting uchun Zoom da uchrashuv yaratish; API javobini qaytaradi"""
+    client = get_zoom_client()
+    with observe_external('zoom', 'meeting.create'):
+        response = client.meeting.create(
+            user_id=meeting.zoom_host or settings.ZOOM_USER_ID,
+            topic=meeting.title,
+            agenda=meeting.description,
+            type=2,
+            start_time=meeting.start_time.astimezone(dt_timezone.utc),
+            duration=meeting.duration,
+            timezone=settings.TIME_ZONE,
+        )
+    response.raise_for_status()
+    return response.json()
+
+
+def create_pool_meeting(host, start_time):
+    """
+    Zaxira (warm pool) uchun vaqtinchalik nom va vaqt bilan uchrashuv.
+
+    start_time - zaxira muddati oxiri: Zoom rejalashtirilgan uchrashuvni
+    shu vaqtdan 30 kun o'tib o'chiradi, ungacha u olinadi yoki almashtiriladi.
+    """
+    client = get_zoom_client()
+    with observe_external('zoom', 'meeting.create'):
+        response = client.meeting.create(
+            user_id=host,
+            topic='Zoomga',
+            type=2,
+            start_time=start_time.astimezone(dt_timezone.utc),
+            duration=30,
+            timezone=settings.TIME_ZONE,
+        )
+    response.raise_for_status()
+    return response.json()
+
+
+def update_meeting(meeting):
+    """Zaxiradan olingan uchrashuvning nomi va vaqtini ZoomMeeting bo'yicha yangilash"""
+    client = get_zoom_client()
+    with observe_external('zoom', 'meeting.update'):
+        response = client.meeting.update(
+            id=meeting.zoom_meeting_id,
+            topic=meeting.title,
+            agenda=meeting.description,
+            start_time=meeting.start_time.astimezone(dt_timezone.utc),
+            duration=meeting.duration,
+            timezone=settings.TIME_ZONE,
+        )
+    response.raise_for_status()
+
+
+def delete_meeting(zoom_meeting_id):
+    """Zoom dagi uchrashuvni o'chirish (allaqachon yo'q bo'lsa ham xato emas)"""
+    client = get_zoom_client()
+    with observe_external('zoom', 'meeting.delete'):
+        response = client.meeting.delete(id=zoom_meeting_id)
+    if response.status_code != 404:
+        response.raise_for_status()
+
+
+def create_series_meeting(series):
+    """
+    Seriya uchun bitta takrorlanuvchi Zoom uchrashuvi (type=3, belgilangan vaqtsiz).
+
+    Havola seriyaning barcha takrorlari uchun amal qiladi.
+    """
+    client = get_zoom_client()
+    with observe_external('zoom', 'meeting.create'):
+        response = client.meeting.create(
+            user_id=settings.ZOOM_USER_ID,
+            topic=series.title,
+            agenda=series.description,
+            type=3,
+            timezone=settings.TIME_ZONE,
+        )
+    response.raise_for_status()
+    return response.json()
@@ -0,0 +1,50 @@
+"""
+Gunicorn sozlamalari (joriy katalogdan avtomatik o'qiladi).
+
+WEB_SERVER_MODE:
+  wsgi (standart) - zoomga.wsgi, sync workerlar; GUNICORN_THREADS > 1 bo'lsa
+                    gthread. Har bir so'rov butun worker (thread) ni band qiladi.
+  asgi            - zoomga.asgi, UvicornWorker: har bir worker bitta event
+                    loop, async view lar (booking JSON API) kutish paytida
+                    boshqa so'rovlarga xizmat qiladi. Sync view lar Django
+                    tomonidan thread ga o'tkaziladi. Oqimli javoblar (eksport,
+                    .ics) zoomga.streaming orqali partiyalab yuboriladi.
+
+PROMETHEUS_MULTIPROC_DIR o'rnatilgan bo'lsa, har bir worker ko'rsatkichlari
+shu katalogga yoziladi va /metrics ularni birlashtiradi.
+"""
+import multiprocessing
+import os
+import shutil
+
+WEB_SERVER_MODE = os.environ.get('WEB_SERVER_MODE', 'wsgi')
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '30'))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', '5'))
+# Xotira oqishini cheklash: worker shuncha so'rovdan keyin qayta ishga tushadi
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', '2000'))
+max_requests_jitter = max_requests // 10
+
+if WEB_SERVER_MODE == 'asgi':
+    wsgi_app = 'zoomga.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+    # Parallellik event loop da, shuning uchun har bir yadroga bitta worker yetarli
+    workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() + 1))
+else:
+    wsgi_app = 'zoomga.wsgi:application'
+    workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+    threads = int(os.environ.get('GUNICORN_THREADS', '1'))
+
+
+def on_starting(server):
+    multiproc_dir = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if multiproc_dir:
+        shutil.rmtree(multiproc_dir, ignore_errors=True)
+        os.makedirs(multiproc_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -6,7 +6,9 @@ import sys
 
 def main():
     """Run administrative tasks."""
-    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'zoomga.settings')
+    # --settings yoki DJANGO_SETTINGS_MODULE berilmasa testlar zoomga.test_settings bilan
+    command = next((arg for arg in sys.argv[1:] if not arg.startswith('-')), None)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'zoomga.test_settings' if command == 'test' else 'zoomga.settings')
     try:
         from django.core.management import execute_from_command_line
     except ImportError as exc:
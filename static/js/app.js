@@ -0,0 +1,31 @@
+// Loading spinner
+function showLoading() {
+    document.querySelector('.loading-spinner').classList.add('active');
+}
+
+function hideLoading() {
+    document.querySelector('.loading-spinner').classList.remove('active');
+}
+
+// Auto-hide alerts
+setTimeout(() => {
+    const alerts = document.querySelectorAll('.alert');
+    alerts.forEach(alert => {
+        const bsAlert = new bootstrap.Alert(alert);
+        bsAlert.close();
+    });
+}, 5000);
+
+// Smooth scroll for anchor links
+document.querySelectorAll('a[href^="#"]').forEach(anchor => {
+    anchor.addEventListener('click', function (e) {
+        e.preventDefault();
+        const target = document.querySelector(this.getAttribute('href'));
+        if (target) {
+            target.scrollIntoView({
+                behavior: 'smooth',
+                block: 'start'
+            });
+        }
+    });
+});
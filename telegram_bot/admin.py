@@ -1,12 +1,20 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from .models import TelegramUser, Department, DepartmentAdmin as DepartmentAdminModel
+from booking.models import SearchDocument
+from booking.admin_tools import LargeTableAdminMixin
+from booking.search import IndexedSearchMixin
 
 @admin.register(TelegramUser)
-class TelegramUserAdmin(admin.ModelAdmin):
+class TelegramUserAdmin(LargeTableAdminMixin, IndexedSearchMixin, admin.ModelAdmin):
     list_display = ['username', 'first_name', 'last_name', 'telegram_id', 'is_admin', 'is_active', 'created_at']
     list_filter = ['is_admin', 'is_active', 'created_at']
+    # Autocomplete (uchrashuv, so'rov formalari) ham shu qidiruv indeksidan foydalanadi
     search_fields = ['username', 'first_name', 'last_name', 'telegram_id']
+    search_object_type = SearchDocument.TYPE_USER
+    autocomplete_fields = ['user']
+    # Autocomplete sahifalashi uchun indeksli tartib (changelist standarti ham -pk)
+    ordering = ['-id']
     readonly_fields = ['telegram_id', 'created_at', 'updated_at']
     
     fieldsets = (
@@ -75,7 +83,9 @@ class DepartmentAdmin(admin.ModelAdmin):
 class DepartmentAdminAdmin(admin.ModelAdmin):
     list_display = ['telegram_user', 'department', 'is_active', 'created_at']
     list_filter = ['is_active', 'department', 'created_at']
+    list_select_related = ['telegram_user', 'department']
     search_fields = ['telegram_user__username', 'telegram_user__first_name', 'department__name']
+    autocomplete_fields = ['telegram_user']
     readonly_fields = ['created_at']
     
     def get_form(self, request, obj=None, **kwargs):
@@ -0,0 +1,148 @@
+"""
+Bot admin panellari uchun oldindan hisoblangan, keshlangan agregatlar.
+
+Umumiy ko'rinish Celery beat orqali muntazam yangilanadi; kesh bo'sh
+bo'lsa, birinchi so'rovda hisoblanadi.
+"""
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from booking.analytics import period_range
+from booking.models import ZoomMeeting, BookingRequest
+from booking.recurrence import count_in_window, expand, series_in_window
+from .models import TelegramUser, Department, DepartmentAdmin
+
+OVERVIEW_KEY = 'bot:admin:overview'
+ADMIN_IDS_KEY = 'bot:admin:ids'
+
+PERIODS = (('today', 'day'), ('week', 'week'), ('month', 'month'))
+
+
+def _period_counts(queryset, field):
+    aggregates = {}
+    for key, granularity in PERIODS:
+        start, end = period_range(granularity)
+        aggregates[key] = Count('id', filter=Q(**{f'{field}__gte': start, f'{field}__lt': end}))
+    return queryset.aggregate(**aggregates)
+
+
+def build_overview():
+    """Foydalanuvchilar, bo'limlar, uchrashuvlar va so'rovlar bo'yicha agregatlar"""
+    users = TelegramUser.objects.aggregate(
+        total=Count('id'),
+        active=Count('id', filter=Q(is_active=True)),
+        admins=Count('id', filter=Q(is_admin=True)),
+    )
+    memberships = DepartmentAdmin.objects.filter(is_active=True).aggregate(
+        total=Count('id'),
+        users=Count('telegram_user', distinct=True),
+    )
+
+    active_meetings = ZoomMeeting.objects.filter(is_active=True)
+    meetings_by_status = dict(active_meetings.values_list('status').annotate(count=Count('id')).order_by())
+    requests_by_status = dict(BookingRequest.objects.values_list('status').annotate(count=Count('id')).order_by())
+
+    week_start, week_end = period_range('week')
+    week_meetings = Counter(dict(
+        active_meetings.filter(start_time__gte=week_start, start_time__lt=week_end)
+        .values_list('department_id').annotate(count=Count('id')).order_by()
+    ))
+    week_meetings.update(
+        occurrence.department_id
+        for occurrence in expand(series_in_window(week_start, week_end), week_start, week_end)
+    )
+    meetings_by_period = _period_counts(active_meetings, 'start_time')
+    for key, granularity in PERIODS:
+        meetings_by_period[key] += count_in_window(*period_range(granularity))
+    pending_requests = dict(
+        BookingRequest.objects.filter(status='pending')
+        .values_list('department_id').annotate(count=Count('id')).order_by()
+    )
+    departments = [
+        {
+            'id': department['id'],
+            'name': department['name'],
+            'is_active': department['is_active'],
+            'daily_limit': department['daily_limit'],
+            'members': department['members'],
+            'week_meetings': week_meetings.get(department['id'], 0),
+            'pending_requests': pending_requests.get(department['id'], 0),
+        }
+        for department in Department.objects.annotate(
+            members=Count('departmentadmin', filter=Q(departmentadmin__is_active=True))
+        ).order_by('name').values('id', 'name', 'is_active', 'daily_limit', 'members')
+    ]
+
+    return {
+        'users': users,
+        'memberships': memberships,
+        'departments': departments,
+        'meetings': {
+            'by_status': meetings_by_status,
+            'by_period': meetings_by_period,
+        },
+        'requests': {
+            'by_status': requests_by_status,
+            'by_period': _period_counts(BookingRequest.objects.all(), 'created_at'),
+        },
+        'generated_at': timezone.now(),
+    }
+
+
+def refresh_overview():
+    overview = build_overview()
+    cache.set(OVERVIEW_KEY, overview, settings.BOT_ADMIN_OVERVIEW_TIMEOUT)
+    return overview
+
+
+def build_admin_ids():
+    return set(TelegramUser.objects.filter(is_admin=True, is_active=True).values_list('telegram_id', flat=True))
+
+
+def get_admin_ids():
+    admin_ids = cache.get(ADMIN_IDS_KEY)
+    if admin_ids is None:
+        admin_ids = build_admin_ids()
+        cache.set(ADMIN_IDS_KEY, admin_ids, settings.BOT_ADMIN_OVERVIEW_TIMEOUT)
+    return admin_ids
+
+
+def get_panel_state():
+    """Admin ro'yxati va umumiy ko'rinish (bitta kesh murojaati)"""
+    cached = cache.get_many([ADMIN_IDS_KEY, OVERVIEW_KEY])
+    admin_ids = cached.get(ADMIN_IDS_KEY)
+    if admin_ids is None:
+        admin_ids = build_admin_ids()
+        cache.set(ADMIN_IDS_KEY, admin_ids, settings.BOT_ADMIN_OVERVIEW_TIMEOUT)
+    overview = cached.get(OVERVIEW_KEY)
+    if overview is None:
+        overview = refresh_overview()
+    return admin_ids, overview
+
+
+def invalidate_admin_ids():
+    cache.delete(ADMIN_IDS_KEY)
+
+
+def users_page(after_id=None, before_id=None, page_size=None):
+    """
+    Foydalanuvchilar sahifasi (id bo'yicha keyset).
+
+    (foydalanuvchilar, oldingi sahifa bormi, keyingi sahifa bormi) qaytaradi.
+    """
+    page_size = page_size or settings.BOT_ADMIN_PAGE_SIZE
+    users = TelegramUser.objects.only('id', 'username', 'first_name', 'last_name', 'is_admin', 'is_active')
+    if before_id is not None:
+        rows = list(users.filter(id__lt=before_id).order_by('-id')[:page_size + 1])
+        has_previous = len(rows) > page_size
+        rows = rows[:page_size][::-1]
+        return rows, has_previous, True
+
+    if after_id is not None:
+        users = users.filter(id__gt=after_id)
+    rows = list(users.order_by('id')[:page_size + 1])
+    return rows[:page_size], after_id is not None, len(rows) > page_size
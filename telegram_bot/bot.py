@@ -1,67 +1,88 @@
+import hashlib
+import io
 import logging
-import os
+import uuid
 from datetime import datetime, timedelta
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardMarkup, KeyboardButton
-from telegram.ext import Application, CommandHandler, CallbackQueryHandler, MessageHandler, filters, ContextTypes
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardMarkup, KeyboardButton, InlineQueryResultArticle, InputTextMessageContent
+from telegram.ext import Application, CommandHandler, CallbackQueryHandler, InlineQueryHandler, MessageHandler, TypeHandler, filters, ContextTypes
+from telegram.helpers import escape_markdown
 from django.contrib.auth.models import User
 from django.utils import timezone
 from django.contrib.auth import get_user_model
-from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.urls import reverse
+from zoomga import metrics, profiling
+from zoomga.metrics import sync_to_async
 from .models import TelegramUser, Department, DepartmentAdmin
-from booking.models import ZoomMeeting, BookingRequest
+from . import aggregates, flood, onboarding, review_queue, schedule
+from booking.models import ZoomMeeting, BookingRequest, MeetingSeries
+from booking.calendar import FEED_USER, feed_token
+from booking.search import search as search_index
+from booking.imports import BulkImportError, import_bookings, import_format, report_csv
+from booking import auto_approval
+from booking.services import approve_request, reject_request, processed_by_telegram_id
+from booking.recurrence import (
+    RECURRENCE_PRESETS, build_rule, cancel_occurrence, count_in_window, find_conflicts, occurrence_start,
+)
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
+ADMIN_PANELS = ('admin_menu', 'admin_requests', 'admin_users', 'admin_departments', 'admin_stats')
+MAX_MESSAGE_LENGTH = 4096
+RECURRENCE_LABELS = {
+    'DAILY': "🔁 Har kuni",
+    'WEEKDAYS': "🔁 Ish kunlari",
+    'WEEKLY': "🔁 Har hafta",
+    'MONTHLY': "🔁 Har oy",
+}
+
+
+def today_window():
+    """Bugungi kun chegaralari (mahalliy vaqt bo'yicha)"""
+    start = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+    return start, start + timedelta(days=1)
+
+
 class ZoomTelegramBot:
     def __init__(self, token):
-        self.application = Application.builder().token(token).build()
+        builder = Application.builder().token(token)
+        request = metrics.telegram_request()
+        if request is not None:
+            builder = builder.request(request)
+        self.application = builder.build()
         self.setup_handlers()
 
     def setup_handlers(self):
-        self.application.add_handler(CommandHandler("start", self.start_command))
-        self.application.add_handler(CommandHandler("help", self.help_command))
-        self.application.add_handler(CommandHandler("profile", self.profile_command))
-        self.application.add_handler(CommandHandler("book", self.book_command))
-        self.application.add_handler(CommandHandler("my_meetings", self.my_meetings_command))
-        self.application.add_handler(CommandHandler("requests", self.requests_command))
-        self.application.add_handler(CommandHandler("admin", self.admin_command))
-        self.application.add_handler(CallbackQueryHandler(self.button_callback))
-        self.application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, self.text_handler))
+        # Flood nazorati barcha handlerlardan oldin (-1 guruh)
+        if settings.BOT_RATE_LIMIT_BACKEND != 'off':
+            self.application.add_handler(TypeHandler(Update, flood.FloodControl.from_settings()), group=-1)
+
+        def handle(callback, name):
+            return metrics.instrument_handler(profiling.profile_handler(callback, name), name)
+
+        commands = {
+            "start": self.start_command,
+            "help": self.help_command,
+            "profile": self.profile_command,
+            "book": self.book_command,
+            "my_meetings": self.my_meetings_command,
+            "requests": self.requests_command,
+            "admin": self.admin_command,
+        }
+        for command, callback in commands.items():
+            self.application.add_handler(CommandHandler(command, handle(callback, command)))
+        self.application.add_handler(CallbackQueryHandler(handle(self.button_callback, metrics.callback_label)))
+        self.application.add_handler(InlineQueryHandler(handle(self.inline_query, 'inline_query')))
+        self.application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle(self.text_handler, 'text')))
+        self.application.add_handler(MessageHandler(filters.Document.ALL, handle(self.document_handler, 'document')))
 
     @sync_to_async
-    def create_or_get_user(self, user_id, username, first_name, last_name):
-        """Create or get Django user synchronously"""
-        try:
-            django_user = User.objects.get(username=f"tg_{user_id}")
-        except User.DoesNotExist:
-            django_user = User.objects.create_user(
-                username=f"tg_{user_id}", 
-                email=f"{user_id}@telegram.bot",
-                password=os.urandom(12).hex()  # Random password
-            )
-        return django_user
-
-    @sync_to_async
-    def create_or_get_telegram_user(self, user_id, username, first_name, last_name, django_user):
-        """Create or get Telegram user synchronously"""
-        # Handle None values for optional fields
-        if first_name is None:
-            first_name = ""
-        if last_name is None:
-            last_name = ""
-        if username is None:
-            username = ""
-        
-        # Create new user with explicit field values
-        telegram_user = TelegramUser.objects.create(
-            telegram_id=user_id,
-            username=username,
-            first_name=first_name,
-            last_name=last_name,
-            user=django_user
-        )
-        
+    def onboard_user(self, user_id, username, first_name, last_name):
+        """Create or update Django and Telegram users synchronously"""
+        telegram_user, _ = onboarding.onboard_user(user_id, username, first_name, last_name)
         return telegram_user
 
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -72,11 +93,8 @@ class ZoomTelegramBot:
         last_name = user.last_name or ""
         username = user.username or ""
         
-        # Create Django user first
-        django_user = await self.create_or_get_user(user.id, username, first_name, last_name)
-        
-        # Create Telegram user
-        telegram_user = await self.create_or_get_telegram_user(user.id, username, first_name, last_name, django_user)
+        # Django va Telegram foydalanuvchisini yaratish yoki yangilash
+        telegram_user = await self.onboard_user(user.id, username, first_name, last_name)
 
         welcome_text = f"""
 🎉 **Zoomga xush kelibsiz!** 🎉
@@ -110,16 +128,22 @@ Boshlash uchun /profile buyrug'ini yuboring va profilingizni to'ldiring!
 /start - Botni ishga tushirish
 /profile - Profilni ko'rish va tahrirlash
 /book - Yangi uchrashuv yaratish
-/my_meetings - Mening uchrashuvlarim
+/my_meetings - Mening uchrashuvlarim (ertaga, hafta yoki YYYY-MM-DD YYYY-MM-DD)
 /requests - So'rovlar
 /admin - Admin paneli
 
 **Tugmalar:**
 📊 Profil - Shaxsiy ma'lumotlar
 📅 Uchrashuv yaratish - Yangi uchrashuv
-⏰ Jadval - Kunlik reja
+⏰ Jadval - Bugun, ertaga, hafta yoki tanlangan oraliq
 📋 So'rovlar - Arizalar holati
 
+**Ommaviy yaratish:**
+CSV yoki XLSX faylni yuboring (ustunlar: department, title, start, duration, description) - har bir qator so'rov sifatida yaratiladi
+
+**Inline rejim:**
+Istalgan chatda bot nomini va uchrashuv nomini yozing (masalan: `@bot standup`) - uchrashuv havolasini ulashish uchun
+
 Savollaringiz bo'lsa admin bilan bog'laning!
         """
         await update.message.reply_text(help_text, parse_mode='Markdown')
@@ -142,6 +166,8 @@ Savollaringiz bo'lsa admin bilan bog'laning!
 {dept_list}
 
 📅 **Bugungi uchrashuvlar soni:** {await self.get_today_meeting_count(telegram_user)}
+
+📆 **Kalendar:** {self.get_calendar_url(telegram_user)}
         """
 
         keyboard = []
@@ -155,7 +181,7 @@ Savollaringiz bo'lsa admin bilan bog'laning!
     async def book_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         telegram_user = await sync_to_async(TelegramUser.objects.get)(telegram_id=update.effective_user.id)
         
-        if self.check_daily_limit(telegram_user):
+        if await self.check_daily_limit(telegram_user):
             await update.message.reply_text(
                 "⚠️ **Kunlik limit to'ldi!**\n\n"
                 "Siz kuniga 5 ta uchrashuv yaratishingiz mumkin. "
@@ -188,38 +214,46 @@ Savollaringiz bo'lsa admin bilan bog'laning!
         )
 
     async def my_meetings_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        telegram_user = await sync_to_async(TelegramUser.objects.get)(telegram_id=update.effective_user.id)
-        
-        today = timezone.now().date()
-        meetings = await sync_to_async(list)(ZoomMeeting.objects.filter(
-            created_by=telegram_user,
-            start_time__date=today,
-            is_active=True
-        ).order_by('start_time'))
-
-        if not meetings:
+        try:
+            first_day, last_day = schedule.parse_range(context.args)
+        except ValueError as exc:
             await update.message.reply_text(
-                "📅 **Bugungi uchrashuvlar yo'q**\n\n"
-                "Yangi uchrashuv yaratish uchun /book buyrug'idan foydalaning.",
+                f"❌ **Oraliq noto'g'ri!**\n\n{escape_markdown(str(exc))}\n\n"
+                "Masalan: /my\\_meetings ertaga, /my\\_meetings hafta yoki /my\\_meetings 2024-05-01 2024-05-07",
                 parse_mode='Markdown'
             )
             return
+        await self.send_schedule(update.message, update.effective_user.id, first_day, last_day)
 
-        text = "📅 **Bugungi uchrashuvlarim:**\n\n"
-        for meeting in meetings:
-            status_emoji = {
-                'scheduled': '⏰',
-                'active': '🟢',
-                'ended': '✅',
-                'cancelled': '❌'
-            }.get(meeting.status, '📋')
-
-            text += f"{status_emoji} **{meeting.title}**\n"
-            text += f"🕐 Vaqt: {meeting.start_time.strftime('%H:%M')} - {meeting.end_time.strftime('%H:%M')}\n"
-            text += f"🏢 Bo'lim: {meeting.department.name}\n"
-            text += f"🔗 Havola: {meeting.meeting_url or 'Yaratilmoqda...'}\n\n"
-
-        await update.message.reply_text(text, parse_mode='Markdown')
+    def schedule_markup(self, occurrence_buttons=()):
+        keyboard = [
+            [InlineKeyboardButton(text, callback_data=callback_data)]
+            for callback_data, text in occurrence_buttons
+        ]
+        keyboard += [[
+            InlineKeyboardButton(label, callback_data=f"schedule:{name}")
+            for name, label in schedule.RANGE_LABELS.items()
+        ], [InlineKeyboardButton("📆 Oraliq", callback_data="schedule:custom")]]
+        return InlineKeyboardMarkup(keyboard)
+
+    async def send_schedule(self, message, telegram_id, first_day, last_day):
+        """Jadvalni bir yoki bir nechta xabarda yuborish; tugmalar oxirgi xabarda"""
+        telegram_user = await sync_to_async(TelegramUser.objects.get)(telegram_id=telegram_id)
+        messages, occurrence_buttons = await sync_to_async(schedule.render_schedule)(
+            telegram_user.id, first_day, last_day
+        )
+        if not messages:
+            messages = [
+                f"{schedule.schedule_title(first_day, last_day)}\n\n"
+                "Uchrashuvlar yo'q. Yangi uchrashuv yaratish uchun /book buyrug'idan foydalaning."
+            ]
+        for number, text in enumerate(messages, start=1):
+            await message.reply_text(
+                text,
+                parse_mode='Markdown',
+                disable_web_page_preview=True,
+                reply_markup=self.schedule_markup(occurrence_buttons) if number == len(messages) else None
+            )
 
     async def requests_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         telegram_user = await sync_to_async(TelegramUser.objects.get)(telegram_id=update.effective_user.id)
@@ -263,29 +297,54 @@ Savollaringiz bo'lsa admin bilan bog'laning!
             )
             return
 
+        await update.message.reply_text(
+            "👑 **Admin paneli** 👑\n\n"
+            "Kerakli bo'limni tanlang:",
+            parse_mode='Markdown',
+            reply_markup=self.admin_menu_markup()
+        )
+
+    def admin_menu_markup(self):
         keyboard = [
             [InlineKeyboardButton("📊 So'rovlar", callback_data="admin_requests")],
             [InlineKeyboardButton("👥 Foydalanuvchilar", callback_data="admin_users")],
             [InlineKeyboardButton("🏢 Bo'limlar", callback_data="admin_departments")],
             [InlineKeyboardButton("📈 Statistika", callback_data="admin_stats")]
         ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        await update.message.reply_text(
-            "👑 **Admin paneli** 👑\n\n"
-            "Kerakli bo'limni tanlang:",
-            parse_mode='Markdown',
-            reply_markup=reply_markup
-        )
+        return InlineKeyboardMarkup(keyboard)
 
     async def button_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         query = update.callback_query
+        if query.data.startswith(("approve_req_", "reject_req_")):
+            await self.review_callback(update, context)
+            return
+        if query.data.startswith(schedule.CANCEL_OCCURRENCE_PREFIX):
+            await self.cancel_occurrence_callback(update, context)
+            return
+
         await query.answer()
         
         data = query.data
+        if data.split(':')[0] in ADMIN_PANELS:
+            # Panellar keshdagi agregatlardan quriladi, foydalanuvchi so'rovisiz
+            await self.admin_panel_callback(update, context)
+            return
+
         telegram_user = await sync_to_async(TelegramUser.objects.get)(telegram_id=update.effective_user.id)
 
-        if data.startswith("select_dept_"):
+        if data.startswith("schedule:"):
+            await query.edit_message_reply_markup(reply_markup=None)
+            name = data.partition(':')[2]
+            if name == 'custom':
+                context.user_data['awaiting_schedule_range'] = True
+                await query.message.reply_text(
+                    "📆 **Sanalarni kiriting:**\n\n"
+                    "Format: YYYY-MM-DD YYYY-MM-DD (masalan: 2024-05-01 2024-05-07)",
+                    parse_mode='Markdown'
+                )
+                return
+            await self.send_schedule(query.message, update.effective_user.id, *schedule.range_dates(name))
+        elif data.startswith("select_dept_"):
             dept_id = data.split("_")[2]
             context.user_data['selected_department'] = dept_id
             await query.edit_message_text(
@@ -293,33 +352,296 @@ Savollaringiz bo'lsa admin bilan bog'laning!
                 "Masalan: 'Muhim majlis'",
                 parse_mode='Markdown'
             )
-
-        elif data == "admin_requests":
-            pending_requests = await sync_to_async(BookingRequest.objects.filter)(status='pending').order_by('-created_at')[:10]
-            
-            if not pending_requests:
-                await query.edit_message_text(
-                    "📋 **Kutilayotgan so'rovlar yo'q**",
-                    parse_mode='Markdown'
-                )
+        elif data.startswith("recur_"):
+            if 'meeting_description' not in context.user_data:
                 return
+            preset = data[len("recur_"):]
+            context.user_data['meeting_recurrence'] = RECURRENCE_PRESETS.get(preset, '')
+            await query.edit_message_reply_markup(reply_markup=None)
+            await self.create_booking_request(update, context)
 
-            text = "📋 **Kutilayotgan so'rovlar:**\n\n"
-            keyboard = []
-            
-            for request in pending_requests:
-                text += f"📝 {request.title}\n"
-                text += f"👤 {request.requested_by.first_name}\n"
-                text += f"🏢 {request.department.name}\n"
-                text += f"🕐 {request.preferred_start_time.strftime('%Y-%m-%d %H:%M')}\n\n"
-                
-                keyboard.append([
-                    InlineKeyboardButton("✅ Tasdiqlash", callback_data=f"approve_req_{request.id}"),
-                    InlineKeyboardButton("❌ Rad etish", callback_data=f"reject_req_{request.id}")
-                ])
+    async def review_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        action, _, request_id = query.data.partition('_req_')
+
+        admin_ids = await sync_to_async(aggregates.get_admin_ids)()
+        if update.effective_user.id not in admin_ids:
+            await query.answer("❌ Siz admin emassiz!", show_alert=True)
+            return
+        try:
+            uuid.UUID(request_id)
+        except ValueError:
+            await query.answer("❌ Noto'g'ri so'rov")
+            return
+
+        # Shartli UPDATE: bir nechta admin bir vaqtda bossa ham faqat bittasi o'tadi
+        processed_by = processed_by_telegram_id(update.effective_user.id)
+        if action == 'approve':
+            won = await sync_to_async(approve_request)(request_id, processed_by) is not None
+            result_text = "✅ Tasdiqlandi, uchrashuv yaratilmoqda"
+        else:
+            won = await sync_to_async(reject_request)(request_id, processed_by)
+            result_text = "❌ Rad etildi"
+
+        await query.answer(result_text if won else "ℹ️ Bu so'rov allaqachon ko'rib chiqilgan")
+
+        # Ko'rib chiqilgan so'rov tugmalarini ro'yxatdan olib tashlash
+        markup = query.message.reply_markup if query.message else None
+        if markup:
+            keyboard = [
+                row for row in markup.inline_keyboard
+                if not any(request_id in (button.callback_data or '') for button in row)
+            ]
+            await query.edit_message_reply_markup(reply_markup=InlineKeyboardMarkup(keyboard))
+
+    async def cancel_occurrence_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Jadvaldagi tugma: seriyaning bitta takrorini bekor qilish"""
+        query = update.callback_query
+        series_id, _, stamp = query.data[len(schedule.CANCEL_OCCURRENCE_PREFIX):].partition(':')
+        result = await sync_to_async(self.cancel_series_occurrence)(update.effective_user.id, series_id, stamp)
+        await query.answer(result)
+
+        # Bekor qilingan takror tugmasini olib tashlash
+        markup = query.message.reply_markup if query.message else None
+        if markup:
+            keyboard = [
+                row for row in markup.inline_keyboard
+                if not any(button.callback_data == query.data for button in row)
+            ]
+            await query.edit_message_reply_markup(reply_markup=InlineKeyboardMarkup(keyboard))
+
+    def cancel_series_occurrence(self, telegram_id, series_id, stamp):
+        """Takrorni bekor qilish (seriya egasi yoki admin); foydalanuvchiga javob matnini qaytaradi"""
+        try:
+            uuid.UUID(series_id)
+            series = MeetingSeries.objects.select_related('created_by').get(id=series_id, is_active=True)
+            original_start = occurrence_start(series, stamp)
+        except (ValueError, MeetingSeries.DoesNotExist):
+            return "❌ Takror topilmadi"
+        if series.created_by.telegram_id != telegram_id and telegram_id not in aggregates.get_admin_ids():
+            return "❌ Bu takrorni bekor qilish huquqingiz yo'q"
+        if original_start <= timezone.now():
+            return "ℹ️ Bu takror vaqti o'tib ketgan"
+        cancel_occurrence(series, original_start)
+        return "✅ Takror bekor qilindi"
+
+    async def admin_panel_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        panel, _, argument = query.data.partition(':')
+
+        admin_ids, overview = await sync_to_async(aggregates.get_panel_state)()
+        if update.effective_user.id not in admin_ids:
+            await query.edit_message_text(
+                "❌ **Siz admin emassiz!**\n\n"
+                "Bu bo'lim faqat adminlar uchun.",
+                parse_mode='Markdown'
+            )
+            return
+
+        if panel == 'admin_menu':
+            await query.edit_message_text(
+                "👑 **Admin paneli** 👑\n\n"
+                "Kerakli bo'limni tanlang:",
+                parse_mode='Markdown',
+                reply_markup=self.admin_menu_markup()
+            )
+        elif panel == 'admin_requests':
+            await self.show_requests_panel(query, argument)
+        elif panel == 'admin_users':
+            await self.show_users_panel(query, overview, argument)
+        elif panel == 'admin_departments':
+            await self.show_departments_panel(query, overview, argument)
+        elif panel == 'admin_stats':
+            await self.show_stats_panel(query, overview)
+
+    async def show_requests_panel(self, query, argument):
+        direction = argument[:1] or review_queue.FORWARD
+        cursor = argument[2:] or None
+        page = await sync_to_async(review_queue.get_page)(direction, cursor)
+        rows = page['rows']
+
+        if not rows:
+            keyboard = [[InlineKeyboardButton("⬅️ Orqaga", callback_data="admin_menu")]]
+            await query.edit_message_text(
+                "📋 **Kutilayotgan so'rovlar yo'q**",
+                parse_mode='Markdown',
+                reply_markup=InlineKeyboardMarkup(keyboard)
+            )
+            return
+
+        text = "📋 **Kutilayotgan so'rovlar:**\n\n"
+        keyboard = []
+        shown = []
+        # Tugmalar va navigatsiya uchun joy qoldiriladi
+        limit = MAX_MESSAGE_LENGTH - 100
+        for number, request in enumerate(rows, start=1):
+            title = request['title'] if len(request['title']) <= 80 else request['title'][:79] + '…'
+            requester = f"{request['requested_by__first_name'] or ''} {request['requested_by__last_name'] or ''}".strip()
+            requester = requester or request['requested_by__username'] or '-'
+            start_time = timezone.localtime(request['preferred_start_time'])
+            entry = (
+                f"{number}. 📝 {escape_markdown(title)}\n"
+                f"👤 {escape_markdown(requester)}\n"
+                f"🏢 {escape_markdown(request['department__name'])}\n"
+                f"🕐 {start_time.strftime('%Y-%m-%d %H:%M')} ({request['duration']} daqiqa)\n\n"
+            )
+            if len(text) + len(entry) > limit:
+                break
+            text += entry
+            shown.append(request)
+            keyboard.append([
+                InlineKeyboardButton(f"✅ {number}", callback_data=f"approve_req_{request['id']}"),
+                InlineKeyboardButton(f"❌ {number}", callback_data=f"reject_req_{request['id']}")
+            ])
+
+        navigation = []
+        next_cursor = None
+        if page['has_previous']:
+            first = shown[0]
+            previous_cursor = review_queue.encode_cursor(first['created_at'], first['id'])
+            navigation.append(InlineKeyboardButton(
+                "◀️", callback_data=f"admin_requests:{review_queue.BACKWARD}.{previous_cursor}"
+            ))
+        if page['has_next'] or len(shown) < len(rows):
+            last = shown[-1]
+            next_cursor = review_queue.encode_cursor(last['created_at'], last['id'])
+            navigation.append(InlineKeyboardButton(
+                "▶️", callback_data=f"admin_requests:{review_queue.FORWARD}.{next_cursor}"
+            ))
+        if navigation:
+            keyboard.append(navigation)
+        keyboard.append([InlineKeyboardButton("⬅️ Orqaga", callback_data="admin_menu")])
+
+        await query.edit_message_text(text, parse_mode='Markdown', reply_markup=InlineKeyboardMarkup(keyboard))
+
+        if next_cursor:
+            # Admin joriy sahifani o'qiyotganda keyingisini keshga yuklash
+            self.application.create_task(
+                sync_to_async(review_queue.prefetch_page)(review_queue.FORWARD, next_cursor)
+            )
+
+    async def show_users_panel(self, query, overview, cursor):
+        direction, _, cursor_id = cursor.partition('.')
+        cursor_id = int(cursor_id) if cursor_id.isdigit() else None
+        if direction == 'p' and cursor_id is not None:
+            users, has_previous, has_next = await sync_to_async(aggregates.users_page)(before_id=cursor_id)
+        else:
+            users, has_previous, has_next = await sync_to_async(aggregates.users_page)(after_id=cursor_id)
+
+        totals = overview['users']
+        memberships = overview['memberships']
+        text = (
+            "👥 **Foydalanuvchilar**\n\n"
+            f"Jami: {totals['total']} | Faol: {totals['active']} | Adminlar: {totals['admins']}\n"
+            f"Bo'lim adminlari: {memberships['users']} ({memberships['total']} ta biriktirish)\n\n"
+        )
+        for user in users:
+            name = escape_markdown(f"{user.first_name or ''} {user.last_name or ''}".strip() or '-')
+            username = f" @{escape_markdown(user.username)}" if user.username else ''
+            badges = ('👑' if user.is_admin else '') + ('' if user.is_active else '🚫')
+            text += f"{badges}{name}{username}\n"
+        if not users:
+            text += "Foydalanuvchilar yo'q\n"
+
+        navigation = []
+        if has_previous and users:
+            navigation.append(InlineKeyboardButton("◀️", callback_data=f"admin_users:p.{users[0].id}"))
+        if has_next and users:
+            navigation.append(InlineKeyboardButton("▶️", callback_data=f"admin_users:n.{users[-1].id}"))
+        keyboard = [navigation] if navigation else []
+        keyboard.append([InlineKeyboardButton("⬅️ Orqaga", callback_data="admin_menu")])
+        await query.edit_message_text(text, parse_mode='Markdown', reply_markup=InlineKeyboardMarkup(keyboard))
+
+    async def show_departments_panel(self, query, overview, page):
+        page_size = settings.BOT_ADMIN_PAGE_SIZE
+        departments = overview['departments']
+        pages = max((len(departments) + page_size - 1) // page_size, 1)
+        page = min(int(page), pages - 1) if page.isdigit() else 0
+
+        text = f"🏢 **Bo'limlar** ({len(departments)} ta)\n\n"
+        for department in departments[page * page_size:(page + 1) * page_size]:
+            status = '🟢' if department['is_active'] else '⚪️'
+            text += (
+                f"{status} **{escape_markdown(department['name'])}**\n"
+                f"👥 A'zolar: {department['members']} | 📅 Shu hafta: {department['week_meetings']}"
+                f" | ⏳ Kutilmoqda: {department['pending_requests']} | Limit: {department['daily_limit']}\n\n"
+            )
+        if not departments:
+            text += "Bo'limlar yo'q\n"
+
+        navigation = []
+        if page > 0:
+            navigation.append(InlineKeyboardButton("◀️", callback_data=f"admin_departments:{page - 1}"))
+        if page < pages - 1:
+            navigation.append(InlineKeyboardButton("▶️", callback_data=f"admin_departments:{page + 1}"))
+        keyboard = [navigation] if navigation else []
+        keyboard.append([InlineKeyboardButton("⬅️ Orqaga", callback_data="admin_menu")])
+        await query.edit_message_text(text, parse_mode='Markdown', reply_markup=InlineKeyboardMarkup(keyboard))
+
+    async def show_stats_panel(self, query, overview):
+        meetings = overview['meetings']
+        requests = overview['requests']
+        meeting_labels = dict(ZoomMeeting.STATUS_CHOICES)
+        request_labels = dict(BookingRequest.STATUS_CHOICES)
+
+        text = "📈 **Statistika**\n\n📅 **Uchrashuvlar:**\n"
+        text += (
+            f"Bugun: {meetings['by_period']['today']} | Shu hafta: {meetings['by_period']['week']}"
+            f" | Shu oy: {meetings['by_period']['month']}\n"
+        )
+        for status, label in meeting_labels.items():
+            text += f"• {label}: {meetings['by_status'].get(status, 0)}\n"
+
+        text += "\n📋 **So'rovlar:**\n"
+        text += (
+            f"Bugun: {requests['by_period']['today']} | Shu hafta: {requests['by_period']['week']}"
+            f" | Shu oy: {requests['by_period']['month']}\n"
+        )
+        for status, label in request_labels.items():
+            text += f"• {label}: {requests['by_status'].get(status, 0)}\n"
 
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            await query.edit_message_text(text, parse_mode='Markdown', reply_markup=reply_markup)
+        generated_at = timezone.localtime(overview['generated_at']).strftime('%H:%M')
+        text += f"\n🕐 Yangilangan: {generated_at}"
+
+        keyboard = [[InlineKeyboardButton("⬅️ Orqaga", callback_data="admin_menu")]]
+        await query.edit_message_text(text, parse_mode='Markdown', reply_markup=InlineKeyboardMarkup(keyboard))
+
+    async def inline_query(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        inline_query = update.inline_query
+        try:
+            offset = max(int(inline_query.offset or 0), 0)
+        except ValueError:
+            offset = 0
+
+        meetings, has_more = await self.find_inline_meetings(inline_query.from_user.id, inline_query.query, offset)
+
+        results = []
+        for meeting in meetings:
+            start_time = timezone.localtime(meeting['start_time'])
+            end_time = start_time + timedelta(minutes=meeting['duration'])
+            when = f"{start_time.strftime('%d.%m.%Y %H:%M')} - {end_time.strftime('%H:%M')}"
+            text = (
+                f"📅 {meeting['title']}\n"
+                f"🕐 {when}\n"
+                f"🏢 {meeting['department__name']}\n"
+                f"🔗 {meeting['meeting_url'] or 'Havola tayyorlanmoqda...'}"
+            )
+            if meeting['password']:
+                text += f"\n🔑 Parol: {meeting['password']}"
+
+            results.append(InlineQueryResultArticle(
+                id=str(meeting['id']),
+                title=meeting['title'],
+                description=f"{when} · {meeting['department__name']}",
+                input_message_content=InputTextMessageContent(text),
+            ))
+
+        await inline_query.answer(
+            results,
+            cache_time=settings.INLINE_QUERY_CACHE_TIMEOUT,
+            is_personal=True,
+            next_offset=str(offset + settings.INLINE_QUERY_PAGE_SIZE) if has_more else '',
+        )
 
     async def text_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         text = update.message.text
@@ -339,9 +661,57 @@ Savollaringiz bo'lsa admin bilan bog'laning!
             await self.start_command(update, context)
         elif text == "👑 Admin panel" and telegram_user.is_admin:
             await self.admin_command(update, context)
+        elif context.user_data.pop('awaiting_schedule_range', False):
+            try:
+                first_day, last_day = schedule.parse_range(text.replace(' - ', ' ').split())
+            except ValueError as exc:
+                context.user_data['awaiting_schedule_range'] = True
+                await update.message.reply_text(f"❌ **Oraliq noto'g'ri!**\n\n{escape_markdown(str(exc))}", parse_mode='Markdown')
+                return
+            await self.send_schedule(update.message, update.effective_user.id, first_day, last_day)
         elif 'selected_department' in context.user_data:
             await self.handle_meeting_creation(update, context, text)
 
+    async def document_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        document = update.message.document
+        fmt = import_format(document.file_name or '')
+        if fmt is None:
+            await update.message.reply_text(
+                "❌ **Fayl turi noto'g'ri!**\n\n"
+                "Uchrashuvlarni ommaviy yaratish uchun CSV yoki XLSX fayl yuboring.",
+                parse_mode='Markdown'
+            )
+            return
+        if document.file_size and document.file_size > settings.BULK_IMPORT_MAX_BYTES:
+            await update.message.reply_text("❌ **Fayl hajmi juda katta!**", parse_mode='Markdown')
+            return
+
+        telegram_user = await sync_to_async(TelegramUser.objects.get)(telegram_id=update.effective_user.id)
+        buffer = io.BytesIO()
+        await (await document.get_file()).download_to_memory(buffer)
+        buffer.seek(0)
+        try:
+            rows = await sync_to_async(import_bookings)(buffer, fmt, telegram_user)
+        except BulkImportError as exc:
+            await update.message.reply_text(f"❌ **Faylni import qilib bo'lmadi!**\n\n{exc}", parse_mode='Markdown')
+            return
+
+        created = sum(row.ok for row in rows)
+        errors = [row for row in rows if not row.ok]
+        text = (
+            f"📥 **Import yakunlandi**\n\n"
+            f"✅ Yaratildi: {created} ta so'rov\n"
+            f"❌ Xato: {len(errors)} ta qator\n"
+        )
+        if errors:
+            text += "\n" + "\n".join(
+                f"{row.line}-qator: {escape_markdown(row.error)}" for row in errors[:10]
+            )
+            if len(errors) > 10:
+                text += f"\n... va yana {len(errors) - 10} ta"
+        await update.message.reply_text(text, parse_mode='Markdown')
+        await update.message.reply_document(document=report_csv(rows), filename='import_report.csv')
+
     async def handle_meeting_creation(self, update: Update, context: ContextTypes.DEFAULT_TYPE, text):
         telegram_user = await sync_to_async(TelegramUser.objects.get)(telegram_id=update.effective_user.id)
         
@@ -401,9 +771,18 @@ Savollaringiz bo'lsa admin bilan bog'laning!
                     "Iltimos, faqat son kiriting (masalan: 60)",
                     parse_mode='Markdown'
                 )
-        else:
+        elif 'meeting_description' not in context.user_data:
             context.user_data['meeting_description'] = text
-            await self.create_booking_request(update, context)
+            keyboard = [[InlineKeyboardButton("➖ Bir martalik", callback_data="recur_none")]]
+            keyboard += [
+                [InlineKeyboardButton(label, callback_data=f"recur_{preset}")]
+                for preset, label in RECURRENCE_LABELS.items()
+            ]
+            await update.message.reply_text(
+                "🔁 **Uchrashuv takrorlansinmi?**",
+                parse_mode='Markdown',
+                reply_markup=InlineKeyboardMarkup(keyboard)
+            )
 
     async def create_booking_request(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         telegram_user = await sync_to_async(TelegramUser.objects.get)(telegram_id=update.effective_user.id)
@@ -412,39 +791,55 @@ Savollaringiz bo'lsa admin bilan bog'laning!
         meeting_time = context.user_data.get('meeting_time')
         meeting_duration = context.user_data.get('meeting_duration')
         meeting_description = context.user_data.get('meeting_description')
+        meeting_recurrence = context.user_data.get('meeting_recurrence', '')
 
         try:
             department = await sync_to_async(Department.objects.get)(id=department_id)
+            if meeting_recurrence:
+                build_rule(meeting_recurrence, meeting_time)
             
             booking_request = await sync_to_async(BookingRequest.objects.create)(
                 title=meeting_title,
                 description=meeting_description,
                 preferred_start_time=meeting_time,
                 duration=meeting_duration,
+                recurrence=meeting_recurrence,
                 department=department,
                 requested_by=telegram_user,
                 status='pending'
             )
+            conflicts = await sync_to_async(find_conflicts)(department.id, meeting_time, meeting_duration)
+            try:
+                auto_approved = await sync_to_async(auto_approval.evaluate_new)(booking_request, conflicts)
+            except Exception:
+                # So'rov saqlangan, admin uni odatdagidek ko'rib chiqadi
+                logger.exception("Avtomatik tasdiqlashda xatolik")
+                auto_approved = None
 
             # Clear user data
-            del context.user_data['selected_department']
-            del context.user_data['meeting_title']
-            del context.user_data['meeting_time']
-            del context.user_data['meeting_duration']
-            del context.user_data['meeting_description']
+            for key in ('selected_department', 'meeting_title', 'meeting_time',
+                        'meeting_duration', 'meeting_description', 'meeting_recurrence'):
+                context.user_data.pop(key, None)
 
-            await update.message.reply_text(
+            text = (
                 f"✅ **Uchrashuv muvaffaqiyatli yaratildi!**\n\n"
                 f"📝 Nomi: {meeting_title}\n"
                 f"🏢 Bo'lim: {department.name}\n"
                 f"🕐 Vaqt: {meeting_time.strftime('%Y-%m-%d %H:%M')}\n"
-                f"⏱️ Davomiyligi: {meeting_duration} daqiqa\n\n"
-                f"Uchrashuv havolasi tez orada yuboriladi!",
-                parse_mode='Markdown'
+                f"⏱️ Davomiyligi: {meeting_duration} daqiqa\n"
             )
+            if meeting_recurrence:
+                text += f"🔁 Takrorlanish: {meeting_recurrence}\n"
+            if conflicts:
+                text += f"\n⚠️ Bu vaqtda bo'limda {len(conflicts)} ta boshqa uchrashuv bor.\n"
+            if auto_approved:
+                text += "\n🤖 So'rov avtomatik tasdiqlandi.\n"
+            text += "\nUchrashuv havolasi tez orada yuboriladi!"
+            await update.effective_message.reply_text(text, parse_mode='Markdown')
 
         except Exception as e:
-            await update.message.reply_text(
+            logger.exception("Uchrashuv so'rovini yaratib bo'lmadi")
+            await update.effective_message.reply_text(
                 "❌ **Xatolik yuz berdi!**\n\n"
                 "Iltimos, qaytadan urinib ko'ring.",
                 parse_mode='Markdown'
@@ -452,22 +847,80 @@ Savollaringiz bo'lsa admin bilan bog'laning!
 
     @sync_to_async
     def check_daily_limit(self, telegram_user):
-        today = timezone.now().date()
-        today_count = ZoomMeeting.objects.filter(
-            created_by=telegram_user,
-            start_time__date=today,
-            is_active=True
-        ).count()
-        return today_count >= 5
+        return self._today_meeting_count(telegram_user) >= 5
 
     @sync_to_async
     def get_today_meeting_count(self, telegram_user):
-        today = timezone.now().date()
-        return ZoomMeeting.objects.filter(
+        return self._today_meeting_count(telegram_user)
+
+    def _today_meeting_count(self, telegram_user):
+        window_start, window_end = today_window()
+        single = ZoomMeeting.objects.filter(
             created_by=telegram_user,
-            start_time__date=today,
+            start_time__gte=window_start,
+            start_time__lt=window_end,
             is_active=True
         ).count()
+        return single + count_in_window(window_start, window_end, created_by_id=telegram_user.id)
+
+    def _inline_scope(self, telegram_id):
+        key = f"inline:scope:{telegram_id}"
+        scope = cache.get(key)
+        if scope is None:
+            telegram_user_id = TelegramUser.objects.filter(
+                telegram_id=telegram_id, is_active=True
+            ).values_list('id', flat=True).first()
+            department_ids = list(DepartmentAdmin.objects.filter(
+                telegram_user_id=telegram_user_id, is_active=True
+            ).values_list('department_id', flat=True)) if telegram_user_id else []
+            scope = {'telegram_user_id': telegram_user_id, 'department_ids': department_ids}
+            cache.set(key, scope, settings.INLINE_SCOPE_CACHE_TIMEOUT)
+        return scope
+
+    @sync_to_async
+    def find_inline_meetings(self, telegram_id, query, offset):
+        """Inline qidiruv: foydalanuvchi va bo'limlari uchrashuvlari (keshlanadi)"""
+        query = ' '.join(query.lower().split())
+        query_hash = hashlib.md5(query.encode()).hexdigest()
+        cache_key = f"inline:results:{telegram_id}:{offset}:{query_hash}"
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        scope = self._inline_scope(telegram_id)
+        if scope['telegram_user_id'] is None:
+            return [], False
+
+        page_size = settings.INLINE_QUERY_PAGE_SIZE
+        if query:
+            documents = search_index(
+                query, ['meeting'], limit=page_size, offset=offset,
+                owner_id=scope['telegram_user_id'], department_ids=scope['department_ids'],
+            )
+            meeting_ids = [document['object_id'] for document in documents]
+        else:
+            # Bo'sh so'rov: yaqinlashib kelayotgan uchrashuvlar
+            upcoming = ZoomMeeting.objects.filter(
+                Q(created_by_id=scope['telegram_user_id']) | Q(department_id__in=scope['department_ids']),
+                is_active=True,
+                start_time__gte=timezone.now(),
+            ).exclude(status='cancelled').order_by('start_time')
+            meeting_ids = [str(meeting_id) for meeting_id in upcoming.values_list('id', flat=True)[offset:offset + page_size]]
+
+        meetings = {
+            str(meeting['id']): meeting
+            for meeting in ZoomMeeting.objects.filter(id__in=meeting_ids).exclude(status='cancelled').values(
+                'id', 'title', 'start_time', 'duration', 'meeting_url', 'password', 'department__name',
+            )
+        }
+        result = ([meetings[meeting_id] for meeting_id in meeting_ids if meeting_id in meetings],
+                  len(meeting_ids) == page_size)
+        cache.set(cache_key, result, settings.INLINE_QUERY_CACHE_TIMEOUT)
+        return result
+
+    def get_calendar_url(self, telegram_user):
+        path = reverse('booking:user_calendar', args=[telegram_user.id, feed_token(FEED_USER, telegram_user.id)])
+        return settings.SITE_URL.rstrip('/') + path
 
     def run(self):
         self.application.run_polling()
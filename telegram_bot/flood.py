@@ -0,0 +1,221 @@
+"""
+Bot uchun flood nazorati (token bucket).
+
+Har bir update boshqa handlerlardan (va har qanday DB murojaatidan) oldin,
+-1 guruhida tekshiriladi. Foydalanuvchi va guruh chati uchun alohida
+"chelak"lar yuritiladi; chelak bo'sh bo'lsa update tashlab yuboriladi va
+foydalanuvchiga bir marta muloyim javob qaytariladi.
+
+Inline so'rovlar (har bir harf uchun bittadan keladi) alohida, kengroq
+chelakdan foydalanadi; chosen_inline_result faqat xabarnoma, u cheklanmaydi.
+
+Backendlar:
+  memory - bitta bot jarayoni uchun
+  redis  - bir nechta bot jarayoni o'rtasida umumiy (Lua skript, atomar)
+"""
+import logging
+import math
+import time
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from telegram import InlineQueryResultsButton
+from telegram.error import TelegramError
+from telegram.ext import ApplicationHandlerStop
+
+from zoomga.metrics import UPDATES_DROPPED
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryTokenBuckets:
+    """
+    Jarayon ichidagi chelaklar.
+
+    To'lib bo'lgan chelak yo'q chelak bilan bir xil, shuning uchun u
+    o'chiriladi: kalitlar oxirgi murojaat tartibida, eng eskilaridan to'lganlari
+    har bir take() da olib tashlanadi. max_keys - qo'shimcha yuqori chegara.
+    """
+
+    def __init__(self, max_keys=100_000):
+        self.max_keys = max_keys
+        # kalit -> (tokenlar, yangilangan payt, to'ladigan payt)
+        self._buckets = OrderedDict()
+        self._warned = OrderedDict()
+
+    def _refill(self, key, rate, burst, now):
+        tokens, updated, _ = self._buckets.get(key, (burst, now, now))
+        return min(burst, tokens + (now - updated) * rate)
+
+    @staticmethod
+    def _evict(entries, now, expires, max_keys):
+        while entries and (expires(next(iter(entries.values()))) <= now or len(entries) > max_keys):
+            entries.popitem(last=False)
+
+    async def take(self, limits):
+        """
+        limits: [(kalit, tezlik (token/soniya), sig'im), ...]
+
+        Barcha chelaklarda token bo'lsa har biridan bittadan oladi.
+        (ruxsat, qayta urinishgacha soniya) qaytaradi.
+        """
+        now = time.monotonic()
+        levels = [self._refill(key, rate, burst, now) for key, rate, burst in limits]
+        allowed = all(tokens >= 1 for tokens in levels)
+        retry_after = 0.0
+        for (key, rate, burst), tokens in zip(limits, levels):
+            if allowed:
+                tokens -= 1
+            elif tokens < 1:
+                retry_after = max(retry_after, (1 - tokens) / rate)
+            self._buckets.pop(key, None)
+            self._buckets[key] = (tokens, now, now + (burst - tokens) / rate)
+
+        self._evict(self._buckets, now, lambda entry: entry[2], self.max_keys)
+        return allowed, retry_after
+
+    async def first_warning(self, key, ttl):
+        """Chelak to'lguncha kalit uchun faqat bir marta True"""
+        now = time.monotonic()
+        self._evict(self._warned, now, lambda expires: expires, self.max_keys)
+        if self._warned.get(key, 0) > now:
+            return False
+        self._warned.pop(key, None)
+        self._warned[key] = now + ttl
+        return True
+
+
+TAKE_SCRIPT = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local levels = {}
+local allowed = 1
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[i * 2 - 1])
+    local burst = tonumber(ARGV[i * 2])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or burst
+    local updated = tonumber(state[2]) or now
+    tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+    levels[i] = tokens
+    if tokens < 1 then
+        allowed = 0
+    end
+end
+local result = {allowed}
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[i * 2 - 1])
+    local burst = tonumber(ARGV[i * 2])
+    local tokens = levels[i]
+    if allowed == 1 then
+        tokens = tokens - 1
+    end
+    redis.call('HSET', key, 'tokens', tostring(tokens), 'ts', tostring(now))
+    redis.call('EXPIRE', key, math.ceil(burst / rate) + 1)
+    result[i + 1] = tostring(tokens)
+end
+return result
+"""
+
+
+class RedisTokenBuckets:
+    """Bir nechta bot jarayoni uchun umumiy chelaklar"""
+
+    prefix = 'bot:flood:'
+
+    def __init__(self, url):
+        from redis import asyncio as redis_asyncio
+
+        self.client = redis_asyncio.from_url(url)
+        self._take = self.client.register_script(TAKE_SCRIPT)
+
+    async def take(self, limits):
+        keys = [self.prefix + key for key, rate, burst in limits]
+        args = [value for key, rate, burst in limits for value in (rate, burst)]
+        allowed, *levels = await self._take(keys=keys, args=args)
+        retry_after = max(
+            [(1 - float(tokens)) / rate for (key, rate, burst), tokens in zip(limits, levels) if float(tokens) < 1],
+            default=0.0,
+        )
+        return bool(int(allowed)), retry_after
+
+    async def first_warning(self, key, ttl):
+        return bool(await self.client.set(f'{self.prefix}warned:{key}', 1, nx=True, ex=max(1, math.ceil(ttl))))
+
+
+class FloodControl:
+    """TypeHandler(Update, ...) uchun callback; ortiqcha update larni to'xtatadi"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.dropped = Counter()
+        self._last_report = time.monotonic()
+
+    @classmethod
+    def from_settings(cls):
+        if settings.BOT_RATE_LIMIT_BACKEND == 'redis':
+            return cls(RedisTokenBuckets(settings.BOT_RATE_LIMIT_REDIS_URL))
+        return cls(MemoryTokenBuckets())
+
+    def _limits(self, update):
+        if update.chosen_inline_result is not None:
+            return []
+        user = update.effective_user
+        if update.inline_query is not None:
+            return [(f'i:{user.id}', settings.BOT_INLINE_RATE, settings.BOT_INLINE_BURST)]
+        chat = update.effective_chat
+        limits = []
+        if user is not None:
+            limits.append((f'u:{user.id}', settings.BOT_USER_RATE, settings.BOT_USER_BURST))
+        if chat is not None and (user is None or chat.id != user.id):
+            limits.append((f'c:{chat.id}', settings.BOT_CHAT_RATE, settings.BOT_CHAT_BURST))
+        return limits
+
+    async def __call__(self, update, context):
+        limits = self._limits(update)
+        if not limits:
+            return
+        try:
+            allowed, retry_after = await self.buckets.take(limits)
+        except Exception:
+            # Limiter ishlamasa bot to'xtab qolmasligi kerak
+            logger.exception("Flood nazorati ishlamadi, update o'tkazildi")
+            return
+        if allowed:
+            return
+
+        key = limits[0][0]
+        self._record_drop(key)
+        try:
+            if await self.buckets.first_warning(key, retry_after):
+                await self._warn(update, retry_after)
+        except Exception:
+            logger.exception("Flood ogohlantirishini yuborib bo'lmadi: %s", key)
+        raise ApplicationHandlerStop
+
+    async def _warn(self, update, retry_after):
+        text = f"⏳ Juda ko'p so'rov yuborildi. Iltimos, {math.ceil(retry_after)} soniyadan keyin qayta urinib ko'ring."
+        try:
+            if update.callback_query is not None:
+                await update.callback_query.answer(text)
+            elif update.inline_query is not None:
+                await update.inline_query.answer(
+                    [], cache_time=0, is_personal=True,
+                    button=InlineQueryResultsButton(text=text, start_parameter='flood'),
+                )
+            elif update.effective_message is not None:
+                await update.effective_message.reply_text(text)
+        except TelegramError:
+            logger.warning("Flood ogohlantirishini yuborib bo'lmadi", exc_info=True)
+
+    def _record_drop(self, key):
+        self.dropped[key] += 1
+        UPDATES_DROPPED.inc()
+        now = time.monotonic()
+        if now - self._last_report >= settings.BOT_RATE_LIMIT_LOG_INTERVAL:
+            logger.warning(
+                "Flood nazorati: %d ta update tashlab yuborildi (%d kalit), eng faollari: %s",
+                sum(self.dropped.values()), len(self.dropped), self.dropped.most_common(5),
+            )
+            self.dropped.clear()
+            self._last_report = now
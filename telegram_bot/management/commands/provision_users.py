@@ -0,0 +1,42 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from telegram_bot.onboarding import provision_users
+
+
+class Command(BaseCommand):
+    help = (
+        'Provision Telegram users and department memberships from CSV '
+        '(columns: telegram_id, username, first_name, last_name, departments; '
+        'departments are separated by ";")'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['csv_file'], newline='', encoding='utf-8-sig') as handle:
+                rows = [self.parse_row(line_number, row) for line_number, row in enumerate(csv.DictReader(handle), 2)]
+        except OSError as exc:
+            raise CommandError(exc)
+
+        users, memberships, missing = provision_users(rows, batch_size=options['batch_size'])
+        for name in missing:
+            self.stderr.write(self.style.WARNING(f'Department not found, memberships skipped: {name}'))
+        self.stdout.write(self.style.SUCCESS(f'Provisioned {users} users and {memberships} new department memberships'))
+
+    def parse_row(self, line_number, row):
+        try:
+            telegram_id = int(row['telegram_id'])
+        except (KeyError, TypeError, ValueError):
+            raise CommandError(f'Line {line_number}: invalid telegram_id')
+        return {
+            'telegram_id': telegram_id,
+            'username': (row.get('username') or '').strip().lstrip('@'),
+            'first_name': (row.get('first_name') or '').strip(),
+            'last_name': (row.get('last_name') or '').strip(),
+            'departments': [name.strip() for name in (row.get('departments') or '').split(';') if name.strip()],
+        }
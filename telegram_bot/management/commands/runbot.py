@@ -1,11 +1,13 @@
 from django.core.management.base import BaseCommand
 from telegram_bot.bot import ZoomTelegramBot
 from django.conf import settings
+from zoomga.metrics import start_metrics_server
 
 class Command(BaseCommand):
     help = 'Run Telegram bot'
 
     def handle(self, *args, **options):
         bot = ZoomTelegramBot(settings.TELEGRAM_BOT_TOKEN)
+        start_metrics_server()
         self.stdout.write(self.style.SUCCESS('Starting Telegram bot...'))
         bot.run()
@@ -0,0 +1,140 @@
+"""
+Telegram foydalanuvchilarini ro'yxatdan o'tkazish.
+
+Bot foydalanuvchilari Django paroli bilan kirmaydi, shuning uchun parol
+xeshlanmaydi: "ishlatib bo'lmaydigan" parol qo'yiladi (make_password(None)).
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from booking.search import index_users
+from .aggregates import invalidate_admin_ids
+from .models import TelegramUser, Department, DepartmentAdmin
+
+User = get_user_model()
+
+PROFILE_FIELDS = ('username', 'first_name', 'last_name')
+
+
+def django_username(telegram_id):
+    return f"tg_{telegram_id}"
+
+
+def _django_user(telegram_id):
+    return User(
+        username=django_username(telegram_id),
+        email=f"{telegram_id}@telegram.bot",
+        password=make_password(None),
+    )
+
+
+def onboard_user(telegram_id, username='', first_name='', last_name=''):
+    """
+    /start uchun: User va TelegramUser juftligini yaratish yoki yangilash.
+
+    Qaytgan foydalanuvchi uchun profil maydonlari faqat o'zgargan bo'lsa
+    yoziladi. (telegram_user, created) qaytaradi.
+    """
+    profile = {
+        'username': username or '',
+        'first_name': first_name or '',
+        'last_name': last_name or '',
+    }
+
+    telegram_user = TelegramUser.objects.filter(telegram_id=telegram_id).first()
+    if telegram_user is not None:
+        changed = [field for field, value in profile.items() if getattr(telegram_user, field) != value]
+        if changed:
+            for field in changed:
+                setattr(telegram_user, field, profile[field])
+            telegram_user.save(update_fields=changed + ['updated_at'])
+        return telegram_user, False
+
+    with transaction.atomic():
+        new_user = _django_user(telegram_id)
+        django_user, _ = User.objects.get_or_create(
+            username=new_user.username,
+            defaults={'email': new_user.email, 'password': new_user.password},
+        )
+        return TelegramUser.objects.update_or_create(
+            telegram_id=telegram_id,
+            defaults={**profile, 'user': django_user},
+        )
+
+
+def provision_users(rows, batch_size=1000):
+    """
+    CSV qatorlaridan foydalanuvchilar va bo'lim a'zoliklarini ommaviy yaratish.
+
+    rows: {'telegram_id', 'username', 'first_name', 'last_name',
+    'departments': [nomlar]} lug'atlari. Mavjud foydalanuvchilarning profil
+    maydonlari yangilanadi, mavjud a'zoliklar o'zgarmaydi.
+    (foydalanuvchilar soni, yangi a'zoliklar soni, topilmagan bo'limlar) qaytaradi.
+    """
+    # Takroriy telegram_id lar bitta upsert ichida ziddiyat beradi
+    unique_rows = {}
+    for row in rows:
+        previous = unique_rows.get(row['telegram_id'])
+        departments = [*previous.get('departments', ()), *row.get('departments', ())] if previous else row.get('departments', ())
+        unique_rows[row['telegram_id']] = {**row, 'departments': departments}
+    rows = list(unique_rows.values())
+
+    department_ids = dict(Department.objects.values_list('name', 'id'))
+    missing_departments = set()
+    user_count = membership_count = 0
+
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        telegram_ids = [row['telegram_id'] for row in batch]
+
+        with transaction.atomic():
+            User.objects.bulk_create(
+                [_django_user(telegram_id) for telegram_id in telegram_ids],
+                ignore_conflicts=True,
+            )
+            user_ids = dict(
+                User.objects.filter(username__in=[django_username(telegram_id) for telegram_id in telegram_ids])
+                .values_list('username', 'id')
+            )
+
+            TelegramUser.objects.bulk_create(
+                [
+                    TelegramUser(
+                        telegram_id=row['telegram_id'],
+                        user_id=user_ids[django_username(row['telegram_id'])],
+                        **{field: row.get(field) or '' for field in PROFILE_FIELDS}
+                    )
+                    for row in batch
+                ],
+                update_conflicts=True,
+                unique_fields=['telegram_id'],
+                update_fields=[*PROFILE_FIELDS, 'updated_at'],
+            )
+            telegram_users = list(TelegramUser.objects.filter(telegram_id__in=telegram_ids))
+            profile_ids = {telegram_user.telegram_id: telegram_user.id for telegram_user in telegram_users}
+
+            memberships = []
+            for row in batch:
+                for name in row.get('departments', ()):
+                    if name not in department_ids:
+                        missing_departments.add(name)
+                        continue
+                    memberships.append(DepartmentAdmin(
+                        telegram_user_id=profile_ids[row['telegram_id']],
+                        department_id=department_ids[name],
+                    ))
+            # ignore_conflicts mavjud a'zoliklarni tashlab yuboradi, shuning uchun yangilari oldin/keyin sanaladi
+            existing = DepartmentAdmin.objects.filter(telegram_user_id__in=profile_ids.values())
+            memberships_before = existing.count() if memberships else 0
+            DepartmentAdmin.objects.bulk_create(memberships, ignore_conflicts=True)
+            if memberships:
+                membership_count += existing.count() - memberships_before
+
+            # bulk_create signallarni chaqirmaydi
+            index_users(telegram_users)
+
+        user_count += len(batch)
+
+    invalidate_admin_ids()
+    return user_count, membership_count, sorted(missing_departments)
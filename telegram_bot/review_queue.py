@@ -0,0 +1,119 @@
+"""
+Bot admin paneli uchun kutilayotgan so'rovlar navbati.
+
+Sahifalar (created_at, id) bo'yicha keyset orqali olinadi; kursor
+callback_data ichiga sig'adigan qisqa ko'rinishda kodlanadi. Keyingi
+sahifa admin joriy sahifani o'qiyotganda keshga oldindan yuklanadi.
+"""
+import base64
+import time
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+from booking.models import BookingRequest
+
+VERSION_KEY = 'bot:requests_queue:version'
+FORWARD = 'n'
+BACKWARD = 'p'
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+_DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+
+def _base36(number):
+    encoded = ''
+    while True:
+        number, remainder = divmod(number, 36)
+        encoded = _DIGITS[remainder] + encoded
+        if not number:
+            return encoded
+
+
+def encode_cursor(created_at, request_id):
+    """(created_at, id) -> 'vaqt36.uuid64' (taxminan 33 belgi)"""
+    micros = (created_at - _EPOCH) // timedelta(microseconds=1)
+    packed_id = base64.urlsafe_b64encode(request_id.bytes).rstrip(b'=').decode()
+    return f"{_base36(micros)}.{packed_id}"
+
+
+def decode_cursor(cursor):
+    try:
+        micros, packed_id = cursor.split('.')
+        created_at = _EPOCH + timedelta(microseconds=int(micros, 36))
+        request_id = uuid.UUID(bytes=base64.urlsafe_b64decode(packed_id + '=='))
+    except (ValueError, TypeError):
+        return None
+    return created_at, request_id
+
+
+def _queue_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = time.time_ns()
+        cache.add(VERSION_KEY, version, None)
+    return version
+
+
+def invalidate_queue():
+    """So'rov holati o'zgarganda keshdagi sahifalarni eskirgan deb belgilash"""
+    cache.set(VERSION_KEY, time.time_ns(), None)
+
+
+def _page_key(direction, cursor):
+    return f"bot:requests_queue:{_queue_version()}:{direction}:{cursor or ''}"
+
+
+def fetch_page(direction=FORWARD, cursor=None, page_size=None):
+    """
+    Kutilayotgan so'rovlar sahifasi, yangilaridan eskilariga.
+
+    {'rows': [...], 'has_previous': bool, 'has_next': bool} qaytaradi.
+    """
+    page_size = page_size or settings.BOT_ADMIN_PAGE_SIZE
+    pending = BookingRequest.objects.filter(status='pending')
+    position = decode_cursor(cursor) if cursor else None
+
+    if position and direction == BACKWARD:
+        created_at, request_id = position
+        pending = pending.filter(
+            Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=request_id)
+        ).order_by('created_at', 'id')
+    else:
+        if position:
+            created_at, request_id = position
+            pending = pending.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=request_id)
+            )
+        pending = pending.order_by('-created_at', '-id')
+
+    rows = list(pending.values(
+        'id', 'title', 'preferred_start_time', 'duration', 'created_at',
+        'requested_by__first_name', 'requested_by__last_name', 'requested_by__username',
+        'department__name',
+    )[:page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+
+    if position and direction == BACKWARD:
+        return {'rows': rows[::-1], 'has_previous': has_more, 'has_next': True}
+    return {'rows': rows, 'has_previous': position is not None, 'has_next': has_more}
+
+
+def get_page(direction=FORWARD, cursor=None):
+    """Keshdan (oldindan yuklangan bo'lsa) yoki DB dan sahifa"""
+    key = _page_key(direction, cursor)
+    page = cache.get(key)
+    if page is None:
+        page = fetch_page(direction, cursor)
+        cache.set(key, page, settings.BOT_REQUESTS_PAGE_CACHE_TIMEOUT)
+    return page
+
+
+def prefetch_page(direction, cursor):
+    key = _page_key(direction, cursor)
+    if cache.get(key) is None:
+        cache.set(key, fetch_page(direction, cursor), settings.BOT_REQUESTS_PAGE_CACHE_TIMEOUT)
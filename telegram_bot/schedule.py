@@ -0,0 +1,204 @@
+"""
+Bot jadvali: bugun, ertaga, hafta va ixtiyoriy sana oralig'i.
+
+Uchrashuvlar bitta indeksli oraliq so'rovi (start_time, select_related) va
+seriya takrorlari bilan olinadi. Matn uchrashuvlar chegarasida Telegram
+xabar hajmiga bo'lib yig'iladi, shuning uchun uzun jadval bir nechta
+xabarda keladi va hech bir uchrashuv ikkiga bo'linmaydi.
+
+Tayyor xabarlar foydalanuvchi va oraliq bo'yicha keshlanadi. Kalitda
+foydalanuvchining kalendar versiyasi bor (booking.calendar): uning
+uchrashuvi yoki seriyasi o'zgarganda kesh o'z-o'zidan eskiradi.
+"""
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from telegram.constants import MessageLimit
+from telegram.helpers import escape_markdown
+
+from booking.analytics import local_midnight
+from booking.calendar import FEED_USER, feed_version
+from booking.recurrence import meetings_in_window, occurrence_stamp
+
+RANGE_TODAY = 'today'
+RANGE_TOMORROW = 'tomorrow'
+RANGE_WEEK = 'week'
+RANGE_LABELS = {
+    RANGE_TODAY: "Bugun",
+    RANGE_TOMORROW: "Ertaga",
+    RANGE_WEEK: "Hafta",
+}
+# /my_meetings argumentlari
+RANGE_ALIASES = {
+    'bugun': RANGE_TODAY, 'today': RANGE_TODAY,
+    'ertaga': RANGE_TOMORROW, 'tomorrow': RANGE_TOMORROW,
+    'hafta': RANGE_WEEK, 'week': RANGE_WEEK,
+}
+DATE_FORMATS = ('%Y-%m-%d', '%d.%m.%Y')
+# Takrorni bekor qilish tugmasi: occ_del:<series_id>:<stamp>
+CANCEL_OCCURRENCE_PREFIX = 'occ_del:'
+MAX_OCCURRENCE_BUTTONS = 8
+WEEKDAYS = ('Dushanba', 'Seshanba', 'Chorshanba', 'Payshanba', 'Juma', 'Shanba', 'Yakshanba')
+STATUS_EMOJI = {
+    'scheduled': '⏰',
+    'active': '🟢',
+    'ended': '✅',
+    'cancelled': '❌',
+}
+
+
+def range_dates(name, today=None):
+    """Nomli oraliq -> (birinchi kun, oxirgi kun), ikkalasi ham kiradi"""
+    today = today or timezone.localdate()
+    if name == RANGE_TOMORROW:
+        tomorrow = today + timedelta(days=1)
+        return tomorrow, tomorrow
+    if name == RANGE_WEEK:
+        return today, today + timedelta(days=6)
+    return today, today
+
+
+def _parse_date(value):
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Sana noto'g'ri: {value} (YYYY-MM-DD yoki DD.MM.YYYY)")
+
+
+def parse_range(args, today=None):
+    """
+    /my_meetings argumentlari yoki "oraliq" matni -> (birinchi kun, oxirgi kun).
+
+    Bo'sh - bugun; 'ertaga', 'hafta'; bitta sana; ikkita sana (ikkalasi ham kiradi).
+    """
+    if not args:
+        return range_dates(RANGE_TODAY, today)
+    if len(args) == 1 and args[0].lower() in RANGE_ALIASES:
+        return range_dates(RANGE_ALIASES[args[0].lower()], today)
+    if len(args) > 2:
+        raise ValueError("Ko'pi bilan ikkita sana kiriting")
+
+    first_day = _parse_date(args[0])
+    last_day = _parse_date(args[-1])
+    if last_day < first_day:
+        raise ValueError("Oxirgi sana birinchisidan oldin bo'lmasligi kerak")
+    if (last_day - first_day).days >= settings.BOT_SCHEDULE_MAX_DAYS:
+        raise ValueError(f"Oraliq {settings.BOT_SCHEDULE_MAX_DAYS} kundan oshmasligi kerak")
+    return first_day, last_day
+
+
+def schedule_title(first_day, last_day, today=None):
+    today = today or timezone.localdate()
+    if first_day == last_day == today:
+        return "📅 **Bugungi uchrashuvlarim:**"
+    if first_day == last_day == today + timedelta(days=1):
+        return "📅 **Ertangi uchrashuvlarim:**"
+    if first_day == last_day:
+        return f"📅 **{first_day:%d.%m.%Y} uchrashuvlarim:**"
+    return f"📅 **Jadval: {first_day:%d.%m} - {last_day:%d.%m.%Y}**"
+
+
+def meeting_lines(meeting):
+    local_start = timezone.localtime(meeting.start_time)
+    local_end = timezone.localtime(meeting.end_time)
+    return (
+        f"{STATUS_EMOJI.get(meeting.status, '📋')} **{escape_markdown(meeting.title)}**\n"
+        f"🕐 Vaqt: {local_start:%H:%M} - {local_end:%H:%M}\n"
+        f"🏢 Bo'lim: {escape_markdown(meeting.department.name)}\n"
+        f"🔗 Havola: {escape_markdown(meeting.meeting_url) if meeting.meeting_url else 'Yaratilmoqda...'}\n\n"
+    )
+
+
+def iter_blocks(meetings, multi_day):
+    """Har bir uchrashuv uchun bitta bo'lak; ko'p kunlik jadvalda kun sarlavhasi birinchi uchrashuvga qo'shiladi"""
+    current_day = None
+    for meeting in meetings:
+        block = meeting_lines(meeting)
+        day = timezone.localtime(meeting.start_time).date()
+        if multi_day and day != current_day:
+            current_day = day
+            block = f"📆 **{day:%d.%m} ({WEEKDAYS[day.weekday()]})**\n\n" + block
+        yield block
+
+
+def chunk_messages(title, blocks, limit=MessageLimit.MAX_TEXT_LENGTH):
+    """
+    Bo'laklarni xabarlarga yig'ish: xabar faqat bo'laklar orasida bo'linadi.
+
+    Satrlarni qayta-qayta qo'shish o'rniga har bir xabar ro'yxatda yig'ilib,
+    bir marta join qilinadi. limit dan uzun yagona bo'lak (juda uzun nom)
+    majburan kesiladi.
+    """
+    parts = [title + "\n\n"]
+    size = len(parts[0])
+    for block in blocks:
+        if size + len(block) > limit and size:
+            yield ''.join(parts).rstrip()
+            parts, size = [], 0
+        while len(block) > limit:
+            yield block[:limit]
+            block = block[limit:]
+        parts.append(block)
+        size += len(block)
+    if size:
+        yield ''.join(parts).rstrip()
+
+
+def _cache_key(telegram_user_id, first_day, last_day, today):
+    # Sarlavha ("Bugungi"/"Ertangi") bugungi sanaga bog'liq
+    version = feed_version(FEED_USER, telegram_user_id)
+    return f'bot:schedule:{telegram_user_id}:{version}:{first_day:%Y%m%d}:{last_day:%Y%m%d}:{today:%Y%m%d}'
+
+
+def occurrence_buttons(meetings, now=None):
+    """
+    Bekor qilish tugmalari uchun kelgusi seriya takrorlari: [(callback_data, matn)].
+
+    Takror (series_id, boshlanish stamp) bilan aniqlanadi - callback_data
+    Telegram ning 64 baytlik chegarasiga sig'adi.
+    """
+    now = now or timezone.now()
+    buttons = []
+    for meeting in meetings:
+        if meeting.series_id is None or meeting.start_time <= now or meeting.status == 'cancelled':
+            continue
+        local_start = timezone.localtime(meeting.start_time)
+        buttons.append((
+            f"{CANCEL_OCCURRENCE_PREFIX}{meeting.series_id}:{occurrence_stamp(meeting.original_start)}",
+            f"❌ {local_start:%d.%m %H:%M} {meeting.title[:24]}",
+        ))
+        if len(buttons) >= MAX_OCCURRENCE_BUTTONS:
+            break
+    return buttons
+
+
+def render_schedule(telegram_user_id, first_day, last_day):
+    """
+    Foydalanuvchi jadvali: (Telegram xabarlari, takrorlarni bekor qilish tugmalari).
+
+    Uchrashuv bo'lmasa bo'sh ro'yxatlar qaytadi.
+    """
+    today = timezone.localdate()
+    cache_key = _cache_key(telegram_user_id, first_day, last_day, today)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    meetings = meetings_in_window(
+        local_midnight(first_day), local_midnight(last_day + timedelta(days=1)),
+        created_by_id=telegram_user_id,
+    )
+    messages = []
+    if meetings:
+        messages = list(chunk_messages(
+            schedule_title(first_day, last_day, today),
+            iter_blocks(meetings, multi_day=first_day != last_day),
+        ))
+    # Kesh muddati ichida o'tib ketgan takror tugmasini bot o'zi rad etadi
+    cached = (messages, occurrence_buttons(meetings))
+    cache.set(cache_key, cached, settings.BOT_SCHEDULE_CACHE_TIMEOUT)
+    return cached
@@ -0,0 +1,10 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import TelegramUser
+from .aggregates import invalidate_admin_ids
+
+
+@receiver([post_save, post_delete], sender=TelegramUser)
+def telegram_user_changed(sender, instance, **kwargs):
+    invalidate_admin_ids()
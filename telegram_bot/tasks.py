@@ -0,0 +1,11 @@
+from celery import shared_task
+
+from zoomga.db_router import replica_task
+from .aggregates import refresh_overview
+
+
+@shared_task
+@replica_task
+def refresh_admin_overview():
+    """Bot admin panellari uchun agregatlarni oldindan hisoblash"""
+    refresh_overview()
@@ -1,3 +1,539 @@
-from django.test import TestCase
+import uuid
+from datetime import date, datetime, time, timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from telegram.ext import ApplicationHandlerStop
+from django.utils import timezone
+
+from booking.models import BookingRequest, MeetingSeries, SearchDocument, ZoomMeeting
+from booking.recurrence import occurrence_stamp
+from . import aggregates, flood, review_queue, schedule
+from .bot import ZoomTelegramBot
+from .models import Department, DepartmentAdmin, TelegramUser
+from .onboarding import onboard_user, provision_users
+
+User = get_user_model()
+
+
+class OnboardUserTests(TestCase):
+    def test_first_start_creates_user(self):
+        telegram_user, created = onboard_user(10, 'ali', 'Ali', 'Valiyev')
+        self.assertTrue(created)
+        self.assertEqual(telegram_user.user.username, 'tg_10')
+        self.assertFalse(telegram_user.user.has_usable_password())
+
+    def test_returning_user_without_changes_only_reads(self):
+        onboard_user(10, 'ali', 'Ali', 'Valiyev')
+        with self.assertNumQueries(1):
+            telegram_user, created = onboard_user(10, 'ali', 'Ali', 'Valiyev')
+        self.assertFalse(created)
+        self.assertEqual(User.objects.count(), 1)
+
+    def test_returning_user_profile_is_updated(self):
+        first, _ = onboard_user(10, 'ali', 'Ali', '')
+        telegram_user, created = onboard_user(10, 'ali_v', 'Ali', None)
+        self.assertFalse(created)
+        self.assertEqual(telegram_user.id, first.id)
+        telegram_user.refresh_from_db()
+        self.assertEqual((telegram_user.username, telegram_user.last_name), ('ali_v', ''))
+        self.assertIn('ali_v', SearchDocument.objects.get(
+            object_type=SearchDocument.TYPE_USER, object_id=str(telegram_user.id),
+        ).document)
+
+
+class ProvisionUsersTests(TestCase):
+    def setUp(self):
+        self.it = Department.objects.create(name="IT")
+        self.finance = Department.objects.create(name="Moliya")
+
+    def test_creates_users_and_memberships(self):
+        users, memberships, missing = provision_users([
+            {'telegram_id': 1, 'username': 'ali', 'first_name': 'Ali', 'departments': ['IT', 'Kadrlar']},
+            {'telegram_id': 2, 'first_name': 'Vali', 'departments': ['IT', 'Moliya']},
+            {'telegram_id': 1, 'username': 'ali', 'first_name': 'Ali', 'departments': ['Moliya', 'IT']},
+        ], batch_size=1)
+        self.assertEqual((users, memberships, missing), (2, 4, ['Kadrlar']))
+        self.assertEqual(TelegramUser.objects.count(), 2)
+        self.assertEqual(DepartmentAdmin.objects.count(), 4)
+        self.assertEqual(SearchDocument.objects.filter(object_type=SearchDocument.TYPE_USER).count(), 2)
+
+    def test_rerun_counts_only_new_memberships(self):
+        provision_users([{'telegram_id': 1, 'first_name': 'Ali', 'departments': ['IT']}])
+        users, memberships, missing = provision_users([
+            {'telegram_id': 1, 'first_name': 'Alisher', 'departments': ['IT', 'Moliya']},
+            {'telegram_id': 2, 'first_name': 'Vali', 'departments': ['IT']},
+        ])
+        self.assertEqual((users, memberships, missing), (2, 2, []))
+        self.assertEqual(DepartmentAdmin.objects.count(), 3)
+        self.assertEqual(TelegramUser.objects.get(telegram_id=1).first_name, 'Alisher')
+        self.assertEqual(User.objects.count(), 2)
+
+    def test_existing_bot_user_is_reused(self):
+        telegram_user, _ = onboard_user(1, 'ali', 'Ali', '')
+        users, memberships, _ = provision_users([{'telegram_id': 1, 'username': 'ali', 'departments': ['IT']}])
+        self.assertEqual((users, memberships), (1, 1))
+        self.assertEqual(DepartmentAdmin.objects.get().telegram_user_id, telegram_user.id)
+
+
+class CancelOccurrenceTests(TestCase):
+    """Bot jadvalidan seriya takrorini bekor qilish"""
+
+    def setUp(self):
+        cache.clear()
+        self.department = Department.objects.create(name="IT")
+        self.owner, _ = onboard_user(10, 'ali', 'Ali', '')
+        self.stranger, _ = onboard_user(20, 'vali', 'Vali', '')
+        self.dtstart = timezone.localtime().replace(hour=10, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        self.series = MeetingSeries.objects.create(
+            title="Standup", department=self.department, created_by=self.owner,
+            dtstart=self.dtstart, duration=15, rrule='FREQ=DAILY',
+        )
+        # Telegram ulanishisiz: faqat sinxron yordamchi sinovdan o'tkaziladi
+        self.bot = ZoomTelegramBot.__new__(ZoomTelegramBot)
+
+    def test_schedule_offers_cancel_buttons(self):
+        day = self.dtstart.date()
+        messages, buttons = schedule.render_schedule(self.owner.id, day, day + timedelta(days=1))
+        self.assertEqual(len(buttons), 2)
+        callback_data, text = buttons[0]
+        self.assertEqual(callback_data, f"occ_del:{self.series.id}:{occurrence_stamp(self.dtstart)}")
+        self.assertLessEqual(len(callback_data.encode()), 64)
+        self.assertIn("Standup", text)
+
+    def test_owner_cancels_occurrence_and_schedule_refreshes(self):
+        day = self.dtstart.date()
+        self.assertEqual(len(schedule.render_schedule(self.owner.id, day, day)[1]), 1)
+
+        stamp = occurrence_stamp(self.dtstart)
+        result = self.bot.cancel_series_occurrence(10, str(self.series.id), stamp)
+        self.assertEqual(result, "✅ Takror bekor qilindi")
+        self.series.refresh_from_db()
+        self.assertEqual(self.series.exdates, [stamp])
+        self.assertEqual(schedule.render_schedule(self.owner.id, day, day), ([], []))
+
+    def test_cancel_is_rejected_for_others_and_bad_data(self):
+        stamp = occurrence_stamp(self.dtstart)
+        self.assertIn("huquqingiz yo'q", self.bot.cancel_series_occurrence(20, str(self.series.id), stamp))
+        self.assertIn("topilmadi", self.bot.cancel_series_occurrence(10, 'nonsense', stamp))
+        self.assertIn("topilmadi", self.bot.cancel_series_occurrence(10, str(self.series.id), '20000101T000000Z'))
+        past = occurrence_stamp(self.dtstart - timedelta(days=1))
+        self.series.dtstart -= timedelta(days=2)
+        self.series.save()
+        self.assertIn("o'tib ketgan", self.bot.cancel_series_occurrence(10, str(self.series.id), past))
+        self.series.refresh_from_db()
+        self.assertEqual(self.series.exdates, [])
+
+
+@override_settings(BOT_SCHEDULE_MAX_DAYS=31)
+class ScheduleRangeTests(SimpleTestCase):
+    """/my_meetings oralig'i va xabarlarni bo'laklarga bo'lish"""
+
+    today = date(2024, 3, 10)
+
+    def test_named_ranges(self):
+        self.assertEqual(schedule.parse_range([], self.today), (self.today, self.today))
+        tomorrow = date(2024, 3, 11)
+        self.assertEqual(schedule.parse_range(['Ertaga'], self.today), (tomorrow, tomorrow))
+        self.assertEqual(schedule.parse_range(['week'], self.today), (self.today, date(2024, 3, 16)))
+
+    def test_dates(self):
+        self.assertEqual(schedule.parse_range(['2024-03-12'], self.today), (date(2024, 3, 12), date(2024, 3, 12)))
+        self.assertEqual(
+            schedule.parse_range(['01.04.2024', '2024-05-01'], self.today), (date(2024, 4, 1), date(2024, 5, 1))
+        )
+
+    def test_invalid_ranges(self):
+        for args, message in (
+            (['12/03/2024'], "Sana noto'g'ri"),
+            (['2024-03-12', '2024-03-11'], "oldin bo'lmasligi"),
+            (['2024-03-01', '2024-04-01'], "31 kundan oshmasligi"),
+            (['2024-03-01', '2024-03-02', '2024-03-03'], "Ko'pi bilan ikkita"),
+        ):
+            with self.subTest(args=args), self.assertRaisesMessage(ValueError, message):
+                schedule.parse_range(args, self.today)
+
+    def test_chunks_split_between_blocks(self):
+        blocks = ['a' * 40 + '\n\n', 'b' * 40 + '\n\n', 'c' * 40 + '\n\n']
+        messages = list(schedule.chunk_messages('T', blocks, limit=90))
+        self.assertEqual(messages, ['T\n\n' + 'a' * 40 + '\n\n' + 'b' * 40, 'c' * 40])
+
+    def test_oversized_block_is_cut(self):
+        messages = list(schedule.chunk_messages('T', ['x' * 25], limit=10))
+        self.assertEqual(messages, ['T', 'x' * 10, 'x' * 10, 'x' * 5])
+
+
+class LongScheduleTests(TestCase):
+    """Uzun jadval bir nechta xabarga uchrashuvlar chegarasida bo'linadi"""
+
+    def setUp(self):
+        cache.clear()
+        self.owner, _ = onboard_user(10, 'ali', 'Ali', '')
+        self.first_day = timezone.localdate() + timedelta(days=1)
+        department = Department.objects.create(name="IT")
+        for hour in range(24):
+            MeetingSeries.objects.create(
+                title='Uzoq nom ' * 20, department=department, created_by=self.owner,
+                dtstart=timezone.make_aware(datetime.combine(self.first_day, time(hour, 10))),
+                duration=30, rrule='FREQ=DAILY;COUNT=2',
+            )
+
+    def test_meetings_are_never_split(self):
+        messages, _ = schedule.render_schedule(self.owner.id, self.first_day, self.first_day + timedelta(days=1))
+        self.assertGreater(len(messages), 1)
+        self.assertTrue(messages[0].startswith("📅 **Jadval:"))
+        for message in messages:
+            self.assertLessEqual(len(message), 4096)
+            # Har bir xabardagi uchrashuvlar to'liq: boshidan havolasigacha
+            self.assertEqual(message.count("🕐 Vaqt:"), message.count("🔗 Havola:"))
+            self.assertTrue(message.rstrip().endswith("Yaratilmoqda..."))
+        self.assertEqual(sum(message.count("🔗 Havola:") for message in messages), 48)
+        self.assertEqual(sum(message.count("📆 **") for message in messages), 2)
+
+
+@override_settings(INLINE_QUERY_PAGE_SIZE=2)
+class InlineSearchTests(TestCase):
+    """Inline qidiruv: faqat o'z va boshqaradigan bo'lim uchrashuvlari, sahifalab"""
+
+    def setUp(self):
+        cache.clear()
+        self.it = Department.objects.create(name="IT")
+        self.finance = Department.objects.create(name="Moliya")
+        self.admin, _ = onboard_user(10, 'ali', 'Ali', '')
+        self.other, _ = onboard_user(20, 'vali', 'Vali', '')
+        DepartmentAdmin.objects.create(telegram_user=self.admin, department=self.it)
+        start = timezone.now() + timedelta(days=1)
+        self.visible = [
+            self.meeting("Standup birinchi", self.it, self.other, start),
+            self.meeting("Standup ikkinchi", self.finance, self.admin, start + timedelta(hours=1)),
+            self.meeting("Standup uchinchi", self.it, self.other, start + timedelta(hours=2)),
+        ]
+        self.meeting("Standup begona", self.finance, self.other, start)
+        self.meeting("Standup bekor", self.it, self.other, start, status='cancelled')
+        self.meeting("Standup o'tgan", self.it, self.admin, start - timedelta(days=2), is_active=False)
+        self.bot = ZoomTelegramBot.__new__(ZoomTelegramBot)
+
+    def meeting(self, title, department, created_by, start_time, **kwargs):
+        return ZoomMeeting.objects.create(
+            title=title, department=department, created_by=created_by, start_time=start_time, duration=30, **kwargs
+        )
+
+    def find(self, query, offset=0, telegram_id=10):
+        meetings, has_more = async_to_sync(self.bot.find_inline_meetings)(telegram_id, query, offset)
+        return [meeting['title'] for meeting in meetings], has_more
+
+    def test_empty_query_pages_upcoming_meetings_in_scope(self):
+        self.assertEqual(self.find(''), (["Standup birinchi", "Standup ikkinchi"], True))
+        self.assertEqual(self.find('', offset=2), (["Standup uchinchi"], False))
+
+    def test_query_is_scoped_to_owner_and_departments(self):
+        titles = self.find('stand')[0] + self.find('stand', offset=2)[0] + self.find('stand', offset=4)[0]
+        self.assertEqual(sorted(titles), sorted(meeting.title for meeting in self.visible))
+        self.assertEqual(self.find('begona'), ([], False))
+        self.assertEqual(self.find('begona', telegram_id=20)[0], ["Standup begona"])
+
+    def test_unknown_user_gets_nothing(self):
+        self.assertEqual(self.find('', telegram_id=99), ([], False))
+
+    def test_results_are_cached_per_user_query_and_offset(self):
+        self.find('STANDUP  birinchi')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.find('standup birinchi')[0], ["Standup birinchi"])
+
+    def test_handler_answers_with_next_offset(self):
+        inline_query = SimpleNamespace(from_user=SimpleNamespace(id=10), query='', offset='', answer=AsyncMock())
+        async_to_sync(self.bot.inline_query)(SimpleNamespace(inline_query=inline_query), None)
+
+        results = inline_query.answer.await_args.args[0]
+        self.assertEqual([result.id for result in results], [str(meeting.id) for meeting in self.visible[:2]])
+        self.assertEqual(inline_query.answer.await_args.kwargs['next_offset'], '2')
+        self.assertTrue(inline_query.answer.await_args.kwargs['is_personal'])
+
+
+@override_settings(BOT_ADMIN_PAGE_SIZE=2)
+class AdminPanelTests(TestCase):
+    """Bot admin panellari: keshlangan agregatlar va keyset sahifalash"""
+
+    def setUp(self):
+        cache.clear()
+        self.users = [onboard_user(10 + index, f'user{index}', f'Ism{index}', '')[0] for index in range(5)]
+        self.admin = self.users[0]
+        TelegramUser.objects.filter(id=self.admin.id).update(is_admin=True)
+        self.it = Department.objects.create(name="IT")
+        for name in ("Moliya", "Kadrlar"):
+            Department.objects.create(name=name)
+        DepartmentAdmin.objects.create(telegram_user=self.users[1], department=self.it)
+        self.bot = ZoomTelegramBot.__new__(ZoomTelegramBot)
+
+    def ids(self, users):
+        return [user.id for user in users]
+
+    def test_users_page_keyset_in_both_directions(self):
+        ids = self.ids(self.users)
+        first, has_previous, has_next = aggregates.users_page()
+        self.assertEqual((self.ids(first), has_previous, has_next), (ids[:2], False, True))
+        middle, has_previous, has_next = aggregates.users_page(after_id=ids[1])
+        self.assertEqual((self.ids(middle), has_previous, has_next), (ids[2:4], True, True))
+        last, has_previous, has_next = aggregates.users_page(after_id=ids[3])
+        self.assertEqual((self.ids(last), has_previous, has_next), (ids[4:], True, False))
+
+        back, has_previous, has_next = aggregates.users_page(before_id=ids[4])
+        self.assertEqual((self.ids(back), has_previous, has_next), (ids[2:4], True, True))
+        back, has_previous, has_next = aggregates.users_page(before_id=ids[2])
+        self.assertEqual((self.ids(back), has_previous, has_next), (ids[:2], False, True))
+
+    def test_overview_is_cached(self):
+        admin_ids, overview = aggregates.get_panel_state()
+        self.assertEqual(admin_ids, {10})
+        self.assertEqual(overview['users'], {'total': 5, 'active': 5, 'admins': 1})
+        self.assertEqual(overview['memberships'], {'total': 1, 'users': 1})
+        self.assertEqual(
+            [(department['name'], department['members']) for department in overview['departments']],
+            [("IT", 1), ("Kadrlar", 0), ("Moliya", 0)],
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(aggregates.get_panel_state()[1], overview)
+
+    def press(self, data, telegram_id=10):
+        query = SimpleNamespace(data=data, edit_message_text=AsyncMock())
+        update = SimpleNamespace(callback_query=query, effective_user=SimpleNamespace(id=telegram_id))
+        async_to_sync(self.bot.admin_panel_callback)(update, None)
+        text = query.edit_message_text.await_args.args[0]
+        markup = query.edit_message_text.await_args.kwargs.get('reply_markup')
+        buttons = [button.callback_data for row in markup.inline_keyboard for button in row] if markup else []
+        return text, buttons
+
+    def test_users_panel_navigation(self):
+        text, buttons = self.press('admin_users')
+        self.assertIn("Jami: 5 | Faol: 5 | Adminlar: 1", text)
+        self.assertIn("Ism0", text)
+        self.assertEqual(buttons, [f'admin_users:n.{self.users[1].id}', 'admin_menu'])
+
+        text, buttons = self.press(buttons[0])
+        self.assertIn("Ism2", text)
+        self.assertNotIn("Ism1", text)
+        self.assertEqual(buttons, [
+            f'admin_users:p.{self.users[2].id}', f'admin_users:n.{self.users[3].id}', 'admin_menu',
+        ])
+
+        text, buttons = self.press(buttons[0])
+        self.assertIn("Ism1", text)
+        self.assertEqual(buttons[0], f'admin_users:n.{self.users[1].id}')
+
+    def test_departments_panel_pages_are_clamped(self):
+        text, buttons = self.press('admin_departments')
+        self.assertIn("Bo'limlar** (3 ta)", text)
+        self.assertEqual(buttons, ['admin_departments:1', 'admin_menu'])
+        text, buttons = self.press('admin_departments:7')
+        self.assertIn("Moliya", text)
+        self.assertNotIn("IT", text)
+        self.assertEqual(buttons, ['admin_departments:0', 'admin_menu'])
+
+    def test_non_admin_is_refused(self):
+        text, buttons = self.press('admin_users', telegram_id=11)
+        self.assertIn("Siz admin emassiz", text)
+        self.assertEqual(buttons, [])
+
+
+class ReviewQueueTests(TestCase):
+    """Kutilayotgan so'rovlar navbati: kursorlar va 4096 belgilik chegara"""
+
+    def setUp(self):
+        self.requester = onboard_user(20, 'requester', 'Ali', 'Valiyev')[0]
+        self.admin = onboard_user(21, 'boss', 'Admin', '')[0]
+        TelegramUser.objects.filter(id=self.admin.id).update(is_admin=True)
+        self.department = Department.objects.create(name="IT")
+        self.bot = ZoomTelegramBot.__new__(ZoomTelegramBot)
+        self.bot.application = SimpleNamespace(create_task=lambda coroutine: coroutine.close())
+
+    def create_requests(self, count, title="So'rov"):
+        created_at = timezone.now() - timedelta(days=1)
+        requests = []
+        for index in range(count):
+            request = BookingRequest.objects.create(
+                department=self.department, requested_by=self.requester, title=f"{title} {index}",
+                preferred_start_time=created_at + timedelta(days=2), duration=60,
+            )
+            # Yangilari birinchi: index qancha katta bo'lsa, shuncha yangi
+            BookingRequest.objects.filter(id=request.id).update(created_at=created_at + timedelta(minutes=index))
+            requests.append(request)
+        cache.clear()
+        return requests[::-1]
+
+    def ids(self, page):
+        return [row['id'] for row in page['rows']]
+
+    def test_cursor_round_trip(self):
+        created_at = timezone.now()
+        request_id = uuid.uuid4()
+        cursor = review_queue.encode_cursor(created_at, request_id)
+        self.assertLessEqual(len(f"admin_requests:n.{cursor}".encode()), 64)
+        self.assertEqual(review_queue.decode_cursor(cursor), (created_at, request_id))
+        self.assertIsNone(review_queue.decode_cursor('buzilgan'))
+
+    def test_pages_in_both_directions(self):
+        requests = self.create_requests(5)
+        ids = [request.id for request in requests]
+        # Bir xil vaqtdagi so'rovlar id bo'yicha ajratiladi
+        tie = BookingRequest.objects.get(id=ids[2]).created_at
+        BookingRequest.objects.filter(id=ids[1]).update(created_at=tie)
+        ids[1:3] = sorted(ids[1:3], reverse=True)
+
+        def cursor(page, index):
+            row = page['rows'][index]
+            return review_queue.encode_cursor(row['created_at'], row['id'])
+
+        first = review_queue.fetch_page(page_size=2)
+        self.assertEqual((self.ids(first), first['has_previous'], first['has_next']), (ids[:2], False, True))
+        middle = review_queue.fetch_page(review_queue.FORWARD, cursor(first, -1), page_size=2)
+        self.assertEqual((self.ids(middle), middle['has_previous'], middle['has_next']), (ids[2:4], True, True))
+        last = review_queue.fetch_page(review_queue.FORWARD, cursor(middle, -1), page_size=2)
+        self.assertEqual((self.ids(last), last['has_previous'], last['has_next']), (ids[4:], True, False))
+
+        back = review_queue.fetch_page(review_queue.BACKWARD, cursor(last, 0), page_size=2)
+        self.assertEqual((self.ids(back), back['has_previous'], back['has_next']), (ids[2:4], True, True))
+        back = review_queue.fetch_page(review_queue.BACKWARD, cursor(back, 0), page_size=2)
+        self.assertEqual((self.ids(back), back['has_previous'], back['has_next']), (ids[:2], False, True))
+
+    def test_cached_page_is_invalidated_on_status_change(self):
+        requests = self.create_requests(3)
+        self.assertEqual(len(review_queue.get_page()['rows']), 3)
+        with self.assertNumQueries(0):
+            review_queue.get_page()
+        requests[0].status = 'approved'
+        requests[0].save()
+        self.assertEqual(self.ids(review_queue.get_page()), [request.id for request in requests[1:]])
+
+    def press(self, data):
+        query = SimpleNamespace(data=data, edit_message_text=AsyncMock())
+        update = SimpleNamespace(callback_query=query, effective_user=SimpleNamespace(id=21))
+        async_to_sync(self.bot.admin_panel_callback)(update, None)
+        text = query.edit_message_text.await_args.args[0]
+        markup = query.edit_message_text.await_args.kwargs['reply_markup']
+        return text, [button.callback_data for row in markup.inline_keyboard for button in row]
+
+    @override_settings(BOT_ADMIN_PAGE_SIZE=40)
+    def test_long_page_is_trimmed_and_resumed(self):
+        requests = self.create_requests(40, title='x' * 120)
+        text, buttons = self.press('admin_requests')
+        approved = [data.removeprefix('approve_req_') for data in buttons if data.startswith('approve_req_')]
+        self.assertLessEqual(len(text), 4096)
+        self.assertLess(len(approved), 40)
+        self.assertEqual(approved, [str(request.id) for request in requests[:len(approved)]])
+
+        # Keyingi sahifa qisqartirilgan joydan davom etadi
+        next_page = [data for data in buttons if data.startswith('admin_requests:n.')]
+        self.assertEqual(len(next_page), 1)
+        text, buttons = self.press(next_page[0])
+        self.assertIn(f"approve_req_{requests[len(approved)].id}", buttons)
+        self.assertTrue(any(data.startswith('admin_requests:p.') for data in buttons))
+
+
+@override_settings(
+    BOT_USER_RATE=1, BOT_USER_BURST=5, BOT_CHAT_RATE=3, BOT_CHAT_BURST=20,
+    BOT_INLINE_RATE=3, BOT_INLINE_BURST=20, BOT_RATE_LIMIT_LOG_INTERVAL=60,
+)
+class FloodControlTests(SimpleTestCase):
+    """Xotiradagi token bucket va FloodControl"""
+
+    def setUp(self):
+        self.now = 1000.0
+        self.enterContext(patch.object(flood.time, 'monotonic', lambda: self.now))
+        self.buckets = flood.MemoryTokenBuckets()
+        self.control = flood.FloodControl(self.buckets)
+
+    def update(self, user_id=1, chat_id=None, inline=False, chosen=False):
+        user = SimpleNamespace(id=user_id)
+        return SimpleNamespace(
+            effective_user=user,
+            effective_chat=None if inline or chosen else SimpleNamespace(id=chat_id or user_id),
+            effective_message=None if inline or chosen else SimpleNamespace(reply_text=AsyncMock()),
+            callback_query=None,
+            inline_query=SimpleNamespace(answer=AsyncMock()) if inline else None,
+            chosen_inline_result=SimpleNamespace() if chosen else None,
+        )
+
+    def passes(self, update):
+        try:
+            async_to_sync(self.control)(update, None)
+        except ApplicationHandlerStop:
+            return False
+        return True
+
+    def take(self, key='u:1', rate=1, burst=5):
+        return async_to_sync(self.buckets.take)([(key, rate, burst)])
+
+    def test_burst_then_throttle_with_retry_after(self):
+        self.assertEqual([self.take()[0] for _ in range(5)], [True] * 5)
+        self.assertEqual(self.take(), (False, 1.0))
+        self.now += 0.5
+        allowed, retry_after = self.take()
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(retry_after, 0.5)
+        self.now += 0.5
+        self.assertTrue(self.take()[0])
+
+    def test_all_buckets_must_have_tokens(self):
+        limits = [('u:1', 1, 5), ('c:-100', 1, 1)]
+        self.assertTrue(async_to_sync(self.buckets.take)(limits)[0])
+        self.assertFalse(async_to_sync(self.buckets.take)(limits)[0])
+        # Rad etilgan urinish foydalanuvchi chelagidan token olmaydi
+        self.assertEqual([self.take()[0] for _ in range(4)], [True] * 4)
+
+    def test_throttled_user_is_warned_once(self):
+        updates = [self.update() for _ in range(8)]
+        self.assertEqual([self.passes(update) for update in updates], [True] * 5 + [False] * 3)
+        warned = [update for update in updates if update.effective_message.reply_text.await_count]
+        self.assertEqual(warned, [updates[5]])
+        self.assertIn("1 soniyadan keyin", updates[5].effective_message.reply_text.await_args.args[0])
+        self.assertEqual(self.control.dropped['u:1'], 3)
+
+        # Chelak to'lgach yana ogohlantiriladi
+        self.now += 10
+        self.assertEqual([self.passes(self.update()) for _ in range(5)], [True] * 5)
+        again = self.update()
+        self.assertFalse(self.passes(again))
+        again.effective_message.reply_text.assert_awaited_once()
+
+    def test_inline_queries_use_own_bucket(self):
+        for _ in range(5):
+            self.assertTrue(self.passes(self.update()))
+        self.assertFalse(self.passes(self.update()))
+
+        queries = [self.update(inline=True) for _ in range(21)]
+        self.assertEqual([self.passes(query) for query in queries], [True] * 20 + [False])
+        button = queries[-1].inline_query.answer.await_args.kwargs['button']
+        self.assertIn("Juda ko'p", button.text)
+        self.assertTrue(self.passes(self.update(chosen=True)))
+
+    def test_limiter_failure_lets_updates_through(self):
+        self.control.buckets = SimpleNamespace(take=AsyncMock(side_effect=ConnectionError))
+        with self.assertLogs(flood.logger, 'ERROR'):
+            self.assertTrue(self.passes(self.update()))
+
+    def test_refilled_buckets_are_evicted(self):
+        for user_id in range(3):
+            self.take(f'u:{user_id}')
+        self.assertEqual(len(self.buckets._buckets), 3)
+        self.now += 0.5
+        self.take('u:3')
+        self.assertEqual(len(self.buckets._buckets), 4)
+        # 1 soniyada bitta token qaytadi: eski chelaklar to'ldi
+        self.now += 1
+        self.take('u:3')
+        self.assertEqual(list(self.buckets._buckets), ['u:3'])
+
+        async_to_sync(self.buckets.first_warning)('u:3', 2)
+        self.now += 3
+        async_to_sync(self.buckets.first_warning)('u:4', 2)
+        self.assertEqual(list(self.buckets._warned), ['u:4'])
+
+    def test_max_keys_bounds_memory(self):
+        self.buckets.max_keys = 2
+        for user_id in range(5):
+            self.take(f'u:{user_id}')
+        self.assertEqual(list(self.buckets._buckets), ['u:3', 'u:4'])
@@ -0,0 +1,200 @@
+"""
+O'qish replikasiga yo'naltirish.
+
+Faqat o'qiydigan sahifalar (dashboard, ro'yxatlar, statistika, eksport,
+analitika) @replica_reads bilan belgilanadi va ularning SELECT lari
+DATABASE_REPLICA aliasiga ketadi. Qolgan hamma narsa (bot, Celery,
+yozuvlar, tranzaksiya ichidagi o'qishlar) asosiy bazada qoladi.
+
+Yozishdan keyin o'qish: so'rov davomida yozuv bo'lsa, foydalanuvchiga
+REPLICA_STICKY_SECONDS ga cookie qo'yiladi va shu vaqt ichida uning barcha
+so'rovlari asosiy bazadan o'qiladi (replika kechikishini yashirish uchun).
+
+Oqimli javoblar (eksport, .ics) tanasi view qaytgandan keyin o'qiladi,
+shuning uchun streaming_content ham view ning o'qish aliasi bilan o'raladi.
+
+Mahalliy sinov: DATABASE_REPLICA_NAME=db_replica.sqlite3 va
+"manage.py migrate --database replica" (ikkinchi SQLite fayli).
+"""
+import contextvars
+import functools
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.http import FileResponse
+
+STICKY_COOKIE = 'db_primary_until'
+
+_reads = contextvars.ContextVar('zoomga_db_reads', default=None)
+_wrote = contextvars.ContextVar('zoomga_db_wrote', default=None)
+
+
+def replica_configured():
+    return settings.DATABASE_REPLICA in settings.DATABASES
+
+
+@contextmanager
+def read_replica():
+    """Blok ichidagi o'qishlarni replikaga yo'naltirish (analitika, eksport, fon vazifalari)"""
+    token = _reads.set('replica')
+    try:
+        yield
+    finally:
+        _reads.reset(token)
+
+
+@contextmanager
+def read_primary():
+    token = _reads.set('primary')
+    try:
+        yield
+    finally:
+        _reads.reset(token)
+
+
+def _mark(view_func, alias):
+    view_func.db_reads = alias
+    return view_func
+
+
+def replica_reads(view_func):
+    """View o'qishlari replikadan (faqat GET/HEAD so'rovlarida)"""
+    return _mark(view_func, 'replica')
+
+
+def primary_reads(view_func):
+    """View o'qishlari doim asosiy bazadan"""
+    return _mark(view_func, 'primary')
+
+
+def replica_task(func):
+    """Fon vazifasi (Celery) o'qishlari replikadan"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with read_replica():
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def _iter_with_reads(content, alias):
+    iterator = iter(content)
+    while True:
+        token = _reads.set(alias)
+        try:
+            chunk = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            _reads.reset(token)
+        yield chunk
+
+
+async def _aiter_with_reads(content, alias):
+    iterator = aiter(content)
+    while True:
+        token = _reads.set(alias)
+        try:
+            chunk = await anext(iterator)
+        except StopAsyncIteration:
+            return
+        finally:
+            _reads.reset(token)
+        yield chunk
+
+
+def keep_reads(response, alias):
+    """Oqimli javob tanasi o'qilayotganda ham view ning o'qish aliasi amal qilsin"""
+    if alias == 'replica' and response.streaming and not isinstance(response, FileResponse):
+        wrap = _aiter_with_reads if response.is_async else _iter_with_reads
+        response.streaming_content = wrap(response.streaming_content, alias)
+    return response
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _reads.get() != 'replica' or not replica_configured():
+            return None
+        # Tranzaksiya ichida o'z yozuvlarimizni ko'rishimiz kerak
+        if connections['default'].in_atomic_block:
+            return None
+        return settings.DATABASE_REPLICA
+
+    def db_for_write(self, model, **hints):
+        wrote = _wrote.get()
+        if wrote is not None:
+            wrote.append(True)
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+
+class ReplicaRoutingMiddleware:
+    """@replica_reads view lar uchun replikani yoqish va yozuvdan keyin asosiy bazaga yopishtirish"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            # ASGI: process_view ham async bo'lsa Django uni thread ga o'tkazmaydi
+            self.process_view = self.aprocess_view
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        reads_token = _reads.set('primary')
+        wrote = []
+        wrote_token = _wrote.set(wrote)
+        try:
+            response = self.get_response(request)
+            reads = _reads.get()
+        finally:
+            _reads.reset(reads_token)
+            _wrote.reset(wrote_token)
+        return self.stick_to_primary(keep_reads(response, reads), wrote)
+
+    async def __acall__(self, request):
+        reads_token = _reads.set('primary')
+        wrote = []
+        wrote_token = _wrote.set(wrote)
+        try:
+            response = await self.get_response(request)
+            reads = _reads.get()
+        finally:
+            _reads.reset(reads_token)
+            _wrote.reset(wrote_token)
+        return self.stick_to_primary(keep_reads(response, reads), wrote)
+
+    def stick_to_primary(self, response, wrote):
+        if wrote and replica_configured():
+            response.set_cookie(
+                STICKY_COOKIE, str(int(time.time()) + settings.REPLICA_STICKY_SECONDS),
+                max_age=settings.REPLICA_STICKY_SECONDS, httponly=True, samesite='Lax',
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        _reads.set(self.reads_for(request, view_func))
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        _reads.set(self.reads_for(request, view_func))
+
+    def reads_for(self, request, view_func):
+        if request.method not in ('GET', 'HEAD'):
+            return 'primary'
+        if request.resolver_match.view_name in settings.REPLICA_FORCE_PRIMARY_VIEWS:
+            return 'primary'
+        if getattr(view_func, 'db_reads', 'primary') != 'replica':
+            return 'primary'
+        try:
+            sticky_until = int(request.COOKIES.get(STICKY_COOKIE, 0))
+        except ValueError:
+            sticky_until = 0
+        return 'primary' if sticky_until > time.time() else 'replica'
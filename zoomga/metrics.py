@@ -0,0 +1,248 @@
+"""
+Ishlash ko'rsatkichlari (Prometheus).
+
+Har bir view va bot handleri uchun umumiy vaqt, DB so'rovlari soni va
+vaqti, sync_to_async o'tishlari soni, shuningdek tashqi API (Telegram,
+Zoom) kechikishlari yig'iladi.
+
+METRICS_ENABLED=False bo'lsa middleware o'chadi, handlerlar o'ralmaydi va
+DB ga hech qanday wrapper o'rnatilmaydi.
+
+Web (gunicorn, bir nechta worker): PROMETHEUS_MULTIPROC_DIR o'rnatilsa
+/metrics barcha workerlar ko'rsatkichlarini birlashtiradi.
+/metrics uchun "Authorization: Bearer <METRICS_TOKEN>" yoki staff sessiyasi kerak.
+Bot jarayoni: ko'rsatkichlar METRICS_BOT_ADDR:METRICS_BOT_PORT da beriladi
+(autentifikatsiyasiz, shuning uchun standart bo'yicha faqat localhost).
+"""
+import contextvars
+import functools
+import os
+import re
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async as asgiref_sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import Http404, HttpResponse
+from django.utils.crypto import constant_time_compare
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram,
+    generate_latest, multiprocess, start_http_server,
+)
+from telegram.request import HTTPXRequest
+
+INF = float('inf')
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, INF)
+
+HANDLER_SECONDS = Histogram(
+    'zoomga_handler_seconds', 'Handler wall time', ['kind', 'handler'],
+)
+HANDLER_ERRORS = Counter(
+    'zoomga_handler_errors_total', 'Handlers that raised an exception', ['kind', 'handler'],
+)
+HANDLER_DB_QUERIES = Histogram(
+    'zoomga_handler_db_queries', 'DB queries per handler call', ['kind', 'handler'], buckets=COUNT_BUCKETS,
+)
+HANDLER_DB_SECONDS = Histogram(
+    'zoomga_handler_db_seconds', 'DB time per handler call', ['kind', 'handler'],
+)
+HANDLER_SYNC_HOPS = Histogram(
+    'zoomga_handler_sync_hops', 'sync_to_async hops per handler call', ['kind', 'handler'], buckets=COUNT_BUCKETS,
+)
+EXTERNAL_SECONDS = Histogram(
+    'zoomga_external_api_seconds', 'Outbound API call latency', ['service', 'operation'],
+)
+EXTERNAL_ERRORS = Counter(
+    'zoomga_external_api_errors_total', 'Outbound API calls that failed', ['service', 'operation'],
+)
+UPDATES_DROPPED = Counter(
+    'zoomga_bot_updates_dropped_total', 'Bot updates dropped by flood control',
+)
+
+_current = contextvars.ContextVar('zoomga_metrics_measurement', default=None)
+_CALLBACK_ID_RE = re.compile(r'_(?:\d+|[0-9a-f]{8}-[0-9a-f-]{27})$')
+
+
+def enabled():
+    return settings.METRICS_ENABLED
+
+
+class Measurement:
+    __slots__ = ('kind', 'handler', 'db_queries', 'db_seconds', 'sync_hops')
+
+    def __init__(self, kind, handler):
+        self.kind = kind
+        self.handler = handler
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.sync_hops = 0
+
+
+@contextmanager
+def measure(kind, handler):
+    """Blok ichidagi vaqt, DB so'rovlari va sync_to_async o'tishlarini yozish"""
+    measurement = Measurement(kind, handler)
+    token = _current.set(measurement)
+    started = time.perf_counter()
+    try:
+        yield measurement
+    except Exception:
+        HANDLER_ERRORS.labels(kind, measurement.handler).inc()
+        raise
+    finally:
+        _current.reset(token)
+        labels = (kind, measurement.handler)
+        HANDLER_SECONDS.labels(*labels).observe(time.perf_counter() - started)
+        HANDLER_DB_QUERIES.labels(*labels).observe(measurement.db_queries)
+        HANDLER_DB_SECONDS.labels(*labels).observe(measurement.db_seconds)
+        HANDLER_SYNC_HOPS.labels(*labels).observe(measurement.sync_hops)
+
+
+@contextmanager
+def observe_external(service, operation):
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        EXTERNAL_ERRORS.labels(service, operation).inc()
+        raise
+    finally:
+        EXTERNAL_SECONDS.labels(service, operation).observe(time.perf_counter() - started)
+
+
+def _db_wrapper(execute, sql, params, many, context):
+    measurement = _current.get()
+    if measurement is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        measurement.db_queries += 1
+        measurement.db_seconds += time.perf_counter() - started
+
+
+def _install_db_wrapper(sender, connection, **kwargs):
+    if _db_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_db_wrapper)
+
+
+def install():
+    """DB wrapperini barcha (hozirgi va keyingi) ulanishlarga o'rnatish"""
+    if not enabled():
+        return
+    connection_created.connect(_install_db_wrapper, dispatch_uid='zoomga.metrics')
+    for connection in connections.all(initialized_only=True):
+        _install_db_wrapper(None, connection)
+
+
+def sync_to_async(func=None, *, thread_sensitive=True, executor=None):
+    """asgiref.sync_to_async, joriy handler uchun o'tishlar soni bilan"""
+    if func is None:
+        return lambda func: sync_to_async(func, thread_sensitive=thread_sensitive, executor=executor)
+    wrapped = asgiref_sync_to_async(func, thread_sensitive=thread_sensitive, executor=executor)
+    if not enabled():
+        return wrapped
+
+    @functools.wraps(func)
+    async def counted(*args, **kwargs):
+        measurement = _current.get()
+        if measurement is not None:
+            measurement.sync_hops += 1
+        return await wrapped(*args, **kwargs)
+
+    return counted
+
+
+def callback_label(update):
+    """'approve_req_<uuid>', 'admin_requests:n.<cursor>' -> 'approve_req', 'admin_requests'"""
+    data = (update.callback_query.data or '') if update.callback_query else ''
+    return 'callback:' + (_CALLBACK_ID_RE.sub('', data.split(':', 1)[0]) or 'unknown')
+
+
+def instrument_handler(handler, name):
+    """Bot handlerini o'rash; name - satr yoki update -> satr funksiyasi"""
+    if not enabled():
+        return handler
+
+    @functools.wraps(handler)
+    async def wrapper(update, context):
+        with measure('bot', name(update) if callable(name) else name):
+            return await handler(update, context)
+
+    return wrapper
+
+
+class InstrumentedHTTPXRequest(HTTPXRequest):
+    """Bot API chaqiruvlari kechikishini yozadigan HTTPXRequest"""
+
+    async def do_request(self, url, method, *args, **kwargs):
+        with observe_external('telegram', url.rsplit('/', 1)[-1]):
+            return await super().do_request(url, method, *args, **kwargs)
+
+
+def telegram_request(connection_pool_size=256):
+    """Bot uchun so'rov obyekti; ko'rsatkichlar o'chiq bo'lsa None (PTB standarti)"""
+    if not enabled():
+        return None
+    return InstrumentedHTTPXRequest(connection_pool_size=connection_pool_size)
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not enabled():
+            raise MiddlewareNotUsed
+        install()
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with measure('view', 'unresolved') as measurement:
+            response = self.get_response(request)
+            if request.resolver_match is not None:
+                measurement.handler = request.resolver_match.view_name
+        return response
+
+    async def __acall__(self, request):
+        with measure('view', 'unresolved') as measurement:
+            response = await self.get_response(request)
+            if request.resolver_match is not None:
+                measurement.handler = request.resolver_match.view_name
+        return response
+
+
+def _registry():
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def metrics_view(request):
+    """Prometheus formatidagi ko'rsatkichlar"""
+    if not enabled():
+        raise Http404
+    # Token berilmagan bo'lsa faqat staff sessiyasi bilan
+    token_ok = bool(settings.METRICS_TOKEN) and constant_time_compare(
+        request.headers.get('Authorization', ''), f'Bearer {settings.METRICS_TOKEN}'
+    )
+    if not token_ok and not request.user.is_staff:
+        return HttpResponse(status=401)
+    return HttpResponse(generate_latest(_registry()), content_type=CONTENT_TYPE_LATEST)
+
+
+def start_metrics_server(port=None):
+    """Web serveri bo'lmagan jarayonlar (bot) uchun alohida HTTP endpoint"""
+    if enabled():
+        install()
+        start_http_server(port or settings.METRICS_BOT_PORT, addr=settings.METRICS_BOT_ADDR)
@@ -0,0 +1,251 @@
+"""
+So'rov bo'yicha profil olish va sekin SQL so'rovlari jurnali.
+
+Profil: namuna oluvchi (sampling) profiler + barcha SQL so'rovlari (vaqt va
+chaqirilgan joy bilan). Natijalar PROFILE_ROOT katalogiga yoziladi:
+  <nom>.folded   - flamegraph.pl / speedscope / inferno uchun "collapsed stacks"
+  <nom>.sql.json - SQL so'rovlari ro'yxati
+
+Web: staff foydalanuvchi booking sahifasiga ?_profile=1 yoki
+"X-Profile: 1" sarlavhasi bilan murojaat qiladi.
+Bot: PROFILE_BOT_USERS ro'yxatidagi foydalanuvchilarning har bir update i.
+
+Sekin so'rovlar jurnali doimo yoqilgan (SLOW_QUERY_THRESHOLD_MS=0 o'chiradi).
+"""
+import contextvars
+import functools
+import json
+import logging
+import re
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from pathlib import Path
+
+from asgiref.sync import async_to_sync, iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.utils import timezone
+
+slow_query_logger = logging.getLogger('zoomga.slow_queries')
+logger = logging.getLogger(__name__)
+
+_active = contextvars.ContextVar('zoomga_active_profile', default=None)
+_LABEL_RE = re.compile(r'[^A-Za-z0-9_.-]+')
+_LIBRARY_MARKERS = ('site-packages', 'dist-packages')
+# DB wrapperlari joylashgan fayllar SQL manbasi sifatida ko'rsatilmaydi
+_WRAPPER_FILES = {__file__, str(Path(__file__).with_name('metrics.py'))}
+
+
+def _short_path(filename):
+    base_dir = str(settings.BASE_DIR)
+    if filename.startswith(base_dir):
+        return filename[len(base_dir) + 1:]
+    for marker in ('site-packages/', 'dist-packages/'):
+        if marker in filename:
+            return filename.split(marker, 1)[1]
+    if '/lib/python' in filename:
+        return filename.split('/lib/python', 1)[1].partition('/')[2]
+    return filename
+
+
+def _is_project_frame(filename):
+    return filename.startswith(str(settings.BASE_DIR)) and not any(marker in filename for marker in _LIBRARY_MARKERS)
+
+
+def query_origin(limit=5):
+    """SQL ni chaqirgan loyiha kodi (ichkaridan tashqariga, 'fayl:qator funksiya')"""
+    frames = [
+        f"{_short_path(frame.filename)}:{frame.lineno} {frame.name}"
+        for frame in traceback.extract_stack()
+        if _is_project_frame(frame.filename) and frame.filename not in _WRAPPER_FILES
+    ]
+    return frames[::-1][:limit]
+
+
+class Sampler(threading.Thread):
+    """Barcha oqimlarning steklarini intervalda yig'adi"""
+
+    def __init__(self, interval):
+        super().__init__(name='zoomga-profiler', daemon=True)
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stopped = threading.Event()
+
+    def run(self):
+        own_ident = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(thread_names.get(ident, str(ident)))
+                self.stacks[';'.join(reversed(stack)).replace(' ', '_')] += 1
+            self.samples += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+class Profile:
+    """Kontekst menejer: blok davomida profil olish va natijani faylga yozish"""
+
+    def __init__(self, label):
+        self.label = _LABEL_RE.sub('_', label).strip('_')[:80] or 'profile'
+        self.name = f"{timezone.now():%Y%m%d-%H%M%S-%f}_{self.label}"
+        self.queries = []
+        self.sampler = Sampler(settings.PROFILE_SAMPLE_INTERVAL_MS / 1000)
+        self.duration = 0.0
+
+    def __enter__(self):
+        self._token = _active.set(self)
+        self._started = time.perf_counter()
+        self.sampler.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.duration = time.perf_counter() - self._started
+        self.sampler.stop()
+        _active.reset(self._token)
+        try:
+            self.write()
+        except OSError:
+            logger.exception("Profilni yozib bo'lmadi: %s", self.name)
+        return False
+
+    def add_query(self, sql, params, many, duration):
+        self.queries.append({
+            'sql': sql,
+            'params': None if many else [repr(param) for param in params or ()],
+            'many': many,
+            'ms': round(duration * 1000, 3),
+            'origin': query_origin(),
+        })
+
+    def write(self):
+        root = settings.PROFILE_ROOT
+        root.mkdir(parents=True, exist_ok=True)
+        with open(root / f'{self.name}.folded', 'w') as handle:
+            for stack, count in self.sampler.stacks.most_common():
+                handle.write(f'{stack} {count}\n')
+        with open(root / f'{self.name}.sql.json', 'w') as handle:
+            json.dump({
+                'label': self.label,
+                'duration_ms': round(self.duration * 1000, 3),
+                'samples': self.sampler.samples,
+                'query_count': len(self.queries),
+                'query_ms': round(sum(query['ms'] for query in self.queries), 3),
+                'queries': self.queries,
+            }, handle, indent=2)
+
+
+def _db_wrapper(execute, sql, params, many, context):
+    profile = _active.get()
+    threshold = settings.SLOW_QUERY_THRESHOLD_MS
+    if profile is None and not threshold:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        if profile is not None:
+            profile.add_query(sql, params, many, duration)
+        if threshold and duration * 1000 >= threshold:
+            origin = query_origin(limit=1)
+            slow_query_logger.warning(
+                "Sekin so'rov (%.1f ms, %s) %s: %s",
+                duration * 1000,
+                context['connection'].alias,
+                origin[0] if origin else '?',
+                sql[:2000],
+            )
+
+
+def _install_db_wrapper(sender, connection, **kwargs):
+    if _db_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_db_wrapper)
+
+
+def install():
+    """Sekin so'rovlar jurnali va profil uchun DB wrapperini o'rnatish"""
+    connection_created.connect(_install_db_wrapper, dispatch_uid='zoomga.profiling')
+    for connection in connections.all(initialized_only=True):
+        _install_db_wrapper(None, connection)
+
+
+def profile_flagged(request):
+    return bool(request.GET.get('_profile') or request.headers.get('X-Profile'))
+
+
+def profile_requested(request):
+    if not profile_flagged(request):
+        return False
+    return request.user.is_authenticated and request.user.is_staff
+
+
+class ProfilingMiddleware:
+    """booking view larini so'rov bo'yicha profillash (MIDDLEWARE ro'yxatida oxirgi bo'lishi kerak)"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            self.process_view = self.aprocess_view
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.resolver_match.app_name != 'booking' or not profile_requested(request):
+            return None
+        if iscoroutinefunction(view_func):
+            view_func = async_to_sync(view_func)
+        with Profile(request.resolver_match.view_name) as profile:
+            response = view_func(request, *view_args, **view_kwargs)
+        response['X-Profile-Id'] = profile.name
+        return response
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        # Bayroqsiz so'rovlarda request.user uchun thread ga o'tilmaydi
+        if request.resolver_match.app_name != 'booking' or not profile_flagged(request):
+            return None
+        if not await sync_to_async(profile_requested)(request):
+            return None
+        if not iscoroutinefunction(view_func):
+            view_func = sync_to_async(view_func)
+        with Profile(request.resolver_match.view_name) as profile:
+            response = await view_func(request, *view_args, **view_kwargs)
+        response['X-Profile-Id'] = profile.name
+        return response
+
+
+def profile_handler(handler, name):
+    """Bot handleri: PROFILE_BOT_USERS dagi foydalanuvchilar update larini profillash"""
+    if not settings.PROFILE_BOT_USERS:
+        return handler
+
+    @functools.wraps(handler)
+    async def wrapper(update, context):
+        user = update.effective_user
+        if user is None or user.id not in settings.PROFILE_BOT_USERS:
+            return await handler(update, context)
+        label = name(update) if callable(name) else name
+        with Profile(f"bot_{label}_{user.id}"):
+            return await handler(update, context)
+
+    return wrapper
@@ -48,13 +48,17 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'zoomga.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'zoomga.staticfiles.StaticFilesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'zoomga.db_router.ReplicaRoutingMiddleware',
+    'zoomga.profiling.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'zoomga.urls'
@@ -87,6 +91,21 @@ DATABASES = {
     }
 }
 
+# O'qish replikasi (zoomga.db_router): hisobot va ro'yxat sahifalari uchun
+DATABASE_REPLICA = 'replica'
+DATABASE_REPLICA_NAME = os.getenv('DATABASE_REPLICA_NAME')
+if DATABASE_REPLICA_NAME:
+    DATABASES[DATABASE_REPLICA] = {
+        **DATABASES['default'],
+        'NAME': DATABASE_REPLICA_NAME,
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['zoomga.db_router.ReplicaRouter']
+# Yozuvdan keyin shu muddat davomida foydalanuvchi asosiy bazadan o'qiydi
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', '10'))
+# Replikadan o'qimaydigan view lar (masalan: booking:dashboard,booking:api_meeting_stats)
+REPLICA_FORCE_PRIMARY_VIEWS = [name for name in os.getenv('REPLICA_FORCE_PRIMARY_VIEWS', '').split(',') if name]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -124,10 +143,17 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/6.0/howto/static-files/
 STATIC_URL = 'static/'
-STATIC_ROOT = BASE_DIR / 'staticfiles'
-
-# Custom CSS
-STATICFILES_DIRS = [BASE_DIR / 'static', BASE_DIR / 'static/css']
+# Docker da loyiha katalogi (.:/app) mount qilinadi, collectstatic natijasi uning tashqarisida
+STATIC_ROOT = Path(os.getenv('STATIC_ROOT', BASE_DIR / 'staticfiles'))
+STATICFILES_DIRS = [BASE_DIR / 'static']
+
+# collectstatic: hashli nomlar + .gz/.br nusxalar; zoomga.staticfiles.StaticFilesMiddleware beradi
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'zoomga.staticfiles.CompressedManifestStaticFilesStorage'},
+}
+# Hashsiz fayllar (masalan, to'g'ridan-to'g'ri havola qilingan) uchun kesh muddati
+STATIC_MAX_AGE = int(os.getenv('STATIC_MAX_AGE', '60'))
 
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
@@ -140,6 +166,40 @@ ADMIN_TELEGRAM_ID = os.getenv('ADMIN_TELEGRAM_ID')
 ZOOM_API_KEY = os.getenv('ZOOM_API_KEY')
 ZOOM_API_SECRET = os.getenv('ZOOM_API_SECRET')
 ZOOM_WEBHOOK_SECRET = os.getenv('ZOOM_WEBHOOK_SECRET')
+ZOOM_ACCOUNT_ID = os.getenv('ZOOM_ACCOUNT_ID')
+ZOOM_USER_ID = os.getenv('ZOOM_USER_ID', 'me')
+# Bo'sh bo'lsa zoomus standarti (https://api.zoom.us/v2); testlar soxta API ga yo'naltiradi
+ZOOM_API_BASE_URL = os.getenv('ZOOM_API_BASE_URL') or None
+ZOOM_OAUTH_URL = os.getenv('ZOOM_OAUTH_URL', 'https://zoom.us/oauth/token')
+# Uchrashuv egalari (vergul bilan); zaxira har biri uchun alohida
+ZOOM_HOST_USER_IDS = [host.strip() for host in os.getenv('ZOOM_HOST_USER_IDS', ZOOM_USER_ID).split(',') if host.strip()]
+# Zoom API chaqiruvlari (zaxirani to'ldirish, qatnashuv hisobotlari) uchun so'rov/soniya
+ZOOM_API_RATE_LIMIT = float(os.getenv('ZOOM_API_RATE_LIMIT', '2'))
+
+# Zoom warm pool (booking.warm_pool): har bir host uchun zaxira hajmi, 0 - o'chiq
+ZOOM_WARM_POOL_SIZE = int(os.getenv('ZOOM_WARM_POOL_SIZE', '0'))
+# Ish vaqtida zaxira faqat shu songacha to'ldiriladi
+ZOOM_WARM_POOL_MIN = int(os.getenv('ZOOM_WARM_POOL_MIN', '2'))
+# To'liq to'ldirish soatlari (mahalliy vaqt, "boshlanish-tugash")
+ZOOM_WARM_POOL_OFFPEAK_HOURS = tuple(int(hour) for hour in os.getenv('ZOOM_WARM_POOL_OFFPEAK_HOURS', '20-7').split('-'))
+ZOOM_WARM_POOL_MAX_AGE_DAYS = int(os.getenv('ZOOM_WARM_POOL_MAX_AGE_DAYS', '14'))
+
+# Qatnashuv (booking.attendance): hisobot uchrashuv tugaganidan shuncha daqiqa keyin olinadi
+ATTENDANCE_REPORT_DELAY_MINUTES = int(os.getenv('ATTENDANCE_REPORT_DELAY_MINUTES', '60'))
+# Bundan eski uchrashuvlar hisoboti olinmaydi
+ATTENDANCE_LOOKBACK_DAYS = int(os.getenv('ATTENDANCE_LOOKBACK_DAYS', '30'))
+ATTENDANCE_BATCH_SIZE = int(os.getenv('ATTENDANCE_BATCH_SIZE', '50'))
+
+# Avtomatik tasdiqlash (booking.auto_approval): navbatni bir o'tishda tekshiriladigan so'rovlar
+AUTO_APPROVAL_BATCH_SIZE = int(os.getenv('AUTO_APPROVAL_BATCH_SIZE', '500'))
+
+# Delta-sinxronlash (/booking/api/changes/, booking.changes)
+CHANGES_PAGE_SIZE = int(os.getenv('CHANGES_PAGE_SIZE', '200'))
+CHANGES_MAX_PAGE_SIZE = int(os.getenv('CHANGES_MAX_PAGE_SIZE', '1000'))
+# Oxirgi shuncha soniyadagi o'zgarishlar keyingi so'rovda qaytariladi (ochiq tranzaksiyalar uchun)
+CHANGES_SETTLE_SECONDS = int(os.getenv('CHANGES_SETTLE_SECONDS', '5'))
+# O'chirish izlari shuncha kun saqlanadi; bundan eski kursor to'liq qayta sinxronlashni talab qiladi
+TOMBSTONE_RETENTION_DAYS = int(os.getenv('TOMBSTONE_RETENTION_DAYS', '30'))
 
 # Celery Configuration
 CELERY_BROKER_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
@@ -148,6 +208,151 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+CELERY_BEAT_SCHEDULE = {
+    'refresh-bot-admin-overview': {
+        'task': 'telegram_bot.tasks.refresh_admin_overview',
+        'schedule': 60.0,
+    },
+    'refill-zoom-warm-pool': {
+        'task': 'booking.tasks.refill_zoom_warm_pool',
+        'schedule': 600.0,
+    },
+    'ingest-meeting-attendance': {
+        'task': 'booking.tasks.ingest_meeting_attendance',
+        'schedule': 900.0,
+    },
+    'auto-approve-backlog': {
+        'task': 'booking.tasks.auto_approve_backlog',
+        'schedule': 300.0,
+    },
+    'prune-tombstones': {
+        'task': 'booking.tasks.prune_tombstones',
+        'schedule': 86400.0,
+    },
+}
+
+# Cache Configuration
+CACHE_URL = os.getenv('CACHE_URL')
+if CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Site URL (bot xabarlaridagi havolalar uchun)
+SITE_URL = os.getenv('SITE_URL', 'http://localhost:8000')
+
+# Calendar (.ics) feed Configuration
+CALENDAR_FEED_PAST_DAYS = int(os.getenv('CALENDAR_FEED_PAST_DAYS', '30'))
+CALENDAR_FEED_FUTURE_DAYS = int(os.getenv('CALENDAR_FEED_FUTURE_DAYS', '180'))
+CALENDAR_FEED_CACHE_TIMEOUT = int(os.getenv('CALENDAR_FEED_CACHE_TIMEOUT', '3600'))
+CALENDAR_FEED_CHUNK_SIZE = int(os.getenv('CALENDAR_FEED_CHUNK_SIZE', '500'))
+
+# Recurring meetings
+RECURRENCE_MAX_COUNT = int(os.getenv('RECURRENCE_MAX_COUNT', '520'))
+# Admin takror tahrirlash sahifasida ko'rsatiladigan keyingi takrorlar soni
+RECURRENCE_ADMIN_OCCURRENCES = int(os.getenv('RECURRENCE_ADMIN_OCCURRENCES', '30'))
+MAX_MEETING_DURATION = int(os.getenv('MAX_MEETING_DURATION', '480'))
+
+# ASGI da oqimli javoblar shu hajmdagi partiyalar bilan yuboriladi (zoomga.streaming)
+STREAMING_BATCH_BYTES = int(os.getenv('STREAMING_BATCH_BYTES', str(64 * 1024)))
+
+# Export Configuration
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', '2000'))
+EXPORT_ROOT = MEDIA_ROOT / 'exports'
+# Fon eksporti egasi (holat va yuklab olish faqat unga) shuncha soniya eslab qolinadi
+EXPORT_OWNER_TIMEOUT = int(os.getenv('EXPORT_OWNER_TIMEOUT', str(24 * 3600)))
+
+# Archival of old meetings and processed requests
+ARCHIVE_AFTER_DAYS = int(os.getenv('ARCHIVE_AFTER_DAYS', '180'))
+ARCHIVE_BATCH_SIZE = int(os.getenv('ARCHIVE_BATCH_SIZE', '500'))
+ARCHIVE_BATCH_PAUSE = float(os.getenv('ARCHIVE_BATCH_PAUSE', '0.5'))
+
+# Bulk import (CSV/XLSX)
+BULK_IMPORT_MAX_ROWS = int(os.getenv('BULK_IMPORT_MAX_ROWS', '1000'))
+BULK_IMPORT_MAX_BYTES = int(os.getenv('BULK_IMPORT_MAX_BYTES', str(5 * 1024 * 1024)))
+
+# Search Configuration
+SEARCH_RESULTS_LIMIT = int(os.getenv('SEARCH_RESULTS_LIMIT', '20'))
+SEARCH_ADMIN_LIMIT = int(os.getenv('SEARCH_ADMIN_LIMIT', '1000'))
+
+# Admin (booking.admin_tools): shundan katta natijalar uchun PostgreSQL taxminiy soni ishlatiladi
+ADMIN_EXACT_COUNT_LIMIT = int(os.getenv('ADMIN_EXACT_COUNT_LIMIT', '10000'))
+ADMIN_COUNT_CACHE_TIMEOUT = int(os.getenv('ADMIN_COUNT_CACHE_TIMEOUT', '60'))
+ADMIN_DATE_HIERARCHY_CACHE_TIMEOUT = int(os.getenv('ADMIN_DATE_HIERARCHY_CACHE_TIMEOUT', '300'))
+
+# Analytics Configuration
+ANALYTICS_CACHE_TIMEOUT = int(os.getenv('ANALYTICS_CACHE_TIMEOUT', '300'))
+ANALYTICS_HISTORY_CACHE_TIMEOUT = int(os.getenv('ANALYTICS_HISTORY_CACHE_TIMEOUT', '3600'))
+ANALYTICS_MAX_DAYS = int(os.getenv('ANALYTICS_MAX_DAYS', '731'))
+
+# Bot admin panels
+BOT_ADMIN_PAGE_SIZE = int(os.getenv('BOT_ADMIN_PAGE_SIZE', '10'))
+BOT_ADMIN_OVERVIEW_TIMEOUT = int(os.getenv('BOT_ADMIN_OVERVIEW_TIMEOUT', '300'))
+BOT_REQUESTS_PAGE_CACHE_TIMEOUT = int(os.getenv('BOT_REQUESTS_PAGE_CACHE_TIMEOUT', '60'))
+
+# Bot jadvali (/my_meetings): oraliq chegarasi va tayyor xabarlar keshi
+BOT_SCHEDULE_MAX_DAYS = int(os.getenv('BOT_SCHEDULE_MAX_DAYS', '31'))
+BOT_SCHEDULE_CACHE_TIMEOUT = int(os.getenv('BOT_SCHEDULE_CACHE_TIMEOUT', '3600'))
+
+# Telegram inline mode
+INLINE_QUERY_PAGE_SIZE = int(os.getenv('INLINE_QUERY_PAGE_SIZE', '20'))
+INLINE_QUERY_CACHE_TIMEOUT = int(os.getenv('INLINE_QUERY_CACHE_TIMEOUT', '30'))
+INLINE_SCOPE_CACHE_TIMEOUT = int(os.getenv('INLINE_SCOPE_CACHE_TIMEOUT', '300'))
+
+# Bot flood control (token bucket): BOT_RATE_LIMIT_BACKEND = memory | redis | off
+BOT_RATE_LIMIT_BACKEND = os.getenv('BOT_RATE_LIMIT_BACKEND', 'memory')
+BOT_RATE_LIMIT_REDIS_URL = os.getenv('BOT_RATE_LIMIT_REDIS_URL', os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+BOT_USER_RATE = float(os.getenv('BOT_USER_RATE', '1'))
+BOT_USER_BURST = int(os.getenv('BOT_USER_BURST', '5'))
+BOT_CHAT_RATE = float(os.getenv('BOT_CHAT_RATE', '3'))
+BOT_CHAT_BURST = int(os.getenv('BOT_CHAT_BURST', '20'))
+# Inline so'rovlar har bir harf uchun keladi, ular uchun alohida chelak
+BOT_INLINE_RATE = float(os.getenv('BOT_INLINE_RATE', '3'))
+BOT_INLINE_BURST = int(os.getenv('BOT_INLINE_BURST', '20'))
+BOT_RATE_LIMIT_LOG_INTERVAL = int(os.getenv('BOT_RATE_LIMIT_LOG_INTERVAL', '60'))
+
+# Transactional outbox: OUTBOX_PUBLISHER = celery | redis
+OUTBOX_PUBLISHER = os.getenv('OUTBOX_PUBLISHER', 'celery')
+OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', '500'))
+OUTBOX_POLL_INTERVAL = float(os.getenv('OUTBOX_POLL_INTERVAL', '1'))
+OUTBOX_RETENTION_HOURS = int(os.getenv('OUTBOX_RETENTION_HOURS', '24'))
+# Shuncha marta yuborib bo'lmagan hodisa navbatdan chiqariladi (dead-letter, adminda ko'rinadi)
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', '10'))
+OUTBOX_REDIS_URL = os.getenv('OUTBOX_REDIS_URL', os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+OUTBOX_REDIS_STREAM = os.getenv('OUTBOX_REDIS_STREAM', 'zoomga:outbox')
+OUTBOX_REDIS_STREAM_MAXLEN = int(os.getenv('OUTBOX_REDIS_STREAM_MAXLEN', '100000'))
+
+# Performance metrics (Prometheus)
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'False').lower() == 'true'
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+METRICS_BOT_PORT = int(os.getenv('METRICS_BOT_PORT', '9100'))
+METRICS_BOT_ADDR = os.getenv('METRICS_BOT_ADDR', '127.0.0.1')
+
+# Profiling va sekin SQL so'rovlari jurnali
+PROFILE_ROOT = Path(os.getenv('PROFILE_ROOT', BASE_DIR / 'profiles'))
+PROFILE_SAMPLE_INTERVAL_MS = int(os.getenv('PROFILE_SAMPLE_INTERVAL_MS', '5'))
+PROFILE_BOT_USERS = {int(user_id) for user_id in os.getenv('PROFILE_BOT_USERS', '').split(',') if user_id.strip()}
+SLOW_QUERY_THRESHOLD_MS = int(os.getenv('SLOW_QUERY_THRESHOLD_MS', '200'))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'zoomga.slow_queries': {'handlers': ['console'], 'level': 'WARNING', 'propagate': False},
+    },
+}
 
 # Crispy Forms Configuration
 CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
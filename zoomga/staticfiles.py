@@ -0,0 +1,192 @@
+"""
+Statik fayllar: barmoq izi (hash), oldindan siqish va ilovadan berish.
+
+collectstatic:
+  CompressedManifestStaticFilesStorage fayl nomlariga kontent hashini
+  qo'shadi (app.3f2a9c.css) va matnli fayllarning .gz hamda .br (Brotli
+  paketi o'rnatilgan bo'lsa) nusxalarini yozadi.
+
+Berish:
+  StaticFilesMiddleware STATIC_ROOT ni ishga tushishda bir marta
+  indekslaydi va so'rovlarga Accept-Encoding bo'yicha tayyor siqilgan
+  nusxani FileResponse (gunicorn da sendfile) bilan qaytaradi. Hashli
+  fayllar o'zgarmas, shuning uchun bir yillik "immutable" kesh.
+"""
+import gzip
+import logging
+import mimetypes
+import os
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.mjs', '.map', '.json', '.svg', '.txt', '.xml', '.html', '.ico', '.ttf', '.otf', '.eot'}
+MIN_COMPRESS_SIZE = 256
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# (Accept-Encoding dagi nom, fayl kengaytmasi) - afzallik tartibida
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def _compress_brotli(data):
+    import brotli
+
+    return brotli.compress(data, quality=11)
+
+
+def _compress_gzip(data):
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Manifest (hashli nomlar) + har bir matnli fayl uchun .gz/.br"""
+
+    # Manifest yo'q bo'lsa (testlar, collectstatic dan oldin) hashsiz nomga qaytish
+    manifest_strict = False
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed_names = set()
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed_names.add(hashed_name)
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+
+        compressors = [('.gz', _compress_gzip)]
+        try:
+            import brotli  # noqa: F401
+            compressors.append(('.br', _compress_brotli))
+        except ImportError:
+            logger.warning("brotli paketi o'rnatilmagan, faqat gzip nusxalar yoziladi")
+
+        for name in sorted(hashed_names | set(paths)):
+            if Path(name).suffix.lower() not in COMPRESSIBLE_EXTENSIONS or not self.exists(name):
+                continue
+            with self.open(name) as handle:
+                data = handle.read()
+            if len(data) < MIN_COMPRESS_SIZE:
+                continue
+            for suffix, compress in compressors:
+                compressed = compress(data)
+                # Foyda bo'lmasa siqilgan nusxa kerak emas
+                if len(compressed) < len(data) * 0.95:
+                    with open(self.path(name + suffix), 'wb') as handle:
+                        handle.write(compressed)
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # collectstatic hali bajarilmagan (testlar, mahalliy ishga tushirish)
+            return name
+
+
+class StaticFile:
+    __slots__ = ('path', 'size', 'mtime', 'content_type', 'variants', 'immutable')
+
+    def __init__(self, path, immutable):
+        stat = os.stat(path)
+        self.path = path
+        self.size = stat.st_size
+        self.mtime = stat.st_mtime
+        self.content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        self.immutable = immutable
+        self.variants = {
+            encoding: path + suffix
+            for encoding, suffix in ENCODINGS
+            if os.path.exists(path + suffix)
+        }
+
+
+def build_index(root, hashed_names):
+    """URL yo'li -> StaticFile (siqilgan nusxalar alohida kalit emas)"""
+    index = {}
+    compressed_suffixes = tuple(suffix for _, suffix in ENCODINGS)
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            if filename.endswith(compressed_suffixes):
+                continue
+            path = os.path.join(directory, filename)
+            name = os.path.relpath(path, root).replace(os.sep, '/')
+            index[name] = StaticFile(path, immutable=name in hashed_names)
+    return index
+
+
+def _accepted_encodings(request):
+    header = request.headers.get('Accept-Encoding', '')
+    accepted = set()
+    for part in header.split(','):
+        encoding, _, params = part.strip().partition(';')
+        if params.replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        accepted.add(encoding.strip().lower())
+    return accepted
+
+
+class StaticFilesMiddleware:
+    """STATIC_ROOT dagi (collectstatic qilingan) fayllarni berish"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        root = settings.STATIC_ROOT
+        if not root or not os.path.isdir(root):
+            # DEBUG da runserver statik fayllarni o'zi beradi
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.prefix = '/' + settings.STATIC_URL.lstrip('/')
+        storage = CompressedManifestStaticFilesStorage()
+        hashed_names = set(storage.hashed_files.values())
+        self.index = build_index(str(root), hashed_names)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        static_file = self.lookup(request)
+        if static_file is not None:
+            return self.serve(request, static_file)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        static_file = self.lookup(request)
+        if static_file is not None:
+            return self.serve(request, static_file)
+        return await self.get_response(request)
+
+    def lookup(self, request):
+        if request.path.startswith(self.prefix) and request.method in ('GET', 'HEAD'):
+            return self.index.get(request.path[len(self.prefix):])
+        return None
+
+    def serve(self, request, static_file):
+        if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), static_file.mtime):
+            response = HttpResponseNotModified()
+        else:
+            path, encoding = static_file.path, None
+            accepted = _accepted_encodings(request)
+            for name, _ in ENCODINGS:
+                if name in static_file.variants and name in accepted:
+                    path, encoding = static_file.variants[name], name
+                    break
+            response = FileResponse(open(path, 'rb'), content_type=static_file.content_type)
+            if encoding:
+                response['Content-Encoding'] = encoding
+            response['Last-Modified'] = http_date(static_file.mtime)
+            response.headers.pop('Content-Disposition', None)
+        if static_file.variants:
+            response['Vary'] = 'Accept-Encoding'
+        response['Cache-Control'] = (
+            IMMUTABLE_CACHE_CONTROL if static_file.immutable else f'public, max-age={settings.STATIC_MAX_AGE}'
+        )
+        return response
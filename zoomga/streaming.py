@@ -0,0 +1,56 @@
+"""
+Oqimli javoblar (eksport, .ics) WSGI va ASGI da.
+
+Django 4.2 ASGI da sync iteratorli StreamingHttpResponse tanasini
+sync_to_async(list) bilan to'liq xotiraga yig'adi. Shuning uchun ASGI
+so'rovlarida sync generator async iteratorga o'raladi: bo'laklar thread da
+STREAMING_BATCH_BYTES gacha yig'ilib, har bir sync_to_async o'tishida bitta
+partiya yuboriladi. Xotira partiya hajmi bilan cheklanadi, o'tishlar soni esa
+qatorlar emas, partiyalar soniga teng.
+
+thread_sensitive o'tishlar bitta thread da bajariladi, shuning uchun
+generatorning server kursori (queryset.iterator) bitta ulanishda qoladi.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+
+
+def _encode(chunk):
+    return chunk.encode('utf-8') if isinstance(chunk, str) else bytes(chunk)
+
+
+async def aiter_batches(chunks, batch_bytes=None):
+    """Sync bo'laklar -> async partiyalar (har biri kamida batch_bytes, oxirgisidan tashqari)"""
+    batch_bytes = batch_bytes or settings.STREAMING_BATCH_BYTES
+    iterator = iter(chunks)
+
+    def next_batch():
+        batch, size = [], 0
+        for chunk in iterator:
+            data = _encode(chunk)
+            batch.append(data)
+            size += len(data)
+            if size >= batch_bytes:
+                return b''.join(batch), False
+        return b''.join(batch), True
+
+    try:
+        done = False
+        while not done:
+            data, done = await sync_to_async(next_batch)()
+            if data:
+                yield data
+    finally:
+        # Mijoz uzilsa generator (va uning kursori) ham yopilsin
+        close = getattr(iterator, 'close', None)
+        if close is not None:
+            await sync_to_async(close)()
+
+
+def streaming_response(request, chunks, **kwargs):
+    """Server turiga mos StreamingHttpResponse (ASGI da async partiyalar)"""
+    if isinstance(request, ASGIRequest):
+        chunks = aiter_batches(chunks)
+    return StreamingHttpResponse(chunks, **kwargs)
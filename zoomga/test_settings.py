@@ -0,0 +1,14 @@
+"""
+Test sozlamalari (manage.py test shu modulni tanlaydi; pytest-django uchun
+DJANGO_SETTINGS_MODULE=zoomga.test_settings).
+
+Replika asosiy test bazasining ko'zgusi: yo'naltirish testlari ikkala
+aliasni ham ishlatadi, ma'lumotlar esa bitta bazada.
+"""
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES, DATABASE_REPLICA
+
+DATABASES[DATABASE_REPLICA] = {
+    **DATABASES['default'],
+    'TEST': {'MIRROR': 'default'},
+}
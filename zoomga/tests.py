@@ -0,0 +1,450 @@
+import gzip
+import json
+import tempfile
+import tracemalloc
+from inspect import iscoroutine
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.management import call_command
+from django.db import connections, transaction
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.test import AsyncRequestFactory, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import path, reverse
+from prometheus_client import REGISTRY
+
+from telegram_bot.models import Department
+from . import metrics, profiling, staticfiles
+from .db_router import STICKY_COOKIE, ReplicaRouter, primary_reads, read_replica, replica_reads
+from .metrics import sync_to_async
+from .staticfiles import IMMUTABLE_CACHE_CONTROL, StaticFilesMiddleware
+from .streaming import streaming_response
+
+
+def department_count(request):
+    if request.method == 'POST':
+        Department.objects.create(name=request.POST['name'])
+    return JsonResponse({'count': Department.objects.count()})
+
+
+@replica_reads
+def replica_view(request):
+    return department_count(request)
+
+
+@primary_reads
+def primary_view(request):
+    return department_count(request)
+
+
+@replica_reads
+async def async_replica_view(request):
+    return JsonResponse({'count': await sync_to_async(Department.objects.count)()})
+
+
+@replica_reads
+def streaming_replica_view(request):
+    # Tana view qaytgandan keyin o'qiladi
+    return StreamingHttpResponse(str(Department.objects.count()) for _ in range(2))
+
+
+@replica_reads
+async def async_streaming_replica_view(request):
+    async def counts():
+        for _ in range(2):
+            yield str(await sync_to_async(Department.objects.count)())
+
+    return StreamingHttpResponse(counts())
+
+
+urlpatterns = [
+    path('replica/', replica_view, name='replica'),
+    path('primary/', primary_view, name='primary'),
+    path('plain/', department_count, name='plain'),
+    path('async/', async_replica_view, name='async'),
+    path('stream/', streaming_replica_view, name='stream'),
+    path('astream/', async_streaming_replica_view, name='astream'),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__, REPLICA_STICKY_SECONDS=10, REPLICA_FORCE_PRIMARY_VIEWS=[])
+class ReplicaRoutingTests(TransactionTestCase):
+    """Replika test bazasida asosiy bazaning ko'zgusi (TEST MIRROR)"""
+
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        Department.objects.create(name="IT")
+
+    def request(self, method, url, **data):
+        """Javob va (asosiy, replika) bazalardagi SELECT lar soni"""
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica']) as replica:
+            response = getattr(self.client, method)(url, data)
+        return response, self.selects(primary), self.selects(replica)
+
+    def selects(self, queries):
+        return sum(query['sql'].startswith('SELECT') for query in queries.captured_queries)
+
+    def test_replica_view_get_reads_from_replica(self):
+        response, primary, replica = self.request('get', '/replica/')
+        self.assertEqual(response.json(), {'count': 1})
+        self.assertEqual((primary, replica), (0, 1))
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
+
+    def test_primary_and_undecorated_views_read_from_primary(self):
+        for url in ('/primary/', '/plain/'):
+            response, primary, replica = self.request('get', url)
+            self.assertEqual((primary, replica), (1, 0), url)
+
+    def test_post_reads_and_writes_on_primary_and_sets_sticky_cookie(self):
+        response, primary, replica = self.request('post', '/replica/', name="Moliya")
+        self.assertEqual(response.json(), {'count': 2})
+        self.assertEqual(replica, 0)
+        self.assertIn(STICKY_COOKIE, response.cookies)
+        self.assertEqual(response.cookies[STICKY_COOKIE]['max-age'], 10)
+
+        # Cookie muddati ichida replika view ham asosiy bazadan o'qiydi
+        response, primary, replica = self.request('get', '/replica/')
+        self.assertEqual((primary, replica), (1, 0))
+
+        self.client.cookies[STICKY_COOKIE] = '0'
+        response, primary, replica = self.request('get', '/replica/')
+        self.assertEqual((primary, replica), (0, 1))
+
+    def test_force_primary_setting(self):
+        with self.settings(REPLICA_FORCE_PRIMARY_VIEWS=['replica']):
+            response, primary, replica = self.request('get', '/replica/')
+        self.assertEqual((primary, replica), (1, 0))
+
+    def test_async_view_reads_from_replica(self):
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica']) as replica:
+            response = self.client.get('/async/')
+        self.assertEqual(response.json(), {'count': 1})
+        self.assertEqual((self.selects(primary), self.selects(replica)), (0, 1))
+
+    def test_streaming_body_reads_from_replica(self):
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica']) as replica:
+            response = self.client.get('/stream/')
+            self.assertEqual(b''.join(response.streaming_content), b'11')
+        self.assertEqual((self.selects(primary), self.selects(replica)), (0, 2))
+
+    def test_async_streaming_body_reads_from_replica(self):
+        async def fetch():
+            response = await self.async_client.get('/astream/')
+            return b''.join([chunk async for chunk in response.streaming_content])
+
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica']) as replica:
+            self.assertEqual(async_to_sync(fetch)(), b'11')
+        self.assertEqual((self.selects(primary), self.selects(replica)), (0, 2))
+
+    def test_reads_inside_atomic_stay_on_primary(self):
+        router = ReplicaRouter()
+        self.assertIsNone(router.db_for_read(Department))
+        with read_replica():
+            self.assertEqual(router.db_for_read(Department), 'replica')
+            with transaction.atomic():
+                self.assertIsNone(router.db_for_read(Department))
+                Department.objects.create(name="Moliya")
+                self.assertEqual(Department.objects.count(), 2)
+            self.assertEqual(Department.objects.using(router.db_for_read(Department)).count(), 2)
+        self.assertEqual(router.db_for_write(Department), 'default')
+
+    def test_task_reads_use_replica(self):
+        with CaptureQueriesContext(connections['replica']) as replica:
+            with read_replica():
+                Department.objects.count()
+        self.assertEqual(self.selects(replica), 1)
+
+
+class StaticFilesTests(SimpleTestCase):
+    """collectstatic (hash + siqilgan nusxalar) va StaticFilesMiddleware"""
+
+    CSS = 'body { color: #333; }\n' * 40
+
+    def setUp(self):
+        source = Path(self.enterContext(tempfile.TemporaryDirectory()))
+        self.root = Path(self.enterContext(tempfile.TemporaryDirectory()))
+        (source / 'css').mkdir()
+        (source / 'css' / 'app.css').write_text(self.CSS)
+        (source / 'css' / 'small.css').write_text('a { color: red; }')
+        self.enterContext(override_settings(
+            STATICFILES_DIRS=[source],
+            STATICFILES_FINDERS=['django.contrib.staticfiles.finders.FileSystemFinder'],
+            STATIC_ROOT=self.root,
+            STATIC_MAX_AGE=60,
+        ))
+        # brotli o'rnatilmagan muhitdagi ogohlantirish
+        with patch.object(staticfiles.logger, 'warning'):
+            call_command('collectstatic', interactive=False, verbosity=0)
+        self.hashed = staticfiles_storage.stored_name('css/app.css')
+        self.middleware = StaticFilesMiddleware(lambda request: HttpResponse('view'))
+
+    def get(self, path, **headers):
+        return self.middleware(RequestFactory().get(f'/static/{path}', **headers))
+
+    def test_collectstatic_writes_hashed_and_compressed_files(self):
+        self.assertRegex(self.hashed, r'^css/app\.[0-9a-f]{12}\.css$')
+        self.assertEqual(staticfiles_storage.url('css/app.css'), f'/static/{self.hashed}')
+        self.assertEqual(gzip.decompress((self.root / f'{self.hashed}.gz').read_bytes()).decode(), self.CSS)
+        # Kichik fayllar siqilmaydi
+        self.assertFalse(list(self.root.glob('css/small*.gz')))
+
+    def test_serves_compressed_variant_with_immutable_cache(self):
+        response = self.get(self.hashed, HTTP_ACCEPT_ENCODING='br, gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Cache-Control'], IMMUTABLE_CACHE_CONTROL)
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)).decode(), self.CSS)
+
+        response = self.get(self.hashed, HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual(b''.join(response.streaming_content).decode(), self.CSS)
+
+    def test_unhashed_name_gets_short_cache_and_not_modified(self):
+        response = self.get('css/app.css')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=60')
+        response.close()
+        response = self.get('css/app.css', HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_other_requests_reach_the_view(self):
+        self.assertEqual(self.get('css/missing.css').content, b'view')
+        response = self.middleware(RequestFactory().post(f'/static/{self.hashed}'))
+        self.assertEqual(response.content, b'view')
+
+    def test_disabled_without_collected_root(self):
+        with self.settings(STATIC_ROOT=self.root / 'missing'):
+            with self.assertRaises(MiddlewareNotUsed):
+                StaticFilesMiddleware(lambda request: HttpResponse())
+
+
+@override_settings(STREAMING_BATCH_BYTES=32 * 1024)
+class StreamingResponseTests(SimpleTestCase):
+    """ASGI da oqimli javob tanasi xotiraga yig'ilmasligi"""
+
+    ROW = 'x' * 1023 + '\n'
+
+    def rows(self, count, produced):
+        try:
+            for _ in range(count):
+                produced.append(1)
+                yield self.ROW
+        finally:
+            produced.append('closed')
+
+    def test_wsgi_request_streams_sync_iterator(self):
+        response = streaming_response(RequestFactory().get('/'), iter(['a', 'b']))
+        self.assertFalse(response.is_async)
+        self.assertEqual(b''.join(response), b'ab')
+
+    def test_asgi_request_streams_in_batches(self):
+        produced = []
+        response = streaming_response(AsyncRequestFactory().get('/'), self.rows(100, produced))
+        self.assertTrue(response.is_async)
+
+        async def first_batches():
+            sizes = []
+            async for part in response:
+                sizes.append(len(part))
+                if len(sizes) == 2:
+                    break
+            await response.streaming_content.aclose()
+            return sizes
+
+        self.assertEqual(async_to_sync(first_batches)(), [32 * 1024, 32 * 1024])
+        # Faqat yuborilgan partiyalar o'qilgan, uzilgandan keyin generator yopilgan
+        self.assertEqual(produced, [1] * 64 + ['closed'])
+
+    def test_asgi_memory_stays_flat(self):
+        body_size = 8 * 1024 * 1024
+
+        async def consume():
+            response = streaming_response(AsyncRequestFactory().get('/'), self.rows(body_size // 1024, []))
+            total = 0
+            async for part in response:
+                total += len(part)
+            return total
+
+        tracemalloc.start()
+        try:
+            total = async_to_sync(consume)()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(total, body_size)
+        # Butun tana (8 MB) emas, bir necha partiya
+        self.assertLess(peak, body_size // 8)
+
+
+@override_settings(METRICS_ENABLED=True, METRICS_TOKEN='')
+class MetricsTests(TestCase):
+    """Handler ko'rsatkichlari va /metrics ga kirish"""
+
+    def setUp(self):
+        self.addCleanup(self.uninstall)
+
+    def uninstall(self):
+        connection_created.disconnect(dispatch_uid='zoomga.metrics')
+        for connection in connections.all(initialized_only=True):
+            if metrics._db_wrapper in connection.execute_wrappers:
+                connection.execute_wrappers.remove(metrics._db_wrapper)
+
+    def sample(self, name, handler):
+        return REGISTRY.get_sample_value(name, {'kind': 'view', 'handler': handler}) or 0
+
+    def call(self, middleware, request, handler):
+        before = {
+            name: self.sample(name, handler)
+            for name in ('zoomga_handler_db_queries_sum', 'zoomga_handler_sync_hops_sum', 'zoomga_handler_seconds_count')
+        }
+        response = middleware(request)
+        if iscoroutine(response):
+            pending = response
+
+            async def finish():
+                return await pending
+
+            response = async_to_sync(finish)()
+        return response, {name: self.sample(name, handler) - value for name, value in before.items()}
+
+    def test_sync_view_counts_queries(self):
+        def view(request):
+            request.resolver_match = SimpleNamespace(view_name='tests:sync_view')
+            Department.objects.count()
+            Department.objects.exists()
+            return HttpResponse()
+
+        _, delta = self.call(metrics.MetricsMiddleware(view), RequestFactory().get('/'), 'tests:sync_view')
+        self.assertEqual(delta, {
+            'zoomga_handler_db_queries_sum': 2,
+            'zoomga_handler_sync_hops_sum': 0,
+            'zoomga_handler_seconds_count': 1,
+        })
+
+    def test_async_view_counts_sync_hops_and_queries(self):
+        async def view(request):
+            request.resolver_match = SimpleNamespace(view_name='tests:async_view')
+            await sync_to_async(Department.objects.count)()
+            await sync_to_async(lambda: None)()
+            return HttpResponse()
+
+        _, delta = self.call(metrics.MetricsMiddleware(view), AsyncRequestFactory().get('/'), 'tests:async_view')
+        self.assertEqual(delta['zoomga_handler_sync_hops_sum'], 2)
+        self.assertEqual(delta['zoomga_handler_db_queries_sum'], 1)
+
+    def test_unresolved_requests_and_errors(self):
+        def view(request):
+            raise ValueError
+
+        before = REGISTRY.get_sample_value('zoomga_handler_errors_total', {'kind': 'view', 'handler': 'unresolved'}) or 0
+        with self.assertRaises(ValueError):
+            metrics.MetricsMiddleware(view)(RequestFactory().get('/'))
+        self.assertEqual(
+            REGISTRY.get_sample_value('zoomga_handler_errors_total', {'kind': 'view', 'handler': 'unresolved'}),
+            before + 1,
+        )
+
+    def test_metrics_require_staff_without_token(self):
+        url = reverse('metrics')
+        self.assertEqual(self.client.get(url).status_code, 401)
+        self.client.force_login(User.objects.create_user('ali'))
+        self.assertEqual(self.client.get(url).status_code, 401)
+        self.client.force_login(User.objects.create_user('admin', is_staff=True))
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'zoomga_handler_seconds', response.content)
+
+    def test_metrics_token(self):
+        url = reverse('metrics')
+        with self.settings(METRICS_TOKEN='secret'):
+            self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION='Bearer wrong').status_code, 401)
+            self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION='Bearer secret').status_code, 200)
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_disabled(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 404)
+        with self.assertRaises(MiddlewareNotUsed):
+            metrics.MetricsMiddleware(lambda request: HttpResponse())
+
+
+class ProfilingTests(TestCase):
+    """So'rov bo'yicha profil va sekin SQL so'rovlari jurnali"""
+
+    def setUp(self):
+        self.root = Path(self.enterContext(tempfile.TemporaryDirectory()))
+        self.enterContext(override_settings(PROFILE_ROOT=self.root, PROFILE_SAMPLE_INTERVAL_MS=1))
+        self.staff = User.objects.create_user('staff', is_staff=True)
+        self.user = User.objects.create_user('user')
+
+    def profiles(self):
+        return sorted(path.name for path in self.root.iterdir())
+
+    def test_staff_request_is_profiled(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('booking:dashboard'), {'_profile': '1'})
+        self.assertEqual(response.status_code, 200)
+        name = response['X-Profile-Id']
+        self.assertTrue(name.endswith('_booking_dashboard'))
+        self.assertEqual(self.profiles(), [f'{name}.folded', f'{name}.sql.json'])
+
+        report = json.loads((self.root / f'{name}.sql.json').read_text())
+        self.assertEqual(report['label'], 'booking_dashboard')
+        self.assertEqual(report['query_count'], len(report['queries']))
+        self.assertGreater(report['query_count'], 0)
+        # SQL manbasi loyiha kodida ko'rsatiladi
+        self.assertTrue(any(
+            query['origin'] and query['origin'][0].startswith('booking/views.py:') for query in report['queries']
+        ))
+
+    def test_header_flag_on_async_view(self):
+        self.async_client.force_login(self.staff)
+
+        async def fetch():
+            return await self.async_client.get(reverse('booking:api_meeting_stats'), headers={'X-Profile': '1'})
+
+        response = async_to_sync(fetch)()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['X-Profile-Id'].endswith('_booking_api_meeting_stats'))
+        self.assertEqual(len(self.profiles()), 2)
+
+    def test_not_profiled_without_flag_or_staff(self):
+        self.client.force_login(self.staff)
+        self.assertNotIn('X-Profile-Id', self.client.get(reverse('booking:dashboard')))
+        self.client.force_login(self.user)
+        self.assertNotIn('X-Profile-Id', self.client.get(reverse('booking:dashboard'), {'_profile': '1'}))
+        self.assertEqual(self.profiles(), [])
+
+    def slow_clock(self, seconds):
+        clock = Mock(side_effect=[100.0, 100.0 + seconds])
+        return patch.object(profiling, 'time', SimpleNamespace(perf_counter=clock))
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=200)
+    def test_slow_query_is_logged_with_origin(self):
+        with self.slow_clock(0.5), self.assertLogs('zoomga.slow_queries', 'WARNING') as logs:
+            User.objects.count()
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("Sekin so'rov (500.0 ms, default) zoomga/tests.py:", logs.output[0])
+        self.assertIn('SELECT COUNT(*)', logs.output[0])
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=200)
+    def test_fast_query_is_not_logged(self):
+        with self.slow_clock(0.1), self.assertNoLogs('zoomga.slow_queries'):
+            User.objects.count()
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+    def test_threshold_zero_disables_log(self):
+        with patch.object(profiling, 'time') as clock, self.assertNoLogs('zoomga.slow_queries'):
+            User.objects.count()
+        clock.perf_counter.assert_not_called()
@@ -18,14 +18,18 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from django.contrib.staticfiles.urls import staticfiles_urlpatterns
 from django.shortcuts import redirect
+from zoomga.metrics import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', lambda request: redirect('booking:dashboard')),
     path('booking/', include('booking.urls')),
+    path('metrics', metrics_view, name='metrics'),
 ]
 
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
-    urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
+    # collectstatic qilinmagan bo'lsa (StaticFilesMiddleware o'chiq) manba kataloglardan
+    urlpatterns += staticfiles_urlpatterns()